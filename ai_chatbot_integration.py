@@ -8,8 +8,8 @@ natural language form generation requests and process them automatically.
 """
 
 import os
+import sys
 import json
-import re
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 
@@ -21,6 +21,10 @@ import logging
 from form_api_backend import FormBackendService
 from coordinate_based_form_filler import CoordinateBasedFormFiller
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+from entity_resolution import ensure_resolution_index
+from entity_extraction import FORM_INTENT_PATTERNS, extract_form_request
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -48,116 +52,20 @@ class AIFormAssistant:
         # Define supported intents and patterns
         self.intent_patterns = self._load_intent_patterns()
         
+        # In-memory client/property index used to resolve names to CRM IDs
+        self.entity_index = ensure_resolution_index()
+        
         logger.info("✅ AI Form Assistant initialized with Gemini 2.5 Flash")
     
     def _load_intent_patterns(self) -> Dict[str, List[str]]:
         """Load natural language intent patterns for form generation"""
-        return {
-            'form_generation': [
-                r'generate.*(?:purchase agreement|contract)',
-                r'create.*(?:form|document|agreement)',
-                r'make.*(?:purchase agreement|offer)',
-                r'prepare.*(?:contract|paperwork)',
-                r'fill out.*(?:form|agreement)',
-                r'populate.*(?:document|form)'
-            ],
-            'form_validation': [
-                r'check.*(?:form|document|contract)',
-                r'validate.*(?:information|data|form)',
-                r'review.*(?:document|contract)',
-                r'verify.*(?:form|agreement)'
-            ],
-            'form_inquiry': [
-                r'what.*(?:forms|documents).*(?:need|required)',
-                r'which.*(?:form|document).*(?:use|choose)',
-                r'show.*(?:available|supported).*forms',
-                r'list.*forms'
-            ],
-            'client_property_extraction': [
-                r'for\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',  # Names
-                r'(?:client|buyer|seller)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-                r'(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln))',  # Addresses
-                r'property.*?(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln))'
-            ]
-        }
+        return FORM_INTENT_PATTERNS
     
     def extract_intent_and_entities(self, user_message: str) -> Dict[str, Any]:
         """Extract intent and entities from user message"""
-        
-        message_lower = user_message.lower()
-        
-        # Detect primary intent
-        intent = 'unknown'
-        confidence = 0.0
-        
-        for intent_type, patterns in self.intent_patterns.items():
-            if intent_type == 'client_property_extraction':
-                continue  # Skip entity patterns in intent detection
-                
-            for pattern in patterns:
-                if re.search(pattern, message_lower):
-                    intent = intent_type
-                    confidence = 0.9
-                    break
-        
-        # Extract entities (names, addresses, form types)
-        entities = {
-            'client_names': [],
-            'property_addresses': [],
-            'form_types': [],
-            'amounts': [],
-            'dates': []
-        }
-        
-        # Extract client names
-        name_patterns = [
-            r'(?:for|client|buyer|seller)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'([A-Z][a-z]+\s+[A-Z][a-z]+)(?:\s+and|\s+at|\s+on)'
-        ]
-        
-        for pattern in name_patterns:
-            matches = re.finditer(pattern, user_message)
-            for match in matches:
-                name = match.group(1).strip()
-                if len(name.split()) >= 2:  # At least first and last name
-                    entities['client_names'].append(name)
-        
-        # Extract property addresses
-        address_patterns = [
-            r'(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln))',
-            r'(?:property|address|located).*?(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr))'
-        ]
-        
-        for pattern in address_patterns:
-            matches = re.finditer(pattern, user_message, re.IGNORECASE)
-            for match in matches:
-                address = match.group(1).strip()
-                entities['property_addresses'].append(address)
-        
-        # Extract form types
-        form_keywords = {
-            'purchase agreement': 'california_purchase_agreement',
-            'buyer representation': 'buyer_representation_agreement',
-            'transaction record': 'transaction_record',
-            'property condition': 'verification_property_condition',
-            'advisory': 'statewide_buyer_seller_advisory'
-        }
-        
-        for keyword, form_id in form_keywords.items():
-            if keyword in message_lower:
-                entities['form_types'].append(form_id)
-        
-        # Extract monetary amounts
-        amount_pattern = r'\$?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-        amounts = re.findall(amount_pattern, user_message)
-        entities['amounts'] = [amount.replace(',', '') for amount in amounts]
-        
-        return {
-            'intent': intent,
-            'confidence': confidence,
-            'entities': entities,
-            'original_message': user_message
-        }
+        # Intent, name, address and amount patterns are precompiled once in
+        # entity_extraction rather than re-resolved on every message
+        return extract_form_request(user_message)
     
     def generate_ai_response(self, user_message: str, context: Dict[str, Any]) -> str:
         """Generate AI response using LangChain and Gemini"""
@@ -220,22 +128,24 @@ Please respond appropriately based on the user's request and extracted informati
         # Default to purchase agreement if no specific form mentioned
         form_type = entities['form_types'][0] if entities['form_types'] else 'california_purchase_agreement'
         
-        # Try to match client names to CRM data (mock for now)
+        # Match client names and addresses against the CRM resolution index
         client_id = self._resolve_client_id(entities['client_names'])
         property_id = self._resolve_property_id(entities['property_addresses'])
         
         if not client_id:
+            candidates = self._client_suggestions(entities['client_names'])
             return {
                 'success': False,
                 'error': 'Unable to identify client in CRM database',
-                'suggestions': f"Available clients: John Smith, Jane Doe, Robert Johnson"
+                'suggestions': f"Closest clients: {candidates}" if candidates else 'No similar clients found'
             }
         
         if not property_id:
+            candidates = self._property_suggestions(entities['property_addresses'])
             return {
                 'success': False, 
                 'error': 'Unable to identify property in CRM database',
-                'suggestions': f"Available properties: 456 Oak Avenue, 789 Pine Street, 321 Elm Drive"
+                'suggestions': f"Closest properties: {candidates}" if candidates else 'No similar properties found'
             }
         
         # Generate the form
@@ -264,41 +174,40 @@ Please respond appropriately based on the user's request and extracted informati
                 'error': f'Form generation failed: {str(e)}'
             }
     
-    def _resolve_client_id(self, client_names: List[str]) -> Optional[str]:
-        """Resolve client names to CRM client IDs (mock implementation)"""
-        # Mock client database
-        mock_clients = {
-            'john smith': 'client_001',
-            'jane doe': 'client_002', 
-            'robert johnson': 'client_003',
-            'mary wilson': 'client_004'
-        }
-        
+    def _resolve_client_id(self, client_names: List[str]) -> Optional[int]:
+        """Resolve client names to CRM client IDs using the resolution index"""
+        # Names that only sound like a client fall through to the suggestions for confirmation
         for name in client_names:
-            name_key = name.lower()
-            if name_key in mock_clients:
-                return mock_clients[name_key]
+            client_id = self.entity_index.resolve_client_id(name)
+            if client_id is not None:
+                return client_id
         
         return None
     
-    def _resolve_property_id(self, addresses: List[str]) -> Optional[str]:
-        """Resolve addresses to CRM property IDs (mock implementation)"""
-        # Mock property database
-        mock_properties = {
-            '456 oak avenue': 'property_001',
-            '789 pine street': 'property_002',
-            '321 elm drive': 'property_003',
-            '123 main street': 'property_004'
-        }
-        
+    def _resolve_property_id(self, addresses: List[str]) -> Optional[int]:
+        """Resolve addresses to CRM property IDs using the resolution index"""
+        # Weak or ambiguous addresses ("123 Main" with a St and a Ct) are left for confirmation
         for address in addresses:
-            address_key = address.lower()
-            for mock_addr, prop_id in mock_properties.items():
-                if mock_addr in address_key or address_key in mock_addr:
-                    return prop_id
+            property_id = self.entity_index.resolve_property_id(address)
+            if property_id is not None:
+                return property_id
         
         return None
     
+    def _client_suggestions(self, client_names: List[str]) -> str:
+        """Names of the closest indexed clients, for clarification prompts"""
+        names = []
+        for name in client_names:
+            names.extend(match['name'] for match in self.entity_index.resolve_client(name, limit=3))
+        return ', '.join(dict.fromkeys(names))
+    
+    def _property_suggestions(self, addresses: List[str]) -> str:
+        """Addresses of the closest indexed properties, for clarification prompts"""
+        found = []
+        for address in addresses:
+            found.extend(match['address'] for match in self.entity_index.resolve_property(address, limit=3))
+        return ', '.join(dict.fromkeys(found))
+    
     def process_natural_language_request(self, user_message: str) -> Dict[str, Any]:
         """Main method to process natural language form requests"""
         
@@ -6,7 +6,11 @@ Uses ReportLab to overlay text at precise coordinates
 """
 
 import os
+import copy
 import json
+import hashlib
+import threading
+import time
 from pathlib import Path
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -15,8 +19,22 @@ from reportlab.lib.colors import black
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import PyPDF2
+from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject
 from io import BytesIO
 
+# API form ids (form_api_backend, crm_field_mapping_config.json) -> coordinate mapping names
+FORM_ALIASES = {
+    "california_purchase_agreement": "California_Residential_Purchase_Agreement",
+    "buyer_representation_agreement": "Buyer_Representation_Agreement",
+    "transaction_record": "Transaction_Record",
+}
+
+# Parsed templates kept per filler (a handful of forms in use at a time)
+TEMPLATE_CACHE_SIZE = 8
+
+# Resource name of the overlay drawn on a stamped page
+OVERLAY_XOBJECT = "/CoordinateOverlay"
+
 class CoordinateBasedFormFiller:
     """
     Professional PDF form filler using coordinate-based text placement
@@ -30,6 +48,10 @@ class CoordinateBasedFormFiller:
         
         # Load coordinate mappings for different forms
         self.form_coordinates = self.load_coordinate_mappings()
+        
+        # Parsed templates reused across forms (see template_reader)
+        self._template_readers = {}
+        self._template_lock = threading.RLock()
     
     def load_coordinate_mappings(self):
         """Load predefined coordinate mappings for CAR forms"""
@@ -87,55 +109,216 @@ class CoordinateBasedFormFiller:
             }
         }
     
-    def create_overlay_pdf(self, form_name, field_data, output_path):
-        """
-        Create a PDF overlay with text at specified coordinates
-        """
+    def resolve_form_name(self, form_name):
+        """Coordinate mapping name for a form, accepting the API form ids as well"""
+        form_name = FORM_ALIASES.get(form_name, form_name)
         if form_name not in self.form_coordinates:
             raise ValueError(f"Form '{form_name}' not supported. Available: {list(self.form_coordinates.keys())}")
-        
-        coordinates = self.form_coordinates[form_name]
-        
-        # Create overlay PDF in memory
-        overlay_buffer = BytesIO()
-        overlay_canvas = canvas.Canvas(overlay_buffer, pagesize=letter)
-        
-        # Group fields by page for efficient processing
+        return form_name
+    
+    def group_fields_by_page(self, form_name, field_data):
+        """
+        Text to place on each page: {page_number: [{"text", "x", "y"}, ...]},
+        with only the pages that carry a non-empty mapped field
+        """
+        coordinates = self.form_coordinates[self.resolve_form_name(form_name)]
         pages_data = {}
         for field_name, value in field_data.items():
             if field_name in coordinates and value:
                 coord = coordinates[field_name]
-                page_num = coord["page"]
-                if page_num not in pages_data:
-                    pages_data[page_num] = []
-                pages_data[page_num].append({
+                pages_data.setdefault(coord["page"], []).append({
                     "text": str(value),
                     "x": coord["x"],
                     "y": coord["y"]
                 })
-        
-        # Create pages with text overlays
-        max_page = max(pages_data.keys()) if pages_data else 1
-        for page_num in range(1, max_page + 1):
-            if page_num in pages_data:
-                # Add text fields to this page
+        return pages_data
+    
+    def _draw_overlay(self, pages):
+        """Overlay PDF with one canvas page per entry in pages (None for a blank page)"""
+        overlay_buffer = BytesIO()
+        overlay_canvas = canvas.Canvas(overlay_buffer, pagesize=letter)
+        for fields in pages:
+            if fields:
                 overlay_canvas.setFont(self.font_name, self.font_size)
                 overlay_canvas.setFillColor(self.text_color)
-                
-                for field in pages_data[page_num]:
+                for field in fields:
                     overlay_canvas.drawString(field["x"], field["y"], field["text"])
-            
             overlay_canvas.showPage()
-        
         overlay_canvas.save()
-        overlay_buffer.seek(0)
+        return overlay_buffer.getvalue()
+    
+    def create_overlay_bytes(self, form_name, field_data):
+        """
+        Create a PDF overlay with text at specified coordinates, in memory
         
-        # Save overlay PDF
+        The overlay lines up page for page with the template (blank pages up
+        to the last page with text), so it can stand in for the form itself.
+        """
+        pages_data = self.group_fields_by_page(form_name, field_data)
+        max_page = max(pages_data.keys()) if pages_data else 1
+        return self._draw_overlay([pages_data.get(page_num) for page_num in range(1, max_page + 1)])
+    
+    def create_overlay_pages(self, form_name, field_data):
+        """
+        Create overlays only for the pages that carry fields
+        
+        Returns:
+            tuple: (page numbers, overlay PDF bytes whose page i stamps page_numbers[i])
+        """
+        pages_data = self.group_fields_by_page(form_name, field_data)
+        page_numbers = sorted(pages_data)
+        return page_numbers, self._draw_overlay([pages_data[page_num] for page_num in page_numbers])
+    
+    def create_overlay_pdf(self, form_name, field_data, output_path):
+        """
+        Create a PDF overlay with text at specified coordinates and save it
+        """
         with open(output_path, 'wb') as f:
-            f.write(overlay_buffer.getvalue())
+            f.write(self.create_overlay_bytes(form_name, field_data))
         
         return output_path
     
+    def template_reader(self, template):
+        """
+        Parsed template, cached across forms
+        
+        Templates given as a path are keyed by path, size and modification
+        time, so a changed file is parsed again; bytes are keyed by content
+        hash. Page objects are resolved once and then only read (see
+        _stamp_page).
+        """
+        if isinstance(template, (bytes, bytearray)):
+            key = hashlib.sha256(template).hexdigest()
+        else:
+            stat = os.stat(template)
+            key = (os.path.abspath(template), stat.st_size, stat.st_mtime_ns)
+        
+        reader = self._template_readers.get(key)
+        if reader is None:
+            if isinstance(template, (bytes, bytearray)):
+                data = bytes(template)
+            else:
+                with open(template, 'rb') as template_file:
+                    data = template_file.read()
+            reader = PyPDF2.PdfReader(BytesIO(data))
+            if len(self._template_readers) >= TEMPLATE_CACHE_SIZE:
+                self._template_readers.pop(next(iter(self._template_readers)))
+            self._template_readers[key] = reader
+        return reader
+    
+    def _stamp_page(self, template_page, overlay_page):
+        """
+        Copy of a template page with the overlay page drawn on top of it
+        
+        The overlay becomes a form XObject with its own resources, so the
+        template's content streams are only referenced: never parsed,
+        renamed or rewritten (PyPDF2's merge_page re-parses the whole page
+        on every call). The cached template page itself is left as is.
+        """
+        overlay = self._content_stream(overlay_page.get_contents().get_data())
+        overlay.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Form"),
+            NameObject("/BBox"): overlay_page.mediabox,
+            NameObject("/Resources"): overlay_page.get("/Resources", DictionaryObject()),
+        })
+        
+        resources = DictionaryObject(template_page.get("/Resources", DictionaryObject()).get_object())
+        xobjects = DictionaryObject(resources.get("/XObject", DictionaryObject()).get_object())
+        name = OVERLAY_XOBJECT
+        while name in xobjects:
+            name += "_"
+        xobjects[NameObject(name)] = overlay
+        resources[NameObject("/XObject")] = xobjects
+        
+        # q <template contents> Q, then the overlay in the default coordinate system
+        contents = ArrayObject([self._content_stream(b"q\n")])
+        if "/Contents" in template_page:
+            original = template_page.raw_get("/Contents")
+            if isinstance(original.get_object(), ArrayObject):
+                contents.extend(original.get_object())
+            else:
+                contents.append(original)
+        contents.append(self._content_stream(f"\nQ\nq {name} Do Q\n".encode()))
+        
+        page = copy.copy(template_page)
+        page[NameObject("/Resources")] = resources
+        page[NameObject("/Contents")] = contents
+        return page
+    
+    @staticmethod
+    def _content_stream(data):
+        stream = DecodedStreamObject()
+        stream.set_data(data)
+        stream.indirect_reference = None  # a new object for the writer to number
+        return stream
+    
+    def stamp_pages(self, template, overlay_bytes, page_map=None):
+        """
+        Stamp overlay pages onto a template in memory
+        
+        Args:
+            template: Template PDF as bytes or a file path
+            overlay_bytes: Overlay PDF
+            page_map: {template page index: overlay page index}; defaults to
+                overlay page i on template page i for every overlay page
+        
+        Returns:
+            bytes: The stamped PDF; pages not in page_map are copied untouched
+        """
+        overlay_pdf = PyPDF2.PdfReader(BytesIO(overlay_bytes))
+        if page_map is None:
+            page_map = {page_index: page_index for page_index in range(len(overlay_pdf.pages))}
+        
+        # The cached reader shares one stream, so forms on the same filler take turns
+        with self._template_lock:
+            template_pdf = self.template_reader(template)
+            output_pdf = PyPDF2.PdfWriter()
+            for page_index, template_page in enumerate(template_pdf.pages):
+                if page_index in page_map:
+                    template_page = self._stamp_page(template_page, overlay_pdf.pages[page_map[page_index]])
+                output_pdf.add_page(template_page)
+            
+            output_buffer = BytesIO()
+            output_pdf.write(output_buffer)
+        return output_buffer.getvalue()
+    
+    def merge_overlay_bytes(self, template, overlay_bytes):
+        """
+        Merge a text overlay onto a template in memory
+        
+        Args:
+            template: Template PDF as bytes or a file path
+            overlay_bytes: Overlay PDF from create_overlay_bytes
+        
+        Returns:
+            bytes: The merged PDF
+        """
+        return self.stamp_pages(template, overlay_bytes)
+    
+    def render_form(self, form_name, field_data, template=None):
+        """
+        Fill a form entirely in memory: overlay, merge and serialize without
+        touching the disk (apart from reading a template given as a path)
+        
+        Only the pages that carry fields get an overlay page and a merge;
+        the rest of the template is passed through as is.
+        
+        Args:
+            form_name: Name of the form (coordinate mapping or API form id)
+            field_data: Dictionary of field names to values
+            template: Blank template as bytes or a path; the overlay alone is
+                returned when it is missing
+        
+        Returns:
+            bytes: The filled PDF
+        """
+        if isinstance(template, (bytes, bytearray)) or (template and os.path.exists(template)):
+            page_numbers, overlay_bytes = self.create_overlay_pages(form_name, field_data)
+            page_map = {page_num - 1: overlay_index for overlay_index, page_num in enumerate(page_numbers)}
+            return self.stamp_pages(template, overlay_bytes, page_map)
+        return self.create_overlay_bytes(form_name, field_data)
+    
     def fill_form(self, form_name, field_data, template_path, output_path):
         """
         Fill a PDF form using coordinate-based text placement
@@ -147,20 +330,11 @@ class CoordinateBasedFormFiller:
             output_path: Path for the filled PDF output
         """
         try:
-            # Create overlay with filled text
-            overlay_path = output_path.replace('.pdf', '_overlay.pdf')
-            self.create_overlay_pdf(form_name, field_data, overlay_path)
-            
-            # Merge overlay with original PDF (if available)
-            if os.path.exists(template_path):
-                merged_path = self.merge_pdf_with_overlay(template_path, overlay_path, output_path)
-                # Clean up temporary overlay
-                os.remove(overlay_path)
-                return merged_path
-            else:
-                # Use overlay as final output
-                os.rename(overlay_path, output_path)
-                return output_path
+            # Overlay and merge in memory; only the finished form is written
+            pdf_bytes = self.render_form(form_name, field_data, template_path)
+            with open(output_path, 'wb') as output_file:
+                output_file.write(pdf_bytes)
+            return output_path
                 
         except Exception as e:
             print(f"❌ Error filling form: {e}")
@@ -171,31 +345,12 @@ class CoordinateBasedFormFiller:
         Merge the original PDF with the text overlay
         """
         try:
-            # Read original PDF
-            with open(template_path, 'rb') as template_file:
-                template_pdf = PyPDF2.PdfReader(template_file)
-                
-                # Read overlay PDF
-                with open(overlay_path, 'rb') as overlay_file:
-                    overlay_pdf = PyPDF2.PdfReader(overlay_file)
-                    
-                    # Create output PDF
-                    output_pdf = PyPDF2.PdfWriter()
-                    
-                    # Merge pages
-                    for page_num in range(len(template_pdf.pages)):
-                        template_page = template_pdf.pages[page_num]
-                        
-                        # If overlay has this page, merge it
-                        if page_num < len(overlay_pdf.pages):
-                            overlay_page = overlay_pdf.pages[page_num]
-                            template_page.merge_page(overlay_page)
-                        
-                        output_pdf.add_page(template_page)
-                    
-                    # Save merged PDF
-                    with open(output_path, 'wb') as output_file:
-                        output_pdf.write(output_file)
+            with open(overlay_path, 'rb') as overlay_file:
+                merged = self.merge_overlay_bytes(template_path, overlay_file.read())
+            
+            # Save merged PDF
+            with open(output_path, 'wb') as output_file:
+                output_file.write(merged)
             
             return output_path
             
@@ -290,6 +445,50 @@ class CoordinateBasedFormFiller:
         
         return result
 
+def benchmark_form_filling(template_path=None, form_name="California_Residential_Purchase_Agreement",
+                           iterations=20):
+    """
+    Forms per second for the page-selective fill (cached template, overlay
+    and merge only on pages with fields) against the previous approach
+    (template parsed per form, a blank overlay page and a merge for every
+    page up to the last one with text).
+    
+    Returns:
+        dict: {'pages', 'stamped_pages', 'previous_forms_per_sec', 'forms_per_sec'}
+    """
+    filler = CoordinateBasedFormFiller()
+    template_path = template_path or f"documents/{form_name}_BLANK_TEMPLATE.pdf"
+    field_data = dict(filler.get_sample_data(form_name))
+    # Signature dates on the last page, as on a real purchase agreement
+    field_data.update({"buyer_date": "March 1, 2025", "seller_date": "March 2, 2025"})
+    
+    def previous():
+        overlay_pdf = PyPDF2.PdfReader(BytesIO(filler.create_overlay_bytes(form_name, field_data)))
+        with open(template_path, 'rb') as template_file:
+            template_pdf = PyPDF2.PdfReader(BytesIO(template_file.read()))
+        output_pdf = PyPDF2.PdfWriter()
+        for page_num, template_page in enumerate(template_pdf.pages):
+            if page_num < len(overlay_pdf.pages):
+                template_page.merge_page(overlay_pdf.pages[page_num])
+            output_pdf.add_page(template_page)
+        output_pdf.write(BytesIO())
+    
+    filler.render_form(form_name, field_data, template_path)  # parse the template once
+    timings = {}
+    for label, render in (('previous', previous),
+                          ('selective', lambda: filler.render_form(form_name, field_data, template_path))):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            render()
+        timings[label] = iterations / (time.perf_counter() - start)
+    
+    return {
+        'pages': len(filler.template_reader(template_path).pages),
+        'stamped_pages': len(filler.group_fields_by_page(form_name, field_data)),
+        'previous_forms_per_sec': round(timings['previous'], 1),
+        'forms_per_sec': round(timings['selective'], 1)
+    }
+
 def main():
     """
     Demonstrate coordinate-based PDF form filling
@@ -314,4 +513,17 @@ def main():
     return filler
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Coordinate-based PDF form filling')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Fill N forms each way and report forms/sec')
+    parser.add_argument('--template', help='Template PDF for the benchmark')
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        timing = benchmark_form_filling(args.template, iterations=args.benchmark)
+        print(f"📄 {timing['pages']} pages, {timing['stamped_pages']} stamped")
+        print(f"⏱️  Previous: {timing['previous_forms_per_sec']} forms/sec")
+        print(f"🚀 Page-selective: {timing['forms_per_sec']} forms/sec")
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Address Normalization for Real Estate CRM
+Canonical street addresses and an indexed normalized_address_key column
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Optional, Any, Tuple
+
+# USPS Publication 28 street suffixes (common subset) -> standard abbreviation
+STREET_SUFFIXES = {
+    'alley': 'aly', 'allee': 'aly', 'ally': 'aly', 'aly': 'aly',
+    'avenue': 'ave', 'av': 'ave', 'aven': 'ave', 'avenu': 'ave', 'avn': 'ave', 'avnue': 'ave', 'ave': 'ave',
+    'boulevard': 'blvd', 'boul': 'blvd', 'boulv': 'blvd', 'blvd': 'blvd',
+    'circle': 'cir', 'circ': 'cir', 'circl': 'cir', 'crcl': 'cir', 'crcle': 'cir', 'cir': 'cir',
+    'court': 'ct', 'crt': 'ct', 'ct': 'ct',
+    'cove': 'cv', 'cv': 'cv',
+    'crossing': 'xing', 'crssng': 'xing', 'xing': 'xing',
+    'drive': 'dr', 'driv': 'dr', 'drv': 'dr', 'dr': 'dr',
+    'expressway': 'expy', 'expy': 'expy',
+    'freeway': 'fwy', 'fwy': 'fwy',
+    'highway': 'hwy', 'highwy': 'hwy', 'hiway': 'hwy', 'hway': 'hwy', 'hwy': 'hwy',
+    'hill': 'hl', 'hl': 'hl',
+    'hollow': 'holw', 'holw': 'holw',
+    'lane': 'ln', 'ln': 'ln',
+    'loop': 'loop',
+    'parkway': 'pkwy', 'parkwy': 'pkwy', 'pkway': 'pkwy', 'pky': 'pkwy', 'pkwy': 'pkwy',
+    'place': 'pl', 'pl': 'pl',
+    'plaza': 'plz', 'plz': 'plz',
+    'point': 'pt', 'pt': 'pt',
+    'ridge': 'rdg', 'rdg': 'rdg',
+    'road': 'rd', 'rd': 'rd',
+    'route': 'rte', 'rte': 'rte',
+    'square': 'sq', 'sqr': 'sq', 'sq': 'sq',
+    'street': 'st', 'strt': 'st', 'str': 'st', 'st': 'st',
+    'terrace': 'ter', 'terr': 'ter', 'ter': 'ter',
+    'trail': 'trl', 'trails': 'trl', 'trl': 'trl',
+    'view': 'vw', 'vw': 'vw',
+    'way': 'way', 'wy': 'way',
+}
+
+DIRECTIONALS = {
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+    'northeast': 'ne', 'northwest': 'nw', 'southeast': 'se', 'southwest': 'sw',
+    'n': 'n', 's': 's', 'e': 'e', 'w': 'w', 'ne': 'ne', 'nw': 'nw', 'se': 'se', 'sw': 'sw',
+}
+
+# Secondary unit designators; all collapse to '#' in the key
+UNIT_DESIGNATORS = {
+    'apartment', 'apt', 'unit', 'suite', 'ste', 'building', 'bldg', 'floor', 'fl',
+    'room', 'rm', 'space', 'spc', 'lot', 'trailer', 'trlr', '#', 'no',
+}
+
+_PUNCTUATION = re.compile(r"[^\w#\s/-]")
+_WHITESPACE = re.compile(r'\s+')
+_UNIT_SPLIT = re.compile(r'#\s*')
+_ORDINAL = re.compile(r'^(\d+)(st|nd|rd|th)$')
+
+def parse_street_address(street: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Split a street line into its parts.
+
+    '123 N. Main Street, Apt 4B' ->
+        {'number': '123', 'predirectional': 'n', 'name': 'main', 'suffix': 'st',
+         'postdirectional': None, 'unit': '4b'}
+    """
+    parts = {'number': None, 'predirectional': None, 'name': None,
+             'suffix': None, 'postdirectional': None, 'unit': None}
+    if not street:
+        return parts
+
+    text = _PUNCTUATION.sub(' ', str(street).lower().replace('.', ''))
+    text = _UNIT_SPLIT.sub(' # ', text)
+    tokens = _WHITESPACE.sub(' ', text).strip().split(' ')
+    tokens = [t for t in tokens if t]
+
+    # Secondary unit: the designator and everything after it
+    for position, token in enumerate(tokens):
+        if position > 0 and token in UNIT_DESIGNATORS and position + 1 < len(tokens):
+            parts['unit'] = ''.join(t for t in tokens[position + 1:] if t not in UNIT_DESIGNATORS) or None
+            tokens = tokens[:position]
+            break
+
+    if tokens and tokens[0][:1].isdigit():
+        parts['number'] = tokens.pop(0)
+        # '123-A Main St' / '123 1/2 Main St' keep the fraction with the number
+        if tokens and '/' in tokens[0]:
+            parts['number'] += ' ' + tokens.pop(0)
+
+    # Peel from the outside in, always leaving at least one token as the
+    # street name so 'East St' and 'North Ave' keep their names
+    if len(tokens) > 1 and tokens[-1] in DIRECTIONALS:
+        parts['postdirectional'] = DIRECTIONALS[tokens.pop()]
+    if len(tokens) > 1 and tokens[-1] in STREET_SUFFIXES:
+        parts['suffix'] = STREET_SUFFIXES[tokens.pop()]
+    if len(tokens) > 1 and tokens[0] in DIRECTIONALS:
+        parts['predirectional'] = DIRECTIONALS[tokens.pop(0)]
+
+    name_tokens = []
+    for token in tokens:
+        ordinal = _ORDINAL.match(token)
+        name_tokens.append(ordinal.group(1) if ordinal else token)
+    parts['name'] = ' '.join(name_tokens) or None
+    return parts
+
+def normalize_street(street: Optional[str]) -> str:
+    """Canonical street line: '123 North Main Street Apt 4' -> '123 n main st #4'"""
+    parts = parse_street_address(street)
+    words = [parts['number'], parts['predirectional'], parts['name'],
+             parts['suffix'], parts['postdirectional']]
+    normalized = ' '.join(w for w in words if w)
+    if parts['unit']:
+        normalized += f" #{parts['unit']}"
+    return normalized
+
+def normalize_address_key(street: Optional[str], city: Optional[str] = None,
+                          state: Optional[str] = None) -> Optional[str]:
+    """
+    Indexable equality key for a property address.
+
+    '123 Main St', 'Sacramento', 'CA' and '123 MAIN STREET', 'sacramento ', 'ca'
+    both give '123 main st|sacramento|ca'. ZIP is left out on purpose: MLS
+    feeds and hand-entered records disagree on it far more often than on
+    the street, city and state used by the existing conflict checks.
+    """
+    normalized = normalize_street(street)
+    if not normalized:
+        return None
+    city_key = _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', str(city or '').lower())).strip()
+    state_key = str(state or '').strip().lower()
+    return f'{normalized}|{city_key}|{state_key}'
+
+def address_key_prefix_range(search_term: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Range bounds for an indexed prefix search on normalized_address_key.
+
+    Only street-number searches ('123 Main', '123 main street') qualify;
+    returns None for anything else so callers fall back to LIKE.
+    """
+    if not search_term or not str(search_term).strip()[:1].isdigit():
+        return None
+    prefix = normalize_street(search_term)
+    if not prefix:
+        return None
+    return prefix, prefix + '\uffff'
+
+def mls_number_prefix_range(search_term: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Range bounds for an indexed prefix search on mls_number, so a partial
+    MLS number ('22501') still finds its listings.
+    """
+    term = str(search_term or '').strip()
+    if not term:
+        return None
+    return term, term + '\uffff'
+
+# ============================================================================
+# DATABASE COLUMN AND INDEX
+# ============================================================================
+
+_ADDRESS_COLUMNS = ('address_line1', 'street_address')
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> list:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()]
+
+def street_column(conn: sqlite3.Connection, table: str) -> Optional[str]:
+    """Name of the street column in this table flavour (address_line1 or street_address)"""
+    columns = _table_columns(conn, table)
+    for column in _ADDRESS_COLUMNS:
+        if column in columns:
+            return column
+    return None
+
+def ensure_address_key_column(conn: sqlite3.Connection, table: str = 'properties') -> Dict[str, Any]:
+    """
+    Add, backfill and index normalized_address_key on a properties table.
+
+    Safe to call repeatedly; after the first successful run per database and
+    table in this process it returns immediately.
+
+    Returns:
+        dict: {'success': bool, 'backfilled': int, 'message': str}
+    """
+    database = conn.execute('PRAGMA database_list').fetchone()[2]
+    marker = (database, table)
+    if marker in _migrated:
+        return {'success': True, 'backfilled': 0, 'message': f'{table} already migrated'}
+
+    with _migrate_lock:
+        columns = _table_columns(conn, table)
+        if not columns:
+            return {'success': False, 'backfilled': 0, 'message': f'Table {table} does not exist'}
+
+        address_column = street_column(conn, table)
+        if not address_column:
+            return {'success': False, 'backfilled': 0, 'message': f'No street column on {table}'}
+
+        if 'normalized_address_key' not in columns:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN normalized_address_key TEXT')
+
+        rows = conn.execute(
+            f'SELECT id, {address_column}, city, state FROM {table} WHERE normalized_address_key IS NULL'
+        ).fetchall()
+        updates = [(normalize_address_key(row[1], row[2], row[3]), row[0]) for row in rows]
+        conn.executemany(f'UPDATE {table} SET normalized_address_key = ? WHERE id = ?', updates)
+        conn.execute(
+            f'CREATE INDEX IF NOT EXISTS idx_{table}_normalized_address_key ON {table}(normalized_address_key)'
+        )
+        conn.commit()
+        if database:  # in-memory databases share an empty name; never cache them
+            _migrated.add(marker)
+
+        return {
+            'success': True,
+            'backfilled': len(updates),
+            'message': f'normalized_address_key ready on {table} ({len(updates)} rows backfilled)'
+        }
+
+def find_property_by_address(conn: sqlite3.Connection, street: str, city: Optional[str],
+                             state: Optional[str], table: str = 'properties') -> Optional[sqlite3.Row]:
+    """Indexed equality lookup of an existing property by normalized address"""
+    ensure_address_key_column(conn, table)
+    key = normalize_address_key(street, city, state)
+    if not key:
+        return None
+    return conn.execute(
+        f'SELECT * FROM {table} WHERE normalized_address_key = ? LIMIT 1', (key,)
+    ).fetchone()
+
+def refresh_address_key(conn: sqlite3.Connection, property_id: int, table: str = 'properties') -> None:
+    """Recompute the key for one row after its address fields changed"""
+    ensure_address_key_column(conn, table)
+    address_column = street_column(conn, table)
+    row = conn.execute(
+        f'SELECT {address_column}, city, state FROM {table} WHERE id = ?', (property_id,)
+    ).fetchone()
+    if row:
+        conn.execute(
+            f'UPDATE {table} SET normalized_address_key = ? WHERE id = ?',
+            (normalize_address_key(row[0], row[1], row[2]), property_id)
+        )
+
+def migrate_address_keys(db_path: str) -> Dict[str, Any]:
+    """
+    Run the normalized_address_key migration on every properties table present.
+
+    Returns:
+        dict: {'success': bool, 'tables': dict, 'message': str}
+    """
+    if not os.path.exists(str(db_path)):
+        return {'success': False, 'tables': {}, 'message': f'Database not found: {db_path}'}
+
+    try:
+        conn = sqlite3.connect(str(db_path))
+        tables = {}
+        for table in ('properties', 'properties_v2'):
+            if _table_columns(conn, table):
+                tables[table] = ensure_address_key_column(conn, table)['message']
+        conn.close()
+        return {
+            'success': True,
+            'tables': tables,
+            'message': '; '.join(tables.values()) or 'No properties tables found'
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'tables': {},
+            'message': f'Error migrating address keys: {str(e)}'
+        }
+
+if __name__ == "__main__":
+    print("🏠 Address Normalization")
+    print("=" * 50)
+    samples = [
+        ('123 Main St', 'Sacramento', 'CA'),
+        ('123 MAIN STREET', 'sacramento', 'ca'),
+        ('456 North Oak Avenue, Apt. 4B', 'Davis', 'CA'),
+        ('456 N Oak Ave #4b', 'Davis', 'CA'),
+        ('10 W 42nd Street Suite 300', 'New York', 'NY'),
+    ]
+    for street, city, state in samples:
+        print(f"  {street!r:40} -> {normalize_address_key(street, city, state)}")
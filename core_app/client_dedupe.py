@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Client Duplicate Detection Engine
+Blocking-key dedupe for real-time create checks and batch duplicate scans
+"""
+
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+from address_normalization import normalize_address_key
+from entity_resolution import normalize_name, normalize_phone, soundex, metaphone
+
+DATABASE_PATH = Path(__file__).parent.parent / 'real_estate_crm.db'
+
+# Pairs scoring at or above this are reported as possible duplicates
+DEFAULT_THRESHOLD = 0.75
+
+# Two people can share a name: without a matching email, phone or address
+# the pair scores at most this, below the threshold
+NAME_ONLY_MAX_SCORE = 0.5
+
+# Blocks larger than this are skipped in batch scans; a block that big means
+# the key is not selective (e.g. a very common surname) and the other keys
+# on the same records still produce the useful comparisons
+DEFAULT_MAX_BLOCK_SIZE = 500
+
+def email_local_part(email: Optional[str]) -> Optional[str]:
+    """Comparable email username: lowercase, no +tags, no dots"""
+    if not email or '@' not in str(email):
+        return None
+    local = str(email).strip().lower().split('@', 1)[0]
+    local = local.split('+', 1)[0].replace('.', '')
+    return local or None
+
+def _normalize_client(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a client row/dict to the fields used for blocking and scoring"""
+    first_tokens = normalize_name(record.get('first_name'))
+    last_tokens = normalize_name(record.get('last_name'))
+    first = first_tokens[0] if first_tokens else ''
+    last = last_tokens[-1] if last_tokens else ''
+    email = str(record['email']).strip().lower() if record.get('email') else None
+
+    phones = set()
+    for field in ('phone', 'home_phone', 'cellular_phone', 'business_phone'):
+        normalized = normalize_phone(record.get(field))
+        if normalized:
+            phones.add(normalized)
+
+    street = record.get('street_address') or record.get('address_street')
+    address = normalize_address_key(street, record.get('city')) if street else None
+
+    return {
+        'id': record.get('id'),
+        'name': ' '.join(filter(None, [record.get('first_name'), record.get('last_name')])),
+        'first': first,
+        'last': last,
+        'first_codes': (soundex(first), metaphone(first)) if first else None,
+        'last_codes': (soundex(last), metaphone(last)) if last else None,
+        'email': email,
+        'email_local': email_local_part(email),
+        'phones': phones,
+        'address': address
+    }
+
+def blocking_keys(client: Dict[str, Any]) -> set:
+    """
+    Blocking keys for a normalized client.
+
+    Only clients sharing at least one key are ever compared: same phone,
+    same email username, or the same Soundex/Metaphone codes for the first
+    and last name. The name codes are sorted so swapped first/last names
+    land in the same block. A last-name-only block would add no pairs that
+    can reach the threshold, so it is deliberately not used.
+    """
+    keys = {f'phone:{phone}' for phone in client['phones']}
+    if client['email_local']:
+        keys.add(f"email:{client['email_local']}")
+    if client['first_codes'] and client['last_codes']:
+        for kind, position in (('soundex', 0), ('metaphone', 1)):
+            codes = sorted([client['first_codes'][position], client['last_codes'][position]])
+            keys.add(f"{kind}:{codes[0]}|{codes[1]}")
+    elif client['last_codes']:
+        keys.add(f"soundex:{client['last_codes'][0]}")
+        keys.add(f"metaphone:{client['last_codes'][1]}")
+    return keys
+
+def _name_signal(a: Dict[str, Any], b: Dict[str, Any]) -> Optional[Tuple[float, str]]:
+    if not (a['first'] and a['last'] and b['first'] and b['last']):
+        return None
+    if a['first'] == b['first'] and a['last'] == b['last']:
+        return 0.8, 'same name'
+    if a['first'] == b['last'] and a['last'] == b['first']:
+        return 0.75, 'first/last name swapped'
+
+    def sounds_like(x, y):
+        return x == y or bool(set(x) & set(y))
+
+    if sounds_like(a['first_codes'], b['first_codes']) and sounds_like(a['last_codes'], b['last_codes']):
+        return 0.6, 'similar-sounding name'
+    if sounds_like(a['first_codes'], b['last_codes']) and sounds_like(a['last_codes'], b['first_codes']):
+        return 0.55, 'similar-sounding swapped name'
+    return None
+
+def score_pair(a: Dict[str, Any], b: Dict[str, Any]) -> Tuple[float, List[str]]:
+    """
+    Score two normalized clients.
+
+    Independent signals are combined noisy-OR style, so a similar name plus
+    a shared email username outranks either one alone. A name, however
+    close, needs an email, phone or address match beside it to count as a
+    duplicate, and a shared address alone is a household, not a duplicate.
+
+    Returns:
+        tuple: (score between 0 and 1, list of human-readable reasons)
+    """
+    signals = []
+    if a['email'] and a['email'] == b['email']:
+        signals.append((1.0, 'same email'))
+    elif a['email_local'] and a['email_local'] == b['email_local']:
+        signals.append((0.5, 'same email username'))
+    if a['phones'] & b['phones']:
+        signals.append((0.85, 'same phone'))
+    if a['address'] and a['address'] == b['address']:
+        signals.append((0.6, 'same address'))
+    contact = bool(signals)
+    name = _name_signal(a, b)
+    if name:
+        signals.append(name)
+
+    remaining = 1.0
+    for weight, _ in signals:
+        remaining *= (1.0 - weight)
+    score = 1.0 - remaining if contact else min(1.0 - remaining, NAME_ONLY_MAX_SCORE)
+    return round(score, 3), [reason for _, reason in signals]
+
+class ClientDedupeEngine:
+    """
+    Blocking-key duplicate detector for one clients table.
+
+    Records are grouped into blocks by blocking_keys(); pairwise scoring only
+    happens inside blocks, so a real-time check touches a handful of
+    candidates and a full scan stays near-linear in the number of clients.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_block_size: int = DEFAULT_MAX_BLOCK_SIZE):
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.loaded = False
+        self._lock = threading.RLock()
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self.blocks = defaultdict(set)
+
+    def add_record(self, record: Dict[str, Any]) -> None:
+        """Insert or replace a client (incremental update on create/update)"""
+        with self._lock:
+            client = _normalize_client(record)
+            self.remove_record(client['id'])
+            self.records[client['id']] = client
+            for key in blocking_keys(client):
+                self.blocks[key].add(client['id'])
+
+    def remove_record(self, client_id: int) -> None:
+        with self._lock:
+            client = self.records.pop(client_id, None)
+            if not client:
+                return
+            for key in blocking_keys(client):
+                self.blocks[key].discard(client_id)
+
+    def find_matches(self, record: Dict[str, Any], limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Real-time check: likely duplicates of a client that is about to be written.
+
+        Returns:
+            list: [{'client_id', 'name', 'score', 'reasons'}] best first
+        """
+        with self._lock:
+            client = _normalize_client(record)
+            candidates = set()
+            for key in blocking_keys(client):
+                candidates |= self.blocks.get(key, set())
+            candidates.discard(client['id'])
+
+            matches = []
+            for candidate_id in candidates:
+                candidate = self.records[candidate_id]
+                score, reasons = score_pair(client, candidate)
+                if score >= self.threshold:
+                    matches.append({
+                        'client_id': candidate_id,
+                        'name': candidate['name'],
+                        'score': score,
+                        'reasons': reasons
+                    })
+
+            matches.sort(key=lambda m: (-m['score'], m['client_id']))
+            return matches[:limit]
+
+    def find_duplicates(self) -> Dict[str, Any]:
+        """
+        Batch scan of every block for duplicate pairs.
+
+        Returns:
+            dict: {'pairs': list, 'clusters': list, 'comparisons': int, 'skipped_blocks': list}
+        """
+        with self._lock:
+            seen = set()
+            pairs = []
+            comparisons = 0
+            skipped = []
+
+            for key, members in self.blocks.items():
+                if len(members) < 2:
+                    continue
+                if len(members) > self.max_block_size:
+                    skipped.append({'key': key, 'size': len(members)})
+                    continue
+
+                ordered = sorted(members)
+                for i, left_id in enumerate(ordered):
+                    left = self.records[left_id]
+                    for right_id in ordered[i + 1:]:
+                        if (left_id, right_id) in seen:
+                            continue
+                        seen.add((left_id, right_id))
+                        comparisons += 1
+                        score, reasons = score_pair(left, self.records[right_id])
+                        if score >= self.threshold:
+                            pairs.append({
+                                'client_ids': [left_id, right_id],
+                                'names': [left['name'], self.records[right_id]['name']],
+                                'score': score,
+                                'reasons': reasons
+                            })
+
+            pairs.sort(key=lambda p: (-p['score'], p['client_ids']))
+            return {
+                'pairs': pairs,
+                'clusters': self._cluster(pairs),
+                'comparisons': comparisons,
+                'skipped_blocks': skipped
+            }
+
+    @staticmethod
+    def _cluster(pairs: List[Dict[str, Any]]) -> List[List[int]]:
+        """Group duplicate pairs into connected clusters (union-find)"""
+        parent = {}
+
+        def root(node):
+            parent.setdefault(node, node)
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for pair in pairs:
+            left, right = pair['client_ids']
+            parent[root(left)] = root(right)
+
+        groups = defaultdict(list)
+        for node in parent:
+            groups[root(node)].append(node)
+        return sorted(sorted(group) for group in groups.values())
+
+    def load_from_connection(self, conn: sqlite3.Connection, table: str = 'clients') -> int:
+        """Rebuild the engine from a clients table"""
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            self.records.clear()
+            self.blocks.clear()
+            try:
+                for row in conn.execute(f'SELECT * FROM {table}'):
+                    self.add_record(dict(row))
+            except sqlite3.OperationalError:
+                pass  # Table not created yet
+            self.loaded = True
+            return len(self.records)
+
+# One engine per (database, table) so clients and clients_v2 stay separate
+_dedupe_engines: Dict[Tuple[str, str], ClientDedupeEngine] = {}
+_engines_lock = threading.Lock()
+
+def get_dedupe_engine(table: str = 'clients', db_path: Optional[str] = None) -> ClientDedupeEngine:
+    """Return the engine for a clients table, loading it on first use"""
+    key = (str(db_path or DATABASE_PATH), table)
+    with _engines_lock:
+        engine = _dedupe_engines.get(key)
+        if engine is None:
+            engine = ClientDedupeEngine()
+            _dedupe_engines[key] = engine
+    if not engine.loaded and os.path.exists(key[0]):
+        try:
+            conn = sqlite3.connect(key[0])
+            engine.load_from_connection(conn, table)
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️  Client dedupe load error: {str(e)}")
+    return engine
+
+def check_client_duplicates(first_name: str, last_name: str, email: Optional[str] = None,
+                            table: str = 'clients', db_path: Optional[str] = None,
+                            **kwargs) -> List[str]:
+    """
+    Real-time duplicate check used by the create-client functions.
+
+    Returns:
+        list: conflict messages, empty when no likely duplicate exists
+    """
+    record = dict(kwargs, first_name=first_name, last_name=last_name, email=email)
+    matches = get_dedupe_engine(table, db_path).find_matches(record)
+    return [
+        f"Possible duplicate of {match['name']} (client ID {match['client_id']}): {', '.join(match['reasons'])}"
+        for match in matches
+    ]
+
+def record_client(client_id: int, table: str = 'clients', db_path: Optional[str] = None, **fields) -> None:
+    """Add a freshly written client to its engine"""
+    get_dedupe_engine(table, db_path).add_record(dict(fields, id=client_id))
+
+def find_duplicate_clients(table: str = 'clients', db_path: Optional[str] = None,
+                           threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Any]:
+    """
+    Batch "find duplicates" job over a whole clients table.
+
+    Returns:
+        dict: {'success': bool, 'pairs': list, 'clusters': list, 'count': int, 'message': str}
+    """
+    try:
+        conn = sqlite3.connect(str(db_path or DATABASE_PATH))
+        engine = ClientDedupeEngine(threshold=threshold)
+        total = engine.load_from_connection(conn, table)
+        conn.close()
+
+        result = engine.find_duplicates()
+        return {
+            'success': True,
+            'pairs': result['pairs'],
+            'clusters': result['clusters'],
+            'count': len(result['pairs']),
+            'comparisons': result['comparisons'],
+            'skipped_blocks': result['skipped_blocks'],
+            'message': f"Found {len(result['pairs'])} likely duplicate pairs among {total} clients "
+                       f"({result['comparisons']} comparisons)"
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'pairs': [],
+            'clusters': [],
+            'count': 0,
+            'message': f'Error finding duplicate clients: {str(e)}'
+        }
+
+def _synthetic_clients(count: int) -> List[Dict[str, Any]]:
+    """Deterministic synthetic client list with ~2% planted duplicates"""
+    import random
+    rng = random.Random(42)
+    first_names = ['John', 'Mary', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Susan',
+                   'James', 'Karen', 'William', 'Lisa', 'Richard', 'Nancy', 'Thomas', 'Betty',
+                   'Daniel', 'Sandra', 'Mark', 'Ashley', 'Steven', 'Emily', 'Paul', 'Donna',
+                   'Andrew', 'Carol', 'Kevin', 'Amanda', 'Brian', 'Melissa', 'George', 'Deborah']
+    syllables = ['har', 'ken', 'dal', 'mor', 'bel', 'vin', 'tra', 'sol', 'gar', 'lin',
+                 'ros', 'pem', 'quin', 'wes', 'tor', 'nash', 'fel', 'cro', 'ban', 'zel']
+    clients = []
+    for i in range(count):
+        first = rng.choice(first_names)
+        last = ''.join(rng.choice(syllables) for _ in range(3)).title()
+        clients.append({
+            'id': i + 1, 'first_name': first, 'last_name': last,
+            'email': f'{first.lower()}.{last.lower()}{i}@example.com',
+            'home_phone': f'916-{200 + i // 10000:03d}-{i % 10000:04d}'
+        })
+    for i in range(0, count, 50):
+        original = clients[i]
+        clients.append({
+            'id': len(clients) + 1, 'first_name': original['last_name'], 'last_name': original['first_name'],
+            'email': original['email'].replace('@example.com', '@mail.com'),
+            'home_phone': original['home_phone']
+        })
+    return clients
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Find likely duplicate clients')
+    parser.add_argument('--db', default=str(DATABASE_PATH), help='SQLite database path')
+    parser.add_argument('--table', default='clients', help='clients or clients_v2')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Scan N synthetic clients instead')
+    args = parser.parse_args()
+
+    print("👥 Client Duplicate Detection")
+    print("=" * 50)
+
+    if args.benchmark:
+        engine = ClientDedupeEngine(threshold=args.threshold)
+        start = time.perf_counter()
+        for client in _synthetic_clients(args.benchmark):
+            engine.add_record(client)
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        result = engine.find_duplicates()
+        scanned = time.perf_counter() - start
+        print(f"Indexed {len(engine.records)} clients in {indexed:.2f}s")
+        print(f"Scan: {len(result['pairs'])} pairs, {result['comparisons']} comparisons, "
+              f"{len(result['skipped_blocks'])} oversized blocks skipped, {scanned:.2f}s")
+    else:
+        result = find_duplicate_clients(args.table, args.db, args.threshold)
+        print(result['message'])
+        for pair in result['pairs'][:25]:
+            print(f"   {pair['names'][0]} ↔ {pair['names'][1]} "
+                  f"(IDs {pair['client_ids']}) score={pair['score']}: {', '.join(pair['reasons'])}")
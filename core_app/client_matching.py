@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Client to Listing Matching for Real Estate CRM
+Scores active buyers against active MLS listings in NumPy matrix blocks
+and keeps a top-N match list per client, updated incrementally
+"""
+
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mls_store import MLSStore
+from mls_feeds import listing_properties, property_types
+
+# Client preference -> its column in the clients table variants
+CLIENT_COLUMNS = {
+    'budget_min': ('budget_min',),
+    'budget_max': ('budget_max',),
+    'bedrooms': ('bedrooms', 'bedrooms_min'),
+    'area_preference': ('area_preference',),
+    'property_type_preference': ('property_type_preference',),
+}
+
+# Preference columns added to clients tables created before matching existed
+PREFERENCE_COLUMN_TYPES = {
+    'budget_min': 'DECIMAL(15,2)',
+    'budget_max': 'DECIMAL(15,2)',
+    'bedrooms': 'INTEGER',
+    'area_preference': 'VARCHAR(255)',
+    'property_type_preference': 'VARCHAR(100)',
+}
+_preference_columns_checked = set()
+
+# Score weights (sum to 1)
+WEIGHTS = {'price': 0.4, 'bedrooms': 0.2, 'area': 0.25, 'property_type': 0.15}
+
+# Price fit falls from 1 to 0 this far (fraction of the budget) outside the budget range
+OVER_BUDGET_TOLERANCE = 0.10
+UNDER_BUDGET_TOLERANCE = 0.25
+
+# Matches scoring below this are not kept
+MIN_SCORE = 0.5
+
+# Up to this many areas per client ("Grass Valley, Nevada City or Penn Valley")
+MAX_AREAS = 4
+
+# Score matrix cells per chunk (clients x listings). Small chunks bound
+# temporary memory and let clients with a full list of perfect matches drop out early.
+BLOCK_CELLS = 1 << 18
+
+_AREA_SEPARATORS = re.compile(r'\s*(?:,|;|/|\bor\b|\band\b|&)\s*', re.IGNORECASE)
+
+class Vocabulary:
+    """Text -> int32 code, shared by listings and clients so areas and types compare as integers"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, values: Iterable[Optional[str]]) -> np.ndarray:
+        codes = []
+        for value in values:
+            if value is None or value != value or not str(value).strip():
+                codes.append(-1)
+                continue
+            codes.append(self.codes.setdefault(str(value).strip().lower(), len(self.codes)))
+        return np.array(codes, dtype=np.int32)
+
+class ListingFeatures:
+    """Active listings as parallel arrays: price, bedrooms and area/type codes"""
+
+    def __init__(self, keys: np.ndarray, price: np.ndarray, bedrooms: np.ndarray, city: np.ndarray,
+                 subdivision: np.ndarray, property_type: np.ndarray):
+        self.keys = keys
+        self.price = price
+        self.bedrooms = bedrooms
+        self.city = city
+        self.subdivision = subdivision
+        self.property_type = property_type
+
+    @classmethod
+    def from_store(cls, store: MLSStore, vocabulary: Vocabulary,
+                   mls_numbers: Optional[Iterable[str]] = None) -> 'ListingFeatures':
+        """Active (or status-less) listings of the store, or of mls_numbers only"""
+        if mls_numbers is None:
+            positions = np.arange(len(store), dtype=np.int64)
+        else:
+            found = (store.positions.get(str(number)) for number in mls_numbers)
+            positions = np.array([position for position in found if position is not None], dtype=np.int64)
+        raw = store.frame(positions)
+        fields = listing_properties(raw)
+        active = fields['status'].isna() | (fields['status'] == 'active')
+        raw, fields = raw[active.to_numpy()], fields[active]
+        subdivision = raw['Subdivision'] if 'Subdivision' in raw else pd.Series(None, index=raw.index)
+        return cls(
+            keys=fields['mls_number'].to_numpy(dtype=object),
+            price=pd.to_numeric(fields['listing_price'], errors='coerce').to_numpy(dtype=np.float64),
+            bedrooms=pd.to_numeric(fields['bedrooms'], errors='coerce').to_numpy(dtype=np.float32),
+            city=vocabulary.encode(fields['city'].tolist()),
+            subdivision=vocabulary.encode(subdivision.tolist()),
+            property_type=vocabulary.encode(fields['property_type'].tolist()),
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def take(self, positions: np.ndarray) -> 'ListingFeatures':
+        return ListingFeatures(self.keys[positions], self.price[positions], self.bedrooms[positions],
+                               self.city[positions], self.subdivision[positions], self.property_type[positions])
+
+def ensure_preference_columns(conn: sqlite3.Connection, table: str = 'clients') -> bool:
+    """
+    Add missing PREFERENCE_COLUMN_TYPES to a clients table; a preference
+    already held under another name (bedrooms_min) is left as it is. Safe to
+    call repeatedly; after the first check per database and table it returns
+    immediately.
+
+    Returns:
+        bool: False when the table does not exist
+    """
+    database = conn.execute('PRAGMA database_list').fetchone()[2]
+    if database and (database, table) in _preference_columns_checked:
+        return True
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()}
+    if not columns:
+        return False
+    for column, column_type in PREFERENCE_COLUMN_TYPES.items():
+        if not columns.intersection(CLIENT_COLUMNS[column]):
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+    conn.commit()
+    if database:  # in-memory databases share an empty name; never cache them
+        _preference_columns_checked.add((database, table))
+    return True
+
+def client_columns(conn: sqlite3.Connection, table: str = 'clients') -> Dict[str, str]:
+    """Preference -> column name, for the preferences this clients table has"""
+    present = {row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()}
+    return {field: next(name for name in names if name in present)
+            for field, names in CLIENT_COLUMNS.items() if any(name in present for name in names)}
+
+class ClientPreferences:
+    """Active buyers as parallel arrays: budget range, bedrooms needed and area/type codes"""
+
+    def __init__(self, ids: np.ndarray, budget_min: np.ndarray, budget_max: np.ndarray, bedrooms: np.ndarray,
+                 areas: np.ndarray, property_type: np.ndarray):
+        self.ids = ids
+        self.budget_min = budget_min
+        self.budget_max = budget_max
+        self.bedrooms = bedrooms
+        self.areas = areas  # clients x MAX_AREAS, -1 padded
+        self.property_type = property_type
+
+    @classmethod
+    def from_db(cls, conn: sqlite3.Connection, vocabulary: Vocabulary,
+                client_ids: Optional[Iterable[int]] = None, table: str = 'clients') -> 'ClientPreferences':
+        """Buyers (client_type buyer or both) that are not inactive, or only client_ids"""
+        ensure_preference_columns(conn, table)
+        present = {row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()}
+        columns = client_columns(conn, table)
+        selected = ', '.join(['id'] + [f'{name} AS {field}' for field, name in columns.items()])
+        conditions, params = [], []
+        if 'client_type' in present:
+            conditions.append("COALESCE(LOWER(client_type), 'buyer') IN ('buyer', 'both')")
+        if 'status' in present:
+            conditions.append("COALESCE(LOWER(status), 'active') = 'active'")
+        if client_ids is not None:
+            client_ids = [int(client_id) for client_id in client_ids]
+            conditions.append(f"id IN ({', '.join('?' * len(client_ids))})")
+            params.extend(client_ids)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = conn.execute(f'SELECT {selected} FROM {table}{where} ORDER BY id', params).fetchall()
+        frame = pd.DataFrame(rows, columns=['id'] + list(columns))
+        for field in CLIENT_COLUMNS:
+            if field not in frame:
+                frame[field] = None
+        return cls.from_frame(frame, vocabulary)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, vocabulary: Vocabulary) -> 'ClientPreferences':
+        def number(name, dtype):
+            values = pd.to_numeric(frame[name], errors='coerce')
+            return values.where(values > 0).to_numpy(dtype=dtype, na_value=np.nan)
+
+        areas = np.full((len(frame), MAX_AREAS), -1, dtype=np.int32)
+        for row, text in enumerate(frame['area_preference'].tolist()):
+            if isinstance(text, str):
+                names = [name for name in _AREA_SEPARATORS.split(text.strip()) if name][:MAX_AREAS]
+                areas[row, :len(names)] = vocabulary.encode(names)
+
+        preference = frame['property_type_preference']
+        types = property_types(preference.fillna('').astype(str)).where(
+            preference.notna() & (preference.astype(str).str.strip() != ''))
+        return cls(
+            ids=frame['id'].to_numpy(dtype=np.int64),
+            budget_min=number('budget_min', np.float64),
+            budget_max=number('budget_max', np.float64),
+            bedrooms=number('bedrooms', np.float32),
+            areas=areas,
+            property_type=vocabulary.encode(types.tolist()),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def take(self, rows: np.ndarray) -> 'ClientPreferences':
+        return ClientPreferences(self.ids[rows], self.budget_min[rows], self.budget_max[rows],
+                                 self.bedrooms[rows], self.areas[rows], self.property_type[rows])
+
+    def concat(self, other: 'ClientPreferences') -> 'ClientPreferences':
+        return ClientPreferences(*(np.concatenate([getattr(self, name), getattr(other, name)])
+                                   for name in ('ids', 'budget_min', 'budget_max', 'bedrooms', 'areas',
+                                                'property_type')))
+
+    def price_windows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Lowest and highest listing price each client can score above 0 on (0 / inf when open)"""
+        low = np.nan_to_num(self.budget_min * (1 - UNDER_BUDGET_TOLERANCE), nan=0.0)
+        high = np.nan_to_num(self.budget_max * (1 + OVER_BUDGET_TOLERANCE), nan=np.inf)
+        return low, high
+
+
+# Stands in for a missing listing price: beyond any budget, and 0 once
+# multiplied by the zero coefficients of a client without one
+_NO_PRICE = np.float32(1e15)
+
+def _indicator(codes: np.ndarray, size: int) -> np.ndarray:
+    """
+    clients x (size + 1) booleans: column code + 1 is True when one of the
+    client's codes (-1 padded rows of `codes`) is code; clients without any
+    code accept everything, column 0 (a listing without a value) included.
+    """
+    codes = codes.reshape(len(codes), -1)
+    table = np.zeros((len(codes), size + 1), dtype=bool)
+    rows, columns = np.nonzero(codes >= 0)
+    table[rows, codes[rows, columns] + 1] = True
+    table[codes.max(axis=1, initial=-1) < 0] = True
+    return table
+
+def score_matrix(clients: ClientPreferences, listings: ListingFeatures,
+                 columns: slice = slice(None)) -> np.ndarray:
+    """
+    Match scores (clients x listings[columns]), 0 to 1, from price fit,
+    bedrooms, area and property type. A missing client preference counts
+    as a full match; a listing priced well outside the budget scores 0.
+
+    Price fit is 1 inside the budget and falls linearly to 0 at
+    OVER_BUDGET_TOLERANCE above it (UNDER_BUDGET_TOLERANCE below). Each
+    bedroom short of the client's count halves the bedroom score. Area and
+    type are looked up per listing code in a per-client indicator table
+    instead of being compared value by value.
+    """
+    price = listings.price[columns].astype(np.float32)
+    price = np.where(np.isnan(price), _NO_PRICE, price)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        over_rate = np.nan_to_num(1 / (OVER_BUDGET_TOLERANCE * clients.budget_max), nan=0.0).astype(np.float32)
+        under_rate = np.nan_to_num(1 / (UNDER_BUDGET_TOLERANCE * clients.budget_min), nan=0.0).astype(np.float32)
+    over_start = (np.nan_to_num(clients.budget_max) * over_rate).astype(np.float32)
+    under_start = (np.nan_to_num(clients.budget_min) * under_rate).astype(np.float32)
+
+    # price_fit = 1 - relu((price - max) / tolerance) - relu((min - price) / tolerance), clipped
+    price_fit = np.multiply(price[None, :], over_rate[:, None])
+    price_fit -= over_start[:, None]
+    np.maximum(price_fit, 0, out=price_fit)
+    under = np.multiply(price[None, :], -under_rate[:, None])
+    under += under_start[:, None]
+    np.maximum(under, 0, out=under)
+    price_fit += under
+    np.subtract(1, price_fit, out=price_fit)
+    np.clip(price_fit, 0, 1, out=price_fit)
+
+    # bedrooms_fit = 1 - 0.5 * (needed - offered), clipped; unknown listing bedrooms score 0.5
+    needed = np.nan_to_num(clients.bedrooms, nan=0.0).astype(np.float32)
+    offered = listings.bedrooms[columns].astype(np.float32)
+    bedrooms_fit = np.add((0.5 * offered)[None, :], (1 - 0.5 * needed)[:, None])
+    unknown = np.flatnonzero(np.isnan(offered))
+    if len(unknown):
+        bedrooms_fit[:, unknown] = np.where(np.isnan(clients.bedrooms), 1, 0.5)[:, None]
+    np.clip(bedrooms_fit, 0, 1, out=bedrooms_fit)
+
+    vocabulary_size = int(max(clients.areas.max(initial=-1), clients.property_type.max(initial=-1),
+                              listings.city.max(initial=-1), listings.subdivision.max(initial=-1),
+                              listings.property_type.max(initial=-1))) + 1
+    areas = _indicator(clients.areas, vocabulary_size)
+    area_fit = areas[:, listings.city[columns] + 1]
+    # a listing without a subdivision must not pass on column 0 for clients with areas
+    area_fit |= areas[:, listings.subdivision[columns] + 1] & (listings.subdivision[columns] >= 0)[None, :]
+    type_fit = _indicator(clients.property_type, vocabulary_size)[:, listings.property_type[columns] + 1]
+
+    scores = price_fit * np.float32(WEIGHTS['price'])
+    scores += bedrooms_fit * np.float32(WEIGHTS['bedrooms'])
+    scores += area_fit * np.float32(WEIGHTS['area'])
+    scores += type_fit * np.float32(WEIGHTS['property_type'])
+    scores[price_fit <= 0] = 0
+    return scores
+
+def merge_top(scores: np.ndarray, keys: np.ndarray, other_scores: np.ndarray, other_keys: np.ndarray,
+              top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best top_n of two (clients x k) score/key lists per row, best first,
+    empty slots last (score 0, key None, or -1 for integer keys)
+    """
+    merged_scores = np.concatenate([scores, other_scores], axis=1)
+    merged_keys = np.concatenate([keys, other_keys], axis=1)
+    if merged_scores.shape[1] > top_n:
+        top = np.argpartition(-merged_scores, top_n - 1, axis=1)[:, :top_n]
+        rows = np.arange(len(merged_scores))[:, None]
+        merged_scores, merged_keys = merged_scores[rows, top], merged_keys[rows, top]
+    order = np.argsort(-merged_scores, axis=1, kind='stable')
+    rows = np.arange(len(merged_scores))[:, None]
+    merged_scores, merged_keys = merged_scores[rows, order], merged_keys[rows, order]
+    empty = merged_scores <= 0
+    merged_keys[empty] = None if merged_keys.dtype == object else -1
+    merged_scores[empty] = 0
+    return merged_scores, merged_keys
+
+class ClientMatcher:
+    """
+    Top-N listing matches per client.
+
+    Listings are sorted by price and clients by the lowest price their
+    budget can match, so each block of clients is scored only against the
+    contiguous run of listings inside its price windows, in column chunks
+    bounded by BLOCK_CELLS. Each chunk is folded into the running top-N
+    with argpartition; a client whose top-N are all perfect scores is not
+    scored further. update_listings scores only new or changed listings
+    against all clients; update_clients rescores only the given clients.
+    Matches are kept by MLS number, so they survive MLS store swaps.
+    """
+
+    CLIENT_BLOCK = 256
+
+    def __init__(self, top_n: int = 20, min_score: float = MIN_SCORE):
+        self.top_n = top_n
+        self.min_score = min_score
+        self.vocabulary = Vocabulary()
+        self.clients = ClientPreferences.from_frame(
+            pd.DataFrame(columns=['id'] + list(CLIENT_COLUMNS)), self.vocabulary)
+        self.listings: Optional[ListingFeatures] = None
+        self.scores = np.zeros((0, top_n), dtype=np.float32)
+        self.keys = np.empty((0, top_n), dtype=object)
+
+    def _rank(self, clients: ClientPreferences, listings: ListingFeatures) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-N (scores, keys) of each client over listings"""
+        n = self.top_n
+        scores = np.zeros((len(clients), n), dtype=np.float32)
+        found = np.full((len(clients), n), -1, dtype=np.int64)  # positions in price order
+        if not len(clients) or not len(listings):
+            return scores, np.full((len(clients), n), None, dtype=object)
+
+        by_price = np.argsort(np.nan_to_num(listings.price, nan=np.inf), kind='stable')
+        listings = listings.take(by_price)
+        prices = np.nan_to_num(listings.price, nan=np.inf)
+        low, high = clients.price_windows()
+        client_order = np.lexsort((high, low))
+
+        for block_start in range(0, len(clients), self.CLIENT_BLOCK):
+            block = client_order[block_start:block_start + self.CLIENT_BLOCK]
+            first = int(np.searchsorted(prices, low[block].min(), side='left'))
+            last = int(np.searchsorted(prices, high[block].max(), side='right'))
+            if np.isinf(high[block]).any():
+                last = len(listings)  # includes unpriced listings for clients without a budget cap
+            chunk = max(1, BLOCK_CELLS // len(block))
+            block_scores, block_found = scores[block], found[block]
+            for start in range(first, last, chunk):
+                open_rows = np.flatnonzero(block_scores[:, -1] < 1)
+                if not len(open_rows):
+                    break
+                columns = slice(start, min(start + chunk, last))
+                chunk_scores = score_matrix(clients.take(block[open_rows]), listings, columns)
+                chunk_scores[chunk_scores < self.min_score] = 0
+                if not chunk_scores.any():
+                    continue
+                positions = np.broadcast_to(np.arange(columns.start, columns.stop)[None, :], chunk_scores.shape)
+                block_scores[open_rows], block_found[open_rows] = merge_top(
+                    block_scores[open_rows], block_found[open_rows], chunk_scores, positions, n)
+            scores[block], found[block] = block_scores, block_found
+        keys = np.append(listings.keys, None)[found]  # -1 picks None
+        return scores, keys
+
+    def score_all(self, clients: ClientPreferences, listings: ListingFeatures) -> Dict[str, Any]:
+        """Replace all match lists: every client against every listing"""
+        start = time.perf_counter()
+        self.clients, self.listings = clients, listings
+        self.scores, self.keys = self._rank(clients, listings)
+        return self._summary('scored', len(clients), len(listings), start)
+
+    def update_listings(self, listings: ListingFeatures, removed: Iterable[str] = (),
+                        all_listings: Optional[ListingFeatures] = None) -> Dict[str, Any]:
+        """
+        Fold new or changed listings into the match lists, after dropping
+        them and the `removed` listings (sold, withdrawn or gone from the
+        feed) from every list. A list that loses a match is not refilled
+        from older listings until the next full scoring.
+        """
+        start = time.perf_counter()
+        if all_listings is not None:
+            self.listings = all_listings
+        stale = np.isin(self.keys, np.array(list(removed) + listings.keys.tolist(), dtype=object))
+        self.scores[stale] = 0
+        self.keys[stale] = None
+        delta_scores, delta_keys = self._rank(self.clients, listings)
+        self.scores, self.keys = merge_top(self.scores, self.keys, delta_scores, delta_keys, self.top_n)
+        return self._summary('updated', len(self.clients), len(listings), start)
+
+    def update_clients(self, clients: ClientPreferences, client_ids: Iterable[int],
+                       listings: Optional[ListingFeatures] = None) -> Dict[str, Any]:
+        """
+        Rescore only `clients` against all listings. client_ids lists every
+        client asked for, so one that is no longer an active buyer (absent
+        from `clients`) loses its matches.
+        """
+        start = time.perf_counter()
+        listings = listings or self.listings
+        if listings is None:
+            raise ValueError('No listings scored yet')
+        self.listings = listings
+        scores, keys = self._rank(clients, listings)
+        replaced = np.isin(self.clients.ids, list({int(client_id) for client_id in client_ids}
+                                                  | set(clients.ids.tolist())))
+        keep = np.flatnonzero(~replaced)
+        self.clients = self.clients.take(keep).concat(clients)
+        self.scores = np.concatenate([self.scores[keep], scores])
+        self.keys = np.concatenate([self.keys[keep], keys])
+        return self._summary('rescored', len(clients), len(listings), start)
+
+    def matches(self, client_id: int, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(mls_number, score) best first"""
+        row = np.flatnonzero(self.clients.ids == int(client_id))
+        if not len(row):
+            return []
+        keys, scores = self.keys[row[0]], self.scores[row[0]]
+        found = [(key, round(float(score), 3)) for key, score in zip(keys.tolist(), scores.tolist()) if key]
+        return found[:limit] if limit else found
+
+    def _summary(self, action: str, clients: int, listings: int, start: float) -> Dict[str, Any]:
+        seconds = round(time.perf_counter() - start, 3)
+        return {'success': True, 'clients': clients, 'listings': listings, 'seconds': seconds,
+                'message': f'Matches {action}: {clients} clients x {listings} listings in {seconds}s'}
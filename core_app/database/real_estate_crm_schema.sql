@@ -53,6 +53,7 @@ CREATE TABLE properties (
     city VARCHAR(100) NOT NULL,
     state VARCHAR(50) NOT NULL,
     zip_code VARCHAR(20) NOT NULL,
+    normalized_address_key VARCHAR(255), -- street|city|state, see address_normalization.py
     county VARCHAR(100),
     parcel_number VARCHAR(100),
     property_type VARCHAR(50), -- single_family, condo, townhouse, etc.
@@ -247,6 +248,7 @@ CREATE INDEX idx_clients_created_at ON clients(created_at);
 
 CREATE INDEX idx_properties_mls ON properties(mls_number);
 CREATE INDEX idx_properties_address ON properties(city, state, zip_code);
+CREATE INDEX idx_properties_normalized_address_key ON properties(normalized_address_key);
 CREATE INDEX idx_properties_price ON properties(listing_price);
 CREATE INDEX idx_properties_status ON properties(status);
 CREATE INDEX idx_properties_listing_date ON properties(listing_date);
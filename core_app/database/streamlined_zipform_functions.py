@@ -6,6 +6,7 @@ Smart, normalized approach covering 95% of ZipForm needs with minimal complexity
 
 import sqlite3
 import json
+import sys
 from datetime import datetime
 from typing import Dict
 
@@ -13,6 +14,12 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent.parent.parent
 DATABASE_PATH = BASE_DIR / 'real_estate_crm.db'
 
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(BASE_DIR))
+from client_dedupe import check_client_duplicates, record_client
+from address_normalization import find_property_by_address, refresh_address_key
+from property_url_generator import refresh_property_urls
+
 def get_db_connection():
     """Get database connection with row factory"""
     conn = sqlite3.connect(DATABASE_PATH)
@@ -35,6 +42,8 @@ def create_zipform_client(first_name, last_name, **kwargs):
     Returns:
         dict: {'success': bool, 'client_id': int, 'message': str}
     """
+    if kwargs.get('phone') and not kwargs.get('home_phone'):
+        kwargs['home_phone'] = kwargs['phone']
     try:
         conn = get_db_connection()
 
@@ -52,6 +61,21 @@ def create_zipform_client(first_name, last_name, **kwargs):
                     'message': f"Email {kwargs['email']} already exists for {existing['first_name']} {existing['last_name']}"
                 }
 
+        if not kwargs.get('allow_duplicates'):
+            duplicates = check_client_duplicates(
+                first_name, last_name, kwargs.get('email'), table='clients_v2', db_path=DATABASE_PATH,
+                home_phone=kwargs.get('home_phone'), business_phone=kwargs.get('business_phone'),
+                cellular_phone=kwargs.get('cellular_phone'), street_address=kwargs.get('street_address'),
+                city=kwargs.get('city')
+            )
+            if duplicates:
+                conn.close()
+                return {
+                    'success': False,
+                    'client_id': None,
+                    'message': '; '.join(duplicates) + ' (pass allow_duplicates=True to create anyway)'
+                }
+
         # Insert with all ZipForm fields
         cursor = conn.execute('''
             INSERT INTO clients_v2 (
@@ -75,6 +99,12 @@ def create_zipform_client(first_name, last_name, **kwargs):
         client_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        record_client(
+            client_id, table='clients_v2', db_path=DATABASE_PATH, first_name=first_name,
+            last_name=last_name, email=kwargs.get('email'), home_phone=kwargs.get('home_phone'),
+            cellular_phone=kwargs.get('cellular_phone'), business_phone=kwargs.get('business_phone'),
+            street_address=kwargs.get('street_address'), city=kwargs.get('city')
+        )
 
         return {
             'success': True,
@@ -110,11 +140,8 @@ def create_zipform_property(street_address, city, state, zip_code, **kwargs):
     try:
         conn = get_db_connection()
 
-        # Check for conflicts
-        existing = conn.execute(
-            'SELECT id FROM properties_v2 WHERE street_address = ? AND city = ? AND state = ?',
-            (street_address, city, state)
-        ).fetchone()
+        # Check for conflicts on the normalized address
+        existing = find_property_by_address(conn, street_address, city, state, table='properties_v2')
 
         if existing:
             conn.close()
@@ -154,6 +181,8 @@ def create_zipform_property(street_address, city, state, zip_code, **kwargs):
         ))
 
         property_id = cursor.lastrowid
+        refresh_address_key(conn, property_id, table='properties_v2')
+        refresh_property_urls(conn, property_id, table='properties_v2')
         conn.commit()
         conn.close()
 
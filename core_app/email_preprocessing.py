@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Email Preprocessing for Real Estate CRM
+Strips quoted replies, signatures, legal footers and HTML before entity extraction
+"""
+
+import html
+import re
+from typing import Dict, Iterable, Iterator, Any
+
+# ============================================================================
+# LINE PATTERNS
+# ============================================================================
+
+# Tag names must be followed by whitespace, '/' or '>' so "Name <user@host.com>" survives
+_HTML_TAG = re.compile(r'<!--.*?-->|<!DOCTYPE[^>]*>|</?[a-zA-Z][a-zA-Z0-9]*(?:[\s/][^>]*)?>', re.DOTALL)
+_HTML_BLOCK = re.compile(r'<(style|script|head)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_HTML_BREAK = re.compile(r'<\s*(?:br|/p|/div|/tr|/li|/h\d)\s*/?\s*>', re.IGNORECASE)
+
+# Start of the previous message in a reply chain
+_REPLY_HEADERS = [
+    re.compile(r'^On .{4,200} wrote:\s*$', re.IGNORECASE),
+    re.compile(r'^-{2,}\s*Original Message\s*-{2,}', re.IGNORECASE),
+    re.compile(r'^_{10,}\s*$'),  # Outlook separator above From:/Sent:
+    re.compile(r'^From:\s.+\s(?:Sent|Date):\s', re.IGNORECASE),  # header collapsed onto one line
+]
+_FORWARD_HEADER = re.compile(r'^-{2,}\s*Forwarded message\s*-{2,}|^Begin forwarded message:', re.IGNORECASE)
+_HEADER_FIELD = re.compile(r'^(?:From|Sent|Date|To|Cc|Subject):\s', re.IGNORECASE)
+
+_SIGNATURE_DELIMITER = re.compile(r'^--\s*$')
+_SIGNATURE_CLOSINGS = re.compile(
+    r'^(?:best|best regards|regards|kind regards|warm regards|thanks|thank you|thanks again|'
+    r'cheers|sincerely|respectfully|talk soon)[,!.]?\s*$',
+    re.IGNORECASE
+)
+_MOBILE_SIGNATURES = re.compile(r'^(?:sent from my|get outlook for|sent via)\b', re.IGNORECASE)
+
+# Disclaimer openings only, at the start of a line: "This email is..." also
+# starts plenty of leads, and a lead may mention "confidential" mid-sentence
+_FOOTER_STARTS = re.compile(
+    r'^(?:confidentiality notice|confidential(?:ity)?:|disclaimer:|privacy notice:|wire fraud (?:alert|warning)'
+    r'|this (?:e-?mail|message|communication)(?: and any attachments?)? (?:is|are|may be) '
+    r'(?:confidential|privileged|intended (?:only|solely))'
+    r'|(?:if )?you (?:are not the intended recipient|have received this (?:e-?mail|message|communication) in error)'
+    r'|(?:to |click here to )?unsubscribe\b|you are receiving this (?:e-?mail|message))',
+    re.IGNORECASE
+)
+
+# Signature lines worth keeping: the sender's own name and contact details
+# are often the only ones in a pasted lead
+_CONTACT_DETAIL = re.compile(r'[\w.+-]+@[\w-]+\.[\w.]+|\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}')
+_PERSON_NAME = re.compile(r"^[A-Z][a-z]+(?: [A-Z]\.?)?(?: [A-Z][a-zA-Z'-]+){1,2}$")
+
+_SPACES = re.compile(r'[ \t ]+')
+
+# Lines after a closing ("Thanks,") that still count as signature
+MAX_SIGNATURE_LINES = 6
+# Longest line that still reads as a signature rather than a sentence
+MAX_SIGNATURE_LINE_CHARS = 60
+
+# ============================================================================
+# PIPELINE STAGES
+# ============================================================================
+
+def strip_html(text: str) -> str:
+    """Turn an HTML email body into plain text lines (tags can span lines, so this runs first)"""
+    if not _HTML_TAG.search(text):
+        return text
+    text = _HTML_BLOCK.sub('', text)
+    text = _HTML_BREAK.sub('\n', text)
+    text = _HTML_TAG.sub('', text)
+    return html.unescape(text)
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Lines with trailing whitespace and non-breaking spaces tidied"""
+    for line in text.splitlines():
+        yield _SPACES.sub(' ', line).rstrip()
+
+def drop_quoted_history(lines: Iterable[str], stats: Dict[str, int]) -> Iterator[str]:
+    """
+    Stop at the first reply header once the new message has started, and drop
+    '>' quoted lines. A forwarded message keeps its body and original sender:
+    the forward banner and its Date:/To:/Subject: fields are dropped.
+    """
+    has_content = False
+    in_forward_header = False
+    lines = iter(lines)
+    for line in lines:
+        stripped = line.strip()
+
+        if _FORWARD_HEADER.match(stripped):
+            stats['quoted'] += len(line) + 1
+            in_forward_header = True
+            continue
+        if in_forward_header:
+            if stripped.lower().startswith('from:'):
+                yield line  # the forwarded sender is usually the lead
+                continue
+            if _HEADER_FIELD.match(stripped) or not stripped:
+                stats['quoted'] += len(line) + 1
+                continue
+            in_forward_header = False
+
+        if has_content and any(header.match(stripped) for header in _REPLY_HEADERS):
+            stats['quoted'] += len(line) + 1 + sum(len(rest) + 1 for rest in lines)
+            return
+        if stripped.startswith('>'):
+            stats['quoted'] += len(line) + 1
+            continue
+
+        if stripped:
+            has_content = True
+        yield line
+
+def _is_prose(line: str) -> bool:
+    """A sentence rather than a signature line ("Acme Realty Inc." is not one)"""
+    return len(line) > MAX_SIGNATURE_LINE_CHARS or (line[-1:] in '.?!' and len(line.split()) >= 4)
+
+def _signature_lines(lines: Iterable[str], stats: Dict[str, int]) -> Iterator[str]:
+    """Lines of a signature block worth keeping: the sender's name and contact details"""
+    for line in lines:
+        stripped = line.strip()
+        if stripped and (_PERSON_NAME.match(stripped) or _CONTACT_DETAIL.search(stripped)):
+            yield line
+        else:
+            stats['signature'] += len(line) + 1
+
+def drop_signatures(lines: Iterable[str], stats: Dict[str, int]) -> Iterator[str]:
+    """
+    Drop signature blocks: everything after a '-- ' delimiter, mobile
+    footers, and a closing like "Best regards," when all that follows it is a
+    short block of signature-like lines up to the end of the message. A
+    blank line followed by more text, or a sentence, means the closing was
+    part of the message. Lines in a signature that are a person's name or
+    carry an email address or phone number are kept.
+    """
+    block = None  # a closing and the lines after it, held until the message ends or goes on
+    block_ended = False
+    lines = iter(lines)
+    for line in lines:
+        stripped = line.strip()
+
+        if _MOBILE_SIGNATURES.match(stripped):
+            stats['signature'] += len(line) + 1
+            continue
+        if _SIGNATURE_DELIMITER.match(stripped):
+            stats['signature'] += len(line) + 1
+            if block:
+                stats['signature'] += len(block[0]) + 1
+                yield from _signature_lines(block[1:], stats)
+            yield from _signature_lines(
+                (rest for rest in lines if not _MOBILE_SIGNATURES.match(rest.strip())), stats)
+            return
+
+        if block is not None:
+            if not stripped:
+                block.append(line)
+                block_ended = True
+                continue
+            if (block_ended or _SIGNATURE_CLOSINGS.match(stripped) or _is_prose(stripped)
+                    or sum(1 for held in block[1:] if held.strip()) >= MAX_SIGNATURE_LINES):
+                yield from block
+                block = None
+            else:
+                block.append(line)
+                continue
+
+        if _SIGNATURE_CLOSINGS.match(stripped):
+            block = [line]
+            block_ended = False
+            continue
+        yield line
+
+    if block:
+        stats['signature'] += len(block[0]) + 1
+        yield from _signature_lines(block[1:], stats)
+
+def drop_boilerplate(lines: Iterable[str], stats: Dict[str, int]) -> Iterator[str]:
+    """
+    Drop legal footers and disclaimers trailing the message: from a line that
+    opens one to the end, as long as every paragraph after it opens a footer
+    too. A footer opener followed by more message text was part of the
+    message and is kept. Mobile footers among them are left for
+    drop_signatures.
+    """
+    footer = None  # the trailing block so far, held until the message ends or goes on
+    for line in lines:
+        stripped = line.strip()
+        if footer is None:
+            if _FOOTER_STARTS.match(stripped):
+                footer = [line]
+            else:
+                yield line
+            continue
+        if (not stripped or footer[-1].strip() or _FOOTER_STARTS.match(stripped)
+                or _MOBILE_SIGNATURES.match(stripped)):
+            footer.append(line)
+            continue
+        yield from footer
+        footer = None
+        yield line
+
+    for line in footer or ():
+        if _MOBILE_SIGNATURES.match(line.strip()):
+            yield line
+        else:
+            stats['boilerplate'] += len(line) + 1
+
+def drop_repeated_paragraphs(lines: Iterable[str], stats: Dict[str, int]) -> Iterator[str]:
+    """
+    Keep the first copy of each paragraph. Threads pasted more than once, or
+    footers repeated per message, otherwise reach the model several times.
+    Runs of blank lines collapse to one.
+    """
+    seen = set()
+    paragraph = []
+
+    def flush():
+        if not paragraph:
+            return
+        key = ' '.join(' '.join(paragraph).lower().split())
+        if key in seen:
+            stats['duplicate'] += sum(len(line) + 1 for line in paragraph)
+        else:
+            seen.add(key)
+            yield from paragraph
+            yield ''
+        paragraph.clear()
+
+    for line in lines:
+        if line.strip():
+            paragraph.append(line)
+        else:
+            yield from flush()
+    yield from flush()
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+def preprocess_email(raw_content: str) -> Dict[str, Any]:
+    """
+    Clean a pasted email before entity extraction.
+
+    Args:
+        raw_content (str): Email body as pasted (plain text or HTML)
+
+    Returns:
+        dict: {'success': bool, 'text': str, 'original_chars': int, 'cleaned_chars': int,
+               'reduction_pct': float, 'removed': dict, 'message': str}
+    """
+    raw_content = raw_content or ''
+    stats = {'html': 0, 'quoted': 0, 'signature': 0, 'boilerplate': 0, 'duplicate': 0}
+
+    plain = strip_html(raw_content)
+    stats['html'] = max(len(raw_content) - len(plain), 0)
+
+    lines = iter_lines(plain)
+    lines = drop_quoted_history(lines, stats)
+    lines = drop_boilerplate(lines, stats)
+    lines = drop_signatures(lines, stats)
+    lines = drop_repeated_paragraphs(lines, stats)
+    cleaned = '\n'.join(lines).strip()
+
+    # An email that is nothing but quoted text is still worth extracting from
+    if not cleaned:
+        cleaned = plain.strip()
+
+    original_chars = len(raw_content)
+    cleaned_chars = len(cleaned)
+    reduction = round(100.0 * (1 - cleaned_chars / original_chars), 1) if original_chars else 0.0
+
+    return {
+        'success': True,
+        'text': cleaned,
+        'original_chars': original_chars,
+        'cleaned_chars': cleaned_chars,
+        'reduction_pct': reduction,
+        'removed': stats,
+        'message': f'Email reduced from {original_chars} to {cleaned_chars} characters ({reduction}% smaller)'
+    }
+
+def preprocess_emails(messages: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Clean a stream of emails one at a time (e.g. a mailbox export)"""
+    for message in messages:
+        yield preprocess_email(message)
+
+if __name__ == "__main__":
+    sample = """Hi Narissa,
+
+Please add me as a buyer. I'm looking in Grass Valley for a 3 bedroom home, budget $650K.
+
+Thanks,
+Jennifer Lawrence
+Cell: 916-555-1234
+Sent from my iPhone
+
+CONFIDENTIALITY NOTICE: This email and any attachments are for the sole use
+of the intended recipient(s) and may contain confidential information.
+
+On Mon, Jun 2, 2025 at 9:14 AM Narissa <narissa@example.com> wrote:
+> Hi Jennifer, thanks for reaching out!
+> What area are you interested in?
+"""
+    print("📧 Email Preprocessing")
+    print("=" * 50)
+    result = preprocess_email(sample)
+    print(result['text'])
+    print(f"\n{result['message']}")
+    print(f"Removed: {result['removed']}")
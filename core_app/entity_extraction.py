@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Compiled Entity Extraction Engine
+Shared regex extractor for chat messages, pasted emails and form requests
+"""
+
+import re
+import time
+from typing import Dict, List, Optional, Any, Iterable, NamedTuple
+
+class PatternHit(NamedTuple):
+    """One pattern match: which pattern (priority order), its text and capture groups"""
+    index: int
+    text: str
+    groups: tuple
+    start: int
+    end: int
+
+class CompiledPatternSet:
+    """
+    An ordered list of regexes compiled once, with an optional cheap gate.
+
+    The gate is a necessary condition shared by every pattern in the set (an
+    '@' for emails, a digit for phones and budgets). Messages that fail it
+    skip the whole family without running any pattern. Patterns that pass the
+    gate run in priority order with an early exit, giving the same results as
+    the "try each pattern with re.search" loops this replaces:
+
+    - first(): the first pattern that matches anywhere, at its leftmost position
+    - find_all(): each pattern's non-overlapping matches, pattern by pattern
+    - matches(): whether any pattern matches at all
+    """
+
+    def __init__(self, patterns: Iterable[str], flags: int = 0, gate: Optional[str] = None):
+        self.patterns = list(patterns)
+        self.flags = flags
+        self.compiled = [re.compile(pattern, flags) for pattern in self.patterns]
+        self.gate = re.compile(gate, flags) if gate else None
+
+    def _passes_gate(self, text: str) -> bool:
+        return self.gate is None or self.gate.search(text) is not None
+
+    def first(self, text: str) -> Optional[PatternHit]:
+        """Highest-priority match, equivalent to the first successful re.search in pattern order"""
+        if not self._passes_gate(text):
+            return None
+        for index, regex in enumerate(self.compiled):
+            match = regex.search(text)
+            if match:
+                return PatternHit(index, match.group(0), match.groups(), match.start(), match.end())
+        return None
+
+    def find_all(self, text: str) -> List[PatternHit]:
+        """All matches, ordered by pattern then position, each pattern non-overlapping with itself"""
+        if not self._passes_gate(text):
+            return []
+        return [
+            PatternHit(index, match.group(0), match.groups(), match.start(), match.end())
+            for index, regex in enumerate(self.compiled)
+            for match in regex.finditer(text)
+        ]
+
+    def matches(self, text: str) -> bool:
+        return self._passes_gate(text) and any(regex.search(text) for regex in self.compiled)
+
+# ============================================================================
+# CRM ENTITY PATTERNS (chat messages and pasted emails)
+# ============================================================================
+
+CRM_NAME_PATTERNS = [
+    r"(?:client record for|add|create client)\s+([a-z]+\s+[a-z]+)",
+    r"Name:\s*([a-z]+\s+[a-z]+)",
+    r"([a-z]+\s+[a-z]+)(?:'s record|\s+called|\s+at the)",
+    r"^([a-z]+\s+[a-z]+),",  # "jessica martinez," at start of line
+    r"([a-z]+\s+[a-z]+)\s+called",  # "john smith called"
+    r"add\s+([a-z]+\s+[a-z]+)\s+to",  # "add jennifer lawrence to"
+]
+
+CRM_PHONE_PATTERNS = [
+    r"(?:phone|cell|number)[:\s]*([\(]?\d{3}[\)]?[\s.-]?\d{3}[\s.-]?\d{4})",  # phone: 555-123-4567
+    r"(?:his|her|my)\s+phone\s+(?:is\s+|number\s+is\s+)?([\(]?\d{3}[\)]?[\s.-]?\d{3}[\s.-]?\d{4})",
+    r"([\(]?\d{3}[\)]?[\s.-]?\d{3}[\s.-]?\d{4})",  # standalone phone number anywhere
+    r"(\d{10})",  # 10 digit number without separators
+]
+
+CRM_EMAIL_PATTERNS = [
+    r"(?:email|e-mail)[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",  # email: user@domain.com
+    r"(?:his|her|my)\s+email\s+(?:is\s+|address\s+is\s+)?([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",
+    r"([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",  # standalone email anywhere
+]
+
+CRM_BUDGET_PATTERNS = [
+    r"(?:budget|under|up to)[:\s]*\$?([\d,]+)K?",  # budget: $500K
+    r"(?:with a budget of|budget is|can spend)[:\s]*\$?([\d,]+)K?",  # with a budget of $450000
+    r"(?:for)\s+\$?([\d,]{4,})(?![-.\d])",  # for $76000 (4+ digits to avoid phone numbers)
+    r"\$+([\d,]{4,})(?![-.\d])",  # standalone large numbers like $450000
+]
+
+CRM_AREA_PATTERNS = [
+    r"(?:in|looking in|area preference)[:\s]*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*?)(?:\s+for|\s+with|\s*$)",
+    r"(?:house|property|home)\s+in\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*?)(?:\s+for|\s+with|\s*$)",
+    r"([A-Z][a-z]+\s+County)(?!\s+[a-z])",  # Nevada County
+    r"(?:Location|Area)[:]\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",  # Location: Sacramento
+]
+
+CRM_BEDROOM_PATTERNS = [
+    r"(\d+)\s*(?:bedroom|br|bed)",  # 3 bedroom
+    r"(?:bedroom|br|bed)[:\s]*(\d+)",  # bedroom: 3
+    r"(\d+)BR",  # 3BR
+]
+
+_CRM_NAMES = CompiledPatternSet(CRM_NAME_PATTERNS, re.IGNORECASE)
+_CRM_PHONES = CompiledPatternSet(CRM_PHONE_PATTERNS, re.IGNORECASE, gate=r'\d{3}')
+_CRM_EMAILS = CompiledPatternSet(CRM_EMAIL_PATTERNS, re.IGNORECASE, gate='@')
+_CRM_BUDGETS = CompiledPatternSet(CRM_BUDGET_PATTERNS, re.IGNORECASE, gate=r'\d')
+_CRM_AREAS = CompiledPatternSet(CRM_AREA_PATTERNS, re.IGNORECASE)
+_CRM_BEDROOMS = CompiledPatternSet(CRM_BEDROOM_PATTERNS, re.IGNORECASE, gate=r'\d')
+
+_BUYER_WORDS = ('looking for', 'buyer', 'buying', 'purchase')
+_SELLER_WORDS = ('selling', 'seller', 'list', 'listing')
+
+def extract_crm_entities(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract client entities (name, phone, email, budget, area, bedrooms, type)
+    from free text. Each field takes the highest-priority pattern that matches.
+
+    Returns:
+        dict: Extracted entity data, or None when nothing was found
+    """
+    entities = {}
+
+    hit = _CRM_NAMES.first(text)
+    if hit:
+        name_parts = hit.groups[0].strip().split()
+        if len(name_parts) >= 2:
+            entities['first_name'] = name_parts[0]
+            entities['last_name'] = ' '.join(name_parts[1:])
+
+    hit = _CRM_PHONES.first(text)
+    if hit:
+        entities['phone'] = hit.groups[0]
+
+    hit = _CRM_EMAILS.first(text)
+    if hit:
+        entities['email'] = hit.groups[0]
+
+    hit = _CRM_BUDGETS.first(text)
+    if hit:
+        budget = int(hit.groups[0].replace(',', ''))
+        entities['budget'] = budget * 1000 if 'K' in hit.text.upper() else budget
+
+    hit = _CRM_AREAS.first(text)
+    if hit:
+        entities['area_preference'] = hit.groups[0].strip()
+
+    hit = _CRM_BEDROOMS.first(text)
+    if hit:
+        entities['bedrooms'] = int(hit.groups[0])
+
+    text_lower = text.lower()
+    if any(word in text_lower for word in _BUYER_WORDS):
+        entities['client_type'] = 'buyer'
+    elif any(word in text_lower for word in _SELLER_WORDS):
+        entities['client_type'] = 'seller'
+    else:
+        entities['client_type'] = 'buyer'  # Default
+
+    return entities if entities else None
+
+# ============================================================================
+# CLIENT CREATION PATTERNS (chat "create client" messages)
+# ============================================================================
+
+CLIENT_NAME_PATTERNS = [
+    r'create\s+(?:client|contact):\s*([A-Za-z]+)\s+([A-Za-z]+)',  # "create client: John Smith"
+    r'name\s+is\s+([A-Za-z]+)\s+([A-Za-z]+)',                     # "my name is Jennifer Martinez"
+    r'Full\s+Name[:\s]+([A-Za-z]+)\s+([A-Za-z]+)',               # "Full Name: Jennifer Martinez"
+    r'^([A-Za-z]+)\s+([A-Za-z]+),?\s+email',                     # "Jennifer Martinez, email:" at start
+    r'([A-Za-z]+)\s+([A-Za-z]+)(?:,\s*email|.*@)',              # Name before email pattern
+    r'client[:\s]+([A-Za-z]+)\s+([A-Za-z]+)'                     # "client: Jennifer Martinez"
+]
+
+_CLIENT_NAMES = CompiledPatternSet(CLIENT_NAME_PATTERNS, re.IGNORECASE)
+_CLIENT_EMAIL = re.compile(r'email[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', re.IGNORECASE)
+_CLIENT_PHONE = re.compile(
+    r'phone[:\s]*(\([0-9]{3}\)\s*[0-9]{3}-[0-9]{4}|\([0-9]{3}\)\s*[0-9]{3}\s*[0-9]{4}|[0-9]{3}-[0-9]{3}-[0-9]{4})',
+    re.IGNORECASE
+)
+_CLIENT_ADDRESS = re.compile(r'address[:\s]*([^,\n]+)', re.IGNORECASE)
+_CLIENT_BUYER_WORDS = ('buyer', 'buying', 'purchase', 'looking to buy')
+
+def extract_client_fields(message: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract the fields needed to create a client from a chat message.
+
+    Returns:
+        dict: Extracted client data, or None without a name plus email or phone
+    """
+    extracted = {}
+
+    hit = _CLIENT_NAMES.first(message)
+    if hit:
+        extracted['first_name'], extracted['last_name'] = hit.groups[0], hit.groups[1]
+
+    email_match = _CLIENT_EMAIL.search(message)
+    if email_match:
+        extracted['email'] = email_match.group(1)
+
+    phone_match = _CLIENT_PHONE.search(message)
+    if phone_match:
+        extracted['phone'] = phone_match.group(1)
+
+    message_lower = message.lower()
+    if any(word in message_lower for word in _CLIENT_BUYER_WORDS):
+        extracted['client_type'] = 'buyer'
+    elif any(word in message_lower for word in _SELLER_WORDS):
+        extracted['client_type'] = 'seller'
+    else:
+        extracted['client_type'] = 'buyer'  # Default
+
+    address_match = _CLIENT_ADDRESS.search(message)
+    if address_match:
+        address_parts = address_match.group(1).strip().split(',')
+        if len(address_parts) >= 1:
+            extracted['street_address'] = address_parts[0].strip()
+        if len(address_parts) >= 2:
+            extracted['city'] = address_parts[1].strip()
+        if len(address_parts) >= 3:
+            state_zip = address_parts[2].strip().split()
+            if len(state_zip) >= 1:
+                extracted['state'] = state_zip[0]
+            if len(state_zip) >= 2:
+                extracted['zip_code'] = state_zip[1]
+
+    if ('first_name' in extracted and 'last_name' in extracted and
+            ('email' in extracted or 'phone' in extracted)):
+        return extracted
+
+    return None
+
+# ============================================================================
+# FORM REQUEST PATTERNS (AIFormAssistant)
+# ============================================================================
+
+FORM_INTENT_PATTERNS = {
+    'form_generation': [
+        r'generate.*(?:purchase agreement|contract)',
+        r'create.*(?:form|document|agreement)',
+        r'make.*(?:purchase agreement|offer)',
+        r'prepare.*(?:contract|paperwork)',
+        r'fill out.*(?:form|agreement)',
+        r'populate.*(?:document|form)'
+    ],
+    'form_validation': [
+        r'check.*(?:form|document|contract)',
+        r'validate.*(?:information|data|form)',
+        r'review.*(?:document|contract)',
+        r'verify.*(?:form|agreement)'
+    ],
+    'form_inquiry': [
+        r'what.*(?:forms|documents).*(?:need|required)',
+        r'which.*(?:form|document).*(?:use|choose)',
+        r'show.*(?:available|supported).*forms',
+        r'list.*forms'
+    ],
+    'client_property_extraction': [
+        r'for\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',  # Names
+        r'(?:client|buyer|seller)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+        r'(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln))',  # Addresses
+        r'property.*?(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln))'
+    ]
+}
+
+FORM_NAME_PATTERNS = [
+    r'(?:for|client|buyer|seller)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+    r'([A-Z][a-z]+\s+[A-Z][a-z]+)(?:\s+and|\s+at|\s+on)'
+]
+
+FORM_ADDRESS_PATTERNS = [
+    r'(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Boulevard|Blvd|Lane|Ln))',
+    r'(?:property|address|located).*?(\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr))'
+]
+
+FORM_KEYWORDS = {
+    'purchase agreement': 'california_purchase_agreement',
+    'buyer representation': 'buyer_representation_agreement',
+    'transaction record': 'transaction_record',
+    'property condition': 'verification_property_condition',
+    'advisory': 'statewide_buyer_seller_advisory'
+}
+
+# The entity extraction family is not an intent; its patterns live in
+# FORM_NAME_PATTERNS and FORM_ADDRESS_PATTERNS below
+_FORM_INTENTS = [
+    (intent, CompiledPatternSet(patterns))
+    for intent, patterns in FORM_INTENT_PATTERNS.items()
+    if intent != 'client_property_extraction'
+]
+_FORM_NAMES = CompiledPatternSet(FORM_NAME_PATTERNS)
+_FORM_ADDRESSES = CompiledPatternSet(FORM_ADDRESS_PATTERNS, re.IGNORECASE, gate=r'\d')
+_FORM_AMOUNT = re.compile(r'\$?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)')
+
+def extract_form_request(user_message: str) -> Dict[str, Any]:
+    """
+    Detect the form intent and extract client names, addresses, form types
+    and amounts from a natural language form request.
+
+    Returns:
+        dict: {'intent': str, 'confidence': float, 'entities': dict, 'original_message': str}
+    """
+    message_lower = user_message.lower()
+
+    # Later intent families take precedence, as in the original loop
+    intent = 'unknown'
+    confidence = 0.0
+    for intent_type, compiled in _FORM_INTENTS:
+        if compiled.matches(message_lower):
+            intent = intent_type
+            confidence = 0.9
+
+    entities = {
+        'client_names': [],
+        'property_addresses': [],
+        'form_types': [],
+        'amounts': [],
+        'dates': []
+    }
+
+    for hit in _FORM_NAMES.find_all(user_message):
+        name = hit.groups[0].strip()
+        if len(name.split()) >= 2:  # At least first and last name
+            entities['client_names'].append(name)
+
+    for hit in _FORM_ADDRESSES.find_all(user_message):
+        entities['property_addresses'].append(hit.groups[0].strip())
+
+    for keyword, form_id in FORM_KEYWORDS.items():
+        if keyword in message_lower:
+            entities['form_types'].append(form_id)
+
+    entities['amounts'] = [amount.replace(',', '') for amount in _FORM_AMOUNT.findall(user_message)]
+
+    return {
+        'intent': intent,
+        'confidence': confidence,
+        'entities': entities,
+        'original_message': user_message
+    }
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+BENCHMARK_CORPUS = [
+    "Add Jennifer Lawrence to the CRM, phone 916-555-1234, email jen.lawrence@gmail.com, budget $650K, looking in Sacramento for a 3 bedroom home",
+    "john smith called about the house in Nevada County with a budget of $450000",
+    "Name: Maria Gonzalez\nPhone: (530) 555-0199\nEmail: maria.g@yahoo.com\nLocation: Grass Valley",
+    "create client: Robert Chen, email: rchen@example.com, phone: 555-867-5309, buyer",
+    "Generate a purchase agreement for John Smith at 456 Oak Avenue for $550,000",
+    "Can you check the contract for Mary Wilson on 789 Pine Street?",
+    "What forms do I need for a buyer representation agreement?",
+    "jessica martinez, 9165550123, wants 4BR under 700000",
+    "Please fill out the transaction record for buyer Sarah Connor located at 12 Elm Drive",
+    "Hi, my name is David Park and I'm looking to buy. My email is dpark@outlook.com",
+    "Client record for alex turner: cell 530.555.7788, area preference Nevada City",
+    "Show available forms and list forms for the property condition advisory",
+]
+
+def _sequential_first(patterns: List[str], text: str, flags: int):
+    """Reference implementation: the per-pattern re.search loop this engine replaces"""
+    for pattern in patterns:
+        match = re.search(pattern, text, flags)
+        if match:
+            return match
+    return None
+
+def benchmark_extraction(iterations: int = 200, corpus: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Measure messages/sec for the compiled extractors against the per-pattern loop.
+
+    Returns:
+        dict: {'messages': int, 'compiled_msgs_per_sec': float, 'sequential_msgs_per_sec': float, 'speedup': float}
+    """
+    corpus = corpus or BENCHMARK_CORPUS
+    families = [CRM_NAME_PATTERNS, CRM_PHONE_PATTERNS, CRM_EMAIL_PATTERNS,
+                CRM_BUDGET_PATTERNS, CRM_AREA_PATTERNS, CRM_BEDROOM_PATTERNS]
+    total = iterations * len(corpus)
+
+    compiled_families = [_CRM_NAMES, _CRM_PHONES, _CRM_EMAILS, _CRM_BUDGETS, _CRM_AREAS, _CRM_BEDROOMS]
+
+    # Both sides do the same pattern work; only the matching strategy differs
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in corpus:
+            for compiled in compiled_families:
+                compiled.first(message)
+            for intent, compiled in _FORM_INTENTS:
+                compiled.matches(message.lower())
+            _FORM_NAMES.find_all(message)
+            _FORM_ADDRESSES.find_all(message)
+    compiled_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in corpus:
+            for patterns in families:
+                _sequential_first(patterns, message, re.IGNORECASE)
+            for intent, patterns in FORM_INTENT_PATTERNS.items():
+                if intent != 'client_property_extraction':
+                    _sequential_first(patterns, message.lower(), 0)
+            for pattern in FORM_NAME_PATTERNS:
+                list(re.finditer(pattern, message))
+            for pattern in FORM_ADDRESS_PATTERNS:
+                list(re.finditer(pattern, message, re.IGNORECASE))
+    sequential_elapsed = time.perf_counter() - start
+
+    return {
+        'messages': total,
+        'compiled_msgs_per_sec': round(total / compiled_elapsed, 1),
+        'sequential_msgs_per_sec': round(total / sequential_elapsed, 1),
+        'speedup': round(sequential_elapsed / compiled_elapsed, 2)
+    }
+
+if __name__ == "__main__":
+    print("🔍 Entity Extraction Engine")
+    print("=" * 50)
+    for message in BENCHMARK_CORPUS[:4]:
+        print(f"\n{message[:70]}...")
+        print(f"   CRM entities: {extract_crm_entities(message)}")
+    result = benchmark_extraction()
+    print(f"\n⏱️  {result['messages']} messages: compiled {result['compiled_msgs_per_sec']} msg/s, "
+          f"per-pattern loop {result['sequential_msgs_per_sec']} msg/s ({result['speedup']}x)")
@@ -0,0 +1,686 @@
+#!/usr/bin/env python3
+"""
+Entity Resolution Index for Real Estate CRM
+In-memory lookup of clients and properties by fuzzy name, phone, email and address
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable
+
+from address_normalization import STREET_SUFFIXES, DIRECTIONALS
+
+DATABASE_PATH = Path(__file__).parent.parent / 'real_estate_crm.db'
+
+_NAME_TOKEN = re.compile(r"[a-z]+")
+_DIGITS = re.compile(r'\D')
+_ADDRESS_FOLD = re.compile(r'[^a-z0-9\s]')
+_EMAIL = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_PHONE = re.compile(r'\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}')
+_STREET_MENTION = re.compile(r'\b(\d{1,6})\s+((?:[A-Za-z0-9.]+\s*){1,5})')
+
+# Scores below this are treated as "no match" when a single ID is requested
+MIN_RESOLUTION_SCORE = 0.6
+
+# Address scores closer than this to the runner-up are too close to call
+# ("123 Main" against 123 Main St and 123 Main Ct)
+MIN_PROPERTY_MARGIN = 0.05
+
+# Per-token name scores: exact, one typo away, sounds alike
+EXACT_TOKEN_SCORE = 1.0
+NEAR_TOKEN_SCORE = 0.9
+PHONETIC_TOKEN_SCORE = 0.7
+
+_SOUNDEX_CODES = {
+    letter: digit
+    for digit, letters in {'1': 'BFPV', '2': 'CGJKQSXZ', '3': 'DT', '4': 'L', '5': 'MN', '6': 'R'}.items()
+    for letter in letters
+}
+
+# ============================================================================
+# NORMALIZATION HELPERS
+# ============================================================================
+
+def normalize_name(name: Optional[str]) -> List[str]:
+    """Lowercase a person name and split it into alphabetic tokens"""
+    if not name:
+        return []
+    return _NAME_TOKEN.findall(str(name).lower())
+
+def soundex(word: Optional[str]) -> str:
+    """American Soundex code for a single name token ('Smith' -> 'S530')"""
+    letters = [c for c in str(word or '').upper() if c.isalpha()]
+    if not letters:
+        return ''
+
+    first = letters[0]
+    previous = _SOUNDEX_CODES.get(first, '')
+    codes = []
+    for letter in letters[1:]:
+        code = _SOUNDEX_CODES.get(letter, '')
+        if code and code != previous:
+            codes.append(code)
+        if letter not in 'HW':
+            previous = code
+
+    return (first + ''.join(codes) + '000')[:4]
+
+def metaphone(word: Optional[str], max_length: int = 6) -> str:
+    """
+    Simplified Metaphone key for a single name token.
+
+    Covers the common English rules (silent letters, PH/TH/SH/CH digraphs,
+    soft C/G) which is enough to group 'Katherine'/'Catherine' and
+    'Philips'/'Phillips' under one key.
+    """
+    word = ''.join(c for c in str(word or '').upper() if c.isalpha())
+    if not word:
+        return ''
+
+    if word[:2] in ('AE', 'GN', 'KN', 'PN', 'WR'):
+        word = word[1:]
+    elif word[0] == 'X':
+        word = 'S' + word[1:]
+    elif word[:2] == 'WH':
+        word = 'W' + word[2:]
+
+    vowels = 'AEIOU'
+    length = len(word)
+    key = []
+    i = 0
+    while i < length and len(key) < max_length:
+        ch = word[i]
+        prev = word[i - 1] if i > 0 else ''
+        nxt = word[i + 1] if i + 1 < length else ''
+        nxt2 = word[i + 2] if i + 2 < length else ''
+
+        if ch == prev and ch != 'C':
+            i += 1
+            continue
+
+        if ch in vowels:
+            if i == 0:
+                key.append(ch)
+        elif ch == 'B':
+            if not (prev == 'M' and i == length - 1):
+                key.append('B')
+        elif ch == 'C':
+            if nxt == 'H' or (nxt == 'I' and nxt2 == 'A'):
+                key.append('X')
+            elif nxt in ('I', 'E', 'Y'):
+                if prev != 'S':
+                    key.append('S')
+            else:
+                key.append('K')
+        elif ch == 'D':
+            if nxt == 'G' and nxt2 in ('E', 'I', 'Y'):
+                key.append('J')
+                i += 1
+            else:
+                key.append('T')
+        elif ch == 'G':
+            if nxt == 'H' and nxt2 and nxt2 not in vowels:
+                pass  # silent as in 'Wright'
+            elif nxt == 'N' and (i + 2 == length or word[i + 2:i + 4] == 'ED'):
+                pass  # silent as in 'Sign'
+            elif nxt in ('I', 'E', 'Y') and prev != 'G':
+                key.append('J')
+            else:
+                key.append('K')
+        elif ch == 'H':
+            if prev not in ('C', 'S', 'P', 'T', 'G') and nxt in vowels:
+                key.append('H')
+        elif ch == 'K':
+            if prev != 'C':
+                key.append('K')
+        elif ch == 'P':
+            key.append('F' if nxt == 'H' else 'P')
+        elif ch == 'Q':
+            key.append('K')
+        elif ch == 'S':
+            if nxt == 'H' or (nxt == 'I' and nxt2 in ('O', 'A')):
+                key.append('X')
+            else:
+                key.append('S')
+        elif ch == 'T':
+            if nxt == 'I' and nxt2 in ('O', 'A'):
+                key.append('X')
+            elif nxt == 'H':
+                key.append('0')
+            elif not (nxt == 'C' and nxt2 == 'H'):
+                key.append('T')
+        elif ch == 'V':
+            key.append('F')
+        elif ch in ('W', 'Y'):
+            if nxt in vowels:
+                key.append(ch)
+        elif ch == 'X':
+            key.append('KS')
+        elif ch == 'Z':
+            key.append('S')
+        else:
+            key.append(ch)  # F, J, L, M, N, R
+        i += 1
+
+    return ''.join(key)[:max_length]
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Reduce a phone number to its last 10 digits (7 for local numbers)"""
+    if not phone:
+        return None
+    digits = _DIGITS.sub('', str(phone))
+    if len(digits) == 11 and digits[0] == '1':
+        digits = digits[1:]
+    if len(digits) >= 10:
+        return digits[-10:]
+    if len(digits) == 7:
+        return digits
+    return None
+
+def fold_address(address: Optional[str]) -> str:
+    """
+    Case and punctuation fold an address for trigram comparison.
+
+    Suffixes and directionals are abbreviated token by token (not only in
+    street position) so free text like '456 Oak Avenue, Davis' folds the
+    same way as the stored '456 Oak Ave'.
+    """
+    if not address:
+        return ''
+    tokens = _ADDRESS_FOLD.sub(' ', str(address).lower().replace('.', '')).split()
+    return ' '.join(STREET_SUFFIXES.get(t) or DIRECTIONALS.get(t) or t for t in tokens)
+
+def address_trigrams(address: Optional[str]) -> set:
+    """Character trigrams of a folded address, padded so short tokens still match"""
+    folded = fold_address(address)
+    if not folded:
+        return set()
+    padded = f'  {folded} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def near_exact(a: str, b: str) -> bool:
+    """
+    Same name token, or one typo apart (an extra, missing, changed or
+    swapped letter) with the same first letter: 'Jon'/'John', 'Jhon'/'John'.
+    'Jim'/'Tim' and 'John'/'Jane' are different names, not typos.
+    """
+    if a == b:
+        return True
+    if not a or not b or a[0] != b[0] or min(len(a), len(b)) < 3 or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2]
+                                      and a[i + 2:] == b[i + 2:])
+
+def _phonetic_keys(token: str) -> List[str]:
+    """Both phonetic keys for a token, namespaced so they never collide"""
+    return [f's:{soundex(token)}', f'm:{metaphone(token)}']
+
+# ============================================================================
+# RESOLUTION INDEX
+# ============================================================================
+
+class EntityResolutionIndex:
+    """
+    In-memory resolution index for CRM clients and properties.
+
+    Clients are indexed by name token, phonetic key (Soundex + Metaphone),
+    normalized phone and email. Properties are indexed by address trigram,
+    street number and MLS number. All lookups return ranked candidates
+    without touching the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.clients: Dict[int, Dict[str, Any]] = {}
+        self.properties: Dict[int, Dict[str, Any]] = {}
+
+        self._name_tokens = defaultdict(set)
+        self._phonetic = defaultdict(set)
+        self._phones = defaultdict(set)
+        self._emails = defaultdict(set)
+
+        self._trigrams = defaultdict(set)
+        self._street_numbers = defaultdict(set)
+        self._mls_numbers = {}
+
+    # ------------------------------------------------------------------
+    # Client maintenance
+    # ------------------------------------------------------------------
+
+    def add_client(self, client_id: int, first_name: Optional[str], last_name: Optional[str],
+                   email: Optional[str] = None, phone: Optional[str] = None, **extra) -> None:
+        """Add or replace a client entry"""
+        with self._lock:
+            self.remove_client(client_id)
+
+            first_tokens = normalize_name(first_name)
+            tokens = first_tokens + normalize_name(last_name)
+            phones = {p for p in (normalize_phone(phone), normalize_phone(extra.get('cellular_phone')),
+                                  normalize_phone(extra.get('business_phone'))) if p}
+            email_key = str(email).strip().lower() if email else None
+
+            self.clients[client_id] = {
+                'id': client_id,
+                'name': ' '.join(filter(None, [first_name, last_name])),
+                'email': email,
+                'phone': phone,
+                'tokens': tokens,
+                'first_tokens': first_tokens,
+                'phones': phones,
+                'email_key': email_key
+            }
+
+            for token in tokens:
+                self._name_tokens[token].add(client_id)
+                for key in _phonetic_keys(token):
+                    self._phonetic[key].add(client_id)
+            for normalized in phones:
+                self._phones[normalized].add(client_id)
+            if email_key:
+                self._emails[email_key].add(client_id)
+
+    def remove_client(self, client_id: int) -> None:
+        """Drop a client from every posting list"""
+        with self._lock:
+            entry = self.clients.pop(client_id, None)
+            if not entry:
+                return
+            for token in entry['tokens']:
+                self._name_tokens[token].discard(client_id)
+                for key in _phonetic_keys(token):
+                    self._phonetic[key].discard(client_id)
+            for normalized in entry['phones']:
+                self._phones[normalized].discard(client_id)
+            if entry['email_key']:
+                self._emails[entry['email_key']].discard(client_id)
+
+    def add_client_row(self, row: Dict[str, Any]) -> None:
+        """Index a client from a raw database row (either clients schema)"""
+        self.add_client(
+            row['id'], row.get('first_name'), row.get('last_name'),
+            email=row.get('email'),
+            phone=row.get('home_phone') or row.get('phone'),
+            cellular_phone=row.get('cellular_phone') or row.get('mobile'),
+            business_phone=row.get('business_phone') or row.get('work_phone')
+        )
+
+    # ------------------------------------------------------------------
+    # Property maintenance
+    # ------------------------------------------------------------------
+
+    def add_property(self, property_id: int, address: Optional[str], city: Optional[str] = None,
+                     state: Optional[str] = None, zip_code: Optional[str] = None,
+                     mls_number: Optional[str] = None) -> None:
+        """Add or replace a property entry"""
+        with self._lock:
+            self.remove_property(property_id)
+
+            folded = fold_address(address)
+            trigrams = address_trigrams(address)
+            street_number = folded.split(' ', 1)[0] if folded[:1].isdigit() else None
+
+            self.properties[property_id] = {
+                'id': property_id,
+                'address': ', '.join(str(p) for p in (address, city, state, zip_code) if p),
+                'street': folded,
+                'city': fold_address(city),
+                'mls_number': str(mls_number).strip() if mls_number else None,
+                'trigrams': trigrams,
+                'street_number': street_number
+            }
+
+            for gram in trigrams:
+                self._trigrams[gram].add(property_id)
+            if street_number:
+                self._street_numbers[street_number].add(property_id)
+            if mls_number:
+                self._mls_numbers[str(mls_number).strip()] = property_id
+
+    def remove_property(self, property_id: int) -> None:
+        """Drop a property from every posting list"""
+        with self._lock:
+            entry = self.properties.pop(property_id, None)
+            if not entry:
+                return
+            for gram in entry['trigrams']:
+                self._trigrams[gram].discard(property_id)
+            if entry['street_number']:
+                self._street_numbers[entry['street_number']].discard(property_id)
+            if entry['mls_number'] and self._mls_numbers.get(entry['mls_number']) == property_id:
+                del self._mls_numbers[entry['mls_number']]
+
+    def add_property_row(self, row: Dict[str, Any]) -> None:
+        """Index a property from a raw database row (either properties schema)"""
+        self.add_property(
+            row['id'], row.get('address_line1') or row.get('street_address'),
+            city=row.get('city'), state=row.get('state'),
+            zip_code=row.get('zip_code'), mls_number=row.get('mls_number')
+        )
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def resolve_client(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank clients matching a name, phone number or email address.
+
+        A name match is 'name' when the client's first name appears in the
+        query exactly or one typo away, and 'phonetic' otherwise, e.g. when it
+        only sounds alike ('John Smith' against Jane Smith). Phonetic matches are
+        candidates to confirm, never an ID to act on (see resolve_client_id).
+
+        Returns:
+            list: [{'id', 'name', 'email', 'phone', 'score', 'match'}] best first,
+                  match being 'email', 'phone', 'name' or 'phonetic'
+        """
+        if not query:
+            return []
+
+        with self._lock:
+            query = str(query).strip()
+            scores: Dict[int, float] = {}
+            reasons: Dict[int, str] = {}
+
+            email_match = _EMAIL.search(query)
+            if email_match:
+                for client_id in self._emails.get(email_match.group(0).lower(), ()):
+                    scores[client_id], reasons[client_id] = 1.0, 'email'
+
+            phone = normalize_phone(query) if len(_DIGITS.sub('', query)) >= 7 else None
+            if phone:
+                for client_id in self._phones.get(phone, ()):
+                    scores[client_id], reasons[client_id] = 1.0, 'phone'
+
+            tokens = normalize_name(_EMAIL.sub(' ', query)) if not phone else []
+            if tokens:
+                for client_id, score in self._score_name_tokens(tokens).items():
+                    if score > scores.get(client_id, 0.0):
+                        first_tokens = self.clients[client_id]['first_tokens']
+                        confirmed = all(any(near_exact(token, first) for token in tokens) for first in first_tokens)
+                        scores[client_id], reasons[client_id] = score, 'name' if confirmed else 'phonetic'
+
+            return self._rank_clients(scores, reasons, limit)
+
+    def _score_name_tokens(self, tokens: List[str]) -> Dict[int, float]:
+        """Token-set name similarity; exact tokens score 1.0, typos 0.9, phonetic matches 0.7"""
+        per_token: Dict[int, List[float]] = defaultdict(lambda: [0.0] * len(tokens))
+
+        for position, token in enumerate(tokens):
+            for client_id in self._name_tokens.get(token, ()):
+                per_token[client_id][position] = EXACT_TOKEN_SCORE
+            for key in _phonetic_keys(token):
+                for client_id in self._phonetic.get(key, ()):
+                    if per_token[client_id][position] >= NEAR_TOKEN_SCORE:
+                        continue
+                    near = any(near_exact(token, other) for other in self.clients[client_id]['tokens'])
+                    per_token[client_id][position] = NEAR_TOKEN_SCORE if near else PHONETIC_TOKEN_SCORE
+
+        scores = {}
+        for client_id, token_scores in per_token.items():
+            client_tokens = self.clients[client_id]['tokens']
+            denominator = max(len(tokens), len(client_tokens), 1)
+            scores[client_id] = round(sum(token_scores) / denominator, 3)
+        return scores
+
+    def _rank_clients(self, scores: Dict[int, float], reasons: Dict[int, str],
+                      limit: int) -> List[Dict[str, Any]]:
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.clients[item[0]]['name']))
+        results = []
+        for client_id, score in ranked[:limit]:
+            entry = self.clients[client_id]
+            results.append({
+                'id': client_id,
+                'name': entry['name'],
+                'email': entry['email'],
+                'phone': entry['phone'],
+                'score': score,
+                'match': reasons[client_id]
+            })
+        return results
+
+    def resolve_client_id(self, query: str, min_score: float = MIN_RESOLUTION_SCORE) -> Optional[int]:
+        """
+        The one client a query refers to, or None when it needs confirming.
+
+        Only email, phone and name matches resolve; a best match that merely
+        sounds alike, or one tied with another client, does not.
+        """
+        matches = self.resolve_client(query, limit=2)
+        if not matches or matches[0]['score'] < min_score or matches[0]['match'] == 'phonetic':
+            return None
+        if len(matches) > 1 and matches[1]['score'] == matches[0]['score']:
+            return None
+        return matches[0]['id']
+
+    def resolve_property(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank properties matching a free-form address or MLS number.
+
+        Returns:
+            list: [{'id', 'address', 'mls_number', 'score', 'match'}] best first
+        """
+        if not query:
+            return []
+
+        with self._lock:
+            query = str(query).strip()
+            property_id = self._mls_numbers.get(query)
+            if property_id is not None:
+                entry = self.properties[property_id]
+                return [{'id': property_id, 'address': entry['address'],
+                         'mls_number': entry['mls_number'], 'score': 1.0, 'match': 'mls_number'}]
+
+            return self._rank_properties(self._score_address(query), limit)
+
+    def resolve_property_id(self, query: str, min_score: float = MIN_RESOLUTION_SCORE) -> Optional[int]:
+        """
+        The one property a query refers to, or None when it needs confirming.
+
+        An MLS number always resolves; an address resolves only when its best
+        match is strong enough and clearly ahead of the next one.
+        """
+        matches = self.resolve_property(query, limit=2)
+        if not matches or matches[0]['score'] < min_score:
+            return None
+        if len(matches) > 1 and matches[0]['score'] - matches[1]['score'] < MIN_PROPERTY_MARGIN:
+            return None
+        return matches[0]['id']
+
+    def _score_address(self, query: str) -> Dict[int, float]:
+        """Trigram Jaccard similarity, restricted to the street number when one is given"""
+        folded = fold_address(query)
+        grams = address_trigrams(folded)
+        if not grams:
+            return {}
+
+        street_number = folded.split(' ', 1)[0] if folded[:1].isdigit() else None
+        allowed = self._street_numbers.get(street_number) if street_number else None
+        if street_number and not allowed:
+            return {}
+
+        overlap: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for property_id in self._trigrams.get(gram, ()):
+                if allowed is None or property_id in allowed:
+                    overlap[property_id] += 1
+
+        scores = {}
+        for property_id, shared in overlap.items():
+            entry = self.properties[property_id]
+            street_grams = entry['trigrams']
+            # Compare against the street line alone as well as street + city,
+            # so "456 Oak Ave" and "456 Oak Ave, Springfield" both score well
+            street_score = shared / len(grams | street_grams)
+            containment = shared / len(street_grams) if street_grams else 0.0
+            scores[property_id] = round(max(street_score, containment * 0.95), 3)
+        return scores
+
+    def _rank_properties(self, scores: Dict[int, float], limit: int) -> List[Dict[str, Any]]:
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [{
+            'id': property_id,
+            'address': self.properties[property_id]['address'],
+            'mls_number': self.properties[property_id]['mls_number'],
+            'score': score,
+            'match': 'address'
+        } for property_id, score in ranked[:limit]]
+
+    def find_mentions(self, message: str, min_score: float = 0.8) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Scan a chat message for clients and properties that already exist.
+
+        Used before calling the model so it can act on known IDs directly
+        instead of issuing find_clients / find_properties round trips.
+        """
+        mentions = {'clients': [], 'properties': []}
+        if not message:
+            return mentions
+
+        with self._lock:
+            seen_clients = set()
+            for email in _EMAIL.findall(message):
+                for match in self.resolve_client(email, limit=3):
+                    seen_clients.add(match['id'])
+                    mentions['clients'].append(match)
+            for phone in _PHONE.findall(message):
+                for match in self.resolve_client(phone, limit=3):
+                    if match['id'] not in seen_clients:
+                        seen_clients.add(match['id'])
+                        mentions['clients'].append(match)
+
+            # Names: a client is mentioned when all of their name tokens occur
+            message_tokens = set(normalize_name(_EMAIL.sub(' ', message)))
+            candidate_counts: Dict[int, int] = defaultdict(int)
+            for token in message_tokens:
+                for client_id in self._name_tokens.get(token, ()):
+                    candidate_counts[client_id] += 1
+            for client_id, hits in candidate_counts.items():
+                entry = self.clients[client_id]
+                if client_id in seen_clients or len(entry['tokens']) < 2:
+                    continue
+                if hits >= len(set(entry['tokens'])):
+                    seen_clients.add(client_id)
+                    mentions['clients'].append({
+                        'id': client_id, 'name': entry['name'], 'email': entry['email'],
+                        'phone': entry['phone'], 'score': 1.0, 'match': 'name'
+                    })
+
+            seen_properties = set()
+            for token in re.findall(r'\b[\w-]{5,}\b', message):
+                property_id = self._mls_numbers.get(token)
+                if property_id is not None and property_id not in seen_properties:
+                    seen_properties.add(property_id)
+                    mentions['properties'].extend(self.resolve_property(token, limit=1))
+            for number, words in _STREET_MENTION.findall(message):
+                if number not in self._street_numbers:
+                    continue
+                for match in self.resolve_property(f'{number} {words}', limit=3):
+                    if match['score'] >= min_score and match['id'] not in seen_properties:
+                        seen_properties.add(match['id'])
+                        mentions['properties'].append(match)
+
+        return mentions
+
+    # ------------------------------------------------------------------
+    # Bulk loading
+    # ------------------------------------------------------------------
+
+    def load_from_connection(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        """Rebuild the whole index from the clients and properties tables"""
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            self.__init__()
+            for table, add_row in (('clients', self.add_client_row), ('properties', self.add_property_row)):
+                try:
+                    for row in conn.execute(f'SELECT * FROM {table}'):
+                        add_row(dict(row))
+                except sqlite3.OperationalError:
+                    continue  # Table missing in this database flavour
+            self.loaded = True
+            return {'clients': len(self.clients), 'properties': len(self.properties)}
+
+# Global resolution index shared by the CRM functions and the AI layer
+_resolution_index = EntityResolutionIndex()
+
+def get_resolution_index() -> EntityResolutionIndex:
+    """Return the process-wide resolution index"""
+    return _resolution_index
+
+def load_resolution_index(db_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the resolution index from the CRM database.
+
+    Returns:
+        dict: {'success': bool, 'clients': int, 'properties': int, 'message': str}
+    """
+    db_path = str(db_path or DATABASE_PATH)
+    if not os.path.exists(db_path):
+        return {'success': False, 'clients': 0, 'properties': 0, 'message': f'Database not found: {db_path}'}
+
+    try:
+        conn = sqlite3.connect(db_path)
+        counts = _resolution_index.load_from_connection(conn)
+        conn.close()
+        return {
+            'success': True,
+            'clients': counts['clients'],
+            'properties': counts['properties'],
+            'message': f"Indexed {counts['clients']} clients and {counts['properties']} properties"
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'clients': 0,
+            'properties': 0,
+            'message': f'Error building resolution index: {str(e)}'
+        }
+
+def ensure_resolution_index(db_path: Optional[str] = None) -> EntityResolutionIndex:
+    """Return the index, building it first if this process has not loaded it yet"""
+    if not _resolution_index.loaded:
+        load_resolution_index(db_path)
+    return _resolution_index
+
+def format_resolved_entities(mentions: Dict[str, Iterable[Dict[str, Any]]]) -> str:
+    """Render find_mentions() output as a short prompt section"""
+    lines = []
+    for client in mentions.get('clients', []):
+        contact = ', '.join(filter(None, [client.get('email'), client.get('phone')]))
+        lines.append(f"- Client {client['name']} → client_id={client['id']}" + (f" ({contact})" if contact else ''))
+    for prop in mentions.get('properties', []):
+        mls = f", MLS #{prop['mls_number']}" if prop.get('mls_number') else ''
+        lines.append(f"- Property {prop['address']} → property_id={prop['id']}{mls}")
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    import time
+
+    result = load_resolution_index()
+    print("🔎 Entity Resolution Index")
+    print("=" * 50)
+    print(result['message'])
+
+    index = get_resolution_index()
+    for query in ['John Smith', 'Jon Smyth', '555-123-4567', '456 Oak Ave']:
+        start = time.perf_counter()
+        clients = index.resolve_client(query, limit=3)
+        properties = index.resolve_property(query, limit=3)
+        elapsed_us = (time.perf_counter() - start) * 1_000_000
+        print(f"\n'{query}' ({elapsed_us:.0f}µs)")
+        for match in clients:
+            print(f"   client {match['id']}: {match['name']} score={match['score']} via {match['match']}")
+        for match in properties:
+            print(f"   property {match['id']}: {match['address']} score={match['score']}")
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings for the CRM web app
+
+The MLS store is built once, by a loader process started from the master,
+and published as memory-mapped files (see mls_shared); each worker maps
+that copy on startup instead of loading the feeds itself.
+"""
+
+import os
+import subprocess
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = 120
+
+# Workers attach to the shared store (see load_mls_on_startup)
+os.environ.setdefault('MLS_SHARED_STORE', '1')
+
+# Each worker's form job pool gets its share of the cores (see form_job_queue)
+os.environ.setdefault('FORM_JOB_WORKERS', str(max(1, (os.cpu_count() or 1) // workers)))
+
+def on_starting(server):
+    """Publish the MLS store before the first worker starts"""
+    loader = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mls_shared.py')
+    result = subprocess.run([sys.executable, loader])
+    if result.returncode != 0:
+        server.log.warning("MLS loader failed; workers will load the feeds themselves")
@@ -41,6 +41,11 @@ CREATE TABLE IF NOT EXISTS clients (
     pre_approval_amount DECIMAL(15,2),
     pre_approval_date DATE,
     pre_approval_lender VARCHAR(255),
+    budget_min DECIMAL(15,2),
+    budget_max DECIMAL(15,2),
+    bedrooms INTEGER, -- minimum bedrooms wanted (buyers)
+    area_preference VARCHAR(255), -- cities or subdivisions, comma separated
+    property_type_preference VARCHAR(100),
     client_type VARCHAR(50) DEFAULT 'buyer',
     lead_source VARCHAR(100),
     referral_source VARCHAR(255),
@@ -65,6 +70,7 @@ CREATE TABLE IF NOT EXISTS properties (
     city VARCHAR(100) NOT NULL,
     state VARCHAR(50) NOT NULL,
     zip_code VARCHAR(20) NOT NULL,
+    normalized_address_key VARCHAR(255), -- see address_normalization.normalize_address_key
     county VARCHAR(100),
     township VARCHAR(100),
     legal_description TEXT,
@@ -296,6 +302,9 @@ CREATE TABLE IF NOT EXISTS offers (
     FOREIGN KEY (lender_id) REFERENCES lenders(id),
     FOREIGN KEY (transaction_id) REFERENCES transactions(id)
 );
+
+-- Property conflict checks and address searches are indexed equality/range lookups
+CREATE INDEX IF NOT EXISTS idx_properties_normalized_address_key ON properties(normalized_address_key);
 """
 
 def initialize_database():
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+MLS to CRM Property Sync for Real Estate CRM
+Set-based bulk import of MLS listings into the properties table and reconciliation
+of imported properties with later price and status changes in the feed
+"""
+
+import json
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+from mls_store import MLSStore
+from mls_feeds import listing_properties
+from address_normalization import ensure_address_key_column
+
+try:
+    from property_url_generator import property_url_values
+except ImportError:  # repository root not on sys.path (see real_estate_crm)
+    property_url_values = None
+
+DATABASE_PATH = Path(__file__).parent.parent / 'real_estate_crm.db'
+
+# create_property field -> its column in either properties schema
+# (database/real_estate_crm_schema.sql or init_database.py)
+PROPERTY_COLUMNS = {
+    'address_line1': ('address_line1', 'street_address'),
+    'city': ('city',),
+    'state': ('state',),
+    'zip_code': ('zip_code',),
+    'mls_number': ('mls_number',),
+    'property_type': ('property_type',),
+    'listing_type': ('listing_type',),
+    'bedrooms': ('bedrooms',),
+    'bathrooms': ('bathrooms',),
+    'square_feet': ('square_feet',),
+    'lot_size': ('lot_size', 'lot_size_acres'),
+    'year_built': ('year_built',),
+    'listing_price': ('listing_price', 'listed_price'),
+    'status': ('status',),
+    'property_description': ('property_description',),
+    'public_remarks': ('public_remarks',),
+    'private_remarks': ('private_remarks',),
+    'normalized_address_key': ('normalized_address_key',),
+    'zillow_url': ('zillow_url',),
+    'realtor_url': ('realtor_url',),
+    'mls_portal_url': ('mls_portal_url',),
+}
+
+# (label, listing column) lines of the private remarks on imported properties
+REMARK_DETAILS = (
+    ('Architectural Style', 'Architectural Style'),
+    ('Heating', 'Heating'),
+    ('Cooling', 'Cooling'),
+    ('Fireplace Features', 'Fireplace Features'),
+    ('Garage Spaces', 'Garage Spaces'),
+    ('Parking Features', 'Parking Features'),
+    ('Pool', 'Pool'),
+    ('Subdivision', 'Subdivision'),
+    ('DOM (Days on Market)', 'DOM'),
+    ('Original Price', 'Original Price'),
+    ('Listing Date', 'Listing Date'),
+    ('Status', 'Status'),
+)
+
+def property_columns(conn: sqlite3.Connection, table: str = 'properties') -> Dict[str, str]:
+    """create_property field -> column name, for the fields this table has"""
+    present = {row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()}
+    columns = {}
+    for field, names in PROPERTY_COLUMNS.items():
+        for name in names:
+            if name in present:
+                columns[field] = name
+                break
+    return columns
+
+def _text(series: pd.Series) -> pd.Series:
+    """Display text per value ('N/A' when missing, 649000.0 -> '649000')"""
+    return series.astype(object).map(
+        lambda value: 'N/A' if value is None or value != value else
+        str(int(value)) if isinstance(value, float) and value.is_integer() else str(value))
+
+def private_remarks(listings: pd.DataFrame, mls_numbers: Iterable[str],
+                    imported_on: Optional[str] = None) -> pd.Series:
+    """Private remarks for imported listings, built column by column rather than per listing"""
+    imported_on = imported_on or datetime.now().strftime("%Y-%m-%d")
+    remarks = ('Auto-imported from Nevada County MLS #' + pd.Series(list(mls_numbers), index=listings.index, dtype=object)
+               + f' on {imported_on}\n\nAdditional MLS Details:')
+    for label, column in REMARK_DETAILS:
+        values = _text(listings[column]) if column in listings.columns else 'N/A'
+        remarks = remarks + f'\n- {label}: ' + values
+    return remarks
+
+def _load_keys(conn: sqlite3.Connection, name: str, rows: Iterable[tuple], columns: str) -> None:
+    """Fill a temporary key table for set-based joins against the properties table"""
+    conn.execute(f'CREATE TEMP TABLE IF NOT EXISTS {name} ({columns})')
+    conn.execute(f'DELETE FROM {name}')
+    conn.executemany(f'INSERT INTO {name} VALUES ({", ".join("?" for _ in columns.split(","))})', rows)
+
+def _existing_properties(conn: sqlite3.Connection, table: str, keys: pd.DataFrame) -> Dict[int, Dict[str, Any]]:
+    """
+    Properties already in the CRM for a batch, by listing number or by
+    normalized address, found with one join against a temporary key table.
+
+    Returns:
+        dict: batch row -> {'property_id': int, 'match': 'mls_number' | 'address'}
+    """
+    _load_keys(conn, 'mls_import_keys', keys[['row', 'mls_number', 'address_key']].itertuples(index=False, name=None),
+               'row INTEGER PRIMARY KEY, mls_number TEXT, address_key TEXT')
+    matches = conn.execute(f'''
+        SELECT k.row, p.id, 'mls_number' FROM mls_import_keys k JOIN {table} p ON p.mls_number = k.mls_number
+        UNION ALL
+        SELECT k.row, p.id, 'address' FROM mls_import_keys k JOIN {table} p ON p.normalized_address_key = k.address_key
+    ''').fetchall()
+
+    existing = {}
+    for row, property_id, match in matches:
+        if row not in existing or match == 'mls_number':
+            existing[row] = {'property_id': property_id, 'match': match}
+    return existing
+
+def import_listings(conn: sqlite3.Connection, store: MLSStore, mls_numbers: Iterable[str],
+                    table: str = 'properties') -> Dict[str, Any]:
+    """
+    Create CRM properties for many MLS listings in one transaction.
+
+    Listings already in the CRM (same listing number or normalized address)
+    are resolved with one query and skipped, the new rows are prepared
+    column-wise with the feed converters and inserted with executemany,
+    and everything is committed once.
+
+    Args:
+        conn: Open CRM database connection
+        store (MLSStore): Loaded MLS listings
+        mls_numbers: Listing numbers to import (duplicates ignored)
+        table (str): Properties table
+
+    Returns:
+        dict: {'success': bool, 'created': int, 'existing': int, 'not_found': int,
+               'results': [{'mls_number', 'status': 'created' | 'exists' | 'not_found', 'property_id', 'message'}],
+               'seconds': float, 'message': str}
+    """
+    start = time.perf_counter()
+    requested = list(dict.fromkeys(str(number).strip() for number in mls_numbers if str(number).strip()))
+    results = {number: {'mls_number': number, 'status': 'not_found', 'property_id': None,
+                        'message': f'MLS #{number} not found in loaded data'} for number in requested}
+
+    found = [(number, store.positions.get(number)) for number in requested]
+    found = [(number, position) for number, position in found if position is not None]
+    numbers = [number for number, _ in found]
+    positions = np.array([position for _, position in found], dtype=np.int64)
+
+    columns = property_columns(conn, table)
+    if 'address_line1' not in columns:
+        raise ValueError(f'Table {table} has no street address column')
+    ensure_address_key_column(conn, table)
+    columns = property_columns(conn, table)
+
+    listings = store.frame(positions)
+    fields = listing_properties(listings)
+    fields['mls_number'] = numbers
+    fields['private_remarks'] = private_remarks(listings, numbers).to_numpy()
+    address_keys = [key.decode('utf-8') or None for key in np.asarray(store.address_keys)[positions].tolist()]
+    fields['normalized_address_key'] = address_keys
+    fields['status'] = fields['status'].where(fields['status'].notna(), 'active')
+    urls = [property_url_values(*row) if property_url_values else (None, None, None) for row in
+            fields[['address_line1', 'city', 'state', 'zip_code', 'mls_number']].itertuples(index=False, name=None)]
+    url_columns = ['zillow_url', 'realtor_url', 'mls_portal_url']
+    fields[url_columns] = pd.DataFrame(urls, index=fields.index, columns=url_columns, dtype=object)
+    keys = pd.DataFrame({'row': np.arange(len(numbers)), 'mls_number': numbers, 'address_key': address_keys})
+
+    try:
+        existing = _existing_properties(conn, table, keys)
+        # Two listings at one address in the same batch create one property
+        repeated = keys['address_key'].notna() & keys['address_key'].duplicated()
+        create = [row for row in range(len(numbers)) if row not in existing and not repeated.iloc[row]]
+
+        insert_fields = list(columns)
+        placeholders = ', '.join('?' for _ in insert_fields)
+        conn.executemany(
+            f'INSERT INTO {table} ({", ".join(columns[field] for field in insert_fields)}) VALUES ({placeholders})',
+            fields.iloc[create][insert_fields].itertuples(index=False, name=None)
+        )
+        created_ids = dict(conn.execute(f'''
+            SELECT k.row, p.id FROM mls_import_keys k JOIN {table} p ON p.mls_number = k.mls_number
+        ''').fetchall())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    by_address = {}
+    for row in create:
+        if address_keys[row]:
+            by_address[address_keys[row]] = created_ids.get(row)
+    for row, number in enumerate(numbers):
+        if row in existing:
+            match = existing[row]
+            reason = 'this MLS number' if match['match'] == 'mls_number' else 'this address'
+            results[number] = {'mls_number': number, 'status': 'exists', 'property_id': match['property_id'],
+                               'message': f'Property already exists with {reason}'}
+        elif repeated.iloc[row]:
+            results[number] = {'mls_number': number, 'status': 'exists',
+                               'property_id': by_address.get(address_keys[row]),
+                               'message': 'Another listing in this import has the same address'}
+        else:
+            results[number] = {'mls_number': number, 'status': 'created', 'property_id': created_ids.get(row),
+                               'message': f'Created property from MLS #{number}'}
+
+    outcomes = list(results.values())
+    counts = {status: sum(1 for outcome in outcomes if outcome['status'] == status)
+              for status in ('created', 'exists', 'not_found')}
+    return {
+        'success': True,
+        'created': counts['created'],
+        'existing': counts['exists'],
+        'not_found': counts['not_found'],
+        'results': outcomes,
+        'seconds': round(time.perf_counter() - start, 3),
+        'message': (f"Imported {counts['created']} MLS listings "
+                    f"({counts['exists']} already in CRM, {counts['not_found']} not found)")
+    }
+
+def index_properties(conn: sqlite3.Connection, property_ids: List[int], table: str = 'properties') -> None:
+    """Add newly written properties to the in-memory entity resolution index"""
+    if not property_ids:
+        return
+    try:
+        from entity_resolution import get_resolution_index
+        index = get_resolution_index()
+        placeholders = ', '.join('?' for _ in property_ids)
+        cursor = conn.execute(f'SELECT * FROM {table} WHERE id IN ({placeholders})', property_ids)
+        names = [description[0] for description in cursor.description]
+        for row in cursor.fetchall():
+            index.add_property_row(dict(zip(names, row)))
+    except Exception as e:
+        print(f"⚠️  Entity index refresh error: {str(e)}")
+
+# ============================================================================
+# RECONCILIATION
+# ============================================================================
+
+# Property fields kept in step with the feed after import
+RECONCILED_FIELDS = ('listing_price', 'status')
+
+AUDIT_SOURCE = 'mls_reconciliation'
+
+def ensure_audit_log(conn: sqlite3.Connection) -> None:
+    """SQLite version of the audit_log table in database/real_estate_crm_schema.sql"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS audit_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name VARCHAR(100),
+        record_id INTEGER,
+        action VARCHAR(50),
+        old_values TEXT,
+        new_values TEXT,
+        user_id INTEGER,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        ip_address VARCHAR(45),
+        user_agent TEXT
+    )''')
+
+def _plain(value: Any) -> Any:
+    """numpy scalar -> Python value, NaN -> None (for JSON and SQL parameters)"""
+    if value is None or value != value:
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+def _changed(field: str, old: pd.Series, new: pd.Series) -> pd.Series:
+    """Rows where the feed has a value for `field` that differs from the CRM's"""
+    if field == 'listing_price':
+        old = pd.to_numeric(old, errors='coerce')
+        new = pd.to_numeric(new, errors='coerce')
+        return new.notna() & (old.isna() | ((old - new).abs() >= 0.005))
+    return new.notna() & (old.fillna('').astype(str) != new.astype(str))
+
+def reconcile_listings(conn: sqlite3.Connection, store: MLSStore, mls_numbers: Optional[Iterable[str]] = None,
+                       table: str = 'properties') -> Dict[str, Any]:
+    """
+    Bring MLS-imported properties up to date with the feed's price and status.
+
+    CRM properties are joined to the loaded listings by MLS number, the
+    changed fields are computed column-wise and applied with one batched
+    UPDATE per field, with an audit_log row per changed property, all in
+    one transaction. Properties whose listing left the feed are counted,
+    not modified.
+
+    Args:
+        conn: Open CRM database connection
+        store (MLSStore): Loaded MLS listings
+        mls_numbers: Only these listings (e.g. a refresh delta); every property with an MLS number when None
+        table (str): Properties table
+
+    Returns:
+        dict: {'success': bool, 'checked': int, 'updated': int, 'price_changes': int, 'status_changes': int,
+               'not_in_feed': int, 'changes': [{'property_id', 'mls_number', 'changes': {field: [old, new]}}],
+               'seconds': float, 'message': str}
+    """
+    start = time.perf_counter()
+    columns = property_columns(conn, table)
+    fields = [field for field in RECONCILED_FIELDS if field in columns]
+    if 'mls_number' not in columns:
+        raise ValueError(f'Table {table} has no mls_number column')
+    selected = ', '.join(f'p.{columns[field]}' for field in fields)
+
+    if mls_numbers is None:
+        rows = conn.execute(f"SELECT p.id, p.mls_number{', ' + selected if selected else ''} FROM {table} p "
+                            "WHERE p.mls_number IS NOT NULL AND p.mls_number != ''").fetchall()
+    else:
+        numbers = list(dict.fromkeys(str(number).strip() for number in mls_numbers))
+        _load_keys(conn, 'mls_reconcile_keys', ((number,) for number in numbers), 'mls_number TEXT PRIMARY KEY')
+        rows = conn.execute(f"SELECT p.id, p.mls_number{', ' + selected if selected else ''} FROM mls_reconcile_keys k "
+                            f"JOIN {table} p ON p.mls_number = k.mls_number").fetchall()
+
+    crm = pd.DataFrame(rows, columns=['id', 'mls_number'] + fields)
+    crm['mls_number'] = crm['mls_number'].astype(str).str.strip()
+    positions = crm['mls_number'].map(lambda number: store.positions.get(number))
+    in_feed = positions.notna().to_numpy()
+    crm = crm[in_feed].reset_index(drop=True)
+    feed = listing_properties(store.frame(positions[in_feed].astype(np.int64).to_numpy()))
+
+    changed = {field: _changed(field, crm[field], feed[field]).to_numpy() for field in fields}
+    any_change = np.logical_or.reduce(list(changed.values())) if changed else np.zeros(len(crm), dtype=bool)
+
+    changes = []
+    for row in np.flatnonzero(any_change).tolist():
+        changes.append({
+            'property_id': int(crm['id'].iloc[row]),
+            'mls_number': crm['mls_number'].iloc[row],
+            'changes': {field: [_plain(crm[field].iloc[row]), _plain(feed[field].iloc[row])]
+                        for field in fields if changed[field][row]}
+        })
+
+    if changes:
+        try:
+            ensure_audit_log(conn)
+            touch = ', updated_at = CURRENT_TIMESTAMP' if 'updated_at' in {
+                row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()} else ''
+            for field in fields:
+                rows = np.flatnonzero(changed[field]).tolist()
+                conn.executemany(f'UPDATE {table} SET {columns[field]} = ?{touch} WHERE id = ?',
+                                 [(_plain(feed[field].iloc[row]), int(crm['id'].iloc[row])) for row in rows])
+            conn.executemany(
+                'INSERT INTO audit_log (table_name, record_id, action, old_values, new_values, user_agent) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(table, change['property_id'], 'UPDATE',
+                  json.dumps({field: values[0] for field, values in change['changes'].items()}),
+                  json.dumps({field: values[1] for field, values in change['changes'].items()}),
+                  AUDIT_SOURCE) for change in changes]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    counts = {field: int(changed[field].sum()) for field in fields}
+    price_changes, status_changes = counts.get('listing_price', 0), counts.get('status', 0)
+    return {
+        'success': True,
+        'checked': len(crm),
+        'updated': len(changes),
+        'price_changes': price_changes,
+        'status_changes': status_changes,
+        'not_in_feed': int((~in_feed).sum()),
+        'changes': changes,
+        'seconds': round(time.perf_counter() - start, 3),
+        'message': (f'Reconciled {len(crm)} MLS properties: {len(changes)} updated '
+                    f'({price_changes} price, {status_changes} status changes)')
+    }
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+MLS Feed Registry for Real Estate CRM
+Declarative column mappings from each MLS export layout onto the canonical listing
+columns, parallel per-feed parsing and a merged, deduplicated listing store
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from mls_store import (MLSStore, NumericColumn, TextColumn, StringArray, MLS_KEY_COLUMN,
+                       hash_columns, is_numeric_series, read_feed_chunks)
+
+# The canonical listing columns are the Nevada County export's names: every
+# feed is mapped onto them, so search, property creation and matching only
+# ever see one schema.
+
+# ============================================================================
+# CONVERTERS
+# ============================================================================
+# Each converter takes a whole source column (one chunk) and returns the
+# converted column. Patterns are compiled once at import.
+
+_NUMBER_NOISE = re.compile(r'[$,\s]')
+_FIRST_NUMBER = re.compile(r'(\d+(?:\.\d+)?)')
+_TYPE_PATTERNS = (
+    (re.compile(r'residential|single'), 'single_family'),
+    (re.compile(r'condo'), 'condo'),
+    (re.compile(r'town'), 'townhouse'),
+    (re.compile(r'land|lot'), 'land'),
+)
+# Checked in order: 'Active Under Contract' is pending, not active
+_STATUS_PATTERNS = (
+    (re.compile(r'pending|contingent|under contract|backup'), 'pending'),
+    (re.compile(r'sold|closed'), 'sold'),
+    (re.compile(r'expired'), 'expired'),
+    (re.compile(r'withdrawn|cancel'), 'withdrawn'),
+    (re.compile(r'active|coming soon'), 'active'),
+)
+
+def to_number(series: pd.Series) -> pd.Series:
+    """'$649,000' -> 649000.0; blanks and unparseable values -> NaN"""
+    if is_numeric_series(series):
+        return series
+    return pd.to_numeric(series.astype(str).str.replace(_NUMBER_NOISE, '', regex=True), errors='coerce')
+
+def first_number(series: pd.Series) -> pd.Series:
+    """First number in each value: '4 (5)' bedrooms -> 4.0"""
+    if is_numeric_series(series):
+        return series
+    return pd.to_numeric(series.astype(str).str.extract(_FIRST_NUMBER, expand=False), errors='coerce')
+
+def full_bathrooms(series: pd.Series) -> pd.Series:
+    """Whole part of a combined bathroom count: 2.5 -> 2"""
+    return np.floor(to_number(series))
+
+def partial_bathrooms(series: pd.Series) -> pd.Series:
+    """One partial bathroom when a combined count has a fraction: 2.5 -> 1"""
+    total = to_number(series)
+    return (total - np.floor(total) > 0).astype(float).where(total.notna())
+
+def _classify(series: pd.Series, patterns, default: Optional[str]) -> pd.Series:
+    """First matching pattern's label per value, `default` when none matches"""
+    lowered = series.astype(str).str.lower()
+    result = pd.Series(default, index=series.index, dtype=object)
+    decided = pd.Series(False, index=series.index)
+    for pattern, label in patterns:
+        hit = lowered.str.contains(pattern) & ~decided & series.notna()
+        result[hit] = label
+        decided |= hit
+    return result
+
+def property_types(series: pd.Series) -> pd.Series:
+    """MLS property type -> CRM property_type (single_family when unrecognised)"""
+    return _classify(series, _TYPE_PATTERNS, 'single_family')
+
+def listing_statuses(series: pd.Series) -> pd.Series:
+    """MLS status -> CRM status (active, pending, sold, expired, withdrawn; None when unrecognised)"""
+    return _classify(series, _STATUS_PATTERNS, None)
+
+# ============================================================================
+# FEED SPECS
+# ============================================================================
+
+class FeedSpec:
+    """
+    One MLS export layout.
+
+    `columns` maps each canonical column to its source column, either a
+    name or a (name, converter) pair. Source columns missing from a file
+    are skipped. With keep_unmapped, the source columns the mapping does not
+    mention are kept under their own names, in file order.
+
+    `signature` lists the source columns that identify the layout in a
+    file's header (see detect_feed). Converters must be module-level
+    functions so specs can be sent to the parsing process pool.
+    """
+
+    def __init__(self, name: str, columns: Dict[str, Union[str, Tuple[str, Callable]]],
+                 signature: Iterable[str], description: str = '', keep_unmapped: bool = False,
+                 key_column: str = MLS_KEY_COLUMN):
+        self.name = name
+        self.columns = {target: (source, None) if isinstance(source, str) else tuple(source)
+                        for target, source in columns.items()}
+        self.signature = tuple(signature)
+        self.description = description
+        self.keep_unmapped = keep_unmapped
+        self.key_column = key_column
+
+    def source_column(self, target: str) -> str:
+        return self.columns.get(target, (target, None))[0]
+
+    def matches(self, header: Iterable[str]) -> bool:
+        header = set(header)
+        return all(name in header for name in self.signature)
+
+    @property
+    def digest(self) -> str:
+        """Changes whenever the mapping does, so snapshots of the old mapping are not reused"""
+        mapping = [[target, source, converter.__name__ if converter else None]
+                   for target, (source, converter) in self.columns.items()]
+        payload = json.dumps([self.name, self.key_column, self.keep_unmapped, mapping])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:10]
+
+    def apply(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Map one parsed chunk onto the canonical columns"""
+        targets: Dict[str, List[str]] = {}
+        for target, (source, _) in self.columns.items():
+            if source in frame.columns:
+                targets.setdefault(source, []).append(target)
+
+        if self.keep_unmapped:
+            order = [(source, target) for source in frame.columns for target in targets.get(source, [source])]
+        else:
+            order = [(source, target) for target, (source, _) in self.columns.items() if source in frame.columns]
+
+        mapped = {}
+        for source, target in order:
+            mapping = self.columns.get(target)
+            converter = mapping[1] if mapping and mapping[0] == source else None
+            mapped[target] = converter(frame[source]) if converter else frame[source]
+        return pd.DataFrame(mapped, index=frame.index)
+
+    def chunks(self, csv_path: str, rows_per_chunk: int,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[pd.DataFrame]:
+        """Canonical chunks of a CSV in this layout (see read_feed_chunks)"""
+        for chunk in read_feed_chunks(csv_path, self.source_column(self.key_column), rows_per_chunk, progress):
+            yield self.apply(chunk)
+
+# Nevada County export: already canonical, numbers guarded against '$1,234' text
+NEVADA_COUNTY_FEED = FeedSpec(
+    'nevada_county',
+    {
+        'List Price': ('List Price', to_number),
+        'Original Price': ('Original Price', to_number),
+        'Close Price': ('Close Price', to_number),
+        'Square Footage': ('Square Footage', to_number),
+        'Lot Size - Acres': ('Lot Size - Acres', to_number),
+        'DOM': ('DOM', to_number),
+        'Full Bathrooms': ('Full Bathrooms', to_number),
+        'Partial Bathrooms': ('Partial Bathrooms', to_number),
+    },
+    signature=('Address - Street Complete',),
+    description='Nevada County MLS export (canonical column names)',
+    keep_unmapped=True
+)
+
+# Simple listing export (Listing.csv): one combined bathroom count
+SIMPLE_LISTING_FEED = FeedSpec(
+    'simple_listing',
+    {
+        'Listing Number': 'Listing Number',
+        'Address - Street Complete': 'Property_Address',
+        'Address - City': 'City',
+        'State': 'State',
+        'Address - Zip Code': 'Zip',
+        'List Price': ('Price', to_number),
+        'Bedrooms And Possible Bedrooms': ('Bedrooms', first_number),
+        'Full Bathrooms': ('Bathrooms', full_bathrooms),
+        'Partial Bathrooms': ('Bathrooms', partial_bathrooms),
+        'Square Footage': ('Square_Feet', to_number),
+        'Property Type': 'Property_Type',
+        'Status': 'Status',
+    },
+    signature=('Property_Address', 'Price'),
+    description='Simple listing export (Listing.csv layout)'
+)
+
+MLS_FEEDS: Dict[str, FeedSpec] = {}
+DEFAULT_FEED = NEVADA_COUNTY_FEED.name
+
+def register_feed(spec: FeedSpec) -> FeedSpec:
+    """Add or replace a feed layout; detect_feed tries layouts in registration order"""
+    MLS_FEEDS[spec.name] = spec
+    return spec
+
+register_feed(NEVADA_COUNTY_FEED)
+register_feed(SIMPLE_LISTING_FEED)
+
+def get_feed(feed: Union[str, FeedSpec]) -> FeedSpec:
+    if isinstance(feed, FeedSpec):
+        return feed
+    if feed not in MLS_FEEDS:
+        raise ValueError(f'Unknown MLS feed "{feed}". Registered feeds: {list(MLS_FEEDS)}')
+    return MLS_FEEDS[feed]
+
+def detect_feed(csv_path: str) -> FeedSpec:
+    """Layout of a CSV from its header (the default layout when none matches)"""
+    header = pd.read_csv(csv_path, nrows=0, quotechar='"', skipinitialspace=True).columns
+    for spec in MLS_FEEDS.values():
+        if spec.matches(header):
+            return spec
+    return MLS_FEEDS[DEFAULT_FEED]
+
+# ============================================================================
+# CRM PROPERTY FIELDS
+# ============================================================================
+
+def listing_properties(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    CRM property fields for canonical listing rows, one column per
+    create_property argument, None where the listing has no value.
+    """
+    def column(*names):
+        for name in names:
+            if name in frame.columns:
+                return frame[name]
+        return pd.Series(None, index=frame.index, dtype=object)
+
+    def text(series):
+        return series.astype(object).where(series.notna(), '').map(
+            lambda value: str(int(value)) if isinstance(value, float) and value.is_integer() else str(value))
+
+    bathrooms = (to_number(column('Full Bathrooms')).fillna(0)
+                 + 0.5 * to_number(column('Partial Bathrooms')).fillna(0))
+    remarks = text(column('Public Remarks'))
+    states = text(column('State'))
+    fields = pd.DataFrame({
+        'address_line1': text(column('Address - Street Complete')),
+        'city': text(column('Address - City')),
+        'state': states.where(states != '', 'CA'),  # Nevada County feed omits state
+        'zip_code': text(column('Address - Zip Code')),
+        'mls_number': text(column(MLS_KEY_COLUMN)),
+        'listing_price': to_number(column('List Price', 'Current Listing Price')),
+        'bedrooms': first_number(column('Bedrooms And Possible Bedrooms')),
+        'bathrooms': bathrooms.where(bathrooms > 0),
+        'square_feet': np.floor(to_number(column('Square Footage'))).astype('Int64'),
+        'lot_size': to_number(column('Lot Size - Acres')),
+        'year_built': np.floor(to_number(column('Year Built Details'))).astype('Int64'),
+        'property_type': property_types(column('Property Type').fillna('Residential')),
+        'listing_type': 'sale',
+        'status': listing_statuses(column('Status')),
+        'property_description': remarks,
+        'public_remarks': remarks,
+    }, index=frame.index)
+    return fields.astype(object).where(fields.notna(), None)
+
+# ============================================================================
+# MERGING
+# ============================================================================
+
+def _concat_column(parts: List[Tuple[Any, np.ndarray, int]]):
+    """One column across stores: (column or None, kept positions, kept rows) per store"""
+    present = [column for column, _, _ in parts if column is not None]
+    if all(column.kind == 'numeric' for column in present):
+        return NumericColumn(np.concatenate([
+            column.values[keep] if column is not None else np.full(rows, np.nan)
+            for column, keep, rows in parts
+        ]))
+
+    merged = TextColumn(np.empty(0, dtype=np.int32), StringArray.from_strings([]))
+    for column, keep, rows in parts:
+        if column is None:
+            merged = TextColumn(np.concatenate([merged.codes, np.full(rows, -1, dtype=np.int32)]),
+                                merged.categories)
+        elif column.kind == 'text':
+            merged = merged.concat(column.take(keep))
+        else:
+            merged = merged.extend(pd.Series(column.values[keep]))
+    return merged
+
+def merge_stores(stores: List[MLSStore]) -> MLSStore:
+    """
+    One store from several feeds' stores. A listing is a duplicate when its
+    listing number, or its normalized address, already came from an earlier
+    store; earlier stores win. Columns are the union of all feeds' columns.
+    """
+    if len(stores) == 1:
+        return stores[0]
+
+    seen_keys = pd.Index([])
+    seen_addresses = np.array([], dtype='S1')
+    kept = []
+    for store in stores:
+        keys = pd.Index(store.keys())
+        addresses = np.asarray(store.address_keys)
+        duplicate = keys.isin(seen_keys) | ((addresses != b'') & np.isin(addresses, seen_addresses))
+        keep = np.flatnonzero(~duplicate)
+        kept.append(keep)
+        seen_keys = seen_keys.append(keys[keep])
+        seen_addresses = np.concatenate([seen_addresses, addresses[keep]])
+
+    names = list(dict.fromkeys(name for store in stores for name in store.column_names))
+    columns = {
+        name: _concat_column([(store.columns.get(name), keep, len(keep)) for store, keep in zip(stores, kept)])
+        for name in names
+    }
+    rows = len(seen_keys)
+    return MLSStore(columns, StringArray.from_strings(seen_keys.tolist()), hash_columns(columns.values(), rows),
+                    seen_addresses, stores[0].key_column)
+
+def store_delta(old: MLSStore, new: MLSStore) -> Dict[str, List[str]]:
+    """Listings added, changed (by row hash) and removed between two store versions"""
+    old_keys = pd.Index(old.keys())
+    new_keys = pd.Index(new.keys())
+    positions = old_keys.get_indexer(new_keys)
+    is_new = positions < 0
+    is_changed = ~is_new & (np.asarray(old.hashes)[np.maximum(positions, 0)] != np.asarray(new.hashes))
+    return {
+        'added': new_keys[is_new].tolist(),
+        'changed': new_keys[is_changed].tolist(),
+        'removed': old_keys.difference(new_keys).tolist()
+    }
+
+# ============================================================================
+# PARALLEL LOADING
+# ============================================================================
+
+def _pool_context():
+    # fork reuses the already-imported parser modules and does not re-run the
+    # app's module-level startup in every worker, as spawn would
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+
+def _parse_feed(csv_path: str, feed: FeedSpec, root: Optional[Path]) -> Dict[str, Any]:
+    """Pool worker: stream one feed into its snapshot; the parent maps it afterwards"""
+    from mls_snapshot import load_store_cached
+    result = load_store_cached(csv_path, feed.key_column, root, feed=feed)
+    return {'count': len(result['store']), 'seconds': result['seconds'], 'message': result['message']}
+
+def load_feeds(feeds: Iterable[Union[str, Tuple[str, Union[str, FeedSpec]]]], root: Optional[Path] = None,
+               max_workers: Optional[int] = None,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Load several MLS feeds into one deduplicated store.
+
+    Feeds whose snapshot is missing or stale are parsed at the same time on
+    a process pool, each worker streaming its CSV into a snapshot; every
+    feed's snapshot is then memory-mapped here and merged (merge_stores).
+
+    Args:
+        feeds: CSV paths, or (csv_path, feed name or FeedSpec) pairs; layouts
+            are detected from the header when not given. Earlier feeds win duplicates.
+        root (Path): Snapshot root (default: snapshot_dir())
+        max_workers (int): Parsing processes (default: one per stale feed, up to the CPU count)
+        progress (callable): Chunk progress for feeds parsed in this process
+
+    Returns:
+        dict: {'store': MLSStore, 'feeds': [{'path', 'feed', 'count', 'from_snapshot', 'fingerprint',
+               'seconds', 'message'}], 'duplicates': int, 'seconds': float}
+    """
+    from mls_snapshot import find_snapshot, load_store_cached
+
+    start = time.perf_counter()
+    resolved = []
+    for entry in feeds:
+        path, feed = entry if isinstance(entry, tuple) else (entry, None)
+        resolved.append((path, get_feed(feed) if feed else detect_feed(path)))
+
+    stale = [(path, feed) for path, feed in resolved if find_snapshot(path, root, feed)[0] is None]
+    workers = min(len(stale), max_workers or os.cpu_count() or 1)
+    parsed = {}
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            futures = {pool.submit(_parse_feed, path, feed, root): path for path, feed in stale}
+            for future in as_completed(futures):
+                parsed[futures[future]] = future.result()
+
+    stores, loaded = [], []
+    for path, feed in resolved:
+        result = load_store_cached(path, feed.key_column, root, progress, feed=feed)
+        stores.append(result['store'])
+        worker = parsed.get(path)
+        loaded.append({
+            'path': path,
+            'feed': feed.name,
+            'count': len(result['store']),
+            'from_snapshot': result['from_snapshot'] and worker is None,
+            'fingerprint': result['fingerprint'],
+            'seconds': worker['seconds'] if worker else result['seconds'],
+            'message': worker['message'] if worker else result['message']
+        })
+
+    store = merge_stores(stores)
+    return {
+        'store': store,
+        'feeds': loaded,
+        'duplicates': sum(len(feed_store) for feed_store in stores) - len(store),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Load and merge MLS feeds')
+    parser.add_argument('csv', nargs='*', default=['documents/canonicalListing.csv', 'Listing.csv'],
+                        help='MLS CSV feeds (earlier feeds win duplicates)')
+    parser.add_argument('--workers', type=int, default=None, help='Parsing processes')
+    args = parser.parse_args()
+
+    print("🗂️  MLS Feed Registry")
+    print("=" * 50)
+    for spec in MLS_FEEDS.values():
+        print(f"  {spec.name}: {spec.description}")
+
+    result = load_feeds(args.csv, max_workers=args.workers)
+    for feed in result['feeds']:
+        origin = 'snapshot' if feed['from_snapshot'] else 'CSV'
+        print(f"  {feed['path']} ({feed['feed']}): {feed['count']} listings from {origin}")
+    print(f"\n✅ {len(result['store'])} listings merged ({result['duplicates']} duplicates dropped) "
+          f"in {result['seconds']}s")
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+MLS Listing History for Real Estate CRM
+Append-only, month-partitioned columnar store of per-listing observations
+(price, status, DOM) for price-change and days-on-market analytics
+"""
+
+import fcntl
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Union
+
+import numpy as np
+import pandas as pd
+
+from mls_store import MLSStore, NumericColumn, StringArray, hash_columns
+from mls_feeds import listing_statuses
+
+# Bump when the on-disk layout changes (2: committed parts listed by name)
+HISTORY_VERSION = 2
+
+DEFAULT_HISTORY_DIR = Path(__file__).parent.parent / 'mls_history'
+
+# Status codes stored per observation (-1: not recognised)
+STATUSES = ('active', 'pending', 'sold', 'expired', 'withdrawn')
+
+# Observation column -> dtype. Listings and subdivisions are int32 codes into
+# the dictionaries kept in state.npz.
+OBSERVATION_COLUMNS = {
+    'listing': np.int32,
+    'observed': 'datetime64[D]',
+    'price': np.float64,
+    'previous_price': np.float64,
+    'original_price': np.float64,
+    'close_price': np.float64,
+    'status': np.int8,
+    'pending_date': 'datetime64[D]',
+    'dom': np.float32,
+    'subdivision': np.int32,
+}
+
+# Values that make a new observation worth keeping. DOM is recorded but not
+# compared, otherwise every listing would be appended on every daily feed.
+TRACKED_COLUMNS = ('price', 'original_price', 'close_price', 'status', 'pending_date', 'subdivision')
+
+def history_dir() -> Path:
+    """History root, overridable with MLS_HISTORY_DIR"""
+    return Path(os.environ.get('MLS_HISTORY_DIR', DEFAULT_HISTORY_DIR))
+
+def _as_date(value: Union[str, date, datetime, None]) -> np.datetime64:
+    if value is None:
+        return np.datetime64(date.today(), 'D')
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+def _dates(series: Optional[pd.Series], rows: int) -> np.ndarray:
+    if series is None:
+        return np.full(rows, np.datetime64('NaT'), dtype='datetime64[D]')
+    parsed = pd.to_datetime(series.astype(object).where(series.notna(), None), errors='coerce', format='mixed')
+    return parsed.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+
+def _numbers(series: Optional[pd.Series], rows: int) -> np.ndarray:
+    if series is None:
+        return np.full(rows, np.nan)
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+def _tracked_values(values: np.ndarray) -> np.ndarray:
+    """float64 view of an observation column for hashing (dates as day numbers, NaT as NaN)"""
+    if values.dtype.kind == 'M':
+        return np.where(np.isnat(values), np.nan, values.astype(np.int64))
+    return values.astype(np.float64)
+
+class ListingHistory:
+    """
+    Per-listing observations, one row each time a listing's price, status,
+    pending date or close price is seen to change.
+
+    Observations are written in immutable parts of .npy columns under one
+    directory per month (YYYY-MM/part-000012/price.npy, ...), so a query over
+    the last week memory-maps only the current month's columns. state.npz
+    holds the listing and subdivision dictionaries and each listing's last
+    observed values hash and price; it is replaced atomically after a part is
+    written, which is the commit point of an append, and lists the committed
+    parts by name. A part it does not list (an interrupted append) is ignored.
+
+    Several processes (gunicorn workers) may append to one root: an append
+    holds an flock on .lock, reloads state.npz under it and names its part
+    uniquely, and readers reload state.npz whenever another process replaced it.
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None):
+        self.root = Path(root) if root else history_dir()
+        self._state_stamp = None
+        self._load_state()
+
+    # ------------------------------------------------------------------ state
+
+    def _load_state(self) -> None:
+        path = self.root / 'state.npz'
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            self.listings: List[str] = []
+            self.subdivisions: List[str] = []
+            self.latest_hash = np.zeros(0, dtype=np.uint64)
+            self.latest_price = np.zeros(0, dtype=np.float64)
+            self.part_names: List[str] = []
+            self._state_stamp = None
+            return
+        with np.load(path, allow_pickle=False) as state:
+            version = int(state['version'])
+            if version not in (1, HISTORY_VERSION):
+                raise ValueError(f'Unsupported MLS history version {version} in {self.root}')
+            self.listings = StringArray(state['listing_offsets'], state['listing_data']).to_list()
+            self.subdivisions = StringArray(state['subdivision_offsets'], state['subdivision_data']).to_list()
+            self.latest_hash = state['latest_hash']
+            self.latest_price = state['latest_price']
+            if version == 1:  # parts numbered part-NNNNNN, committed below a count
+                self.part_names = sorted(
+                    f'{part.parent.name}/{part.name}' for part in self.root.glob('*/part-*')
+                    if int(part.name.split('-')[1]) < int(state['parts']))
+            else:
+                self.part_names = StringArray(state['part_offsets'], state['part_data']).to_list()
+        self._state_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self) -> None:
+        """Reload state.npz if another process (or instance) committed since it was read"""
+        try:
+            stat = (self.root / 'state.npz').stat()
+            stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._state_stamp:
+            self._load_state()
+
+    def _save_state(self) -> None:
+        listings = StringArray.from_strings(self.listings)
+        subdivisions = StringArray.from_strings(self.subdivisions)
+        parts = StringArray.from_strings(self.part_names)
+        handle, temp_path = tempfile.mkstemp(prefix='.state-', suffix='.npz', dir=self.root)
+        with os.fdopen(handle, 'wb') as output:
+            np.savez(output, version=np.int64(HISTORY_VERSION), parts=np.int64(len(self.part_names)),
+                     listing_offsets=listings.offsets, listing_data=listings.data,
+                     subdivision_offsets=subdivisions.offsets, subdivision_data=subdivisions.data,
+                     part_offsets=parts.offsets, part_data=parts.data,
+                     latest_hash=self.latest_hash, latest_price=self.latest_price)
+        os.replace(temp_path, self.root / 'state.npz')
+        stat = (self.root / 'state.npz').stat()
+        self._state_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @contextmanager
+    def _append_lock(self) -> Iterator[None]:
+        """Inter-process lock serializing appends to this root (flock on .lock)"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / '.lock', 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _codes(values: Iterable[Optional[str]], dictionary: List[str]) -> np.ndarray:
+        """int32 codes of values in an append-only dictionary (extended in place), -1 for missing"""
+        lookup = {value: code for code, value in enumerate(dictionary)}
+        codes = []
+        for value in values:
+            if value is None or value != value or value == '':
+                codes.append(-1)
+                continue
+            value = str(value)
+            if value not in lookup:
+                lookup[value] = len(dictionary)
+                dictionary.append(value)
+            codes.append(lookup[value])
+        return np.array(codes, dtype=np.int32)
+
+    # ----------------------------------------------------------------- append
+
+    def observe(self, store: MLSStore, mls_numbers: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Observation columns (without listing/observed) for the store's listings, or only mls_numbers"""
+        if mls_numbers is None:
+            positions = np.arange(len(store), dtype=np.int64)
+        else:
+            found = [store.positions.get(str(number)) for number in mls_numbers]
+            positions = np.array([position for position in found if position is not None], dtype=np.int64)
+        frame = store.frame(positions)
+        rows = len(frame)
+        price = _numbers(frame.get('List Price', frame.get('Current Listing Price')), rows)
+        status = listing_statuses(frame['Status']) if 'Status' in frame else pd.Series([None] * rows)
+        status_codes = {name: code for code, name in enumerate(STATUSES)}
+        return {
+            'mls_number': np.array([store.key_at(position) for position in positions.tolist()], dtype=object),
+            'price': price,
+            'original_price': _numbers(frame.get('Original Price'), rows),
+            'close_price': _numbers(frame.get('Close Price'), rows),
+            'status': np.array([status_codes.get(value, -1) for value in status.tolist()], dtype=np.int8),
+            'pending_date': _dates(frame.get('Pending Date'), rows),
+            'dom': _numbers(frame.get('DOM'), rows).astype(np.float32),
+            'subdivision': self._codes(frame['Subdivision'].tolist() if 'Subdivision' in frame else [None] * rows,
+                                       self.subdivisions),
+        }
+
+    def append(self, store: MLSStore, observed_on: Union[str, date, datetime, None] = None,
+               mls_numbers: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Record the store's listings as of observed_on (default: today),
+        appending only listings that are new or whose tracked values changed
+        since their last observation.
+
+        Args:
+            store (MLSStore): Current MLS listings
+            observed_on: Observation date
+            mls_numbers: Only consider these listings (e.g. a refresh delta)
+
+        Returns:
+            dict: {'success': bool, 'appended': int, 'new_listings': int, 'unchanged': int,
+                   'partition': str or None, 'seconds': float, 'message': str}
+        """
+        start = time.perf_counter()
+        with self._append_lock():
+            self._load_state()  # other processes may have appended since
+            result = self._append(store, _as_date(observed_on), mls_numbers)
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        return result
+
+    def _append(self, store: MLSStore, observed: np.datetime64,
+                mls_numbers: Optional[Iterable[str]]) -> Dict[str, Any]:
+        values = self.observe(store, mls_numbers)
+        listing = self._codes(values.pop('mls_number').tolist(), self.listings)
+        new_count = len(self.listings) - len(self.latest_hash)
+
+        hashes = hash_columns([NumericColumn(_tracked_values(values[name])) for name in TRACKED_COLUMNS], len(listing))
+        self.latest_hash = np.concatenate([self.latest_hash, np.zeros(new_count, dtype=np.uint64)])
+        self.latest_price = np.concatenate([self.latest_price, np.full(new_count, np.nan)])
+        is_new = listing >= len(self.listings) - new_count
+        keep = is_new | (self.latest_hash[listing] != hashes)
+
+        rows = np.flatnonzero(keep)
+        partition = None
+        if len(rows):
+            columns = {name: column[rows] for name, column in values.items()}
+            columns['listing'] = listing[rows]
+            columns['observed'] = np.full(len(rows), observed, dtype='datetime64[D]')
+            columns['previous_price'] = self.latest_price[listing[rows]]
+            partition = self._write_part(observed, columns)
+            self.latest_hash[listing[rows]] = hashes[rows]
+            self.latest_price[listing[rows]] = values['price'][rows]
+        if len(rows) or new_count:
+            self._save_state()
+
+        return {
+            'success': True,
+            'appended': len(rows),
+            'new_listings': new_count,
+            'unchanged': len(listing) - len(rows),
+            'partition': partition,
+            'message': f'Recorded {len(rows)} listing observations ({new_count} new listings, '
+                       f'{len(listing) - len(rows)} unchanged)'
+        }
+
+    def _write_part(self, observed: np.datetime64, columns: Dict[str, np.ndarray]) -> str:
+        """
+        Write one immutable part under the observation's month; returns its
+        relative path. Called with the append lock held, so anything in the
+        month not listed in the state was left by an append that never committed.
+        """
+        month_dir = self.root / str(observed.astype('datetime64[M]'))
+        month_dir.mkdir(parents=True, exist_ok=True)
+        committed = set(self.part_names)
+        for leftover in month_dir.iterdir():
+            if leftover.name.startswith('.staging-') or (
+                    leftover.name.startswith('part-') and f'{month_dir.name}/{leftover.name}' not in committed):
+                shutil.rmtree(leftover, ignore_errors=True)
+
+        # Sequence first so parts sort in append order; the suffix keeps names unique
+        name = f'part-{len(self.part_names):06d}-{uuid.uuid4().hex[:8]}'
+        staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=month_dir))
+        for column, dtype in OBSERVATION_COLUMNS.items():
+            np.save(staging / f'{column}.npy', np.ascontiguousarray(columns[column], dtype=dtype), allow_pickle=False)
+        os.rename(staging, month_dir / name)
+        self.part_names.append(f'{month_dir.name}/{name}')
+        return f'{month_dir.name}/{name}'
+
+    # ------------------------------------------------------------------ query
+
+    def _part_dirs(self, since: Optional[np.datetime64], until: Optional[np.datetime64]) -> List[Path]:
+        """Committed parts in month partitions overlapping [since, until], in append order"""
+        self._refresh()
+        first = str(since.astype('datetime64[M]')) if since is not None else None
+        last = str(until.astype('datetime64[M]')) if until is not None else None
+        parts = []
+        for name in self.part_names:
+            month = name.split('/', 1)[0]
+            if (first and month < first) or (last and month > last):
+                continue
+            parts.append(self.root / name)
+        return sorted(parts)
+
+    def observations(self, since: Union[str, date, None] = None, until: Union[str, date, None] = None,
+                     columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Observations between since and until (inclusive), reading only the
+        month partitions and columns asked for. Listing and subdivision codes
+        are decoded to mls_number and subdivision; status to its name.
+        """
+        since = _as_date(since) if since is not None else None
+        until = _as_date(until) if until is not None else None
+        names = list(columns) if columns else list(OBSERVATION_COLUMNS)
+        wanted = list(dict.fromkeys(['observed'] + [name for name in names if name in OBSERVATION_COLUMNS]))
+        if 'mls_number' in names:
+            wanted.append('listing')
+
+        data = {name: [] for name in wanted}
+        for part in self._part_dirs(since, until):
+            for name in wanted:
+                data[name].append(np.load(part / f'{name}.npy', mmap_mode='r', allow_pickle=False))
+        arrays = {name: np.concatenate(chunks) if chunks else np.zeros(0, dtype=OBSERVATION_COLUMNS[name])
+                  for name, chunks in data.items()}
+
+        mask = np.ones(len(arrays['observed']), dtype=bool)
+        if since is not None:
+            mask &= arrays['observed'] >= since
+        if until is not None:
+            mask &= arrays['observed'] <= until
+        frame = pd.DataFrame({name: array[mask] for name, array in arrays.items()})
+
+        if 'listing' in frame:
+            frame['mls_number'] = np.array(self.listings, dtype=object)[frame.pop('listing').to_numpy()]
+        if 'subdivision' in frame:
+            labels = np.array(self.subdivisions + [None], dtype=object)
+            frame['subdivision'] = labels[frame['subdivision'].to_numpy()]  # -1 picks None
+        if 'status' in frame:
+            frame['status'] = np.array(STATUSES + (None,), dtype=object)[frame['status'].to_numpy()]
+        return frame[[name for name in names if name in frame] if columns else list(frame.columns)]
+
+    def listing_history(self, mls_number: str) -> List[Dict[str, Any]]:
+        """All observations of one listing, oldest first"""
+        frame = self.observations()
+        frame = frame[frame['mls_number'] == str(mls_number)].sort_values('observed', kind='stable')
+        for name in ('observed', 'pending_date'):
+            frame[name] = frame[name].dt.strftime('%Y-%m-%d')
+        return [{name: (None if pd.isna(value) else value) for name, value in row.items()}
+                for row in frame.to_dict('records')]
+
+    def price_changes(self, days: int = 7, as_of: Union[str, date, None] = None,
+                      drops_only: bool = True) -> pd.DataFrame:
+        """
+        Price changes observed in the last `days` days up to as_of. Each
+        observation carries the listing's previous price, so this reads only
+        the partitions covering the window.
+        """
+        until = _as_date(as_of)
+        frame = self.observations(since=until - np.timedelta64(days, 'D'), until=until,
+                                  columns=['mls_number', 'observed', 'previous_price', 'price', 'status', 'subdivision'])
+        changed = frame['previous_price'].notna() & frame['price'].notna()
+        changed &= (frame['price'] < frame['previous_price']) if drops_only else (frame['price'] != frame['previous_price'])
+        frame = frame[changed].copy()
+        frame['change'] = frame['price'] - frame['previous_price']
+        frame['change_percent'] = (frame['change'] / frame['previous_price'] * 100).round(2)
+        return frame.sort_values(['observed', 'change_percent'], ascending=[False, True]).reset_index(drop=True)
+
+    def latest(self, as_of: Union[str, date, None] = None) -> pd.DataFrame:
+        """
+        Each listing's last observation up to as_of. DOM of listings still
+        active is advanced by the days since they were observed, since an
+        unchanged listing is not re-recorded as its DOM grows.
+        """
+        until = _as_date(as_of)
+        frame = self.observations(until=until)
+        frame = frame.sort_values('observed', kind='stable').drop_duplicates('mls_number', keep='last')
+        active = (frame['status'] == 'active').to_numpy()
+        elapsed = (until - frame['observed'].to_numpy().astype('datetime64[D]')).astype(np.float32)
+        frame['dom'] = np.where(active, frame['dom'].to_numpy() + elapsed, frame['dom'].to_numpy())
+        return frame.reset_index(drop=True)
+
+    def median_dom(self, by: str = 'subdivision', status: Optional[str] = None,
+                   as_of: Union[str, date, None] = None) -> pd.DataFrame:
+        """Median (and count of) days on market per group of listings' latest observations"""
+        frame = self.latest(as_of)
+        if status:
+            frame = frame[frame['status'] == status.lower()]
+        frame = frame[frame['dom'].notna()]
+        grouped = frame.groupby(by, dropna=True)['dom']
+        return pd.DataFrame({'median_dom': grouped.median(), 'listings': grouped.size()}) \
+            .sort_values('median_dom').reset_index()
+
+    def summary(self) -> Dict[str, Any]:
+        parts = self._part_dirs(None, None)
+        return {
+            'root': str(self.root),
+            'listings': len(self.listings),
+            'observations': sum(np.load(part / 'listing.npy', mmap_mode='r').shape[0] for part in parts),
+            'partitions': sorted({part.parent.name for part in parts}),
+            'parts': len(parts)
+        }
+
+if __name__ == "__main__":
+    import argparse
+
+    from mls_feeds import load_feeds
+
+    parser = argparse.ArgumentParser(description='MLS listing history')
+    parser.add_argument('--root', default=None, help='History directory (default: MLS_HISTORY_DIR or mls_history/)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    append_parser = commands.add_parser('append', help='Record the current feeds as of a date')
+    append_parser.add_argument('csv', nargs='*', default=['documents/canonicalListing.csv', 'Listing.csv'])
+    append_parser.add_argument('--date', default=None, help='Observation date (default: today)')
+    drops_parser = commands.add_parser('drops', help='Price drops in the last N days')
+    drops_parser.add_argument('--days', type=int, default=7)
+    dom_parser = commands.add_parser('dom', help='Median days on market per group')
+    dom_parser.add_argument('--by', default='subdivision')
+    dom_parser.add_argument('--status', default=None)
+    args = parser.parse_args()
+
+    history = ListingHistory(args.root)
+    print("📈 MLS Listing History")
+    print("=" * 50)
+    if args.command == 'append':
+        store = load_feeds([path for path in args.csv if os.path.exists(path)])['store']
+        print(f"✅ {history.append(store, args.date)['message']}")
+    elif args.command == 'drops':
+        print(history.price_changes(args.days).to_string(index=False))
+    else:
+        print(history.median_dom(args.by, args.status).to_string(index=False))
+    print(f"\n{history.summary()}")
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Streaming MLS Feed Ingestion for Real Estate CRM
+Builds the columnar MLS store chunk by chunk, optionally straight into snapshot files
+"""
+
+import gc
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from mls_store import (MLSStore, NumericColumn, TextColumn, StringArray, SortedKeyIndex, MLS_KEY_COLUMN,
+                       build_column, encode_keys, hash_columns, is_numeric_series, listing_keys,
+                       read_feed_chunks, row_address_keys, text_values)
+
+# Rows parsed per chunk; at ~2 KB per Nevada County row this keeps the
+# parser's working set around 100 MB regardless of feed size
+DEFAULT_CHUNK_ROWS = 50_000
+
+def chunk_rows() -> int:
+    """Chunk size, overridable with MLS_CHUNK_ROWS"""
+    return int(os.environ.get('MLS_CHUNK_ROWS', DEFAULT_CHUNK_ROWS))
+
+class _Spill:
+    """
+    Where chunk parts and finished column arrays live: files in a directory
+    (memory-mapped, so finished columns are page cache rather than process
+    memory) or plain arrays in RAM when no directory is given.
+    """
+
+    def __init__(self, directory: Optional[Path]):
+        self.directory = directory
+        self._parts = 0
+
+    def put(self, array: np.ndarray) -> Any:
+        if self.directory is None:
+            return array
+        self._parts += 1
+        path = self.directory / f'.part{self._parts}.npy'
+        np.save(path, array, allow_pickle=False)
+        return path
+
+    def get(self, part: Any) -> np.ndarray:
+        return np.load(part, mmap_mode='r', allow_pickle=False) if isinstance(part, Path) else part
+
+    def drop(self, part: Any) -> None:
+        if isinstance(part, Path):
+            os.remove(part)
+
+    def allocate(self, name: str, dtype: Any, length: int) -> np.ndarray:
+        """Array for a finished column, named as mls_snapshot names it"""
+        if self.directory is None or length == 0:
+            return np.empty(length, dtype=dtype)
+        return np.lib.format.open_memmap(self.directory / f'{name}.npy', mode='w+', dtype=dtype, shape=(length,))
+
+    def replace(self, name: str, array: np.ndarray) -> np.ndarray:
+        """Write a finished array again under its name (after dropping duplicate listings)"""
+        if self.directory is None or len(array) == 0:
+            return array
+        path = self.directory / f'{name}.npy'
+        if path.exists():
+            os.remove(path)  # the old mapping stays valid until released
+        replaced = self.allocate(name, array.dtype, len(array))
+        replaced[:] = array
+        return replaced
+
+class _TextDictionary:
+    """
+    Distinct values of one text column across chunks. Values are looked up
+    by 64-bit hash in a sorted array, and their UTF-8 bytes are appended to
+    the category buffer, so no Python string is kept per category.
+    """
+
+    def __init__(self, spill: _Spill, name: str):
+        self.spill = spill
+        self.name = name
+        self.sorted_hashes = np.array([], dtype=np.uint64)
+        self.sorted_codes = np.array([], dtype=np.int32)
+        self.hash_parts: List[np.ndarray] = []
+        self.length_parts: List[np.ndarray] = []
+        self.size = 0
+        self.nbytes = 0
+        self._buffer: List[bytes] = []
+        self._data_path = None if spill.directory is None else spill.directory / f'.{name}.categories.raw'
+
+    def encode(self, series: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(text_values(series), use_na_sentinel=True)
+        if len(uniques) == 0:
+            return codes.astype(np.int32)
+        strings = np.array([str(value) for value in uniques], dtype=object)
+        hashes = pd.util.hash_array(strings)
+
+        slots = np.searchsorted(self.sorted_hashes, hashes)
+        found = slots < len(self.sorted_hashes)
+        found[found] = self.sorted_hashes[slots[found]] == hashes[found]
+        mapped = np.empty(len(strings), dtype=np.int32)
+        mapped[found] = self.sorted_codes[slots[found]]
+
+        unseen = np.flatnonzero(~found)
+        if len(unseen):
+            new_codes = np.arange(self.size, self.size + len(unseen), dtype=np.int32)
+            mapped[unseen] = new_codes
+            self._append([strings[i].encode('utf-8') for i in unseen])
+            self.hash_parts.append(hashes[unseen])
+            merged_hashes = np.concatenate([self.sorted_hashes, hashes[unseen]])
+            order = np.argsort(merged_hashes, kind='stable')
+            self.sorted_hashes = merged_hashes[order]
+            self.sorted_codes = np.concatenate([self.sorted_codes, new_codes])[order]
+            self.size += len(unseen)
+
+        return np.where(codes >= 0, mapped[np.maximum(codes, 0)], -1).astype(np.int32)
+
+    def _append(self, encoded: List[bytes]) -> None:
+        self.length_parts.append(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+        blob = b''.join(encoded)
+        self.nbytes += len(blob)
+        if self._data_path is None:
+            self._buffer.append(blob)
+        else:
+            with open(self._data_path, 'ab') as handle:
+                handle.write(blob)
+
+    def finish(self) -> StringArray:
+        offsets = np.zeros(self.size + 1, dtype=np.int64)
+        if self.size:
+            np.cumsum(np.concatenate(self.length_parts), out=offsets[1:])
+        if self._data_path is None:
+            data = np.frombuffer(b''.join(self._buffer), dtype=np.uint8)
+            self._buffer = []
+            return StringArray(offsets, data)
+
+        data = self.spill.allocate(f'{self.name}.categories.data', np.uint8, self.nbytes)
+        if self._data_path.exists():
+            with open(self._data_path, 'rb') as handle:
+                position = 0
+                for block in iter(lambda: handle.read(1 << 24), b''):
+                    data[position:position + len(block)] = np.frombuffer(block, dtype=np.uint8)
+                    position += len(block)
+            os.remove(self._data_path)
+        return StringArray(offsets, data)
+
+    @property
+    def category_hashes(self) -> np.ndarray:
+        return np.concatenate(self.hash_parts) if self.hash_parts else np.array([], dtype=np.uint64)
+
+class _ColumnBuilder:
+    """
+    One column assembled from chunk parts. pandas infers types per chunk, so
+    the final kind is decided at the end: any text part makes a text column
+    (numeric parts are converted, as a whole-file parse would have read
+    them), all-missing parts fit either kind.
+    """
+
+    def __init__(self, spill: _Spill, name: str):
+        self.spill = spill
+        self.name = name
+        self.parts: List[tuple] = []  # (kind, part, rows)
+        self.dictionary: Optional[_TextDictionary] = None
+
+    def add(self, series: pd.Series) -> None:
+        if len(series) == 0:
+            return
+        if series.isna().all():
+            self.parts.append(('null', None, len(series)))
+        elif is_numeric_series(series):
+            self.parts.append(('numeric', self.spill.put(build_column(series).values), len(series)))
+        else:
+            if self.dictionary is None:
+                self.dictionary = _TextDictionary(self.spill, self.name)
+            self.parts.append(('text', self.spill.put(self.dictionary.encode(series)), len(series)))
+
+    def finish(self, rows: int):
+        """(column, category hashes or None)"""
+        kinds = {kind for kind, _, _ in self.parts}
+        if 'text' in kinds:
+            finished = self._finish_text(rows)
+        elif 'numeric' in kinds:
+            finished = self._finish_numeric(rows), None
+        else:
+            finished = NumericColumn(np.full(rows, np.nan)), None
+        self.parts = []  # release chunk parts before the next column is assembled
+        return finished
+
+    def _finish_numeric(self, rows: int) -> NumericColumn:
+        dtypes = [self.spill.get(part).dtype for kind, part, _ in self.parts if kind == 'numeric']
+        if 'null' in {kind for kind, _, _ in self.parts}:
+            dtypes.append(np.dtype(np.float64))
+        values = self.spill.allocate(f'{self.name}.values', np.result_type(*dtypes), rows)
+        position = 0
+        for kind, part, length in self.parts:
+            if kind == 'null':
+                values[position:position + length] = np.nan
+            else:
+                values[position:position + length] = self.spill.get(part)
+                self.spill.drop(part)
+            position += length
+        return NumericColumn(values)
+
+    def _finish_text(self, rows: int):
+        parts = []
+        for kind, part, length in self.parts:
+            if kind == 'numeric':
+                part = self.dictionary.encode(pd.Series(np.asarray(self.spill.get(part))))
+            parts.append((kind, part, length))
+
+        codes = self.spill.allocate(f'{self.name}.codes', np.int32, rows)
+        position = 0
+        for kind, part, length in parts:
+            if kind == 'null':
+                codes[position:position + length] = -1
+            else:
+                codes[position:position + length] = self.spill.get(part)
+            position += length
+        for kind, part, _ in self.parts:
+            if kind != 'null':
+                self.spill.drop(part)
+        return TextColumn(codes, self.dictionary.finish()), self.dictionary.category_hashes
+
+class ChunkedStoreBuilder:
+    """
+    Incremental MLSStore construction from DataFrame chunks.
+
+    Each chunk is converted to typed column parts and released, so parsing
+    needs one chunk of pandas objects at a time. With a directory, finished
+    columns are written there under the names mls_snapshot uses and
+    memory-mapped; only the per-row keys, hashes and address keys (tens of
+    bytes per listing) and the text dictionaries' hash tables stay in memory.
+    """
+
+    def __init__(self, key_column: str = MLS_KEY_COLUMN, directory: Optional[Path] = None,
+                 source: Optional[str] = None):
+        self.key_column = key_column
+        self.source = source
+        self.spill = _Spill(Path(directory) if directory is not None else None)
+        self.columns: Optional[Dict[str, _ColumnBuilder]] = None
+        self.key_parts: List[np.ndarray] = []
+        self.address_parts: List[np.ndarray] = []
+        self.rows = 0
+
+    def add(self, frame: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = {name: _ColumnBuilder(self.spill, f'col{number}')
+                            for number, name in enumerate(frame.columns)}
+        elif list(frame.columns) != list(self.columns):
+            raise ValueError('MLS feed columns changed between chunks')
+
+        frame, keys = listing_keys(frame, self.key_column)
+        self.key_parts.append(encode_keys(keys.tolist()))
+        self.address_parts.append(row_address_keys(frame))
+        for name, column in self.columns.items():
+            column.add(frame[name])
+        self.rows += len(frame)
+
+    def build(self) -> MLSStore:
+        names = list(self.columns or {})
+        row_keys = np.concatenate(self.key_parts) if self.key_parts else np.array([], dtype='S1')
+        address_keys = np.concatenate(self.address_parts) if self.address_parts else np.array([], dtype='S1')
+        finished = {name: self.columns[name].finish(self.rows) for name in names}
+
+        # A listing repeated in a later chunk replaces the earlier row, as in a whole-file parse
+        keep = _last_occurrences(row_keys)
+        if keep is not None:
+            row_keys, address_keys = row_keys[keep], address_keys[keep]
+            finished = {name: (self._take(name, column, keep), category_hashes)
+                        for name, (column, category_hashes) in finished.items()}
+
+        columns = {name: column for name, (column, _) in finished.items()}
+        hashes = hash_columns(list(finished.values()), len(row_keys))
+        indexes = {'listing': SortedKeyIndex.from_row_keys(row_keys),
+                   'address': SortedKeyIndex.from_row_keys(address_keys)}
+        return MLSStore(columns, StringArray.from_fixed_width(row_keys), hashes, address_keys,
+                        self.key_column, self.source, indexes)
+
+    def _take(self, name: str, column: Any, keep: np.ndarray) -> Any:
+        """Rows `keep` of a finished column, written back to the spill directory"""
+        prefix = self.columns[name].name
+        taken = column.take(keep)
+        if taken.kind == 'numeric':
+            return NumericColumn(self.spill.replace(f'{prefix}.values', taken.values))
+        return TextColumn(self.spill.replace(f'{prefix}.codes', taken.codes), taken.categories)
+
+def _last_occurrences(row_keys: np.ndarray) -> Optional[np.ndarray]:
+    """Row positions keeping the last row per key, or None when keys are already unique"""
+    if len(row_keys) == 0:
+        return None
+    _, first_from_end = np.unique(row_keys[::-1], return_index=True)
+    if len(first_from_end) == len(row_keys):
+        return None
+    return np.sort(len(row_keys) - 1 - first_from_end)
+
+def ingest_csv(csv_path: str, key_column: str = MLS_KEY_COLUMN, directory: Optional[Path] = None,
+               rows_per_chunk: Optional[int] = None,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None, feed: Any = None) -> MLSStore:
+    """
+    Stream an MLS CSV export into a columnar store.
+
+    Args:
+        csv_path (str): MLS CSV feed
+        key_column (str): Listing number column
+        directory (Path): Write column arrays here and memory-map them (e.g. a
+            snapshot staging directory); in memory when None
+        rows_per_chunk (int): Rows parsed at a time (default: chunk_rows())
+        progress (callable): Called after each chunk with rows/bytes read (see read_feed_chunks)
+        feed (FeedSpec): Map each chunk onto the canonical columns (see mls_feeds);
+            the CSV's own columns are kept when None
+
+    Returns:
+        MLSStore: Raises KeyError when the key column is missing
+    """
+    rows_per_chunk = rows_per_chunk or chunk_rows()
+    if feed is not None:
+        key_column = feed.key_column
+        chunks = feed.chunks(csv_path, rows_per_chunk, progress)
+    else:
+        chunks = read_feed_chunks(csv_path, key_column, rows_per_chunk, progress)
+
+    builder = ChunkedStoreBuilder(key_column, directory, source=csv_path)
+    for chunk in chunks:
+        builder.add(chunk)
+    if builder.columns is None:  # header only
+        header = pd.read_csv(csv_path, nrows=0)
+        builder.add(feed.apply(header) if feed is not None else header)
+    return builder.build()
+
+def print_progress(update: Dict[str, Any]) -> None:
+    """Progress callback for CLI and startup use"""
+    print(f"📥 MLS ingest: {update['percent']:5.1f}%  {update['rows']:,} rows  "
+          f"({update['bytes_read'] / (1024 * 1024):,.0f} of {update['total_bytes'] / (1024 * 1024):,.0f} MB)")
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _peak_rss_mb() -> float:
+    """High-water RSS of this process (VmHWM resets on exec, unlike ru_maxrss)"""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def _measure_ingest(variant: str, csv_path: str, directory: Optional[str]) -> Dict[str, float]:
+    """Build a store one way and report time and peak RSS (runs in a fresh process)"""
+    gc.collect()
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if variant == 'whole_file':
+        store = MLSStore.from_dataframe(pd.read_csv(csv_path, quotechar='"', skipinitialspace=True,
+                                                    on_bad_lines='skip'))
+    else:
+        store = ingest_csv(csv_path, directory=Path(directory) if directory else None)
+    elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 2), 'peak_rss_mb': round(_peak_rss_mb() - baseline, 1),
+            'listings': len(store)}
+
+def benchmark_ingest(rows: int = 300_000) -> Dict[str, Any]:
+    """
+    Compare whole-file parsing with chunked ingestion (in memory and
+    spilled to disk) on a synthetic feed, each in its own interpreter.
+
+    Returns:
+        dict: {'rows': int, 'file_mb': float, 'whole_file': dict, 'chunked': dict, 'chunked_to_disk': dict}
+    """
+    import multiprocessing
+    import shutil
+    import tempfile
+    from mls_store import _synthetic_feed
+
+    workdir = tempfile.mkdtemp()
+    csv_path = os.path.join(workdir, 'feed.csv')
+    try:
+        _synthetic_feed(csv_path, rows)
+        context = multiprocessing.get_context('spawn')
+        results = {'rows': rows, 'file_mb': round(os.path.getsize(csv_path) / (1024 * 1024), 1)}
+        for variant, directory in (('whole_file', None), ('chunked', None),
+                                   ('chunked_to_disk', os.path.join(workdir, 'columns'))):
+            if directory:
+                os.makedirs(directory)
+            with context.Pool(1) as pool:
+                results[variant] = pool.apply(_measure_ingest, (variant, csv_path, directory))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Stream an MLS CSV feed into the columnar store')
+    parser.add_argument('csv', nargs='?', default='Listing.csv', help='MLS CSV feed')
+    parser.add_argument('--chunk-rows', type=int, help=f'Rows per chunk (default {DEFAULT_CHUNK_ROWS})')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Compare ingestion on N synthetic listings')
+    args = parser.parse_args()
+
+    print("📥 MLS Streaming Ingestion")
+    print("=" * 50)
+
+    if args.benchmark:
+        result = benchmark_ingest(args.benchmark)
+        print(f"  {result['rows']:,} listings, {result['file_mb']} MB CSV")
+        for variant in ('whole_file', 'chunked', 'chunked_to_disk'):
+            stats = result[variant]
+            print(f"  {variant:16} {stats['seconds']:7.2f}s  peak +{stats['peak_rss_mb']:8.1f} MB")
+    else:
+        store = ingest_csv(args.csv, rows_per_chunk=args.chunk_rows, progress=print_progress)
+        print(f"Loaded {len(store)} listings, {len(store.column_names)} columns, "
+              f"{store.nbytes / 1024:.1f} KB of column data")
@@ -4,27 +4,242 @@ MLS Data Integration for Real Estate CRM
 Handles Nevada County MLS CSV data processing
 """
 
-import pandas as pd
 import os
+import sqlite3
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Tuple, Union
+
+import numpy as np
+import pandas as pd
 
-# Global MLS data cache
-_mls_data = None
+from mls_store import MLSStore
+from mls_ingest import ingest_csv, chunk_rows
+from mls_snapshot import load_store_cached, source_fingerprint, file_sha256, write_snapshot
+from mls_search import MLSSearchIndex
+from mls_keywords import KeywordIndex
+from mls_similarity import SimilarityIndex
+from mls_shared import SharedMLSStore
+from mls_feeds import FeedSpec, get_feed, detect_feed, load_feeds, store_delta, listing_properties
+from mls_crm_sync import DATABASE_PATH, import_listings, index_properties, private_remarks, reconcile_listings
+from mls_history import ListingHistory
+from mls_market import MarketStatsCube, DIMENSIONS as MARKET_DIMENSIONS
+from client_matching import ClientMatcher, ClientPreferences, ListingFeatures
+
+# Global MLS data cache: an immutable columnar store. Loads and refreshes
+# build a new store and publish it with a single reference assignment, so
+# readers that took `store = _mls_store` keep a consistent version.
+_mls_store: Optional[MLSStore] = None
 _mls_last_loaded = None
+_mls_fingerprint: Optional[Dict[str, Any]] = None
+_mls_version = 0
+
+# (csv_path, FeedSpec) of every feed in the current store, for refreshes
+_mls_feeds: List[Tuple[str, FeedSpec]] = []
+
+# Serializes loads and refreshes; readers never take it
+_mls_lock = threading.Lock()
+
+# Change events for downstream consumers (search indexes, matching, UI)
+_mls_listeners: List[Callable[[Dict[str, Any]], None]] = []
+_mls_events = deque(maxlen=50)
+
+# CRM database kept in step with feed changes (see enable_mls_reconciliation)
+_reconcile_db_path: Optional[str] = None
+_last_reconciliation: Optional[Dict[str, Any]] = None
+
+# Listing observations appended on every change (see enable_mls_history)
+_listing_history: Optional[ListingHistory] = None
+
+# Market statistics cube, rebuilt whenever the store changes
+_market_cube: Optional[MarketStatsCube] = None
+
+# Top listing matches per buyer, kept current from MLS changes (see enable_client_matching)
+_client_matcher: Optional[ClientMatcher] = None
+_matching_db_path: Optional[str] = None
+_matching_lock = threading.Lock()
+
+# Search index for the current store version, rebuilt lazily after a swap
+_search_index: Optional[MLSSearchIndex] = None
+_search_lock = threading.Lock()
+
+# Keyword index over remarks and feature text, built when MLS data loads
+# and extended from the previous version on each refresh
+_keyword_index: Optional[KeywordIndex] = None
+
+# Similar-listing index (remarks TF-IDF over the keyword postings + numeric features)
+_similarity_index: Optional[SimilarityIndex] = None
+
+# Store shared by every web worker (see enable_shared_mls): the version of
+# it this process serves
+_shared_store: Optional[SharedMLSStore] = None
+_shared_version = 0
+
+def subscribe_mls_changes(callback: Callable[[Dict[str, Any]], None]) -> None:
+    """
+    Register a callback for MLS data changes. It receives an event dict:
+    {'version': int, 'type': 'load' | 'delta', 'added': list, 'changed': list,
+     'removed': list, 'count': int, 'timestamp': str}
+    For 'load' events the listing lists are empty: everything may have changed.
+    """
+    if callback not in _mls_listeners:
+        _mls_listeners.append(callback)
+
+def unsubscribe_mls_changes(callback: Callable[[Dict[str, Any]], None]) -> None:
+    if callback in _mls_listeners:
+        _mls_listeners.remove(callback)
+
+def get_mls_changes(since_version: int = 0) -> List[Dict[str, Any]]:
+    """Recent change events newer than since_version (last 50 kept)"""
+    return [event for event in _mls_events if event['version'] > since_version]
+
+def _publish(store: MLSStore, fingerprint: Optional[Dict[str, Any]], event_type: str,
+             added: List[str] = (), changed: List[str] = (), removed: List[str] = (),
+             feeds: Optional[List[Tuple[str, FeedSpec]]] = None, origin: str = 'local',
+             shared_version: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Swap in a new store version and notify listeners (caller holds _mls_lock).
+
+    Listeners run with _mls_lock held, so they read the version announced
+    from _mls_store and must not call _current_store(): adopting a newer
+    shared version would take _mls_lock again and deadlock.
+
+    In shared mode a store built here ('local') is first published for the
+    other workers and the memory-mapped copy is served instead; one adopted
+    from another process arrives with origin 'shared'.
+    """
+    global _mls_store, _mls_last_loaded, _mls_fingerprint, _mls_version, _mls_feeds, _shared_version
+
+    if _shared_store is not None and origin == 'local':
+        pointer = _shared_store.publish(
+            store, fingerprint, [(path, spec.name) for path, spec in (feeds if feeds is not None else _mls_feeds)],
+            {'type': event_type, 'added': list(added), 'changed': list(changed), 'removed': list(removed),
+             'base': _shared_version})
+        store = _shared_store.open(pointer)
+        shared_version = pointer['version']
+    if shared_version is not None:
+        _shared_version = shared_version
+
+    _mls_store = store  # atomic reference swap
+    _mls_fingerprint = fingerprint
+    if feeds is not None:
+        _mls_feeds = feeds
+    _mls_version += 1
+    _mls_last_loaded = datetime.now().isoformat()
+
+    event = {
+        'version': _mls_version,
+        'type': event_type,
+        'added': list(added),
+        'changed': list(changed),
+        'removed': list(removed),
+        'count': len(store),
+        'timestamp': _mls_last_loaded,
+        'origin': origin
+    }
+    _mls_events.append(event)
+    for callback in list(_mls_listeners):
+        try:
+            callback(event)
+        except Exception as e:
+            print(f"⚠️  MLS change listener failed: {e}")
+    return event
+
+# ============================================================================
+# SHARED STORE ACROSS WORKERS
+# ============================================================================
+
+def _current_store() -> Optional[MLSStore]:
+    """Store for readers; in shared mode a newer published version is adopted first"""
+    shared = _shared_store
+    if shared is not None:
+        pointer = shared.pointer()
+        if pointer is not None and pointer['version'] != _shared_version:
+            _adopt_shared()
+    return _mls_store
+
+def _adopt_shared() -> None:
+    """Map the published store and announce it like a local load or refresh"""
+    with _mls_lock:
+        shared = _shared_store
+        pointer = shared.pointer() if shared is not None else None
+        if pointer is None or pointer['version'] == _shared_version:
+            return
+        store = shared.open(pointer)
+        feeds = [(path, get_feed(name)) for path, name in pointer['feeds']]
+        event = pointer['event']
+        # Incremental only when it was computed from the version served here
+        if event['type'] == 'delta' and event.get('base') == _shared_version and _mls_store is not None:
+            _publish(store, pointer['fingerprint'], 'delta', event['added'], event['changed'], event['removed'],
+                     feeds=feeds, origin='shared', shared_version=pointer['version'])
+        else:
+            _publish(store, pointer['fingerprint'], 'load', feeds=feeds, origin='shared',
+                     shared_version=pointer['version'])
+
+def enable_shared_mls(root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Serve the MLS store from one set of memory-mapped files shared by every
+    worker process instead of a copy per worker.
+
+    Loads and refreshes in any process publish the new store under the next
+    version number (see mls_shared); every process checks that number on
+    each access and maps a newer version when there is one, so adding
+    workers does not multiply MLS memory. Indexes built over the store
+    stay per process.
+
+    Args:
+        root (str): Shared directory (default: MLS_SHARED_DIR or mls_cache/shared)
+    """
+    global _shared_store, _shared_version
+    with _mls_lock:
+        _shared_store = SharedMLSStore(root)
+        _shared_version = 0
+    return {'success': True, 'message': f'Shared MLS store enabled ({_shared_store.root})'}
+
+def disable_shared_mls() -> Dict[str, Any]:
+    global _shared_store, _shared_version
+    with _mls_lock:
+        _shared_store = None
+        _shared_version = 0
+    return {'success': True, 'message': 'Shared MLS store disabled'}
 
-def load_mls_data(csv_path: str) -> Dict[str, Any]:
+def attach_shared_mls() -> Dict[str, Any]:
+    """
+    Serve the version already published in the shared directory (what a
+    worker does at startup instead of loading the feeds itself).
+
+    Returns:
+        dict: {'success': bool, 'count': int, 'version': int, 'message': str}
+    """
+    if _shared_store is None:
+        return {'success': False, 'count': 0, 'version': 0, 'message': 'Shared MLS store not enabled'}
+    try:
+        store = _current_store()
+    except (OSError, ValueError, KeyError) as e:
+        return {'success': False, 'count': 0, 'version': 0, 'message': f'Error mapping shared MLS store: {str(e)}'}
+    if store is None or not _shared_version:
+        return {'success': False, 'count': 0, 'version': 0,
+                'message': f'No MLS store published in {_shared_store.root}'}
+    return {'success': True, 'count': len(store), 'version': _shared_version,
+            'message': f'Attached to shared MLS store v{_shared_version} ({len(store)} listings)'}
+
+def load_mls_data(csv_path: str, progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                  feed: Optional[Union[str, FeedSpec]] = None) -> Dict[str, Any]:
     """
     Load Nevada County MLS data from CSV file.
 
     Args:
         csv_path (str): Path to MLS CSV file
+        progress (callable): Called after each parsed chunk with rows/bytes read
+            (only when the CSV has to be parsed; see mls_ingest.print_progress)
+        feed (str): Registered feed layout (see mls_feeds.MLS_FEEDS); detected
+            from the CSV header when not given
 
     Returns:
-        dict: {'success': bool, 'count': int, 'message': str, 'last_updated': str}
+        dict: {'success': bool, 'count': int, 'message': str, 'last_updated': str, 'from_snapshot': bool,
+               'feed': str}
     """
-    global _mls_data, _mls_last_loaded
-
     try:
         if not os.path.exists(csv_path):
             return {
@@ -34,33 +249,95 @@ def load_mls_data(csv_path: str) -> Dict[str, Any]:
                 'last_updated': None
             }
 
-        # Load CSV data with error handling for malformed lines
-        df = pd.read_csv(csv_path, quotechar='"', skipinitialspace=True, on_bad_lines='skip')
+        # Memory-map the parsed snapshot when the CSV is unchanged; stream it
+        # into a new snapshot in chunks only when it changed
+        with _mls_lock:
+            try:
+                spec = get_feed(feed) if feed else detect_feed(csv_path)
+                loaded = load_store_cached(csv_path, spec.key_column, progress=progress, feed=spec)
+            except (KeyError, ValueError) as e:
+                return {
+                    'success': False,
+                    'count': 0,
+                    'message': e.args[0],
+                    'last_updated': None
+                }
 
-        # Use "Listing Number" as the MLS identifier column
-        mls_column = "Listing Number"
+            store = loaded['store']
+            _publish(store, loaded['fingerprint'], 'load', feeds=[(csv_path, spec)])
 
-        if mls_column not in df.columns:
-            return {
-                'success': False,
-                'count': 0,
-                'message': f'Could not find "{mls_column}" column in CSV. Available columns: {list(df.columns)}',
-                'last_updated': None
-            }
+        return {
+            'success': True,
+            'count': len(store),
+            'message': f'Successfully loaded {len(store)} MLS listings',
+            'last_updated': _mls_last_loaded,
+            'from_snapshot': loaded['from_snapshot'],
+            'feed': spec.name
+        }
 
-        # Create lookup dictionary
-        _mls_data = {}
-        for _, row in df.iterrows():
-            mls_num = str(row[mls_column]).strip()
-            if mls_num and mls_num.lower() != 'nan':
-                _mls_data[mls_num] = row.to_dict()
+    except Exception as e:
+        return {
+            'success': False,
+            'count': 0,
+            'message': f'Error loading MLS data: {str(e)}',
+            'last_updated': None
+        }
+
+def load_mls_feeds(csv_paths: Union[List[str], str], max_workers: Optional[int] = None,
+                   progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Load several MLS feeds with different export layouts into one listing store.
+
+    Each CSV's layout is detected from its header and mapped onto the
+    canonical columns (see mls_feeds). Feeds that have to be parsed are
+    parsed at the same time on a process pool. A listing found in more than
+    one feed, by listing number or by normalized address, is kept from the
+    feed listed first.
 
-        _mls_last_loaded = datetime.now().isoformat()
+    Args:
+        csv_paths (list): MLS CSV files, highest priority first (or a comma-separated string)
+        max_workers (int): Parsing processes (default: one per feed to parse, up to the CPU count)
+        progress (callable): Chunk progress for feeds parsed in this process
 
+    Returns:
+        dict: {'success': bool, 'count': int, 'duplicates': int, 'feeds': list, 'message': str,
+               'last_updated': str}
+    """
+    if isinstance(csv_paths, str):
+        csv_paths = [path.strip() for path in csv_paths.split(',') if path.strip()]
+    missing = [path for path in csv_paths if not os.path.exists(path)]
+    if not csv_paths or missing:
+        return {
+            'success': False,
+            'count': 0,
+            'message': f'MLS file not found: {", ".join(missing)}' if missing else 'No MLS files given',
+            'last_updated': None
+        }
+
+    try:
+        with _mls_lock:
+            try:
+                loaded = load_feeds(csv_paths, max_workers=max_workers, progress=progress)
+            except (KeyError, ValueError) as e:
+                return {'success': False, 'count': 0, 'message': e.args[0], 'last_updated': None}
+
+            store = loaded['store']
+            feeds = [(feed['path'], get_feed(feed['feed'])) for feed in loaded['feeds']]
+            if len(feeds) == 1:
+                fingerprint = loaded['feeds'][0]['fingerprint']
+            else:
+                fingerprint = {'feeds': [feed['fingerprint'] for feed in loaded['feeds']]}
+            _publish(store, fingerprint, 'load', feeds=feeds)
+
+        summaries = [{key: feed[key] for key in ('path', 'feed', 'count', 'from_snapshot', 'seconds')}
+                     for feed in loaded['feeds']]
         return {
             'success': True,
-            'count': len(_mls_data),
-            'message': f'Successfully loaded {len(_mls_data)} MLS listings',
+            'count': len(store),
+            'duplicates': loaded['duplicates'],
+            'feeds': summaries,
+            'message': (f'Successfully loaded {len(store)} MLS listings from {len(feeds)} feeds '
+                        f'({loaded["duplicates"]} duplicates merged)'),
             'last_updated': _mls_last_loaded
         }
 
@@ -68,10 +345,142 @@ def load_mls_data(csv_path: str) -> Dict[str, Any]:
         return {
             'success': False,
             'count': 0,
-            'message': f'Error loading MLS data: {str(e)}',
+            'message': f'Error loading MLS feeds: {str(e)}',
             'last_updated': None
         }
 
+def refresh_mls_data(csv_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Incrementally refresh loaded MLS data from its CSV feed.
+
+    Cheap when nothing changed: size and mtime are compared first, then the
+    file hash. Otherwise the feed is read in chunks, each listing row is hashed and
+    compared with the loaded version, and only added/changed/removed listings
+    are applied to build the next store version, which is then swapped in
+    atomically and announced to subscribe_mls_changes listeners. A store
+    merged from several feeds (load_mls_feeds) is refreshed by reloading the
+    feeds, reparsing only the ones whose CSV changed.
+
+    Args:
+        csv_path (str): MLS CSV file (default: the file or feeds currently loaded)
+
+    Returns:
+        dict: {'success': bool, 'changed': bool, 'added': int, 'updated': int, 'removed': int,
+               'count': int, 'version': int, 'message': str}
+    """
+    store = _current_store()
+    if store and not csv_path and store.source is None and len(_mls_feeds) > 1:
+        return _refresh_feeds()
+
+    csv_path = csv_path or (store.source if store else None)
+    if not store or not csv_path or os.path.abspath(csv_path) != os.path.abspath(store.source or ''):
+        if not csv_path:
+            return {'success': False, 'changed': False, 'message': 'No MLS data loaded and no csv_path given'}
+        result = load_mls_data(csv_path)
+        result.update({'changed': result['success'], 'version': _mls_version})
+        return result
+
+    try:
+        with _mls_lock:
+            store = _mls_store
+            if not os.path.exists(csv_path):
+                return {'success': False, 'changed': False, 'message': f'MLS file not found: {csv_path}'}
+
+            def unchanged(message):
+                return {'success': True, 'changed': False, 'added': 0, 'updated': 0, 'removed': 0,
+                        'count': len(store), 'version': _mls_version, 'message': message}
+
+            fingerprint = source_fingerprint(csv_path, with_hash=False)
+            known = _mls_fingerprint or {}
+            if (fingerprint['size'], fingerprint['mtime_ns']) == (known.get('size'), known.get('mtime_ns')):
+                return unchanged('MLS feed unchanged')
+            fingerprint['sha256'] = file_sha256(csv_path)
+            if fingerprint['sha256'] == known.get('sha256'):
+                _mls_fingerprint.update(fingerprint)
+                return unchanged('MLS feed touched but content unchanged')
+
+            # Diff chunk by chunk: only added and changed rows are kept in memory
+            feed = _mls_feeds[0][1] if _mls_feeds else detect_feed(csv_path)
+            delta = store.diff(feed.chunks(csv_path, chunk_rows()))
+            try:
+                new_store = store.apply_delta(delta['rows'], delta['removed'], csv_path)
+                mode = 'delta'
+            except ValueError:
+                new_store = ingest_csv(csv_path, feed=feed)
+                mode = 'rebuild'
+
+            event = _publish(new_store, fingerprint, 'delta',
+                             delta['added'], delta['changed'], delta['removed'])
+
+        try:
+            write_snapshot(new_store, csv_path, fingerprint, feed=feed)
+        except OSError as e:
+            print(f"⚠️  MLS snapshot not updated: {e}")
+
+        return {
+            'success': True,
+            'changed': True,
+            'added': len(delta['added']),
+            'updated': len(delta['changed']),
+            'removed': len(delta['removed']),
+            'count': len(new_store),
+            'version': event['version'],
+            'message': (f"MLS refreshed ({mode}): {len(delta['added'])} added, "
+                        f"{len(delta['changed'])} changed, {len(delta['removed'])} removed")
+        }
+
+    except Exception as e:
+        return {'success': False, 'changed': False, 'message': f'Error refreshing MLS data: {str(e)}'}
+
+def _refresh_feeds() -> Dict[str, Any]:
+    """refresh_mls_data for a store merged from several feeds"""
+    global _mls_fingerprint
+
+    try:
+        with _mls_lock:
+            store = _mls_store
+            feeds = list(_mls_feeds)
+            missing = [path for path, _ in feeds if not os.path.exists(path)]
+            if missing:
+                return {'success': False, 'changed': False, 'message': f'MLS file not found: {", ".join(missing)}'}
+
+            def unchanged(message):
+                return {'success': True, 'changed': False, 'added': 0, 'updated': 0, 'removed': 0,
+                        'count': len(store), 'version': _mls_version, 'message': message}
+
+            known = (_mls_fingerprint or {}).get('feeds', [])
+            current = [source_fingerprint(path, with_hash=False) for path, _ in feeds]
+            if len(known) == len(current) and all(
+                    (now['size'], now['mtime_ns']) == (then.get('size'), then.get('mtime_ns'))
+                    for now, then in zip(current, known)):
+                return unchanged('MLS feeds unchanged')
+
+            # Unchanged feeds map their snapshots; changed ones are reparsed
+            loaded = load_feeds(feeds)
+            delta = store_delta(store, loaded['store'])
+            fingerprint = {'feeds': [feed['fingerprint'] for feed in loaded['feeds']]}
+            if not any(delta.values()):
+                _mls_fingerprint = fingerprint
+                return unchanged('MLS feeds touched but listings unchanged')
+
+            new_store = loaded['store']
+            event = _publish(new_store, fingerprint, 'delta', delta['added'], delta['changed'], delta['removed'])
+
+        return {
+            'success': True,
+            'changed': True,
+            'added': len(delta['added']),
+            'updated': len(delta['changed']),
+            'removed': len(delta['removed']),
+            'count': len(new_store),
+            'version': event['version'],
+            'message': (f"MLS feeds refreshed: {len(delta['added'])} added, "
+                        f"{len(delta['changed'])} changed, {len(delta['removed'])} removed")
+        }
+
+    except Exception as e:
+        return {'success': False, 'changed': False, 'message': f'Error refreshing MLS feeds: {str(e)}'}
+
 def find_mls_property(mls_number: str) -> Dict[str, Any]:
     """
     Find property by MLS number in loaded data.
@@ -82,9 +491,9 @@ def find_mls_property(mls_number: str) -> Dict[str, Any]:
     Returns:
         dict: {'success': bool, 'property': dict, 'message': str}
     """
-    global _mls_data
+    store = _current_store()
 
-    if not _mls_data:
+    if not store:
         return {
             'success': False,
             'property': None,
@@ -93,10 +502,10 @@ def find_mls_property(mls_number: str) -> Dict[str, Any]:
 
     mls_number = str(mls_number).strip()
 
-    if mls_number in _mls_data:
+    if mls_number in store:
         return {
             'success': True,
-            'property': _mls_data[mls_number],
+            'property': store.get(mls_number),
             'message': f'Found MLS #{mls_number}'
         }
     else:
@@ -106,6 +515,210 @@ def find_mls_property(mls_number: str) -> Dict[str, Any]:
             'message': f'MLS #{mls_number} not found in loaded data'
         }
 
+def find_mls_property_by_address(street_address: str, city: str, state: str = 'CA') -> Dict[str, Any]:
+    """
+    Find the MLS listing for a street address using the normalized address key.
+
+    Args:
+        street_address (str): Street line in any common format ('123 Main St' / '123 MAIN STREET')
+        city (str): City
+        state (str): State (default: 'CA')
+
+    Returns:
+        dict: {'success': bool, 'mls_number': str, 'property': dict, 'message': str}
+    """
+    store = _current_store()
+    mls_num = store.find_by_address(street_address, city, state) if store else None
+
+    if mls_num is None:
+        return {
+            'success': False,
+            'mls_number': None,
+            'property': None,
+            'message': f'No MLS listing found at {street_address}, {city}'
+        }
+
+    return {
+        'success': True,
+        'mls_number': mls_num,
+        'property': store.get(mls_num),
+        'message': f'Found MLS #{mls_num} at {street_address}, {city}'
+    }
+
+def _get_search_index(store: MLSStore) -> MLSSearchIndex:
+    """Search index for a store version (built on first search after each load or refresh)"""
+    global _search_index
+    index = _search_index
+    if index is not None and index.store is store:
+        return index
+    with _search_lock:
+        if _search_index is None or _search_index.store is not store:
+            _search_index = MLSSearchIndex(store)
+        return _search_index
+
+def find_mls_properties(filters: Optional[Dict[str, Any]] = None, **criteria) -> Dict[str, Any]:
+    """
+    Search loaded MLS listings by several criteria at once, e.g.
+    "3br under 650k in Grass Valley with a pool".
+
+    Args:
+        filters (dict): Criteria as a dict; keyword arguments are merged in.
+            Ranges: min_/max_ price, sqft, lot_acres, dom, year_built, bedrooms, bathrooms
+            Categories: city, zip_code, property_type, status (one value or a list), pool (bool)
+            sort_by: price_asc (default), price_desc, newest_listing, newest_construction,
+            sqft_desc, lot_desc; limit: max results (default 20)
+
+    Returns:
+        dict: {'success': bool, 'count': int, 'total': int, 'properties': list, 'message': str}
+    """
+    store = _current_store()
+
+    if not store:
+        return {
+            'success': False,
+            'count': 0,
+            'total': 0,
+            'properties': [],
+            'message': 'No MLS data loaded. Please load MLS CSV file first.'
+        }
+
+    filters = {**(filters or {}), **criteria}
+    try:
+        result = _get_search_index(store).search(filters)
+    except (ValueError, TypeError) as e:
+        return {'success': False, 'count': 0, 'total': 0, 'properties': [], 'message': str(e)}
+
+    shown = len(result['properties'])
+    return {
+        'success': True,
+        'count': shown,
+        'total': result['total'],
+        'properties': result['properties'],
+        'message': (f"Found {result['total']} MLS listings matching your criteria"
+                    + (f" (showing {shown})" if shown < result['total'] else ''))
+    }
+
+def _update_keyword_index(event: Dict[str, Any]) -> None:
+    """MLS change listener: index the new store's text, reusing the previous postings on a delta"""
+    global _keyword_index
+    store = _mls_store
+    if store is None:
+        return
+    previous = _keyword_index
+    with _search_lock:
+        if event['type'] == 'delta' and previous is not None:
+            _keyword_index = previous.extend(store)
+        else:
+            _keyword_index = KeywordIndex.build(store)
+
+subscribe_mls_changes(_update_keyword_index)
+
+def _get_keyword_index(store: MLSStore) -> KeywordIndex:
+    """Keyword index for a store version (built here if the change listener has not run for it)"""
+    global _keyword_index
+    index = _keyword_index
+    if index is not None and index.store is store:
+        return index
+    with _search_lock:
+        if _keyword_index is None or _keyword_index.store is not store:
+            _keyword_index = KeywordIndex.build(store)
+        return _keyword_index
+
+def search_mls_keywords(query: str, filters: Optional[Dict[str, Any]] = None, **criteria) -> Dict[str, Any]:
+    """
+    Search the text of MLS listings (Public Remarks plus exterior, parking,
+    pool, patio, levels and style features), e.g. "owned solar",
+    "RV parking" or "single story" AND pool, optionally narrowed by the
+    find_mls_properties criteria.
+
+    Words are stemmed (pools finds pool) and ANDed; "quoted words" match
+    as a phrase; OR, NOT / -word and parentheses combine them; a field
+    prefix searches one field, e.g. parking:rv or remarks:"owned solar".
+
+    Args:
+        query (str): Keyword query
+        filters (dict): find_mls_properties criteria; keyword arguments are merged in
+
+    Returns:
+        dict: {'success': bool, 'count': int, 'total': int, 'properties': list, 'message': str}
+    """
+    store = _current_store()
+
+    if not store:
+        return {
+            'success': False,
+            'count': 0,
+            'total': 0,
+            'properties': [],
+            'message': 'No MLS data loaded. Please load MLS CSV file first.'
+        }
+
+    filters = {**(filters or {}), **criteria}
+    try:
+        result = _get_keyword_index(store).search(query, _get_search_index(store), filters)
+    except (ValueError, TypeError) as e:
+        return {'success': False, 'count': 0, 'total': 0, 'properties': [], 'message': str(e)}
+
+    shown = len(result['properties'])
+    return {
+        'success': True,
+        'count': shown,
+        'total': result['total'],
+        'properties': result['properties'],
+        'message': (f"Found {result['total']} MLS listings matching \"{query}\""
+                    + (f" (showing {shown})" if shown < result['total'] else ''))
+    }
+
+def _update_similarity_index(event: Dict[str, Any]) -> None:
+    """MLS change listener: reweigh listing vectors for the new store (runs after _update_keyword_index)"""
+    global _similarity_index
+    store = _mls_store
+    if store is not None:
+        _similarity_index = SimilarityIndex(store, _get_keyword_index(store), _get_search_index(store))
+
+subscribe_mls_changes(_update_similarity_index)
+
+def find_similar_listings(mls_number: str, limit: int = 10, filters: Optional[Dict[str, Any]] = None,
+                          **criteria) -> Dict[str, Any]:
+    """
+    Find MLS listings similar to one a buyer liked: remarks wording (TF-IDF)
+    plus price, square footage, beds, baths, lot size and year built.
+    Computed locally from the loaded feed, no external service.
+
+    Args:
+        mls_number (str): The listing to match
+        limit (int): Max results (default 10)
+        filters (dict): find_mls_properties criteria (e.g. status, city, max_price);
+            keyword arguments are merged in
+
+    Returns:
+        dict: {'success': bool, 'count': int, 'properties': list with 'similarity', 'message': str}
+    """
+    store = _current_store()
+
+    if not store:
+        return {'success': False, 'count': 0, 'properties': [],
+                'message': 'No MLS data loaded. Please load MLS CSV file first.'}
+
+    index = _similarity_index
+    if index is None or index.store is not store:
+        index = SimilarityIndex(store, _get_keyword_index(store), _get_search_index(store))
+    filters = {**(filters or {}), **criteria}
+    try:
+        result = index.similar(mls_number, limit, filters)
+    except KeyError:
+        return {'success': False, 'count': 0, 'properties': [], 'message': f'MLS #{mls_number} not found'}
+    except (ValueError, TypeError) as e:
+        return {'success': False, 'count': 0, 'properties': [], 'message': str(e)}
+
+    return {
+        'success': True,
+        'mls_number': str(mls_number).strip(),
+        'count': len(result['properties']),
+        'properties': result['properties'],
+        'message': f"Found {len(result['properties'])} listings similar to MLS #{str(mls_number).strip()}"
+    }
+
 def create_property_from_mls(mls_number: str) -> Dict[str, Any]:
     """
     Auto-create property record from MLS data.
@@ -130,45 +743,15 @@ def create_property_from_mls(mls_number: str) -> Dict[str, Any]:
     mls_data = mls_result['property']
 
     try:
-        # Import our CRM functions
-        from .real_estate_crm import create_property
-
-        # Map Nevada County MLS data to our property fields (exact column names)
-        property_data = {
-            'address_line1': mls_data.get('Address - Street Complete', ''),
-            'city': mls_data.get('Address - City', ''),
-            'state': 'CA',  # Nevada County is in California
-            'zip_code': str(mls_data.get('Address - Zip Code', '')),
-            'mls_number': mls_number,
-            'listing_price': _safe_float(mls_data.get('Current Listing Price', 0)),
-            'bedrooms': _extract_bedrooms(mls_data.get('Bedrooms And Possible Bedrooms', '')),
-            'bathrooms': _calculate_total_bathrooms(
-                mls_data.get('Full Bathrooms', 0),
-                mls_data.get('Partial Bathrooms', 0)
-            ),
-            'square_feet': _safe_int(mls_data.get('Square Footage', 0)),
-            'lot_size': _safe_float(mls_data.get('Lot Size - Acres', 0)),
-            'year_built': _safe_int(mls_data.get('Year Built Details', 0)),
-            'property_type': _normalize_property_type(mls_data.get('Property Type', 'Residential')),
-            'listing_type': 'sale',
-            'property_description': mls_data.get('Public Remarks', ''),
-            'public_remarks': mls_data.get('Public Remarks', ''),
-            'private_remarks': f'''Auto-imported from Nevada County MLS #{mls_number} on {datetime.now().strftime("%Y-%m-%d")}
-
-Additional MLS Details:
-- Architectural Style: {mls_data.get('Architectural Style', 'N/A')}
-- Heating: {mls_data.get('Heating', 'N/A')}
-- Cooling: {mls_data.get('Cooling', 'N/A')}
-- Fireplace Features: {mls_data.get('Fireplace Features', 'N/A')}
-- Garage Spaces: {mls_data.get('Garage Spaces', 'N/A')}
-- Parking Features: {mls_data.get('Parking Features', 'N/A')}
-- Pool: {mls_data.get('Pool', 'N/A')}
-- Subdivision: {mls_data.get('Subdivision', 'N/A')}
-- DOM (Days on Market): {mls_data.get('DOM', 'N/A')}
-- Original Price: {mls_data.get('Original Price', 'N/A')}
-- Listing Date: {mls_data.get('Listing Date', 'N/A')}
-- Status: {mls_data.get('Status', 'N/A')}'''
-        }
+        # Import our CRM functions (create_property rejects addresses that
+        # already exist under any formatting via normalized_address_key)
+        from real_estate_crm import create_property
+
+        # Map the canonical listing columns (every feed layout is mapped onto
+        # them at load) to our property fields with the shared converters
+        property_data = listing_properties(pd.DataFrame([mls_data])).iloc[0].to_dict()
+        property_data['mls_number'] = mls_number
+        property_data['private_remarks'] = private_remarks(pd.DataFrame([mls_data]), [mls_number]).iloc[0]
 
         # Create property using our existing function
         result = create_property(**property_data)
@@ -196,6 +779,392 @@ Additional MLS Details:
             'mls_data': mls_data
         }
 
+def import_mls_properties(mls_numbers: Optional[Union[List[str], str]] = None,
+                          filters: Optional[Dict[str, Any]] = None,
+                          db_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Create CRM properties for many MLS listings at once, e.g. a whole
+    subdivision or every result of a saved search.
+
+    Listings already in the CRM (same MLS number or address) are skipped.
+    Existing properties are looked up with one query and all new rows are
+    inserted in one transaction.
+
+    Args:
+        mls_numbers (list): MLS numbers to import (or a comma-separated string)
+        filters (dict): find_mls_properties criteria; every matching listing is imported
+        db_path (str): CRM database (default: real_estate_crm.db)
+
+    Returns:
+        dict: {'success': bool, 'created': int, 'existing': int, 'not_found': int,
+               'results': list of per-listing {'mls_number', 'status', 'property_id', 'message'}, 'message': str}
+    """
+    store = _current_store()
+
+    def failure(message):
+        return {'success': False, 'created': 0, 'existing': 0, 'not_found': 0, 'results': [], 'message': message}
+
+    if not store:
+        return failure('No MLS data loaded. Please load MLS CSV file first.')
+
+    if isinstance(mls_numbers, str):
+        mls_numbers = [number.strip() for number in mls_numbers.split(',') if number.strip()]
+    numbers = list(mls_numbers or [])
+    if filters:
+        criteria = {name: value for name, value in filters.items() if name not in ('sort_by', 'limit')}
+        try:
+            positions = np.sort(_get_search_index(store).match(criteria))
+        except (ValueError, TypeError) as e:
+            return failure(str(e))
+        numbers += [store.key_at(position) for position in positions.tolist()]
+    if not numbers:
+        return failure('No MLS listings to import: give mls_numbers or filters that match listings')
+
+    try:
+        conn = sqlite3.connect(str(db_path or DATABASE_PATH))
+        try:
+            result = import_listings(conn, store, numbers)
+            index_properties(conn, [outcome['property_id'] for outcome in result['results']
+                                    if outcome['status'] == 'created'])
+        finally:
+            conn.close()
+        return result
+    except Exception as e:
+        return failure(f'Error importing MLS listings: {str(e)}')
+
+def reconcile_mls_properties(mls_numbers: Optional[Union[List[str], str]] = None,
+                             db_path: Optional[str] = None, store: Optional[MLSStore] = None) -> Dict[str, Any]:
+    """
+    Update CRM properties created from MLS listings with the feed's current
+    listing price and status (price drops, pending, sold). Every change is
+    written to audit_log; all updates are applied in one transaction.
+
+    Args:
+        mls_numbers (list): Only these listings (default: every property with an MLS number)
+        db_path (str): CRM database (default: real_estate_crm.db)
+        store (MLSStore): Listings to reconcile against (default: the current store)
+
+    Returns:
+        dict: {'success': bool, 'checked': int, 'updated': int, 'price_changes': int, 'status_changes': int,
+               'not_in_feed': int, 'changes': list, 'message': str}
+    """
+    global _last_reconciliation
+    if store is None:
+        store = _current_store()
+
+    def failure(message):
+        return {'success': False, 'checked': 0, 'updated': 0, 'price_changes': 0, 'status_changes': 0,
+                'not_in_feed': 0, 'changes': [], 'message': message}
+
+    if not store:
+        return failure('No MLS data loaded. Please load MLS CSV file first.')
+    db_path = str(db_path or _reconcile_db_path or DATABASE_PATH)
+    if not os.path.exists(db_path):
+        return failure(f'Database not found: {db_path}')
+    if isinstance(mls_numbers, str):
+        mls_numbers = [number.strip() for number in mls_numbers.split(',') if number.strip()]
+
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            result = reconcile_listings(conn, store, mls_numbers)
+        finally:
+            conn.close()
+    except Exception as e:
+        return failure(f'Error reconciling MLS properties: {str(e)}')
+
+    _last_reconciliation = {'message': result['message'], 'updated': result['updated'],
+                            'timestamp': datetime.now().isoformat()}
+    return result
+
+def _reconcile_on_change(event: Dict[str, Any]) -> None:
+    """MLS change listener: a delta reconciles only the listings it added or changed"""
+    if event.get('origin') == 'shared':
+        return  # reconciled by the process that published it
+    numbers = None if event['type'] == 'load' else event['added'] + event['changed']
+    if numbers is not None and not numbers:
+        return
+    # The version being announced; _current_store() here would re-enter _mls_lock
+    result = reconcile_mls_properties(numbers, _reconcile_db_path, store=_mls_store)
+    if result['updated'] or not result['success']:
+        print(f"{'🔄' if result['success'] else '⚠️ '} MLS reconciliation: {result['message']}")
+
+def enable_mls_reconciliation(db_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Reconcile CRM properties after every MLS load and refresh (see reconcile_mls_properties).
+
+    Returns:
+        dict: {'success': bool, 'message': str}
+    """
+    global _reconcile_db_path
+    _reconcile_db_path = str(db_path or DATABASE_PATH)
+    subscribe_mls_changes(_reconcile_on_change)
+    return {'success': True, 'message': f'MLS reconciliation enabled for {_reconcile_db_path}'}
+
+def disable_mls_reconciliation() -> Dict[str, Any]:
+    global _reconcile_db_path
+    unsubscribe_mls_changes(_reconcile_on_change)
+    _reconcile_db_path = None
+    return {'success': True, 'message': 'MLS reconciliation disabled'}
+
+def _record_history(event: Dict[str, Any]) -> None:
+    """MLS change listener: a delta records only the listings it added or changed"""
+    if event.get('origin') == 'shared':
+        return  # recorded by the process that published it
+    history, store = _listing_history, _mls_store
+    if history is None or store is None:
+        return
+    numbers = None if event['type'] == 'load' else event['added'] + event['changed']
+    if numbers is not None and not numbers:
+        return
+    result = history.append(store, mls_numbers=numbers)
+    if result['appended']:
+        print(f"📈 MLS history: {result['message']}")
+
+def enable_mls_history(root: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Record listing price, status and DOM observations after every MLS load
+    and refresh (see mls_history). Only listings whose values changed are appended.
+
+    Returns:
+        dict: {'success': bool, 'message': str}
+    """
+    global _listing_history
+    _listing_history = ListingHistory(root)
+    subscribe_mls_changes(_record_history)
+    return {'success': True, 'message': f'MLS history enabled in {_listing_history.root}'}
+
+def disable_mls_history() -> Dict[str, Any]:
+    global _listing_history
+    unsubscribe_mls_changes(_record_history)
+    _listing_history = None
+    return {'success': True, 'message': 'MLS history disabled'}
+
+def _history_or_failure() -> Tuple[Optional[ListingHistory], Optional[Dict[str, Any]]]:
+    if _listing_history is None:
+        return None, {'success': False, 'message': 'MLS history is not enabled'}
+    return _listing_history, None
+
+def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-friendly rows: dates as YYYY-MM-DD, NaN as None"""
+    frame = frame.copy()
+    for name in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[name]):
+            frame[name] = frame[name].dt.strftime('%Y-%m-%d')
+    return [{name: (None if pd.isna(value) else value) for name, value in row.items()}
+            for row in frame.to_dict('records')]
+
+def find_mls_price_drops(days: int = 7) -> Dict[str, Any]:
+    """
+    Listings whose price dropped in the last `days` days.
+
+    Returns:
+        dict: {'success': bool, 'drops': [{'mls_number', 'observed', 'previous_price', 'price',
+               'change', 'change_percent', ...}], 'count': int, 'message': str}
+    """
+    history, failure = _history_or_failure()
+    if failure:
+        return failure
+    drops = _records(history.price_changes(int(days)))
+    return {'success': True, 'drops': drops, 'count': len(drops),
+            'message': f'{len(drops)} price drops in the last {days} days'}
+
+def get_mls_days_on_market(by: str = 'subdivision', status: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Median days on market per subdivision (or another history column), from each listing's latest observation.
+
+    Returns:
+        dict: {'success': bool, 'groups': [{by, 'median_dom', 'listings'}], 'message': str}
+    """
+    history, failure = _history_or_failure()
+    if failure:
+        return failure
+    if by not in ('subdivision', 'status'):
+        return {'success': False, 'message': f'Cannot group days on market by {by}'}
+    groups = _records(history.median_dom(by, status))
+    return {'success': True, 'groups': groups, 'message': f'Median days on market for {len(groups)} groups'}
+
+def get_mls_listing_history(mls_number: str) -> Dict[str, Any]:
+    """
+    Recorded price/status observations of one listing, oldest first.
+
+    Returns:
+        dict: {'success': bool, 'history': list, 'message': str}
+    """
+    history, failure = _history_or_failure()
+    if failure:
+        return failure
+    observations = history.listing_history(str(mls_number).strip())
+    if not observations:
+        return {'success': False, 'history': [], 'message': f'No history recorded for MLS #{mls_number}'}
+    return {'success': True, 'history': observations,
+            'message': f'{len(observations)} observations of MLS #{mls_number}'}
+
+def _rebuild_market_stats(event: Dict[str, Any]) -> None:
+    """MLS change listener: precompute market statistics for the new store version"""
+    global _market_cube
+    store = _mls_store
+    if store is not None:
+        _market_cube = MarketStatsCube.build(store, event['version'])
+
+subscribe_mls_changes(_rebuild_market_stats)
+
+def get_market_stats(city: Optional[str] = None, subdivision: Optional[str] = None,
+                     property_type: Optional[str] = None, bedrooms: Optional[Any] = None,
+                     by: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Market statistics from the loaded MLS listings: counts by status and
+    median/percentile list price, close price, price per square foot and
+    days on market, for any combination of city, subdivision, property
+    type and bedroom count (5+ grouped). Answered from a cube precomputed
+    when MLS data loads or changes.
+
+    Args:
+        city, subdivision, property_type, bedrooms: Market segment (omit for all listings)
+        by (str): Break the segment down by city, subdivision, property_type or bedrooms
+
+    Returns:
+        dict: {'success': bool, 'stats': dict or 'breakdown': list, 'filters': dict, 'message': str}
+    """
+    _current_store()
+    cube = _market_cube
+    if cube is None:
+        return {'success': False, 'message': 'No MLS data loaded. Please load MLS CSV file first.'}
+    filters = {name: value for name, value in (('city', city), ('subdivision', subdivision),
+                                               ('property_type', property_type), ('bedrooms', bedrooms))
+               if value not in (None, '')}
+    try:
+        if by:
+            if by not in MARKET_DIMENSIONS:
+                return {'success': False, 'message': f'Cannot break market stats down by {by}. '
+                                                     f'Use one of: {", ".join(MARKET_DIMENSIONS)}'}
+            breakdown = cube.breakdown(by, **filters)
+            return {'success': True, 'breakdown': breakdown, 'filters': filters, 'by': by,
+                    'version': cube.version, 'built_at': cube.built_at,
+                    'message': f'Market stats for {len(breakdown)} {by} values'}
+        stats = cube.get(**filters)
+    except ValueError as e:
+        return {'success': False, 'message': f'Invalid market filter: {str(e)}'}
+
+    if stats is None:
+        return {'success': False, 'filters': filters, 'message': 'No MLS listings in this market segment'}
+    return {'success': True, 'stats': stats, 'filters': filters, 'version': cube.version,
+            'built_at': cube.built_at, 'message': f"Market stats over {stats['listings']} listings"}
+
+def _matching_clients(client_ids: Optional[List[int]] = None) -> ClientPreferences:
+    conn = sqlite3.connect(_matching_db_path)
+    try:
+        return ClientPreferences.from_db(conn, _client_matcher.vocabulary, client_ids)
+    finally:
+        conn.close()
+
+def _score_all_clients(store: MLSStore) -> Dict[str, Any]:
+    listings = ListingFeatures.from_store(store, _client_matcher.vocabulary)
+    return _client_matcher.score_all(_matching_clients(), listings)
+
+def _update_client_matches(event: Dict[str, Any]) -> None:
+    """MLS change listener: a delta scores only its added and changed listings against every client"""
+    matcher, store = _client_matcher, _mls_store
+    if matcher is None or store is None:
+        return
+    try:
+        with _matching_lock:
+            if event['type'] == 'load':
+                result = _score_all_clients(store)
+            else:
+                numbers = event['added'] + event['changed']
+                delta = ListingFeatures.from_store(store, matcher.vocabulary, numbers)
+                inactive = sorted(set(numbers) - set(delta.keys.tolist()))  # now pending, sold, ...
+                result = matcher.update_listings(delta, event['removed'] + inactive)
+                matcher.listings = None  # full features rebuilt on the next client rescore
+        print(f"🎯 Client matching: {result['message']}")
+    except Exception as e:
+        print(f"⚠️  Client matching failed: {e}")
+
+def enable_client_matching(db_path: Optional[str] = None, top_n: int = 20) -> Dict[str, Any]:
+    """
+    Keep a top-N MLS listing match list for every active buyer, rescored
+    when MLS data loads and updated with only the new or changed listings
+    on refresh (see client_matching).
+
+    Returns:
+        dict: {'success': bool, 'message': str}
+    """
+    global _client_matcher, _matching_db_path
+    _matching_db_path = str(db_path or DATABASE_PATH)
+    _client_matcher = ClientMatcher(top_n)
+    subscribe_mls_changes(_update_client_matches)
+    if _mls_store is not None:
+        with _matching_lock:
+            _score_all_clients(_mls_store)
+    return {'success': True, 'message': f'Client matching enabled for {_matching_db_path}'}
+
+def disable_client_matching() -> Dict[str, Any]:
+    global _client_matcher, _matching_db_path
+    unsubscribe_mls_changes(_update_client_matches)
+    _client_matcher = _matching_db_path = None
+    return {'success': True, 'message': 'Client matching disabled'}
+
+def rescore_client_matches(client_ids: Union[List[int], int]) -> Dict[str, Any]:
+    """
+    Rescore only these clients against every active listing, after their
+    budget, bedrooms, area or property type preferences changed.
+
+    Returns:
+        dict: {'success': bool, 'clients': int, 'listings': int, 'seconds': float, 'message': str}
+    """
+    store = _current_store()
+    matcher = _client_matcher
+    if matcher is None or store is None:
+        return {'success': False, 'message': 'Client matching is not enabled or no MLS data is loaded'}
+    client_ids = [client_ids] if isinstance(client_ids, (int, str)) else list(client_ids)
+    with _matching_lock:
+        if matcher.listings is None:
+            matcher.listings = ListingFeatures.from_store(store, matcher.vocabulary)
+        return matcher.update_clients(_matching_clients(client_ids), client_ids)
+
+def get_client_matches(client_id: int, limit: int = 10) -> Dict[str, Any]:
+    """
+    Best-matching active MLS listings for a buyer, by price fit with their
+    budget, bedrooms, preferred areas and property type.
+
+    Args:
+        client_id (int): CRM client ID
+        limit (int): Number of listings to return
+
+    Returns:
+        dict: {'success': bool, 'client_id': int, 'matches': [{'mls_number', 'score', 'address', 'city',
+               'price', 'bedrooms', 'property_type', 'dom'}], 'message': str}
+    """
+    store = _current_store()
+    matcher = _client_matcher
+    if matcher is None or store is None:
+        return {'success': False, 'matches': [], 'message': 'Client matching is not enabled or no MLS data is loaded'}
+
+    matches = []
+    for mls_number, score in matcher.matches(int(client_id)):
+        listing = store.get(mls_number)
+        if listing is None:
+            continue
+        matches.append({
+            'mls_number': mls_number,
+            'score': score,
+            'address': listing.get('Address - Street Complete'),
+            'city': listing.get('Address - City'),
+            'price': listing.get('List Price'),
+            'bedrooms': listing.get('Bedrooms And Possible Bedrooms'),
+            'property_type': listing.get('Property Type'),
+            'dom': listing.get('DOM'),
+        })
+        if len(matches) >= int(limit):
+            break
+
+    if not matches:
+        return {'success': False, 'client_id': int(client_id), 'matches': [],
+                'message': f'No matching listings for client {client_id} (not an active buyer or nothing fits)'}
+    return {'success': True, 'client_id': int(client_id), 'matches': matches,
+            'message': f'Top {len(matches)} MLS matches for client {client_id}'}
+
 def get_mls_status() -> Dict[str, Any]:
     """
     Get current MLS data status.
@@ -203,82 +1172,34 @@ def get_mls_status() -> Dict[str, Any]:
     Returns:
         dict: Status information about loaded MLS data
     """
-    global _mls_data, _mls_last_loaded
+    store = _current_store()
 
     return {
-        'loaded': _mls_data is not None,
-        'count': len(_mls_data) if _mls_data else 0,
+        'loaded': store is not None,
+        'count': len(store) if store else 0,
         'last_updated': _mls_last_loaded,
-        'sample_mls_numbers': list(_mls_data.keys())[:5] if _mls_data else []
+        'version': _mls_version,
+        'shared_version': _shared_version if _shared_store is not None else None,
+        'last_reconciliation': _last_reconciliation,
+        'sample_mls_numbers': [store.key_at(i) for i in range(min(5, len(store)))] if store else []
     }
 
-def _safe_float(value) -> Optional[float]:
-    """Safely convert value to float"""
-    try:
-        if value is None or value == '':
-            return None
-        return float(str(value).replace(',', '').replace('$', ''))
-    except:
-        return None
-
-def _safe_int(value) -> Optional[int]:
-    """Safely convert value to int"""
-    try:
-        if value is None or value == '':
-            return None
-        return int(float(str(value).replace(',', '')))
-    except:
-        return None
-
-def _extract_bedrooms(bedroom_string: str) -> Optional[float]:
-    """Extract bedroom count from Nevada County format like '4 (5)' """
-    try:
-        if not bedroom_string:
-            return None
-        # Extract first number from string like "4 (5)"
-        import re
-        match = re.search(r'(\d+)', str(bedroom_string))
-        return float(match.group(1)) if match else None
-    except:
-        return None
-
-def _calculate_total_bathrooms(full_baths, partial_baths) -> Optional[float]:
-    """Calculate total bathrooms from full and partial"""
-    try:
-        full = _safe_float(full_baths) or 0
-        partial = _safe_float(partial_baths) or 0
-        total = full + (partial * 0.5)  # Partial baths count as 0.5
-        return total if total > 0 else None
-    except:
-        return None
-
-def _normalize_property_type(prop_type: str) -> str:
-    """Convert Nevada County property type to our standard format"""
-    if not prop_type:
-        return 'single_family'
-
-    prop_type_lower = str(prop_type).lower()
-
-    if 'residential' in prop_type_lower or 'single' in prop_type_lower:
-        return 'single_family'
-    elif 'condo' in prop_type_lower:
-        return 'condo'
-    elif 'town' in prop_type_lower:
-        return 'townhouse'
-    elif 'land' in prop_type_lower or 'lot' in prop_type_lower:
-        return 'land'
-    else:
-        return 'single_family'  # Default fallback
-
 # MLS functions registry for AI discovery
 MLS_FUNCTIONS = {
     'load_mls_data': {
         'function': load_mls_data,
         'description': 'Load Nevada County MLS data from CSV file',
         'required_params': ['csv_path'],
-        'optional_params': [],
+        'optional_params': ['feed'],
         'example': 'load_mls_data("/path/to/nevada_county_listings.csv")'
     },
+    'load_mls_feeds': {
+        'function': load_mls_feeds,
+        'description': 'Load and merge several MLS CSV feeds with different column layouts (duplicates removed)',
+        'required_params': ['csv_paths'],
+        'optional_params': ['max_workers'],
+        'example': 'load_mls_feeds(["documents/canonicalListing.csv", "Listing.csv"])'
+    },
     'find_mls_property': {
         'function': find_mls_property,
         'description': 'Find property details by MLS number',
@@ -286,6 +1207,38 @@ MLS_FUNCTIONS = {
         'optional_params': [],
         'example': 'find_mls_property("12345")'
     },
+    'find_mls_property_by_address': {
+        'function': find_mls_property_by_address,
+        'description': 'Find the MLS listing at a street address (any abbreviation style)',
+        'required_params': ['street_address', 'city'],
+        'optional_params': ['state'],
+        'example': 'find_mls_property_by_address("123 Main Street", "Grass Valley")'
+    },
+    'find_mls_properties': {
+        'function': find_mls_properties,
+        'description': 'Search MLS listings by price, size, lot, days on market, year built, beds/baths, city, zip, type, status and pool',
+        'required_params': [],
+        'optional_params': ['min_price', 'max_price', 'min_bedrooms', 'city', 'pool', 'min_bathrooms', 'zip_code',
+                            'min_sqft', 'max_sqft', 'min_lot_acres', 'max_lot_acres', 'max_dom', 'min_year_built',
+                            'max_year_built', 'max_bedrooms', 'property_type', 'status', 'sort_by', 'limit'],
+        'example': 'find_mls_properties(min_bedrooms=3, max_price=650000, city="Grass Valley", pool=True)'
+    },
+    'search_mls_keywords': {
+        'function': search_mls_keywords,
+        'description': 'Search MLS listing remarks and features by keywords and phrases (e.g. owned solar, RV parking, '
+                       'single story pool), with AND/OR/NOT, "quoted phrases" and optional find_mls_properties filters',
+        'required_params': ['query'],
+        'optional_params': ['min_price', 'max_price', 'min_bedrooms', 'city', 'zip_code', 'property_type', 'status',
+                            'max_dom', 'min_sqft', 'sort_by', 'limit'],
+        'example': 'search_mls_keywords(\'"owned solar" OR parking:rv\', max_price=700000, city="Grass Valley")'
+    },
+    'find_similar_listings': {
+        'function': find_similar_listings,
+        'description': 'Find MLS listings similar to a given listing (remarks wording, price, size, beds, baths, lot, year)',
+        'required_params': ['mls_number'],
+        'optional_params': ['limit', 'status', 'city', 'min_price', 'max_price', 'min_bedrooms'],
+        'example': 'find_similar_listings("225036301", limit=5, status="Active")'
+    },
     'create_property_from_mls': {
         'function': create_property_from_mls,
         'description': 'Auto-create property record from MLS data',
@@ -293,6 +1246,62 @@ MLS_FUNCTIONS = {
         'optional_params': [],
         'example': 'create_property_from_mls("12345")'
     },
+    'import_mls_properties': {
+        'function': import_mls_properties,
+        'description': 'Create CRM properties for many MLS listings at once (list of MLS numbers or search filters)',
+        'required_params': [],
+        'optional_params': ['mls_numbers', 'filters'],
+        'example': 'import_mls_properties(filters={"city": "Grass Valley", "max_price": 650000})'
+    },
+    'reconcile_mls_properties': {
+        'function': reconcile_mls_properties,
+        'description': 'Update CRM properties from MLS with current listing prices and statuses (price drops, pending, sold)',
+        'required_params': [],
+        'optional_params': ['mls_numbers'],
+        'example': 'reconcile_mls_properties()'
+    },
+    'find_mls_price_drops': {
+        'function': find_mls_price_drops,
+        'description': 'Find MLS listings with a price drop in the last N days',
+        'required_params': [],
+        'optional_params': ['days'],
+        'example': 'find_mls_price_drops(days=7)'
+    },
+    'get_mls_days_on_market': {
+        'function': get_mls_days_on_market,
+        'description': 'Median days on market by subdivision (or status) from the MLS listing history',
+        'required_params': [],
+        'optional_params': ['by', 'status'],
+        'example': 'get_mls_days_on_market(by="subdivision", status="active")'
+    },
+    'get_mls_listing_history': {
+        'function': get_mls_listing_history,
+        'description': 'Price and status history of one MLS listing',
+        'required_params': ['mls_number'],
+        'optional_params': [],
+        'example': 'get_mls_listing_history("12345")'
+    },
+    'get_market_stats': {
+        'function': get_market_stats,
+        'description': 'Market statistics (median/percentile price, close price, $/sqft, days on market, counts) by city, subdivision, property type and bedrooms',
+        'required_params': [],
+        'optional_params': ['city', 'subdivision', 'property_type', 'bedrooms', 'by'],
+        'example': 'get_market_stats(city="Grass Valley", bedrooms=3) or get_market_stats(by="city")'
+    },
+    'get_client_matches': {
+        'function': get_client_matches,
+        'description': 'Best-matching active MLS listings for a buyer client (budget, bedrooms, area, property type)',
+        'required_params': ['client_id'],
+        'optional_params': ['limit'],
+        'example': 'get_client_matches(client_id=12, limit=5)'
+    },
+    'refresh_mls_data': {
+        'function': refresh_mls_data,
+        'description': 'Apply changes from an updated MLS CSV feed (only changed listings are reprocessed)',
+        'required_params': [],
+        'optional_params': ['csv_path'],
+        'example': 'refresh_mls_data()'
+    },
     'get_mls_status': {
         'function': get_mls_status,
         'description': 'Check status of loaded MLS data',
@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+MLS Keyword Search for Real Estate CRM
+Positional inverted index over Public Remarks and the feature columns, with
+boolean and phrase queries ("owned solar", parking:rv, single story AND pool)
+"""
+
+import re
+import time
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+from mls_store import MLSStore, StringArray
+from mls_search import MLSSearchIndex, DEFAULT_LIMIT, DEFAULT_SORT, MAX_LIMIT
+
+# Searchable text field -> alternative column names (Nevada County export first)
+TEXT_FIELDS = {
+    'remarks': ('Public Remarks', 'Remarks', 'Description'),
+    'exterior': ('Exterior Features',),
+    'parking': ('Parking Features',),
+    'pool': ('Pool Features',),
+    'patio': ('Patio And Porch Features',),
+    'levels': ('Levels',),
+    'style': ('Architectural Style',),
+}
+
+# Comma-separated feature lists ("Attached,RV Access"): items are spaced
+# ITEM_GAP positions apart so a phrase never spans two of them
+LIST_FIELDS = frozenset(TEXT_FIELDS) - {'remarks'}
+ITEM_GAP = 8
+
+STOP_WORDS = frozenset(
+    'a an and are as at be been but by for from has have in into is it its of on or our s so than that the '
+    'their there these this to was w were will with you your'.split())
+
+# Segments appended by refreshes before they are merged into one
+MAX_SEGMENTS = 8
+
+_WORD = re.compile(r'[a-z0-9]+')
+_QUERY_TOKEN = re.compile(r'\(|\)|(-)?(?:([a-z_]+):)?(?:"([^"]*)"?|([^\s()"]+))', re.IGNORECASE)
+_OPERATORS = {'and': 'AND', 'or': 'OR', 'not': 'NOT'}
+
+# ============================================================================
+# TOKENIZING
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def stem(word: str) -> str:
+    """
+    Light suffix-stripping stemmer: plurals, -ing/-ed and a final e
+    (stories -> story, parking -> park, garages -> garag, fenced -> fenc).
+    Documents and queries go through the same rules, so stems only need
+    to agree with each other, not be real words.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]  # running -> run
+            break
+    if word.endswith('e') and len(word) > 3:
+        word = word[:-1]
+    return word
+
+def words(text: str, listing: bool = False) -> List[str]:
+    """Lower-cased words of a text; feature lists get ITEM_GAP empty words between items"""
+    text = text.lower().replace("'", '')
+    if not listing:
+        return _WORD.findall(text)
+    gap = [''] * ITEM_GAP
+    return list(chain.from_iterable(_WORD.findall(item) + gap for item in text.split(',')))
+
+class TermDictionary(dict):
+    """
+    Word -> term id of its stem, -1 for stop words (and the empty gap word).
+    Filled on first sight, so each distinct word is stemmed once per index.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.stems: Dict[str, int] = {}
+
+    def __missing__(self, word: str) -> int:
+        if not word or word in STOP_WORDS:
+            term = -1
+        else:
+            term = self.stems.setdefault(stem(word), len(self.stems))
+        self[word] = term
+        return term
+
+    def lookup(self, word: str) -> Optional[int]:
+        """Term id for a query word without adding it: -1 for stop words, None when never indexed"""
+        if not word or word in STOP_WORDS:
+            return -1
+        return self.stems.get(stem(word))
+
+def _decode(strings: StringArray, start: int, stop: int) -> List[str]:
+    """strings[start:stop] as a list, decoding only that slice of the buffer"""
+    bounds = strings.offsets[start:stop + 1] - strings.offsets[start]
+    raw = strings.data[strings.offsets[start]:strings.offsets[stop]].tobytes()
+    bounds = bounds.tolist()
+    return [raw[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(stop - start)]
+
+# ============================================================================
+# POSTINGS
+# ============================================================================
+
+def _distinct(sorted_values: np.ndarray) -> np.ndarray:
+    """Unique values of an already sorted array (no re-sort, unlike np.unique)"""
+    if len(sorted_values) == 0:
+        return sorted_values
+    return sorted_values[np.concatenate([[True], sorted_values[1:] != sorted_values[:-1]])]
+
+class PostingSegment:
+    """
+    Postings for a run of documents: sorted term ids, and per term the
+    (document, position) pairs in document then position order, as three
+    flat arrays sliced by `starts`.
+    """
+
+    def __init__(self, terms: np.ndarray, starts: np.ndarray, documents: np.ndarray, positions: np.ndarray):
+        self.terms = terms
+        self.starts = starts
+        self.documents = documents
+        self.positions = positions
+        self._frequencies: Optional[Dict[str, np.ndarray]] = None
+
+    @classmethod
+    def build(cls, term_ids: np.ndarray, documents: np.ndarray, positions: np.ndarray) -> 'PostingSegment':
+        """From per-token arrays already in document, position order"""
+        order = np.argsort(term_ids, kind='stable')  # keeps document, position order within a term
+        sorted_terms = term_ids[order]
+        terms, starts = np.unique(sorted_terms, return_index=True)
+        return cls(terms.astype(np.int32), np.append(starts, len(sorted_terms)).astype(np.int64),
+                   documents[order].astype(np.int32), positions[order].astype(np.int32))
+
+    @classmethod
+    def tokenize(cls, texts: List[str], first_document: int, dictionary: TermDictionary,
+                 listing: bool = False) -> 'PostingSegment':
+        lookup = dictionary.__getitem__
+        ids = [list(map(lookup, words(text, listing))) for text in texts]
+        lengths = np.fromiter(map(len, ids), dtype=np.int64, count=len(ids))
+        total = int(lengths.sum())
+        term_ids = np.fromiter(chain.from_iterable(ids), dtype=np.int32, count=total)
+        documents = np.repeat(np.arange(first_document, first_document + len(texts), dtype=np.int32), lengths)
+        starts = np.cumsum(lengths) - lengths
+        positions = np.arange(total, dtype=np.int64) - np.repeat(starts, lengths)
+        keep = term_ids >= 0  # stop words leave a hole in the positions
+        return cls.build(term_ids[keep], documents[keep], positions[keep])
+
+    @classmethod
+    def merge(cls, segments: List['PostingSegment']) -> 'PostingSegment':
+        """One segment from several covering consecutive document runs"""
+        term_ids = np.concatenate([np.repeat(s.terms, np.diff(s.starts)) for s in segments])
+        order = np.lexsort((np.concatenate([s.positions for s in segments]),
+                            np.concatenate([s.documents for s in segments])))
+        return cls.build(term_ids[order], np.concatenate([s.documents for s in segments])[order],
+                         np.concatenate([s.positions for s in segments])[order])
+
+    def postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        slot = int(np.searchsorted(self.terms, term))
+        if slot == len(self.terms) or self.terms[slot] != term:
+            return self.documents[:0], self.positions[:0]
+        start, stop = self.starts[slot], self.starts[slot + 1]
+        return self.documents[start:stop], self.positions[start:stop]
+
+    def phrase(self, terms: List[Tuple[int, int]]) -> np.ndarray:
+        """Documents with every (offset, term) at start + offset for some start"""
+        matches = None
+        for offset, term in terms:
+            documents, positions = self.postings(term)
+            # (document, start) packed into one sorted int64 per occurrence
+            starts = (documents.astype(np.int64) << 32) | (positions.astype(np.int64) - offset + (1 << 31))
+            if matches is None or len(starts) == 0:
+                matches = starts
+            else:
+                found = np.minimum(np.searchsorted(starts, matches), len(starts) - 1)
+                matches = matches[starts[found] == matches]
+            if len(matches) == 0:
+                break
+        return _distinct(matches >> 32).astype(np.int32)
+
+    def frequencies(self) -> Dict[str, np.ndarray]:
+        """
+        Term frequency per distinct (term, document) pair, term-major like the
+        postings, plus 'by_document', the order that groups them by document.
+        Computed on first use and kept: a segment never changes once built.
+        """
+        if self._frequencies is None:
+            term_ids = np.repeat(self.terms, np.diff(self.starts))
+            first = np.ones(len(self.documents), dtype=bool)
+            first[1:] = (term_ids[1:] != term_ids[:-1]) | (self.documents[1:] != self.documents[:-1])
+            first = np.flatnonzero(first)
+            documents = self.documents[first]
+            self._frequencies = {
+                'terms': term_ids[first],
+                'documents': documents,
+                'counts': np.diff(np.append(first, len(self.documents))).astype(np.int32),
+                'by_document': np.argsort(documents, kind='stable').astype(np.int32),
+            }
+        return self._frequencies
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+class FieldIndex:
+    """
+    Inverted index of one text column. Documents are the column's distinct
+    values (its dictionary categories), so repeated feature lists like
+    "Attached,Garage Door Opener" are tokenized once; row matches come from
+    a document -> bool table gathered through the column codes.
+    """
+
+    def __init__(self, column_name: str, codes: np.ndarray, categories: StringArray,
+                 segments: List[PostingSegment], listing: bool):
+        self.column_name = column_name
+        self.codes = codes
+        self.categories = categories
+        self.segments = segments
+        self.listing = listing
+
+    @classmethod
+    def build(cls, column_name: str, column, dictionary: TermDictionary, listing: bool) -> 'FieldIndex':
+        categories = column.categories
+        segment = PostingSegment.tokenize(_decode(categories, 0, len(categories)), 0, dictionary, listing)
+        return cls(column_name, np.asarray(column.codes), categories, [segment], listing)
+
+    def extends_to(self, column) -> bool:
+        """True when the column's categories start with this index's (TextColumn.extend appends)"""
+        old, new = self.categories, column.categories
+        if new is old:
+            return True
+        count = len(old)
+        if len(new) < count or not np.array_equal(old.offsets, new.offsets[:count + 1]):
+            return False
+        return np.array_equal(old.data, new.data[:old.offsets[-1]])
+
+    def extend(self, column, dictionary: TermDictionary) -> 'FieldIndex':
+        """Index for a newer version of the column: only categories added since are tokenized"""
+        count = len(self.categories)
+        segments = list(self.segments)
+        if len(column.categories) > count:
+            texts = _decode(column.categories, count, len(column.categories))
+            segments.append(PostingSegment.tokenize(texts, count, dictionary, self.listing))
+        if len(segments) > MAX_SEGMENTS:
+            segments = [PostingSegment.merge(segments)]
+        return FieldIndex(self.column_name, np.asarray(column.codes), column.categories, segments, self.listing)
+
+    def documents(self, terms: List[Tuple[int, int]]) -> np.ndarray:
+        """Documents containing a term (one entry) or phrase ((offset, term) entries)"""
+        if len(terms) == 1:
+            found = [_distinct(segment.postings(terms[0][1])[0]) for segment in self.segments]
+        else:
+            found = [segment.phrase(terms) for segment in self.segments]
+        return np.concatenate(found)
+
+    def rows(self, documents: np.ndarray) -> np.ndarray:
+        table = np.zeros(len(self.categories) + 1, dtype=bool)  # slot 0 is "missing"
+        table[documents + 1] = True
+        return table[self.codes + 1]
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def parse_query(query: str) -> Any:
+    """
+    Parse a keyword query into a tree of ('text', field, text, quoted),
+    ('and', [...]), ('or', [...]) and ('not', node).
+
+    Words are ANDed; OR, NOT (or a leading -) and parentheses combine them;
+    "quoted words" are phrases; field:word or field:"phrase" searches one
+    field (see TEXT_FIELDS). Raises ValueError for malformed queries.
+    """
+    tokens = []
+    for match in _QUERY_TOKEN.finditer(query or ''):
+        text = match.group(0)
+        if text in ('(', ')'):
+            tokens.append((text,))
+            continue
+        negate, field, phrase, word = match.groups()
+        if field and field.lower() not in TEXT_FIELDS:
+            word = f'{field}:{word if phrase is None else phrase}'
+            field = None
+        if negate:
+            tokens.append(('NOT',))
+        if phrase is None and field is None and word.lower() in _OPERATORS:
+            tokens.append((_OPERATORS[word.lower()],))
+        else:
+            tokens.append(('text', field.lower() if field else None,
+                           word if phrase is None else phrase, phrase is not None))
+    if not tokens:
+        raise ValueError('Empty keyword query')
+
+    position = 0
+
+    def peek():
+        return tokens[position][0] if position < len(tokens) else None
+
+    def advance():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def any_of():
+        nodes = [all_of()]
+        while peek() == 'OR':
+            advance()
+            nodes.append(all_of())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def all_of():
+        nodes = [unary()]
+        while peek() not in (None, 'OR', ')'):
+            if peek() == 'AND':
+                advance()
+            nodes.append(unary())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def unary():
+        kind = peek()
+        if kind == 'NOT':
+            advance()
+            return ('not', unary())
+        if kind == '(':
+            advance()
+            node = any_of()
+            if peek() == ')':
+                advance()
+            return node
+        if kind == 'text':
+            return advance()
+        raise ValueError(f'Unexpected {kind or "end of query"} in keyword query "{query}"')
+
+    tree = any_of()
+    if position < len(tokens):
+        raise ValueError(f'Unbalanced parenthesis in keyword query "{query}"')
+    return tree
+
+class KeywordIndex:
+    """
+    Keyword search structures for one MLSStore version: a FieldIndex per
+    text column in TEXT_FIELDS sharing one TermDictionary.
+
+    Built when MLS data loads; a refresh reuses every field whose categories
+    only grew, tokenizing just the new remarks and feature lists. A query
+    is a few postings lookups per word and boolean row masks, so its cost
+    follows the matches and the row count, not the text volume.
+    """
+
+    def __init__(self, store: MLSStore, fields: Dict[str, FieldIndex], dictionary: TermDictionary,
+                 build_seconds: float = 0.0):
+        self.store = store
+        self.fields = fields
+        self.dictionary = dictionary
+        self.build_seconds = build_seconds
+
+    @classmethod
+    def build(cls, store: MLSStore, previous: Optional['KeywordIndex'] = None) -> 'KeywordIndex':
+        start = time.perf_counter()
+        dictionary = previous.dictionary if previous is not None else TermDictionary()
+        fields = {}
+        for field, names in TEXT_FIELDS.items():
+            column_name = store.first_column(names)
+            if column_name is None or store.columns[column_name].kind != 'text':
+                continue
+            column = store.columns[column_name]
+            old = previous.fields.get(field) if previous is not None else None
+            if old is not None and old.column_name == column_name and old.extends_to(column):
+                fields[field] = old.extend(column, dictionary)
+            else:
+                fields[field] = FieldIndex.build(column_name, column, dictionary, field in LIST_FIELDS)
+        return cls(store, fields, dictionary, time.perf_counter() - start)
+
+    def extend(self, store: MLSStore) -> 'KeywordIndex':
+        """Index for a newer store version, reusing this one's postings where possible"""
+        return KeywordIndex.build(store, self)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def _text(self, field: Optional[str], text: str, quoted: bool) -> Optional[np.ndarray]:
+        """Row mask for a word or phrase, None when it is only stop words"""
+        if field is not None and field not in self.fields:
+            raise ValueError(f'This MLS feed has no {field} text to search')
+        terms = [(offset, self.dictionary.lookup(word)) for offset, word in enumerate(words(text))]
+        terms = [(offset, term) for offset, term in terms if term != -1]
+        if not terms:
+            return None
+        if any(term is None for _, term in terms):
+            return np.zeros(len(self.store), dtype=bool)
+        mask = np.zeros(len(self.store), dtype=bool)
+        for index in ([self.fields[field]] if field else self.fields.values()):
+            documents = index.documents(terms)
+            if len(documents):
+                mask |= index.rows(documents)
+        return mask
+
+    def _evaluate(self, node: Any) -> Optional[np.ndarray]:
+        kind = node[0]
+        if kind == 'text':
+            return self._text(*node[1:])
+        if kind == 'not':
+            mask = self._evaluate(node[1])
+            return None if mask is None else ~mask
+        masks = [mask for mask in map(self._evaluate, node[1]) if mask is not None]
+        if not masks:
+            return None
+        return (np.logical_and if kind == 'and' else np.logical_or).reduce(masks)
+
+    def match(self, query: str) -> np.ndarray:
+        """Row mask of listings matching a keyword query (see parse_query)"""
+        mask = self._evaluate(parse_query(query))
+        if mask is None:
+            raise ValueError(f'Keyword query "{query}" has no searchable words')
+        return mask
+
+    def search(self, query: str, search_index: MLSSearchIndex,
+               filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Keyword query combined with MLSSearchIndex filters (price, beds, city...).
+
+        Returns:
+            dict: {'total': int, 'positions': ndarray, 'properties': list, 'seconds': float}
+        """
+        filters = dict(filters or {})
+        start = time.perf_counter()
+        limit = min(max(int(filters.get('limit') or DEFAULT_LIMIT), 1), MAX_LIMIT)
+        mask = self.match(query)
+        candidates = search_index.match(filters)
+        candidates = candidates[mask[candidates]]
+        positions = search_index.top(candidates, filters.get('sort_by') or DEFAULT_SORT, limit)
+        seconds = time.perf_counter() - start
+        return {
+            'total': len(candidates),
+            'positions': positions,
+            'properties': [search_index.summary(int(position)) for position in positions],
+            'seconds': seconds
+        }
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+BENCHMARK_QUERIES = [
+    'owned solar',
+    '"mountain views" AND deck',
+    'kitchen -trails',
+    'remarks:updated OR parking:rv',
+]
+
+def benchmark_keywords(rows: int = 100_000, repeats: int = 50) -> Dict[str, Any]:
+    """
+    Build a keyword index over a synthetic feed, extend it with a 1% delta
+    and time representative queries (median over `repeats` runs).
+
+    Returns:
+        dict: {'rows': int, 'build_seconds': float, 'extend_seconds': float,
+               'queries': list of {'query', 'total', 'median_ms'}}
+    """
+    import os
+    import tempfile
+    from mls_store import _synthetic_feed
+
+    handle, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    try:
+        _synthetic_feed(csv_path, rows)
+        store = MLSStore.from_csv(csv_path)
+    finally:
+        os.remove(csv_path)
+
+    index = KeywordIndex.build(store)
+    changed = store.frame(np.arange(0, len(store), 100, dtype=np.int64))
+    changed['Public Remarks'] = changed['Public Remarks'] + ' Price reduced, owned solar!'
+    newer = store.apply_delta(changed, [])
+    extended = index.extend(newer)
+    search_index = MLSSearchIndex(newer)
+
+    queries = []
+    for query in BENCHMARK_QUERIES:
+        timings = []
+        for _ in range(repeats):
+            result = extended.search(query, search_index, {'max_price': 800000})
+            timings.append(result['seconds'])
+        queries.append({'query': query, 'total': result['total'],
+                        'median_ms': round(float(np.median(timings)) * 1000, 3)})
+    return {'rows': rows, 'build_seconds': round(index.build_seconds, 3),
+            'extend_seconds': round(extended.build_seconds, 3), 'queries': queries}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='MLS keyword search')
+    parser.add_argument('query', nargs='?', default='owned solar')
+    parser.add_argument('--csv', nargs='*', default=['documents/canonicalListing.csv'])
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Time keyword searches over N synthetic listings')
+    args = parser.parse_args()
+
+    print("🔤 MLS Keyword Search")
+    print("=" * 50)
+
+    if args.benchmark:
+        result = benchmark_keywords(args.benchmark)
+        print(f"  Index built over {result['rows']} listings in {result['build_seconds']}s, "
+              f"extended by a 1% delta in {result['extend_seconds']}s")
+        for query in result['queries']:
+            print(f"  {query['median_ms']:7.3f} ms  {query['total']:6} matches  {query['query']}")
+    else:
+        from mls_feeds import load_feeds
+
+        store = load_feeds(args.csv)['store']
+        index = KeywordIndex.build(store)
+        result = index.search(args.query, MLSSearchIndex(store))
+        print(f"{result['total']} listings match {args.query!r} ({len(index.dictionary.stems)} terms indexed)")
+        for listing in result['properties']:
+            print(f"  #{listing['mls_number']} {listing['address']}, {listing['city']} ${listing['price'] or 0:,.0f}")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+MLS Market Statistics for Real Estate CRM
+Precomputed cube of price, $/sqft, close price and DOM statistics by city,
+subdivision, property type and bedroom count
+"""
+
+import time
+from datetime import datetime
+from itertools import combinations
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mls_store import MLSStore
+from mls_feeds import listing_properties, to_number
+
+# Cube dimensions, in key order
+DIMENSIONS = ('city', 'subdivision', 'property_type', 'bedrooms')
+
+# Statistic -> market frame column
+METRICS = {
+    'list_price': 'list_price',
+    'close_price': 'close_price',
+    'price_per_sqft': 'price_per_sqft',
+    'close_price_per_sqft': 'close_price_per_sqft',
+    'dom': 'dom',
+}
+
+QUANTILES = {'p25': 0.25, 'median': 0.5, 'p75': 0.75, 'p90': 0.9}
+
+STATUS_COUNTS = ('active', 'pending', 'sold')
+
+ALL = '*'
+
+def _key_value(dimension: str, value: Any) -> Optional[str]:
+    """Cube key component for a dimension value: lower-case text, '5+' bedroom bucket"""
+    if value is None or (isinstance(value, float) and value != value) or str(value).strip() == '':
+        return None
+    if dimension == 'bedrooms':
+        bedrooms = int(float(value))
+        return '5+' if bedrooms >= 5 else str(bedrooms)
+    text = str(value).strip().lower()
+    if dimension == 'property_type':
+        text = text.replace('-', '_').replace(' ', '_')
+    return text
+
+def market_frame(store: MLSStore) -> pd.DataFrame:
+    """One row per listing: the cube dimensions (as key values), status and the metric columns"""
+    raw = store.frame(np.arange(len(store), dtype=np.int64))
+    fields = listing_properties(raw)
+
+    def raw_number(name):
+        return to_number(raw[name]) if name in raw else pd.Series(np.nan, index=raw.index)
+
+    list_price = pd.to_numeric(fields['listing_price'], errors='coerce')
+    close_price = raw_number('Close Price')
+    close_price = close_price.where(close_price > 0)  # the feed reports 0 until a listing closes
+    square_feet = pd.to_numeric(fields['square_feet'], errors='coerce')
+    square_feet = square_feet.where(square_feet > 0)
+    subdivision = raw['Subdivision'] if 'Subdivision' in raw else pd.Series(None, index=raw.index)
+
+    frame = pd.DataFrame({
+        'city': [_key_value('city', value) for value in fields['city'].tolist()],
+        'subdivision': [_key_value('subdivision', value) for value in subdivision.tolist()],
+        'property_type': [_key_value('property_type', value) for value in fields['property_type'].tolist()],
+        'bedrooms': [_key_value('bedrooms', value) for value in fields['bedrooms'].tolist()],
+        'status': fields['status'].fillna('active').tolist(),
+        'list_price': list_price.to_numpy(dtype=np.float64),
+        'close_price': close_price.to_numpy(dtype=np.float64),
+        'price_per_sqft': (list_price / square_feet).to_numpy(dtype=np.float64),
+        'close_price_per_sqft': (close_price / square_feet).to_numpy(dtype=np.float64),
+        'dom': raw_number('DOM').to_numpy(dtype=np.float64),
+    })
+    return frame
+
+def _round(value: float) -> Optional[float]:
+    return None if value != value else round(float(value), 2)
+
+class MarketStatsCube:
+    """
+    Market statistics for every combination of city, subdivision, property
+    type and bedroom count, including the roll-ups over any subset of them
+    (16 groupings; '*' marks a rolled-up dimension).
+
+    Built once per MLS store version with one groupby per grouping; lookups
+    are a single dict access on the normalized key.
+    """
+
+    def __init__(self, cells: Dict[Tuple[str, ...], Dict[str, Any]], values: Dict[str, List[str]],
+                 listings: int, version: Optional[int] = None, seconds: float = 0.0):
+        self.cells = cells
+        self.values = values
+        self.listings = listings
+        self.version = version
+        self.seconds = seconds
+        self.built_at = datetime.now().isoformat()
+
+    @classmethod
+    def build(cls, store: MLSStore, version: Optional[int] = None) -> 'MarketStatsCube':
+        start = time.perf_counter()
+        frame = market_frame(store)
+        frame[ALL] = ALL
+        metrics = list(METRICS.values())
+        cells = {}
+
+        for size in range(len(DIMENSIONS) + 1):
+            for dimensions in combinations(DIMENSIONS, size):
+                keys = [ALL] + list(dimensions)
+                subset = frame.dropna(subset=list(dimensions)) if dimensions else frame
+                if subset.empty:
+                    continue
+                grouped = subset.groupby(keys, sort=False)
+                counts = grouped.size()
+                # One row per group: (statistic, metric) columns, then the status counts
+                table = pd.concat({'count': grouped[metrics].count(), 'mean': grouped[metrics].mean(),
+                                   **{name: grouped[metrics].quantile(q) for name, q in QUANTILES.items()}}, axis=1)
+                statuses = subset.groupby(keys + ['status'], sort=False).size().unstack(fill_value=0)
+                statuses = statuses.reindex(index=counts.index, columns=list(STATUS_COUNTS), fill_value=0)
+                positions = {column: position for position, column in enumerate(table.columns)}
+
+                for group, listings, stats, status_counts in zip(counts.index, counts.tolist(),
+                                                                  table.to_numpy().tolist(), statuses.to_numpy().tolist()):
+                    labels = group if isinstance(group, tuple) else (group,)
+                    by_dimension = dict(zip(dimensions, labels[1:]))
+                    key = tuple(by_dimension.get(dimension, ALL) for dimension in DIMENSIONS)
+                    cell = {'listings': int(listings),
+                            'status_counts': dict(zip(STATUS_COUNTS, map(int, status_counts)))}
+                    for metric, column in METRICS.items():
+                        count = int(stats[positions[('count', column)]])
+                        cell[metric] = {'count': count}
+                        if count:
+                            cell[metric].update({name: _round(stats[positions[(name, column)]])
+                                                 for name in list(QUANTILES) + ['mean']})
+                    cells[key] = cell
+
+        values = {dimension: sorted(frame[dimension].dropna().unique().tolist()) for dimension in DIMENSIONS}
+        return cls(cells, values, len(frame), version, round(time.perf_counter() - start, 3))
+
+    @staticmethod
+    def key(city: Any = None, subdivision: Any = None, property_type: Any = None,
+            bedrooms: Any = None) -> Tuple[str, ...]:
+        given = {'city': city, 'subdivision': subdivision, 'property_type': property_type, 'bedrooms': bedrooms}
+        return tuple(_key_value(dimension, given[dimension]) or ALL for dimension in DIMENSIONS)
+
+    def get(self, city: Any = None, subdivision: Any = None, property_type: Any = None,
+            bedrooms: Any = None) -> Optional[Dict[str, Any]]:
+        """Statistics for one cell, None when no listing falls in it"""
+        return self.cells.get(self.key(city, subdivision, property_type, bedrooms))
+
+    def breakdown(self, by: str, **filters) -> List[Dict[str, Any]]:
+        """Cells for every value of one dimension, the other dimensions fixed by filters"""
+        if by not in DIMENSIONS:
+            raise ValueError(f'Unknown market dimension: {by}. Use one of {", ".join(DIMENSIONS)}')
+        base = dict(zip(DIMENSIONS, self.key(**filters)))
+        rows = []
+        for value in self.values[by]:
+            cell = self.cells.get(tuple(value if dimension == by else base[dimension] for dimension in DIMENSIONS))
+            if cell:
+                rows.append({by: value, **cell})
+        return rows
+
+if __name__ == "__main__":
+    import argparse
+
+    from mls_feeds import load_feeds
+
+    parser = argparse.ArgumentParser(description='MLS market statistics')
+    parser.add_argument('csv', nargs='*', default=['documents/canonicalListing.csv', 'Listing.csv'])
+    parser.add_argument('--by', default='city', choices=DIMENSIONS)
+    args = parser.parse_args()
+
+    store = load_feeds(args.csv)['store']
+    cube = MarketStatsCube.build(store)
+    print("📊 MLS Market Statistics")
+    print("=" * 50)
+    print(f"{len(cube.cells)} cells from {cube.listings} listings in {cube.seconds}s\n")
+    for row in cube.breakdown(args.by):
+        print(f"  {row[args.by]:<28} {row['listings']:>4} listings  "
+              f"median ${row['list_price'].get('median') or 0:>12,.0f}  "
+              f"${row['price_per_sqft'].get('median') or 0:>6,.0f}/sqft  "
+              f"DOM {row['dom'].get('median') or 0:>5.0f}")
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Multi-criteria MLS Search for Real Estate CRM
+Sorted-array range indexes and category postings over the columnar MLS store
+"""
+
+import re
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable, Iterable, Tuple
+
+import numpy as np
+
+from mls_store import MLSStore, STREET_COLUMNS, CITY_COLUMNS
+
+# Alternative column names per searchable field (Nevada County export first,
+# then the simple Listing.csv layout)
+RANGE_FIELDS = {
+    'price': ('List Price', 'Current Listing Price', 'Price'),
+    'sqft': ('Square Footage', 'Square_Feet'),
+    'lot_acres': ('Lot Size - Acres',),
+    'dom': ('DOM',),
+    'year_built': ('Year Built Details', 'Year_Built'),
+    'bedrooms': ('Bedrooms And Possible Bedrooms', 'Bedrooms'),
+    'bathrooms': ('Bathrooms',),
+}
+EQUALITY_FIELDS = {
+    'city': CITY_COLUMNS,
+    'zip_code': ('Address - Zip Code', 'Zip'),
+    'property_type': ('Property Type', 'Property_Type'),
+    'status': ('Status',),
+}
+
+# Filter name -> (field, bound)
+RANGE_FILTERS = {
+    f'{bound}_{field}': (field, bound)
+    for field in ('price', 'sqft', 'lot_acres', 'dom', 'year_built', 'bedrooms', 'bathrooms')
+    for bound in ('min', 'max')
+}
+EQUALITY_FILTERS = ('city', 'zip_code', 'property_type', 'status', 'pool')
+
+# sort_by option -> (field, descending)
+SORT_OPTIONS = {
+    'price_asc': ('price', False),
+    'price_desc': ('price', True),
+    'newest_listing': ('dom', False),
+    'newest_construction': ('year_built', True),
+    'sqft_desc': ('sqft', True),
+    'lot_desc': ('lot_acres', True),
+}
+DEFAULT_SORT = 'price_asc'
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+_FIRST_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+_AMOUNT = re.compile(r'^\$?\s*([\d,]*\.?\d+)\s*([km])?$', re.IGNORECASE)
+
+# ============================================================================
+# INDEXES
+# ============================================================================
+
+class RangeIndex:
+    """
+    Row positions sorted by a numeric field. A min/max filter is two binary
+    searches (np.searchsorted is a vectorized bisect) giving a contiguous
+    slice of positions; missing values (NaN) are left out of the sorted run.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        order = np.argsort(values, kind='stable')  # NaN sorts last
+        present = int(np.count_nonzero(~np.isnan(values)))
+        self.order = order[:present].astype(np.int32)
+        self.sorted = values[self.order]
+
+    def _bounds(self, low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+        start = 0 if low is None else int(np.searchsorted(self.sorted, low, side='left'))
+        stop = len(self.sorted) if high is None else int(np.searchsorted(self.sorted, high, side='right'))
+        return start, max(start, stop)
+
+    def count(self, low: Optional[float], high: Optional[float]) -> int:
+        start, stop = self._bounds(low, high)
+        return stop - start
+
+    def positions(self, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        start, stop = self._bounds(low, high)
+        return self.order[start:stop]
+
+    def mask(self, candidates: np.ndarray, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        values = self.values[candidates]
+        keep = ~np.isnan(values)
+        if low is not None:
+            keep &= values >= low
+        if high is not None:
+            keep &= values <= high
+        return keep
+
+class EqualityIndex:
+    """
+    Postings for a low-cardinality field (city, zip, status...): row positions
+    grouped by category code, plus a case-insensitive label -> codes map.
+    Candidate sets are narrowed with a per-code lookup table, one array
+    gather per filter instead of a Python set per value.
+    """
+
+    def __init__(self, codes: np.ndarray, labels: List[str]):
+        self.codes = codes
+        self.labels = labels
+        order = np.argsort(codes, kind='stable')
+        present = codes[order] >= 0
+        self.postings = order[present].astype(np.int32)
+        self.counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)])
+        self.lookup: Dict[str, List[int]] = {}
+        for code, label in enumerate(labels):
+            self.lookup.setdefault(label.strip().lower(), []).append(code)
+
+    def codes_for(self, wanted: Iterable[str]) -> List[int]:
+        return [code for value in wanted for code in self.lookup.get(str(value).strip().lower(), [])]
+
+    def count(self, codes: List[int]) -> int:
+        return int(sum(self.counts[code] for code in codes))
+
+    def positions(self, codes: List[int]) -> np.ndarray:
+        runs = [self.postings[self.starts[code]:self.starts[code + 1]] for code in codes]
+        return np.concatenate(runs) if runs else np.array([], dtype=np.int32)
+
+    def mask(self, candidates: np.ndarray, codes: List[int]) -> np.ndarray:
+        table = np.zeros(len(self.labels) + 1, dtype=bool)  # slot 0 is "missing"
+        table[np.asarray(codes, dtype=np.int64) + 1] = True
+        return table[self.codes[candidates] + 1]
+
+# ============================================================================
+# FIELD EXTRACTION
+# ============================================================================
+
+def _parse_year(text: str) -> float:
+    if text.strip().lower() == 'new':
+        return float(datetime.now().year)
+    match = re.search(r'\b(1[89]\d\d|20\d\d)\b', text)
+    return float(match.group(1)) if match else np.nan
+
+def _parse_first_number(text: str) -> float:
+    match = _FIRST_NUMBER.search(text.replace(',', ''))
+    return float(match.group()) if match else np.nan
+
+def _numbers(store: MLSStore, column_name: Optional[str],
+             parse: Callable[[str], float] = _parse_first_number) -> np.ndarray:
+    """
+    float64 values of a column, NaN where missing. Text columns are parsed
+    once per distinct category ('4 (5)' -> 4, 'New' -> this year), not per row.
+    """
+    if column_name is None:
+        return np.full(len(store), np.nan)
+    column = store.columns[column_name]
+    if column.kind == 'numeric':
+        return np.asarray(column.values, dtype=np.float64)
+    parsed = np.array([parse(label) for label in column.categories.to_list()] + [np.nan], dtype=np.float64)
+    return parsed[column.codes]  # code -1 picks the trailing NaN
+
+def _equality_index(store: MLSStore, column_name: Optional[str]) -> Optional[EqualityIndex]:
+    if column_name is None:
+        return None
+    column = store.columns[column_name]
+    if column.kind == 'text':
+        return EqualityIndex(np.asarray(column.codes), column.categories.to_list())
+    values = np.asarray(column.values, dtype=np.float64)
+    present = ~np.isnan(values)
+    uniques, inverse = np.unique(values[present], return_inverse=True)
+    codes = np.full(len(values), -1, dtype=np.int32)
+    codes[present] = inverse
+    labels = [str(int(value)) if value == int(value) else str(value) for value in uniques]
+    return EqualityIndex(codes, labels)
+
+def _pool_codes(store: MLSStore) -> Optional[np.ndarray]:
+    """1 where the listing has a pool ('Pool' = Yes or any 'Pool Features'), else 0"""
+    if 'Pool' not in store.columns and 'Pool Features' not in store.columns:
+        return None
+    has_pool = np.zeros(len(store), dtype=bool)
+    if 'Pool' in store.columns and store.columns['Pool'].kind == 'text':
+        column = store.columns['Pool']
+        yes = np.array([label.strip().lower() in ('yes', 'y', 'true') for label in column.categories.to_list()]
+                       + [False])
+        has_pool |= yes[column.codes]
+    if 'Pool Features' in store.columns and store.columns['Pool Features'].kind == 'text':
+        column = store.columns['Pool Features']
+        real = np.array([label.strip().lower() not in ('', 'none', 'no') for label in column.categories.to_list()]
+                        + [False])
+        has_pool |= real[column.codes]
+    return has_pool.astype(np.int32)
+
+# ============================================================================
+# SEARCH INDEX
+# ============================================================================
+
+class MLSSearchIndex:
+    """
+    Search structures for one MLSStore version: a RangeIndex per numeric
+    field and an EqualityIndex per category field. Built once per store
+    (a few argsorts), then every query is binary searches and array masks.
+
+    A query counts the rows each criterion matches (O(log n) for ranges,
+    O(1) per value for categories), materializes only the smallest set and
+    narrows it with the remaining criteria, so cost follows the most
+    selective filter rather than the feed size.
+    """
+
+    def __init__(self, store: MLSStore):
+        start = time.perf_counter()
+        self.store = store
+        self.street_column = store.first_column(STREET_COLUMNS)
+
+        self.ranges: Dict[str, RangeIndex] = {}
+        self.range_columns: Dict[str, str] = {}
+        for field, names in RANGE_FIELDS.items():
+            column_name = store.first_column(names)
+            if column_name is None:
+                continue
+            parse = _parse_year if field == 'year_built' else _parse_first_number
+            self.ranges[field] = RangeIndex(_numbers(store, column_name, parse))
+            self.range_columns[field] = column_name
+
+        if 'bathrooms' not in self.ranges and 'Full Bathrooms' in store.columns:
+            partial = np.nan_to_num(_numbers(store, store.first_column(['Partial Bathrooms'])))
+            self.ranges['bathrooms'] = RangeIndex(_numbers(store, 'Full Bathrooms') + 0.5 * partial)
+            self.range_columns['bathrooms'] = 'Full Bathrooms'
+
+        self.equalities: Dict[str, EqualityIndex] = {}
+        self.equality_columns: Dict[str, str] = {}
+        for field, names in EQUALITY_FIELDS.items():
+            column_name = store.first_column(names)
+            if column_name is not None:
+                self.equalities[field] = _equality_index(store, column_name)
+                self.equality_columns[field] = column_name
+
+        pool = _pool_codes(store)
+        if pool is not None:
+            self.equalities['pool'] = EqualityIndex(pool, ['no', 'yes'])
+
+        self.build_seconds = time.perf_counter() - start
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def _criteria(self, filters: Dict[str, Any]) -> List[Tuple[int, Any, Any]]:
+        """(match count, index, args) per filter; ValueError for unusable filters"""
+        bounds: Dict[str, List[Optional[float]]] = {}
+        criteria = []
+        for name, value in filters.items():
+            if value is None or value == '' or name in ('sort_by', 'limit'):
+                continue
+            if name in RANGE_FILTERS:
+                field, bound = RANGE_FILTERS[name]
+                bounds.setdefault(field, [None, None])[0 if bound == 'min' else 1] = _parse_amount(name, value)
+            elif name in EQUALITY_FILTERS:
+                if name not in self.equalities:
+                    raise ValueError(f'This MLS feed has no {name.replace("_", " ")} data')
+                index = self.equalities[name]
+                if name == 'pool':
+                    wanted = ['yes' if _truthy(value) else 'no']
+                else:
+                    wanted = value if isinstance(value, (list, tuple, set)) else str(value).split(',')
+                codes = index.codes_for(wanted)
+                criteria.append((index.count(codes), index, codes))
+            else:
+                allowed = sorted(RANGE_FILTERS) + list(EQUALITY_FILTERS) + ['sort_by', 'limit']
+                raise ValueError(f'Unknown MLS search filter "{name}". Available filters: {allowed}')
+
+        for field, (low, high) in bounds.items():
+            if field not in self.ranges:
+                raise ValueError(f'This MLS feed has no {field.replace("_", " ")} data')
+            index = self.ranges[field]
+            criteria.append((index.count(low, high), index, (low, high)))
+        return criteria
+
+    def match(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Row positions matching every filter (unordered)"""
+        criteria = sorted(self._criteria(filters), key=lambda criterion: criterion[0])
+        if not criteria:
+            return np.arange(len(self.store), dtype=np.int32)
+        count, index, args = criteria[0]
+        if count == 0:
+            return np.array([], dtype=np.int32)
+
+        candidates = index.positions(*args) if isinstance(index, RangeIndex) else index.positions(args)
+        for _, index, args in criteria[1:]:
+            keep = index.mask(candidates, *args) if isinstance(index, RangeIndex) else index.mask(candidates, args)
+            candidates = candidates[keep]
+            if len(candidates) == 0:
+                break
+        return candidates
+
+    def top(self, candidates: np.ndarray, sort_by: str = DEFAULT_SORT, limit: int = DEFAULT_LIMIT) -> np.ndarray:
+        """
+        First `limit` candidates in sort order. argpartition selects the k
+        best in linear time, so only those k are fully sorted. Listings
+        missing the sort field go last; ties keep feed order.
+        """
+        if sort_by not in SORT_OPTIONS:
+            raise ValueError(f'Unknown sort_by "{sort_by}". Options: {list(SORT_OPTIONS)}')
+        field, descending = SORT_OPTIONS[sort_by]
+        if field not in self.ranges or len(candidates) == 0:
+            return np.sort(candidates)[:limit]
+
+        keys = self.ranges[field].values[candidates]
+        keys = -keys if descending else keys.copy()
+        keys[np.isnan(keys)] = np.inf
+        if len(candidates) > limit:
+            best = np.argpartition(keys, limit - 1)[:limit]
+            candidates, keys = candidates[best], keys[best]
+        return candidates[np.lexsort((candidates, keys))]
+
+    def summary(self, position: int) -> Dict[str, Any]:
+        """Compact listing view for result lists (find_mls_property has the full record)"""
+        store = self.store
+
+        def number(field, cast=float):
+            index = self.ranges.get(field)
+            value = index.values[position] if index is not None else np.nan
+            return None if np.isnan(value) else cast(value)
+
+        def label(field):
+            column_name = self.equality_columns.get(field)
+            return store.columns[column_name].value(position) if column_name else None
+
+        pool = self.equalities.get('pool')
+        return {
+            'mls_number': store.key_at(position),
+            'address': store.columns[self.street_column].value(position) if self.street_column else None,
+            'city': label('city'),
+            'zip_code': None if label('zip_code') is None else str(label('zip_code')).split('.')[0],
+            'price': number('price'),
+            'bedrooms': number('bedrooms', int),
+            'bathrooms': number('bathrooms'),
+            'square_feet': number('sqft', int),
+            'lot_acres': number('lot_acres'),
+            'year_built': number('year_built', int),
+            'dom': number('dom', int),
+            'status': label('status'),
+            'property_type': label('property_type'),
+            'pool': None if pool is None else bool(pool.codes[position])
+        }
+
+    def search(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run a multi-criteria search.
+
+        Args:
+            filters (dict): min_/max_ price, sqft, lot_acres, dom, year_built, bedrooms,
+                bathrooms; city, zip_code, property_type, status (a value or a list);
+                pool (bool); sort_by (see SORT_OPTIONS); limit
+
+        Returns:
+            dict: {'total': int, 'positions': ndarray, 'properties': list, 'seconds': float}
+        """
+        filters = dict(filters or {})
+        start = time.perf_counter()
+        limit = min(max(int(filters.get('limit') or DEFAULT_LIMIT), 1), MAX_LIMIT)
+        candidates = self.match(filters)
+        positions = self.top(candidates, filters.get('sort_by') or DEFAULT_SORT, limit)
+        seconds = time.perf_counter() - start
+        return {
+            'total': len(candidates),
+            'positions': positions,
+            'properties': [self.summary(int(position)) for position in positions],
+            'seconds': seconds
+        }
+
+def _parse_amount(name: str, value: Any) -> float:
+    """Numeric filter value; accepts model-style strings like '650k', '$1.2M' or '2,500'"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _AMOUNT.match(str(value).strip())
+    if not match:
+        raise ValueError(f'Invalid value for {name}: {value!r}')
+    amount = float(match.group(1).replace(',', ''))
+    suffix = (match.group(2) or '').lower()
+    return amount * {'k': 1_000, 'm': 1_000_000}.get(suffix, 1)
+
+def _truthy(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('yes', 'y', 'true', '1', 'pool')
+    return bool(value)
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+BENCHMARK_QUERIES = [
+    {'min_bedrooms': 3, 'max_price': 650000, 'city': 'Grass Valley', 'pool': True},
+    {'min_price': 400000, 'max_price': 900000, 'min_sqft': 2000, 'status': 'Active'},
+    {'zip_code': '95945', 'min_lot_acres': 2, 'max_dom': 30, 'sort_by': 'newest_listing'},
+    {'min_year_built': 2010, 'property_type': 'Residential', 'sort_by': 'price_desc'},
+    {'max_price': 300000},
+]
+
+def benchmark_search(rows: int = 100_000, repeats: int = 200) -> Dict[str, Any]:
+    """
+    Build a search index over a synthetic feed and time representative
+    queries (median over `repeats` runs, summaries included).
+
+    Returns:
+        dict: {'rows': int, 'build_seconds': float, 'queries': list of {'filters', 'total', 'median_ms'}}
+    """
+    import os
+    import tempfile
+    from mls_store import _synthetic_feed
+
+    handle, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    try:
+        _synthetic_feed(csv_path, rows)
+        index = MLSSearchIndex(MLSStore.from_csv(csv_path))
+    finally:
+        os.remove(csv_path)
+
+    queries = []
+    for filters in BENCHMARK_QUERIES:
+        timings = []
+        for _ in range(repeats):
+            result = index.search(filters)
+            timings.append(result['seconds'])
+        queries.append({'filters': filters, 'total': result['total'],
+                        'median_ms': round(float(np.median(timings)) * 1000, 3)})
+    return {'rows': rows, 'build_seconds': round(index.build_seconds, 3), 'queries': queries}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Multi-criteria MLS search')
+    parser.add_argument('csv', nargs='?', default='Listing.csv', help='MLS CSV feed to search')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Time searches over N synthetic listings')
+    args = parser.parse_args()
+
+    print("🔎 MLS Search")
+    print("=" * 50)
+
+    if args.benchmark:
+        result = benchmark_search(args.benchmark)
+        print(f"  Index built over {result['rows']} listings in {result['build_seconds']}s")
+        for query in result['queries']:
+            print(f"  {query['median_ms']:7.3f} ms  {query['total']:6} matches  {query['filters']}")
+    else:
+        index = MLSSearchIndex(MLSStore.from_csv(args.csv))
+        result = index.search({'sort_by': 'price_asc', 'limit': 5})
+        print(f"{result['total']} listings searchable; cheapest:")
+        for listing in result['properties']:
+            print(f"  #{listing['mls_number']} {listing['address']}, {listing['city']} ${listing['price']:,.0f}")
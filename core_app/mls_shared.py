@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Shared MLS Store for Real Estate CRM
+One memory-mapped MLS store for every gunicorn worker, published under a
+version number that workers check on each access
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+
+from mls_store import MLSStore
+from mls_snapshot import snapshot_dir, write_store, read_snapshot
+
+# Published versions kept on disk; workers still mapping an older one keep
+# its pages after the files are removed
+KEEP_VERSIONS = 2
+
+def shared_dir(root: Optional[str] = None) -> Path:
+    """Shared store root: MLS_SHARED_DIR, else shared/ under the snapshot cache"""
+    if root:
+        return Path(root)
+    return Path(os.environ.get('MLS_SHARED_DIR') or snapshot_dir() / 'shared')
+
+@contextmanager
+def _exclusive(directory: Path) -> Iterator[None]:
+    """Inter-process lock serializing publishers (flock on .lock)"""
+    with open(directory / '.lock', 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+class SharedMLSStore:
+    """
+    MLS store published as .npy files (see mls_snapshot.write_store) in a
+    numbered version directory, with current.json naming the latest one.
+
+    Every process maps the same files, so the store's arrays sit in the page
+    cache once however many workers serve them. pointer() is one os.stat
+    per call while nothing changed; a new version is read and mapped only
+    when current.json was replaced.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = shared_dir(root)
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self._pointer: Optional[Dict[str, Any]] = None
+
+    def pointer(self) -> Optional[Dict[str, Any]]:
+        """current.json contents (cached until the file is replaced), None before the first publish"""
+        try:
+            stat = os.stat(self.root / 'current.json')
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != self._stat:
+            with open(self.root / 'current.json') as handle:
+                self._pointer = json.load(handle)
+            self._stat = key
+        return self._pointer
+
+    def version(self) -> int:
+        pointer = self.pointer()
+        return pointer['version'] if pointer else 0
+
+    def open(self, pointer: Optional[Dict[str, Any]] = None) -> MLSStore:
+        """Memory-map a published version (the current one by default)"""
+        pointer = pointer or self.pointer()
+        if pointer is None:
+            raise FileNotFoundError(f'No MLS store published in {self.root}')
+        return read_snapshot(self.root / pointer['directory'])
+
+    def publish(self, store: MLSStore, fingerprint: Optional[Dict[str, Any]] = None,
+                feeds: Optional[List[Tuple[str, str]]] = None,
+                event: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Write a store as the next version and point current.json at it.
+
+        Args:
+            store: Store to publish
+            fingerprint: Source fingerprint(s), so any worker can tell whether its feeds changed
+            feeds: (csv path, feed layout name) pairs the store was loaded from
+            event: Change that produced it ({'type', 'added', 'changed', 'removed'}); lets a
+                worker holding the previous version update its indexes incrementally
+
+        Returns:
+            dict: The new pointer ({'version', 'directory', 'fingerprint', 'feeds', 'event', 'published_at'})
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with _exclusive(self.root):
+            self._stat = None  # re-read under the lock
+            current = self.pointer()
+            version = (current['version'] if current else 0) + 1
+            directory = f'v{version:06d}'
+            staging = Path(tempfile.mkdtemp(prefix='.staging-', dir=self.root))
+            try:
+                write_store(store, staging, shared_version=version)
+                os.rename(staging, self.root / directory)
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+            pointer = {
+                'version': version,
+                'directory': directory,
+                'fingerprint': fingerprint,
+                'feeds': [list(feed) for feed in feeds or []],
+                'event': {'type': 'load', 'added': [], 'changed': [], 'removed': [], **(event or {})},
+                'published_at': datetime.now().isoformat()
+            }
+            handle, temp_path = tempfile.mkstemp(prefix='.current-', dir=self.root)
+            with os.fdopen(handle, 'w') as target:
+                json.dump(pointer, target)
+            os.replace(temp_path, self.root / 'current.json')
+
+            for old in sorted(path for path in self.root.glob('v*') if path.is_dir())[:-KEEP_VERSIONS]:
+                shutil.rmtree(old, ignore_errors=True)
+        return pointer
+
+    def status(self) -> Dict[str, Any]:
+        pointer = self.pointer()
+        if pointer is None:
+            return {'published': False, 'version': 0, 'root': str(self.root)}
+        directory = self.root / pointer['directory']
+        size = sum(path.stat().st_size for path in directory.glob('*.npy')) if directory.exists() else 0
+        return {'published': True, 'version': pointer['version'], 'root': str(self.root),
+                'feeds': [path for path, _ in pointer['feeds']], 'published_at': pointer['published_at'],
+                'bytes': size}
+
+def build_shared_store(csv_paths: List[str], root: Optional[str] = None,
+                       sync_crm: bool = True) -> Dict[str, Any]:
+    """
+    Load MLS feeds once and publish them for the workers (gunicorn.conf.py
+    runs this in a loader process before the workers start).
+
+    Args:
+        csv_paths (list): MLS CSV files, highest priority first
+        root (str): Shared directory
+        sync_crm (bool): Reconcile CRM properties and record listing history
+            for this load here, once; workers skip both for shared versions
+
+    Returns:
+        dict: load_mls_feeds result plus 'shared_version'
+    """
+    import mls_integration
+
+    mls_integration.enable_shared_mls(root)
+    if sync_crm:
+        mls_integration.enable_mls_reconciliation()
+        mls_integration.enable_mls_history()
+    result = mls_integration.load_mls_feeds(csv_paths)
+    result['shared_version'] = mls_integration.get_mls_status()['shared_version']
+    return result
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Publish the MLS store shared by all web workers')
+    parser.add_argument('csv', nargs='*', default=['documents/canonicalListing.csv', 'Listing.csv'])
+    parser.add_argument('--root', help='Shared store directory (default: mls_cache/shared)')
+    parser.add_argument('--status', action='store_true', help='Show the published version and exit')
+    parser.add_argument('--no-sync', action='store_true', help='Skip CRM reconciliation and listing history')
+    args = parser.parse_args()
+
+    print("🔗 Shared MLS Store")
+    print("=" * 50)
+    if not args.status:
+        result = build_shared_store([path for path in args.csv if os.path.exists(path)], args.root,
+                                    sync_crm=not args.no_sync)
+        print(f"  {result['message']}")
+    status = SharedMLSStore(args.root).status()
+    if status['published']:
+        print(f"  Version {status['version']} in {status['root']}: {status['bytes'] / 1e6:.1f} MB "
+              f"mapped by every worker ({', '.join(status['feeds'])})")
+    else:
+        print(f"  Nothing published in {status['root']}")
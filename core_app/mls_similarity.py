@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+MLS Similar Listings for Real Estate CRM
+TF-IDF over Public Remarks plus scaled price, size, beds, baths, lot and year,
+answered offline with sparse dot products over the keyword index postings
+"""
+
+import time
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+from mls_store import MLSStore
+from mls_search import MLSSearchIndex, MAX_LIMIT
+from mls_keywords import KeywordIndex
+
+# Numeric features (MLSSearchIndex range fields); skewed ones compared on a log scale
+NUMERIC_FEATURES = ('price', 'sqft', 'bedrooms', 'bathrooms', 'lot_acres', 'year_built')
+LOG_FEATURES = ('price', 'sqft', 'lot_acres')
+
+# Score = TEXT_WEIGHT * remarks cosine + NUMERIC_WEIGHT * numeric closeness
+TEXT_WEIGHT = 0.6
+NUMERIC_WEIGHT = 0.4
+
+# Highest-weighted remark terms used as the query ("more like this"); terms
+# in more than MAX_TERM_SHARE of listings are left out, their idf is near the
+# floor and their postings are the longest
+QUERY_TERMS = 32
+MAX_TERM_SHARE = 0.5
+
+DEFAULT_LIMIT = 10
+
+class SimilarityIndex:
+    """
+    Listing similarity for one MLSStore version.
+
+    Remarks are TF-IDF vectors (sublinear tf, smoothed idf, L2-normalized)
+    stored as per-segment sparse arrays aligned with the keyword index
+    postings, so the text is tokenized once, by the keyword index, and a
+    refresh only adds the new remarks' segment. Document frequencies count
+    listings, not distinct remarks, and are recomputed per version with
+    one bincount over the non-zeros.
+
+    A query scores every listing with a sparse dot product over its top
+    QUERY_TERMS terms (short postings, as high-weight terms are rare) plus
+    a dense distance over the z-scaled numeric features, then keeps the
+    best k with argpartition.
+    """
+
+    def __init__(self, store: MLSStore, keyword_index: KeywordIndex, search_index: MLSSearchIndex):
+        start = time.perf_counter()
+        self.store = store
+        self.search_index = search_index
+        self.remarks = keyword_index.fields.get('remarks')
+        self.segments: List[Dict[str, np.ndarray]] = []
+        self.common = np.zeros(0, dtype=bool)
+        if self.remarks is not None:
+            self._weigh_remarks(len(keyword_index.dictionary.stems))
+        self._scale_numeric()
+        self.build_seconds = time.perf_counter() - start
+
+    def _weigh_remarks(self, vocabulary: int) -> None:
+        remarks = self.remarks
+        codes = remarks.codes
+        listings = np.bincount(codes[codes >= 0], minlength=len(remarks.categories)).astype(np.float64)
+        frequencies = [segment.frequencies() for segment in remarks.segments]
+
+        document_frequency = np.zeros(vocabulary, dtype=np.float64)
+        for entry in frequencies:
+            document_frequency += np.bincount(entry['terms'], weights=listings[entry['documents']],
+                                              minlength=vocabulary)
+        count = float(listings.sum())
+        idf = np.log((1 + count) / (1 + document_frequency)) + 1
+        self.common = document_frequency > MAX_TERM_SHARE * count
+
+        squares = np.zeros(len(remarks.categories), dtype=np.float64)
+        weights = []
+        for entry in frequencies:
+            weight = (1 + np.log(entry['counts'])) * idf[entry['terms']]
+            squares += np.bincount(entry['documents'], weights=weight * weight, minlength=len(squares))
+            weights.append(weight)
+        norms = np.sqrt(squares)
+        norms[norms == 0] = 1
+
+        for entry, weight in zip(frequencies, weights):
+            by_document = entry['by_document']
+            self.segments.append({
+                'terms': entry['terms'],
+                'documents': entry['documents'],
+                'weights': (weight / norms[entry['documents']]).astype(np.float32),
+                'by_document': by_document,
+                'sorted_documents': entry['documents'][by_document],
+            })
+
+    def _scale_numeric(self) -> None:
+        """
+        NUMERIC_FEATURES z-scores per listing, stacked feature-major as
+        squares, values (0 where missing) and present (1) / missing (0)
+        rows, so a query's squared distances are one vector-matrix product.
+        """
+        columns = []
+        for field in NUMERIC_FEATURES:
+            index = self.search_index.ranges.get(field)
+            if index is None:
+                columns.append(np.full(len(self.store), np.nan))
+                continue
+            values = index.values.astype(np.float64)
+            if field in LOG_FEATURES:
+                values = np.log1p(np.where(values > 0, values, np.nan))
+            present = values[~np.isnan(values)]
+            mean = present.mean() if len(present) else 0.0
+            std = present.std() if len(present) else 0.0
+            columns.append((values - mean) / (std or 1.0))
+        features = np.vstack(columns).astype(np.float32)
+        present = (~np.isnan(features)).astype(np.float32)
+        values = np.nan_to_num(features, nan=0.0)
+        self.numeric = np.ascontiguousarray(np.vstack([values * values, values, present]))
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def _query_terms(self, document: int):
+        """(terms, weights) of one remark's vector, its top QUERY_TERMS by weight"""
+        for segment in self.segments:
+            sorted_documents = segment['sorted_documents']
+            start, stop = np.searchsorted(sorted_documents, [document, document + 1])
+            if start < stop:
+                entries = segment['by_document'][start:stop]
+                terms, weights = segment['terms'][entries], segment['weights'][entries]
+                rare = ~self.common[terms]
+                terms, weights = terms[rare], weights[rare]
+                if len(terms) > QUERY_TERMS:
+                    best = np.argpartition(weights, -QUERY_TERMS)[-QUERY_TERMS:]
+                    terms, weights = terms[best], weights[best]
+                return terms, weights
+        return np.array([], dtype=np.int32), np.array([], dtype=np.float32)
+
+    def text_scores(self, position: int) -> Optional[np.ndarray]:
+        """Remarks cosine of every listing with listing `position`, None if it has no remarks"""
+        if self.remarks is None or self.remarks.codes[position] < 0:
+            return None
+        terms, weights = self._query_terms(int(self.remarks.codes[position]))
+        if len(terms) == 0:
+            return None
+        documents, products = [], []
+        for segment in self.segments:
+            starts = np.searchsorted(segment['terms'], terms, side='left')
+            stops = np.searchsorted(segment['terms'], terms, side='right')
+            for start, stop, weight in zip(starts.tolist(), stops.tolist(), weights.tolist()):
+                if start < stop:
+                    documents.append(segment['documents'][start:stop])
+                    products.append(segment['weights'][start:stop] * weight)
+        scores = np.bincount(np.concatenate(documents), weights=np.concatenate(products),
+                             minlength=len(self.remarks.categories) + 1).astype(np.float32)
+        scores[-1] = 0  # slot for code -1 (no remarks); category ids stop one short
+        return scores[self.remarks.codes]
+
+    def numeric_scores(self, position: int) -> Optional[np.ndarray]:
+        """exp(-mean squared z-score difference / 2) over the features listing `position` has"""
+        features = len(NUMERIC_FEATURES)
+        query = self.numeric[features:2 * features, position]
+        used = self.numeric[2 * features:, position]
+        count = float(used.sum())
+        if count == 0:
+            return None
+        # Over the query's features: (x - q)^2 where the listing has x, 1 (one std) where it does not
+        squared = np.concatenate([used, -2 * query, query * query - used]) @ self.numeric + count
+        np.maximum(squared, 0, out=squared)
+        return np.exp(squared / np.float32(-2 * count))
+
+    def scores(self, position: int) -> np.ndarray:
+        text = self.text_scores(position)
+        numeric = self.numeric_scores(position)
+        if text is None and numeric is None:
+            return np.zeros(len(self.store))
+        if text is None:
+            return numeric
+        if numeric is None:
+            return text
+        numeric *= NUMERIC_WEIGHT
+        numeric += TEXT_WEIGHT * text
+        return numeric
+
+    def similar(self, mls_number: str, limit: int = DEFAULT_LIMIT,
+                filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Listings most similar to one MLS listing, narrowed by MLSSearchIndex filters.
+
+        Returns:
+            dict: {'total': int, 'positions': ndarray, 'scores': ndarray, 'properties': list, 'seconds': float}
+        Raises:
+            KeyError: listing not in this store
+        """
+        start = time.perf_counter()
+        position = self.store.positions.get(str(mls_number).strip())
+        if position is None:
+            raise KeyError(mls_number)
+        limit = min(max(int(limit or DEFAULT_LIMIT), 1), MAX_LIMIT)
+
+        scores = self.scores(position)
+        scores[position] = -np.inf
+        if filters:
+            candidates = self.search_index.match(dict(filters))
+            scores = scores[candidates]
+        else:
+            candidates = np.arange(len(scores), dtype=np.int32)
+        keep = scores > -np.inf
+        candidates, scores = candidates[keep], scores[keep]
+        total = len(candidates)
+        if len(candidates) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            candidates, scores = candidates[best], scores[best]
+        order = np.lexsort((candidates, -scores))
+        positions, scores = candidates[order], scores[order]
+        seconds = time.perf_counter() - start
+
+        properties = []
+        for listing_position, score in zip(positions.tolist(), scores.tolist()):
+            properties.append({**self.search_index.summary(listing_position), 'similarity': round(score, 4)})
+        return {'total': total, 'positions': positions, 'scores': scores,
+                'properties': properties, 'seconds': seconds}
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def benchmark_similarity(rows: int = 100_000, queries: int = 200) -> Dict[str, Any]:
+    """
+    Build keyword, search and similarity indexes over a synthetic feed, then
+    time similar-listing queries for random listings and a rebuild after a
+    1% delta.
+
+    Returns:
+        dict: {'rows': int, 'build_seconds': float, 'delta_seconds': float,
+               'median_ms': float, 'p95_ms': float}
+    """
+    import os
+    import tempfile
+    from mls_store import _synthetic_feed
+
+    handle, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    try:
+        _synthetic_feed(csv_path, rows)
+        store = MLSStore.from_csv(csv_path)
+    finally:
+        os.remove(csv_path)
+
+    keyword_index = KeywordIndex.build(store)
+    index = SimilarityIndex(store, keyword_index, MLSSearchIndex(store))
+
+    changed = store.frame(np.arange(0, len(store), 100, dtype=np.int64))
+    changed['Public Remarks'] = changed['Public Remarks'] + ' Owned solar and a new roof.'
+    newer = store.apply_delta(changed, [])
+    start = time.perf_counter()
+    newer_keywords = keyword_index.extend(newer)
+    SimilarityIndex(newer, newer_keywords, MLSSearchIndex(newer))
+    delta_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(3)
+    timings = [index.similar(store.key_at(int(position)))['seconds']
+               for position in rng.integers(0, len(store), queries)]
+    return {'rows': rows, 'build_seconds': round(index.build_seconds, 3), 'delta_seconds': round(delta_seconds, 3),
+            'median_ms': round(float(np.median(timings)) * 1000, 3),
+            'p95_ms': round(float(np.percentile(timings, 95)) * 1000, 3)}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Similar MLS listings')
+    parser.add_argument('mls_number', nargs='?')
+    parser.add_argument('--csv', nargs='*', default=['documents/canonicalListing.csv'])
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Time similarity queries over N synthetic listings')
+    args = parser.parse_args()
+
+    print("🧭 MLS Similar Listings")
+    print("=" * 50)
+
+    if args.benchmark:
+        result = benchmark_similarity(args.benchmark)
+        print(f"  Built over {result['rows']} listings in {result['build_seconds']}s "
+              f"(after a 1% delta: {result['delta_seconds']}s)")
+        print(f"  Query median {result['median_ms']} ms, p95 {result['p95_ms']} ms")
+    else:
+        from mls_feeds import load_feeds
+
+        store = load_feeds(args.csv)['store']
+        index = SimilarityIndex(store, KeywordIndex.build(store), MLSSearchIndex(store))
+        mls_number = args.mls_number or store.key_at(0)
+        result = index.similar(mls_number, 5)
+        print(f"Listings most like #{mls_number} ({result['seconds'] * 1000:.2f} ms):")
+        for listing in result['properties']:
+            print(f"  {listing['similarity']:.3f}  #{listing['mls_number']} {listing['address']}, "
+                  f"{listing['city']} ${listing['price'] or 0:,.0f}")
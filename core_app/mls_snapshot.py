@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+MLS Snapshot Cache for Real Estate CRM
+Versioned .npy snapshots of the parsed MLS store, memory-mapped at startup
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Any, Callable, Tuple
+
+import numpy as np
+
+from mls_store import MLSStore, NumericColumn, TextColumn, StringArray, SortedKeyIndex, MLS_KEY_COLUMN
+from mls_ingest import ingest_csv
+
+# Bump when the on-disk layout or the store's parsing rules change
+SNAPSHOT_VERSION = 3
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent / 'mls_cache'
+
+def snapshot_dir() -> Path:
+    """Snapshot root, overridable with MLS_SNAPSHOT_DIR"""
+    return Path(os.environ.get('MLS_SNAPSHOT_DIR', DEFAULT_SNAPSHOT_DIR))
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_fingerprint(csv_path: str, with_hash: bool = True) -> Dict[str, Any]:
+    """Size and mtime of the source feed, plus its SHA-256 unless with_hash is False"""
+    stat = os.stat(csv_path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        fingerprint['sha256'] = file_sha256(csv_path)
+    return fingerprint
+
+def _feed_dir(csv_path: str, root: Path, feed: Any = None) -> Path:
+    """
+    One directory per source feed, named after the file and its absolute
+    path, plus the feed layout and its mapping digest when mapped (see mls_feeds)
+    """
+    absolute = os.path.abspath(csv_path)
+    if feed is None:
+        path_hash = hashlib.sha1(absolute.encode('utf-8')).hexdigest()[:10]
+        return root / f'{Path(absolute).stem}-{path_hash}'
+    path_hash = hashlib.sha1(f'{absolute}|{feed.digest}'.encode('utf-8')).hexdigest()[:10]
+    return root / f'{Path(absolute).stem}-{feed.name}-{path_hash}'
+
+# ============================================================================
+# WRITE
+# ============================================================================
+
+def _save(directory: Path, name: str, array: np.ndarray) -> str:
+    filename = f'{name}.npy'
+    target = directory / filename
+    if _is_mapped_file(array, target):
+        return filename  # streamed into the staging directory by mls_ingest
+    np.save(target, np.ascontiguousarray(array), allow_pickle=False)
+    return filename
+
+def _is_mapped_file(array: np.ndarray, target: Path) -> bool:
+    """True if array is a whole-file memory map of target (not a slice of it)"""
+    if not isinstance(array, np.memmap) or not array.filename or not target.exists():
+        return False
+    return (Path(array.filename).resolve() == target.resolve()
+            and array.offset + array.nbytes == target.stat().st_size)
+
+def staging_dir(csv_path: str, root: Optional[Path] = None, feed: Any = None) -> Path:
+    """Fresh staging directory for a feed's next snapshot version"""
+    feed_dir = _feed_dir(csv_path, root or snapshot_dir(), feed)
+    feed_dir.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix='.staging-', dir=feed_dir))
+
+def _save_strings(directory: Path, name: str, strings: StringArray) -> Dict[str, str]:
+    return {'offsets': _save(directory, f'{name}.offsets', strings.offsets),
+            'data': _save(directory, f'{name}.data', strings.data)}
+
+def _save_index(directory: Path, name: str, index: SortedKeyIndex) -> Dict[str, str]:
+    return {'keys': _save(directory, f'{name}.keys', index.keys),
+            'positions': _save(directory, f'{name}.positions', index.positions)}
+
+def write_store(store: MLSStore, directory: Path, **details) -> Dict[str, Any]:
+    """
+    Write every array of a store into a directory as .npy files plus a
+    manifest.json that read_snapshot maps back. `details` (source, feed,
+    fingerprint...) are recorded in the manifest.
+    """
+    columns = []
+    for number, (name, column) in enumerate(store.columns.items()):
+        if column.kind == 'numeric':
+            columns.append({'name': name, 'kind': 'numeric',
+                            'values': _save(directory, f'col{number}.values', column.values)})
+        else:
+            columns.append({'name': name, 'kind': 'text',
+                            'codes': _save(directory, f'col{number}.codes', column.codes),
+                            'categories': _save_strings(directory, f'col{number}.categories', column.categories)})
+
+    manifest = {
+        'snapshot_version': SNAPSHOT_VERSION,
+        'source': store.source,
+        **details,
+        'key_column': store.key_column,
+        'rows': len(store),
+        'columns': columns,
+        'keys': _save_strings(directory, 'keys', store.key_strings),
+        'hashes': _save(directory, 'hashes', store.hashes),
+        'address_keys': _save(directory, 'address_keys', store.address_keys),
+        'indexes': {name: _save_index(directory, f'index.{name}', index) for name, index in store.indexes.items()},
+        'created_at': datetime.now().isoformat()
+    }
+    with open(directory / 'manifest.json', 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+def write_snapshot(store: MLSStore, csv_path: str, fingerprint: Dict[str, Any],
+                   root: Optional[Path] = None, staging: Optional[Path] = None, feed: Any = None) -> Path:
+    """
+    Write a store as a new snapshot version and point the feed's current.json at it.
+
+    The version directory is filled under a temporary name and renamed into
+    place, and current.json is swapped with os.replace, so a worker starting
+    concurrently sees either the old snapshot or the complete new one. Older
+    versions are removed; processes still mapping them keep their pages.
+
+    `staging` is a directory from staging_dir() that already holds some of
+    the store's arrays (written there by mls_ingest); those are kept as-is.
+    `feed` is the FeedSpec the store was mapped with, if any.
+    """
+    feed_dir = _feed_dir(csv_path, root or snapshot_dir(), feed)
+    version_name = f"v{SNAPSHOT_VERSION}-{fingerprint['sha256'][:16]}"
+    staging = staging or staging_dir(csv_path, root, feed)
+    write_store(store, staging, source=os.path.abspath(csv_path),
+                feed=feed.name if feed is not None else None, fingerprint=fingerprint)
+
+    version_dir = feed_dir / version_name
+    try:
+        os.rename(staging, version_dir)
+    except OSError:
+        # Another worker already published this source version; use theirs
+        shutil.rmtree(staging, ignore_errors=True)
+        if not version_dir.exists():
+            raise
+    _write_pointer(feed_dir, version_name, fingerprint)
+
+    for old in feed_dir.iterdir():
+        if old.is_dir() and old.name != version_name and not old.name.startswith('.staging-'):
+            shutil.rmtree(old, ignore_errors=True)
+    return version_dir
+
+def _write_pointer(feed_dir: Path, version_name: str, fingerprint: Dict[str, Any]) -> None:
+    handle, temp_path = tempfile.mkstemp(prefix='.current-', dir=feed_dir)
+    with os.fdopen(handle, 'w') as pointer:
+        json.dump({'version': version_name, 'fingerprint': fingerprint}, pointer)
+    os.replace(temp_path, feed_dir / 'current.json')
+
+# ============================================================================
+# READ
+# ============================================================================
+
+def _load(directory: Path, filename: str) -> np.ndarray:
+    return np.load(directory / filename, mmap_mode='r', allow_pickle=False)
+
+def _load_strings(directory: Path, files: Dict[str, str]) -> StringArray:
+    return StringArray(_load(directory, files['offsets']), _load(directory, files['data']))
+
+def read_snapshot(version_dir: Path, source: Optional[str] = None) -> MLSStore:
+    """Memory-map a snapshot directory back into an MLSStore (no CSV parsing)"""
+    with open(version_dir / 'manifest.json') as handle:
+        manifest = json.load(handle)
+
+    columns = {}
+    for spec in manifest['columns']:
+        if spec['kind'] == 'numeric':
+            columns[spec['name']] = NumericColumn(_load(version_dir, spec['values']))
+        else:
+            columns[spec['name']] = TextColumn(_load(version_dir, spec['codes']),
+                                               _load_strings(version_dir, spec['categories']))
+
+    indexes = {
+        name: SortedKeyIndex(_load(version_dir, files['keys']), _load(version_dir, files['positions']))
+        for name, files in manifest['indexes'].items()
+    }
+    return MLSStore(columns, _load_strings(version_dir, manifest['keys']), _load(version_dir, manifest['hashes']),
+                    _load(version_dir, manifest['address_keys']), manifest['key_column'],
+                    source or manifest['source'], indexes)
+
+def find_snapshot(csv_path: str, root: Optional[Path] = None,
+                  feed: Any = None) -> Tuple[Optional[Path], Optional[Dict[str, Any]]]:
+    """
+    Snapshot directory still valid for the current source file, if any.
+
+    Matching size and mtime is trusted without reading the file. If only the
+    mtime moved (file copied or touched) the SHA-256 decides, and a match
+    refreshes the recorded mtime so the next start takes the fast path.
+
+    Returns:
+        tuple: (version directory or None, fingerprint computed while checking or None)
+    """
+    feed_dir = _feed_dir(csv_path, root or snapshot_dir(), feed)
+    try:
+        with open(feed_dir / 'current.json') as handle:
+            pointer = json.load(handle)
+    except (OSError, ValueError):
+        return None, None
+
+    version_dir = feed_dir / pointer['version']
+    recorded = pointer['fingerprint']
+    if not pointer['version'].startswith(f'v{SNAPSHOT_VERSION}-') or not (version_dir / 'manifest.json').exists():
+        return None, None
+
+    current = source_fingerprint(csv_path, with_hash=False)
+    if current['size'] == recorded['size'] and current['mtime_ns'] == recorded['mtime_ns']:
+        return version_dir, recorded
+
+    if current['size'] != recorded['size']:
+        return None, None
+    current['sha256'] = file_sha256(csv_path)
+    if current['sha256'] != recorded['sha256']:
+        return None, current
+
+    _write_pointer(feed_dir, pointer['version'], current)
+    return version_dir, current
+
+def load_store_cached(csv_path: str, key_column: str = MLS_KEY_COLUMN, root: Optional[Path] = None,
+                      progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                      feed: Any = None) -> Dict[str, Any]:
+    """
+    MLS store for a CSV feed: memory-mapped from its snapshot when the source
+    is unchanged, otherwise streamed from CSV in chunks straight into a new
+    snapshot version (see mls_ingest), so memory stays flat for any feed size.
+    With a FeedSpec (see mls_feeds) the store holds the canonical columns and
+    is cached separately from the unmapped one.
+
+    Returns:
+        dict: {'success': bool, 'store': MLSStore, 'from_snapshot': bool, 'fingerprint': dict,
+               'seconds': float, 'message': str}
+    """
+    start = time.perf_counter()
+    version_dir, fingerprint = find_snapshot(csv_path, root, feed)
+
+    if version_dir is not None:
+        try:
+            store = read_snapshot(version_dir, csv_path)
+            return {
+                'success': True,
+                'store': store,
+                'from_snapshot': True,
+                'fingerprint': fingerprint,
+                'seconds': round(time.perf_counter() - start, 3),
+                'message': f'Mapped {len(store)} MLS listings from snapshot {version_dir.name}'
+            }
+        except Exception as e:
+            print(f"⚠️  MLS snapshot unreadable, reparsing CSV: {e}")
+
+    fingerprint = fingerprint if fingerprint and 'sha256' in fingerprint else source_fingerprint(csv_path)
+
+    try:
+        staging = staging_dir(csv_path, root, feed)
+    except OSError as e:
+        # A read-only deployment still works, it just parses on every boot
+        staging, saved = None, f' (snapshot not written: {e})'
+
+    try:
+        store = ingest_csv(csv_path, key_column, directory=staging, progress=progress, feed=feed)
+        if staging is not None:
+            write_snapshot(store, csv_path, fingerprint, root, staging=staging, feed=feed)
+            saved = ' and saved snapshot'
+    except BaseException:
+        if staging is not None:
+            shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    return {
+        'success': True,
+        'store': store,
+        'from_snapshot': False,
+        'fingerprint': fingerprint,
+        'seconds': round(time.perf_counter() - start, 3),
+        'message': f'Streamed {len(store)} MLS listings from CSV{saved}'
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build or check the MLS snapshot cache')
+    parser.add_argument('csv', nargs='?', default='Listing.csv', help='MLS CSV feed')
+    args = parser.parse_args()
+
+    print("🗄️  MLS Snapshot Cache")
+    print("=" * 50)
+    for attempt in ('first load', 'second load'):
+        result = load_store_cached(args.csv)
+        print(f"  {attempt}: {result['message']} in {result['seconds']}s")
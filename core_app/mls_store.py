@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+Columnar MLS Listing Store for Real Estate CRM
+Typed column arrays with a listing number -> row index; dicts are built only on lookup
+"""
+
+import gc
+import os
+import time
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from address_normalization import normalize_address_key
+
+# Identifier column shared by both feed layouts
+MLS_KEY_COLUMN = "Listing Number"
+
+# Address columns in the Nevada County export and the simple Listing.csv layout
+STREET_COLUMNS = ('Address - Street Complete', 'Property_Address')
+CITY_COLUMNS = ('Address - City', 'City')
+STATE_COLUMNS = ('State',)
+
+class StringArray:
+    """
+    Immutable array of strings stored as one UTF-8 buffer plus int64 offsets.
+
+    Two flat numpy arrays instead of one Python object per value, so large
+    text columns cost their byte length and can be written to disk as-is.
+    """
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> 'StringArray':
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    @classmethod
+    def from_fixed_width(cls, array: np.ndarray) -> 'StringArray':
+        """From a fixed-width bytes (S) array, without a Python object per value"""
+        width = array.dtype.itemsize
+        lengths = np.char.str_len(array).astype(np.int64)
+        offsets = np.zeros(len(array) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        raw = np.frombuffer(array.tobytes(), dtype=np.uint8).reshape(len(array), width)
+        return cls(offsets, raw[np.arange(width) < lengths[:, None]])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+
+    def to_list(self) -> List[str]:
+        raw = self.data.tobytes()
+        bounds = self.offsets.tolist()
+        return [raw[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+
+    def concat(self, other: 'StringArray') -> 'StringArray':
+        offsets = np.concatenate([self.offsets, other.offsets[1:] + self.offsets[-1]])
+        return StringArray(offsets, np.concatenate([self.data, other.data]))
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.data.nbytes
+
+class SortedKeyIndex:
+    """
+    String key -> row position lookup over two flat arrays: sorted fixed-width
+    byte keys and their row positions. Unlike a dict it can be memory-mapped
+    from a snapshot and shared between worker processes.
+    """
+
+    def __init__(self, keys: np.ndarray, positions: np.ndarray):
+        self.keys = keys
+        self.positions = positions
+
+    @classmethod
+    def build(cls, keys: Iterable[Optional[str]]) -> 'SortedKeyIndex':
+        """Index keys given in row order; None is skipped and the last row wins for repeats"""
+        return cls.from_row_keys(encode_keys(keys))
+
+    @classmethod
+    def from_row_keys(cls, row_keys: np.ndarray) -> 'SortedKeyIndex':
+        """Index a fixed-width byte array holding one key per row (b'' for none)"""
+        rows = np.flatnonzero(row_keys != b'').astype(np.int32)
+        if len(rows) == 0:
+            return cls(np.array([], dtype='S1'), np.array([], dtype=np.int32))
+        key_array, row_array = row_keys[rows], rows
+        order = np.argsort(key_array, kind='stable')
+        key_array, row_array = key_array[order], row_array[order]
+        last_of_run = np.append(key_array[1:] != key_array[:-1], True)
+        return cls(key_array[last_of_run], row_array[last_of_run])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        if not key:
+            return default
+        encoded = key.encode('utf-8')
+        if len(self.keys) == 0 or len(encoded) > self.keys.dtype.itemsize:
+            return default
+        index = int(np.searchsorted(self.keys, encoded))
+        if index < len(self.keys) and self.keys[index] == encoded:
+            return int(self.positions[index])
+        return default
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+def encode_keys(keys: Iterable[Optional[str]]) -> np.ndarray:
+    """Per-row keys as a fixed-width UTF-8 byte array, b'' where a row has none"""
+    encoded = [key.encode('utf-8') if key else b'' for key in keys]
+    width = max(map(len, encoded), default=0) or 1
+    return np.array(encoded, dtype=f'S{width}')
+
+class NumericColumn:
+    """int/float/bool column; NaN marks a missing float"""
+
+    kind = 'numeric'
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def take(self, positions: np.ndarray) -> 'NumericColumn':
+        return NumericColumn(self.values[positions])
+
+    def extend(self, series: pd.Series) -> 'NumericColumn':
+        added = build_column(series)
+        if added.kind != 'numeric':
+            raise ValueError(f'{series.name} changed from numeric to text')
+        return NumericColumn(np.concatenate([self.values, added.values]))
+
+    def value(self, position: int) -> Any:
+        value = self.values[position].item()
+        if isinstance(value, float) and value != value:  # NaN
+            return None
+        return value
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+class TextColumn:
+    """
+    Dictionary-encoded text column: int32 codes into a StringArray of distinct
+    values, -1 for missing. City, status and property type collapse to a
+    handful of categories; free text like Public Remarks stays one entry per row.
+    """
+
+    kind = 'text'
+
+    def __init__(self, codes: np.ndarray, categories: StringArray):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> 'TextColumn':
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        return cls(codes.astype(np.int32, copy=False), StringArray.from_strings(str(u) for u in uniques))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def take(self, positions: np.ndarray) -> 'TextColumn':
+        return TextColumn(self.codes[positions], self.categories)
+
+    def extend(self, series: pd.Series) -> 'TextColumn':
+        """
+        Append rows, reusing existing categories and adding only unseen values.
+        Categories no longer referenced stay until the next full rebuild.
+        """
+        codes, uniques = pd.factorize(text_values(series), use_na_sentinel=True)
+        uniques = [str(u) for u in uniques]
+        mapped = pd.Index(self.categories.to_list()).get_indexer(uniques)
+        unseen = np.flatnonzero(mapped < 0)
+        mapped[unseen] = len(self.categories) + np.arange(len(unseen))
+        categories = self.categories.concat(StringArray.from_strings(uniques[i] for i in unseen))
+        added = np.append(mapped, -1)[codes].astype(np.int32)  # code -1 (missing) stays -1
+        return TextColumn(np.concatenate([self.codes, added]), categories)
+
+    def concat(self, other: 'TextColumn') -> 'TextColumn':
+        """Append another text column's rows, mapping its categories onto these"""
+        uniques = other.categories.to_list()
+        mapped = pd.Index(self.categories.to_list()).get_indexer(uniques)
+        unseen = np.flatnonzero(mapped < 0)
+        mapped[unseen] = len(self.categories) + np.arange(len(unseen))
+        categories = self.categories.concat(StringArray.from_strings(uniques[i] for i in unseen))
+        codes = np.asarray(other.codes)
+        added = np.where(codes >= 0, mapped[np.maximum(codes, 0)] if len(mapped) else -1, -1).astype(np.int32)
+        return TextColumn(np.concatenate([self.codes, added]), categories)
+
+    def value(self, position: int) -> Optional[str]:
+        code = self.codes[position]
+        return None if code < 0 else self.categories[code]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.categories.nbytes
+
+def is_numeric_series(series: pd.Series) -> bool:
+    return pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series)
+
+def text_values(series: pd.Series) -> pd.Series:
+    """
+    A column's values as text, None where missing. A column that is numeric
+    in one chunk of a feed can be text in another (a zip column with one
+    '95945-1234'), so numbers are written the way they appear in the CSV:
+    95945.0 -> '95945'.
+    """
+    if not is_numeric_series(series):
+        return series
+
+    def as_text(value):
+        if value is None:
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    return series.astype(object).where(series.notna(), None).map(as_text)
+
+def build_column(series: pd.Series, kind: Optional[str] = None):
+    """Typed column for one DataFrame series (kind='text' forces a text column)"""
+    if kind == 'text':
+        return TextColumn.from_series(text_values(series))
+    if is_numeric_series(series):
+        values = series.to_numpy()
+        if values.dtype == object:  # nullable Int64/boolean with missing values
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return NumericColumn(values)
+    return TextColumn.from_series(series)
+
+def listing_keys(frame: pd.DataFrame, key_column: str = MLS_KEY_COLUMN) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Valid listing numbers for a frame: stripped strings, blanks and NaN
+    dropped, last row winning for repeated numbers (as the dict loader did).
+    """
+    raw = frame[key_column]
+    # A blank listing number turns the whole column float; keep '101', not '101.0'
+    if pd.api.types.is_float_dtype(raw) and (raw.dropna() % 1 == 0).all():
+        raw = raw.astype('Int64')
+    keys = raw.astype(str).fillna('').str.strip()
+    valid = ((keys != '') & (keys.str.lower() != 'nan') & (keys != '<NA>')).to_numpy()
+    frame, keys = frame[valid], keys[valid]
+    unique = ~keys.duplicated(keep='last').to_numpy()
+    return frame[unique], keys[unique]
+
+def read_feed(csv_path: str, key_column: str = MLS_KEY_COLUMN) -> pd.DataFrame:
+    """Parse an MLS CSV export, skipping malformed lines"""
+    frame = pd.read_csv(csv_path, quotechar='"', skipinitialspace=True, on_bad_lines='skip')
+    if key_column not in frame.columns:
+        raise KeyError(f'Could not find "{key_column}" column in CSV. Available columns: {list(frame.columns)}')
+    return frame
+
+def read_feed_chunks(csv_path: str, key_column: str = MLS_KEY_COLUMN, chunk_rows: int = 50_000,
+                     progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Parse an MLS CSV export `chunk_rows` rows at a time. Quoted multi-line
+    remarks stay inside their row. After each chunk `progress` (if given)
+    receives {'rows': int, 'bytes_read': int, 'total_bytes': int, 'percent': float}.
+    """
+    header = pd.read_csv(csv_path, nrows=0, quotechar='"', skipinitialspace=True)
+    if key_column not in header.columns:
+        raise KeyError(f'Could not find "{key_column}" column in CSV. Available columns: {list(header.columns)}')
+
+    total_bytes = os.path.getsize(csv_path)
+    rows = 0
+    with open(csv_path, 'rb') as handle:
+        reader = pd.read_csv(handle, quotechar='"', skipinitialspace=True, on_bad_lines='skip', chunksize=chunk_rows)
+        for number, chunk in enumerate(reader):
+            if number:
+                chunk = _drop_overflowed_first_row(chunk)
+            rows += len(chunk)
+            yield chunk
+            if progress:
+                bytes_read = min(handle.tell(), total_bytes)
+                progress({'rows': rows, 'bytes_read': bytes_read, 'total_bytes': total_bytes,
+                          'percent': round(100.0 * bytes_read / total_bytes, 1) if total_bytes else 100.0})
+
+def _drop_overflowed_first_row(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    pandas' C tokenizer does not apply on_bad_lines to the first line of
+    each chunk after the first: a line with extra fields (an unescaped quote
+    in Public Remarks) comes back truncated instead of skipped, with remark
+    text shifted into the following columns. Such a row is recognised by
+    sentences landing in columns that are numeric in every other row; it is
+    dropped and those columns re-typed, as a whole-file parse would have.
+    """
+    if len(chunk) < 2:
+        return chunk
+    broken = []
+    for name in chunk.columns:
+        series = chunk[name]
+        first = series.iloc[0]
+        if is_numeric_series(series) or not isinstance(first, str) or len(first.split()) < 3:
+            continue
+        rest = series.iloc[1:]
+        if rest.notna().any() and pd.to_numeric(rest, errors='coerce').notna().sum() == rest.notna().sum():
+            broken.append(name)
+    if not broken:
+        return chunk
+    chunk = chunk.iloc[1:].copy()
+    for name in broken:
+        chunk[name] = pd.to_numeric(chunk[name])
+    return chunk
+
+# Hash of a missing cell, the same for numeric NaN and text None so a
+# column that parses as all-NaN in one chunk hashes like its text version
+_MISSING_HASH = np.uint64(0x9E3779B97F4A7C15)
+_HASH_PRIME = np.uint64(0x100000001B3)
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer over a uint64 array"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def column_hashes(column, category_hashes: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    One uint64 per row for a typed column. Numbers hash by float64 value
+    (so 3 and 3.0 agree across chunks), text by its string, once per category.
+    """
+    if column.kind == 'numeric':
+        values = np.asarray(column.values, dtype=np.float64) + 0.0  # folds -0.0 into 0.0
+        hashes = _mix64(values.view(np.uint64))
+        hashes[np.isnan(values)] = _MISSING_HASH
+        return hashes
+    if category_hashes is None:
+        category_hashes = pd.util.hash_array(np.array(column.categories.to_list(), dtype=object))
+    return np.append(category_hashes, _MISSING_HASH)[column.codes]  # code -1 picks the missing hash
+
+def hash_columns(columns: Iterable[Any], rows: int) -> np.ndarray:
+    """Combine per-column hashes, in column order, into one uint64 per row"""
+    hashes = np.zeros(rows, dtype=np.uint64)
+    for column in columns:
+        if isinstance(column, tuple):  # (column, precomputed category hashes)
+            column_hash = column_hashes(*column)
+        else:
+            column_hash = column_hashes(column)
+        hashes = (hashes ^ column_hash) * _HASH_PRIME
+    return _mix64(hashes)
+
+def row_hashes(frame: pd.DataFrame, kinds: Optional[Dict[str, str]] = None) -> np.ndarray:
+    """
+    One uint64 content hash per row, for spotting changed listings between
+    feeds. Hashes come from the typed columns, so a row hashes the same
+    whether its feed was parsed whole or in chunks; `kinds` gives the
+    column kinds of the store being compared against.
+    """
+    kinds = kinds or {}
+    return hash_columns((build_column(frame[name], kinds.get(name)) for name in frame.columns), len(frame))
+
+def row_address_keys(frame: pd.DataFrame) -> np.ndarray:
+    """normalized_address_key of every row, for matching CRM properties to listings"""
+    def column(names):
+        for name in names:
+            if name in frame.columns:
+                return [value if isinstance(value, str) else None for value in frame[name].tolist()]
+        return [None] * len(frame)
+
+    return encode_keys(
+        normalize_address_key(street, city, state or 'CA')  # Nevada County feed omits state
+        for street, city, state in zip(column(STREET_COLUMNS), column(CITY_COLUMNS), column(STATE_COLUMNS))
+    )
+
+class MLSStore:
+    """
+    Read-only columnar MLS listing store.
+
+    Columns keep the feed's order and types; get() assembles the same
+    {column: value} dict the old loader kept per listing, with missing cells
+    as None instead of NaN. Instances are never modified after construction,
+    so a reader holding a reference always sees one consistent version.
+
+    Every array (columns, listing numbers, per-row content hashes and
+    address keys, and the lookup indexes) is a plain numpy array, so a store
+    can be written to and memory-mapped from a snapshot (see mls_snapshot).
+    """
+
+    def __init__(self, columns: Dict[str, Any], key_strings: StringArray, hashes: np.ndarray,
+                 address_keys: np.ndarray, key_column: str = MLS_KEY_COLUMN, source: Optional[str] = None,
+                 indexes: Optional[Dict[str, SortedKeyIndex]] = None):
+        self.columns = columns
+        self.column_names = list(columns)
+        self.key_column = key_column
+        self.source = source
+        self.key_strings = key_strings
+        self.hashes = hashes
+        self.address_keys = address_keys
+        self.indexes = indexes if indexes is not None else {}
+        if 'listing' not in self.indexes:
+            self.indexes['listing'] = SortedKeyIndex.build(key_strings.to_list())
+        if 'address' not in self.indexes:
+            self.indexes['address'] = SortedKeyIndex.from_row_keys(address_keys)
+        self.positions = self.indexes['listing']
+
+    @classmethod
+    def from_dataframe(cls, frame: pd.DataFrame, key_column: str = MLS_KEY_COLUMN,
+                       source: Optional[str] = None) -> 'MLSStore':
+        frame, keys = listing_keys(frame, key_column)
+        columns = {name: build_column(frame[name]) for name in frame.columns}
+        return cls(columns, StringArray.from_strings(keys.tolist()), hash_columns(columns.values(), len(frame)),
+                   row_address_keys(frame), key_column, source)
+
+    @classmethod
+    def from_csv(cls, csv_path: str, key_column: str = MLS_KEY_COLUMN) -> 'MLSStore':
+        """Stream a CSV feed into a store chunk by chunk (see mls_ingest)"""
+        from mls_ingest import ingest_csv
+        return ingest_csv(csv_path, key_column)
+
+    @property
+    def kinds(self) -> Dict[str, str]:
+        return {name: column.kind for name, column in self.columns.items()}
+
+    def diff(self, feed: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> Dict[str, Any]:
+        """
+        Compare a freshly parsed feed against this store by listing number and
+        row hash. The feed can be one DataFrame or an iterable of chunks (see
+        read_feed_chunks); only added and changed rows are kept from each chunk.
+
+        Returns:
+            dict: {'added': list, 'changed': list, 'removed': list, 'rows': DataFrame of added + changed rows}
+        """
+        chunks = [feed] if isinstance(feed, pd.DataFrame) else feed
+        old = pd.Index(self.keys())
+        kinds = self.kinds
+        added, changed, seen, touched = {}, {}, [], []
+
+        for frame in chunks:
+            frame, keys = listing_keys(frame, self.key_column)
+            new = row_hashes(frame, kinds)
+            positions = old.get_indexer(keys.to_numpy())
+            is_new = positions < 0
+            is_changed = ~is_new & (self.hashes[np.maximum(positions, 0)] != new)
+            added.update(dict.fromkeys(keys[is_new].tolist()))
+            changed.update(dict.fromkeys(keys[is_changed].tolist()))
+            touched.append(frame[is_new | is_changed])
+            seen.append(keys.to_numpy())
+
+        seen_keys = pd.Index(np.concatenate(seen)) if seen else pd.Index([])
+        removed = old.difference(seen_keys)
+        rows = pd.concat(touched) if touched else pd.DataFrame(columns=self.column_names)
+        return {
+            'added': list(added),
+            'changed': [key for key in changed if key not in added],
+            'removed': removed.tolist(),
+            'rows': rows
+        }
+
+    def apply_delta(self, rows: pd.DataFrame, removed: Iterable[str], source: Optional[str] = None) -> 'MLSStore':
+        """
+        New store version: this one without `removed`, with `rows` (new or
+        changed listings) replacing or adding listings by number.
+
+        Unchanged rows are gathered with array takes; only the delta rows are
+        hashed, address-normalized and encoded, so the Python-level work is
+        proportional to what changed. Raises ValueError when the feed's
+        columns changed, in which case the caller rebuilds from scratch.
+        """
+        rows, keys = listing_keys(rows, self.key_column)
+        if list(rows.columns) != self.column_names:
+            raise ValueError('MLS feed columns changed')
+
+        replaced = set(removed) | set(keys.tolist())
+        old_keys = self.keys()
+        keep = np.flatnonzero(~pd.Index(old_keys).isin(list(replaced)))
+
+        columns = {name: column.take(keep).extend(rows[name]) for name, column in self.columns.items()}
+        key_strings = StringArray.from_strings([old_keys[i] for i in keep] + keys.tolist())
+        hashes = np.concatenate([self.hashes[keep], row_hashes(rows, self.kinds)])
+        address_keys = np.concatenate([self.address_keys[keep], row_address_keys(rows)])
+        return MLSStore(columns, key_strings, hashes, address_keys, self.key_column, source or self.source)
+
+    def __len__(self) -> int:
+        return len(self.key_strings)
+
+    def __contains__(self, mls_number: str) -> bool:
+        return mls_number in self.positions
+
+    def keys(self) -> List[str]:
+        return self.key_strings.to_list()
+
+    def key_at(self, position: int) -> str:
+        return self.key_strings[position]
+
+    def row(self, position: int) -> Dict[str, Any]:
+        return {name: column.value(position) for name, column in self.columns.items()}
+
+    def get(self, mls_number: str) -> Optional[Dict[str, Any]]:
+        position = self.positions.get(mls_number)
+        return None if position is None else self.row(position)
+
+    def frame(self, positions: np.ndarray) -> pd.DataFrame:
+        """Listings at `positions` as a DataFrame of the feed's columns (text decoded once per distinct value)"""
+        positions = np.asarray(positions, dtype=np.int64)
+        data = {}
+        for name, column in self.columns.items():
+            if column.kind == 'numeric':
+                data[name] = column.values[positions]
+            else:
+                used, inverse = np.unique(np.asarray(column.codes)[positions], return_inverse=True)
+                labels = np.array([column.categories[code] if code >= 0 else None for code in used.tolist()],
+                                  dtype=object)
+                data[name] = labels[inverse.reshape(-1)]
+        return pd.DataFrame(data)
+
+    def find_by_address(self, street: Optional[str], city: Optional[str], state: Optional[str] = 'CA') -> Optional[str]:
+        """Listing number at a normalized street/city/state address"""
+        key = normalize_address_key(street, city, state)
+        position = self.indexes['address'].get(key) if key else None
+        return None if position is None else self.key_at(position)
+
+    def first_column(self, names: Iterable[str]) -> Optional[str]:
+        """First of several alternative column names present in this feed"""
+        for name in names:
+            if name in self.columns:
+                return name
+        return None
+
+    def iter_column(self, column_name: str) -> Iterator[Any]:
+        """All values of one column in row order (text decoded once per category)"""
+        column = self.columns[column_name]
+        if column.kind == 'text':
+            categories = column.categories.to_list()
+            return (categories[code] if code >= 0 else None for code in column.codes.tolist())
+        return (column.value(position) for position in range(len(column)))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _synthetic_feed(csv_path: str, rows: int, seed: int = 42) -> None:
+    """Write a Nevada County style feed (35 columns) with `rows` listings"""
+    rng = np.random.default_rng(seed)
+    cities = np.array(['Grass Valley', 'Nevada City', 'Penn Valley', 'Truckee', 'Auburn',
+                       'Rough and Ready', 'Chicago Park', 'Smartsville', 'North San Juan', 'Colfax'])
+    streets = np.array(['Cold Spring Ct', 'Main St', 'Oak Ave', 'Ridge Rd', 'Pine Dr',
+                        'Brunswick Rd', 'Idaho Maryland Rd', 'Alta Sierra Dr', 'Lake Wildwood Dr', 'Rattlesnake Rd'])
+    styles = np.array(['Contemporary', 'Craftsman', 'Ranch', 'Traditional', 'Cabin', 'Victorian'])
+    heating = np.array(['Central', 'Propane', 'Wood Stove', 'Electric', 'Heat Pump'])
+    statuses = np.array(['Active', 'Pending', 'Sold', 'Contingent', 'Withdrawn'])
+    types = np.array(['Residential', 'Condo', 'Townhouse', 'Land', 'Manufactured'])
+    levels = np.array(['One', 'Two', 'Three Or More', 'Split'])
+    yes_no = np.array(['Yes', 'No'])
+
+    price = np.round(rng.lognormal(13.3, 0.45, rows), -3)
+    street_numbers = rng.integers(10, 25000, rows)
+    street_names = streets[rng.integers(0, len(streets), rows)]
+    addresses = pd.Series(street_numbers.astype(str)) + ' ' + pd.Series(street_names)
+    city = cities[rng.integers(0, len(cities), rows)]
+    bedrooms = rng.integers(1, 7, rows)
+    square_feet = rng.integers(500, 6000, rows)
+    remarks = ('Beautiful ' + pd.Series(bedrooms.astype(str)) + ' bed home at ' + addresses + ' in ' +
+               pd.Series(city) + ' with ' + pd.Series(square_feet.astype(str)) +
+               ' sqft, updated kitchen, mountain views and a large deck. Close to downtown and trails.')
+    listing_dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 700, rows), unit='D')
+
+    frame = pd.DataFrame({
+        '# of Fireplaces': rng.integers(0, 3, rows),
+        'Address - City': city,
+        'Address - Street Complete': addresses,
+        'Address - Zip Code': rng.choice([95945, 95949, 95959, 95946, 96161], rows),
+        'Architectural Style': styles[rng.integers(0, len(styles), rows)],
+        'Bedrooms And Possible Bedrooms': bedrooms.astype(str),
+        'Close Date': np.nan,
+        'Close Price': 0.0,
+        'Cooling': np.where(rng.random(rows) < 0.7, 'Central', 'None'),
+        'DOM': rng.integers(0, 400, rows),
+        'Exterior Features': np.where(rng.random(rows) < 0.3, 'Fire Pit', None),
+        'Fireplace Features': np.where(rng.random(rows) < 0.4, 'Wood Burning', None),
+        'Full Bathrooms': rng.integers(1, 5, rows),
+        'Garage Spaces': rng.integers(0, 4, rows),
+        'Heating': heating[rng.integers(0, len(heating), rows)],
+        'Levels': levels[rng.integers(0, len(levels), rows)],
+        'List Price': price,
+        'Listing Date': listing_dates.strftime('%m/%d/%y'),
+        MLS_KEY_COLUMN: np.arange(224000000, 224000000 + rows),
+        'Lot Size - Acres': np.round(rng.gamma(1.5, 0.8, rows), 2),
+        'Lot Size - Sq Ft': np.round(rng.gamma(1.5, 0.8, rows) * 43560),
+        'On Market Date': listing_dates.strftime('%m/%d/%y'),
+        'Original Price': np.round(price * rng.uniform(1.0, 1.15, rows), -3),
+        'Parking Features': np.where(rng.random(rows) < 0.6, 'Attached,Garage Door Opener', 'Detached'),
+        'Partial Bathrooms': rng.integers(0, 2, rows),
+        'Patio And Porch Features': np.where(rng.random(rows) < 0.5, 'Deck', 'Uncovered Patio'),
+        'Pending Date': np.nan,
+        'Pool': yes_no[(rng.random(rows) < 0.15).astype(int) ^ 1],
+        'Pool Features': np.where(rng.random(rows) < 0.1, 'In Ground', None),
+        'Property Type': types[rng.integers(0, len(types), rows)],
+        'Public Remarks': remarks,
+        'Square Footage': square_feet,
+        'Status': statuses[rng.integers(0, len(statuses), rows)],
+        'Subdivision': np.where(rng.random(rows) < 0.5, 'Lake Wildwood', 'Alta Sierra'),
+        'Year Built Details': rng.integers(1900, 2024, rows).astype(str),
+    })
+    frame.to_csv(csv_path, index=False)
+
+def _rss_mb() -> float:
+    import psutil
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+def _measure_load(variant: str, csv_path: str) -> Dict[str, float]:
+    """Load the feed one way and report time and retained RSS (runs in a fresh process)"""
+    gc.collect()
+    before = _rss_mb()
+    start = time.perf_counter()
+    frame = pd.read_csv(csv_path, quotechar='"', skipinitialspace=True, on_bad_lines='skip')
+    if variant == 'iterrows':
+        listings = {}
+        for _, row in frame.iterrows():
+            mls_num = str(row[MLS_KEY_COLUMN]).strip()
+            if mls_num and mls_num.lower() != 'nan':
+                listings[mls_num] = row.to_dict()
+    else:
+        listings = MLSStore.from_dataframe(frame)
+    elapsed = time.perf_counter() - start
+    del frame
+    gc.collect()
+    return {'seconds': round(elapsed, 2), 'rss_mb': round(_rss_mb() - before, 1), 'listings': len(listings)}
+
+def benchmark_mls_load(rows: int = 100_000) -> Dict[str, Any]:
+    """
+    Compare the iterrows dict loader with MLSStore on a synthetic feed.
+
+    Each variant runs in its own interpreter so retained memory is measured
+    from a clean baseline.
+
+    Returns:
+        dict: {'rows': int, 'iterrows': dict, 'columnar': dict, 'speedup': float}
+    """
+    import multiprocessing
+    import tempfile
+
+    handle, csv_path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    try:
+        _synthetic_feed(csv_path, rows)
+        context = multiprocessing.get_context('spawn')
+        results = {}
+        for variant in ('iterrows', 'columnar'):
+            with context.Pool(1) as pool:
+                results[variant] = pool.apply(_measure_load, (variant, csv_path))
+    finally:
+        os.remove(csv_path)
+
+    return {
+        'rows': rows,
+        'iterrows': results['iterrows'],
+        'columnar': results['columnar'],
+        'speedup': round(results['iterrows']['seconds'] / max(results['columnar']['seconds'], 1e-9), 1)
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Columnar MLS listing store')
+    parser.add_argument('csv', nargs='?', default='Listing.csv', help='MLS CSV feed to load')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Compare loaders on N synthetic listings')
+    args = parser.parse_args()
+
+    print("🏠 MLS Listing Store")
+    print("=" * 50)
+
+    if args.benchmark:
+        result = benchmark_mls_load(args.benchmark)
+        for variant in ('iterrows', 'columnar'):
+            stats = result[variant]
+            print(f"  {variant:9} {stats['seconds']:7.2f}s  {stats['rss_mb']:8.1f} MB retained  "
+                  f"({stats['listings']} listings)")
+        print(f"  Speedup: {result['speedup']}x")
+    else:
+        store = MLSStore.from_csv(args.csv)
+        print(f"Loaded {len(store)} listings, {len(store.column_names)} columns, "
+              f"{store.nbytes / 1024:.1f} KB of column data")
+        if len(store):
+            print(store.get(store.keys()[0]))
@@ -9,6 +9,7 @@ from datetime import datetime, date
 from typing import Dict, List, Optional, Any, Tuple
 import json
 from zipform_ai_functions import get_db_connection
+from address_normalization import address_key_prefix_range, mls_number_prefix_range, ensure_address_key_column
 
 # ============================================================================
 # OFFER CREATION WORKFLOW DESIGN
@@ -198,20 +199,30 @@ def search_properties(search_term: str, limit: int = 10) -> List[Dict]:
     try:
         conn = get_db_connection()
         
-        query = '''
+        select = '''
             SELECT id, address_line1, city, state, zip_code,
                    mls_number, listing_price, property_type, bedrooms, bathrooms,
                    square_feet, created_at
             FROM properties 
-            WHERE address_line1 LIKE ? OR city LIKE ? OR mls_number LIKE ?
-            ORDER BY city, address_line1
-            LIMIT ?
         '''
         
-        search_pattern = f"%{search_term}%"
-        results = conn.execute(query, (
-            search_pattern, search_pattern, search_pattern, limit
-        )).fetchall()
+        address_range = address_key_prefix_range(search_term)
+        if address_range:
+            # Street-number searches are an indexed range scan on the normalized key
+            ensure_address_key_column(conn)
+            results = conn.execute(select + '''
+                WHERE (normalized_address_key >= ? AND normalized_address_key < ?)
+                   OR (mls_number >= ? AND mls_number < ?)
+                ORDER BY city, address_line1
+                LIMIT ?
+            ''', address_range + mls_number_prefix_range(search_term) + (limit,)).fetchall()
+        else:
+            search_pattern = f"%{search_term}%"
+            results = conn.execute(select + '''
+                WHERE address_line1 LIKE ? OR city LIKE ? OR mls_number LIKE ?
+                ORDER BY city, address_line1
+                LIMIT ?
+            ''', (search_pattern, search_pattern, search_pattern, limit)).fetchall()
         
         properties = []
         for row in results:
@@ -4,7 +4,8 @@ Real Estate CRM Application
 Comprehensive client and transaction management for Narissa Realty
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file
+from flask import (Flask, render_template, request, jsonify, redirect, url_for, flash, send_file, Response,
+                   stream_with_context)
 import sqlite3
 import json
 from datetime import datetime, date
@@ -12,6 +13,7 @@ from decimal import Decimal
 import os
 import google.generativeai as genai
 from functools import wraps
+from io import BytesIO
 
 # Import monitoring and SSL configuration (Tasks #9 and #10)
 import sys
@@ -207,22 +209,54 @@ GEMINI_CONFIGURED = configure_gemini()
 def load_mls_on_startup():
     """Load MLS data when Flask starts up"""
     try:
-        from mls_integration import load_mls_data
-        mls_file = 'Listing.csv'  # Use the main MLS file with 526 listings
-        if os.path.exists(mls_file):
-            result = load_mls_data(mls_file)
+        from mls_integration import (load_mls_feeds, enable_mls_reconciliation, enable_mls_history,
+                                     enable_client_matching, enable_shared_mls, attach_shared_mls)
+        from mls_ingest import print_progress
+        # Under gunicorn every worker maps one MLS store published by the loader (gunicorn.conf.py)
+        if os.environ.get('MLS_SHARED_STORE'):
+            enable_shared_mls()
+        # Keep MLS-imported properties' price and status in step with feed changes
+        enable_mls_reconciliation(DATABASE_PATH)
+        # Record price/status changes of every load and refresh in mls_history/
+        enable_mls_history()
+        # Top listing matches per buyer, updated from each refresh delta
+        enable_client_matching(DATABASE_PATH)
+        if os.environ.get('MLS_SHARED_STORE'):
+            result = attach_shared_mls()
             if result['success']:
-                print(f"✅ MLS data loaded: {result['count']} listings from {mls_file}")
+                print(f"✅ {result['message']}")
+                return
+            print(f"⚠️  {result['message']}; loading MLS feeds in this worker")
+        # Nevada County export (526 listings) first: it wins listings found in both feeds
+        mls_files = [path for path in ('documents/canonicalListing.csv', 'Listing.csv') if os.path.exists(path)]
+        if mls_files:
+            result = load_mls_feeds(mls_files, progress=print_progress)
+            if result['success']:
+                for feed in result['feeds']:
+                    origin = 'snapshot' if feed['from_snapshot'] else 'CSV'
+                    print(f"✅ MLS feed loaded: {feed['count']} listings from {feed['path']} ({feed['feed']}, {origin})")
+                print(f"✅ MLS data loaded: {result['count']} listings ({result['duplicates']} duplicates merged)")
             else:
                 print(f"⚠️  MLS load failed: {result['message']}")
         else:
-            print(f"⚠️  MLS file not found: {mls_file}")
+            print("⚠️  MLS files not found: documents/canonicalListing.csv, Listing.csv")
     except Exception as e:
         print(f"⚠️  MLS startup error: {str(e)}")
 
 # Load MLS data
 load_mls_on_startup()
 
+def preload_form_templates():
+    """Read the clean form templates into memory once per worker (see form_template_registry)"""
+    try:
+        from form_template_registry import get_template_registry
+        result = get_template_registry().preload()
+        print(f"{'✅' if result['success'] else '⚠️ '} {result['message']}")
+    except Exception as e:
+        print(f"⚠️  Form template preload error: {str(e)}")
+
+preload_form_templates()
+
 # ============================================================================
 # DATA VALIDATION SYSTEM (Task #4)
 # ============================================================================
@@ -230,6 +264,9 @@ load_mls_on_startup()
 import re
 from typing import Dict, Any, List, Tuple
 
+from entity_extraction import extract_crm_entities, extract_client_fields
+from email_preprocessing import preprocess_email
+
 def validate_extracted_data(data: Dict[str, Any], operation_type: str) -> Tuple[bool, List[str], Dict[str, Any]]:
     """
     Validate extracted data before database operations.
@@ -374,67 +411,8 @@ def extract_client_data_from_message(message):
     Returns:
         dict: Extracted client data or None if insufficient data
     """
-    import re
-    
-    # Initialize extracted data
-    extracted = {}
-    
-    # Name patterns - prioritize clean name extraction
-    name_patterns = [
-        r'create\s+(?:client|contact):\s*([A-Za-z]+)\s+([A-Za-z]+)',  # "create client: John Smith"
-        r'name\s+is\s+([A-Za-z]+)\s+([A-Za-z]+)',                     # "my name is Jennifer Martinez"
-        r'Full\s+Name[:\s]+([A-Za-z]+)\s+([A-Za-z]+)',               # "Full Name: Jennifer Martinez"
-        r'^([A-Za-z]+)\s+([A-Za-z]+),?\s+email',                     # "Jennifer Martinez, email:" at start
-        r'([A-Za-z]+)\s+([A-Za-z]+)(?:,\s*email|.*@)',              # Name before email pattern
-        r'client[:\s]+([A-Za-z]+)\s+([A-Za-z]+)'                     # "client: Jennifer Martinez"
-    ]
-    
-    for pattern in name_patterns:
-        match = re.search(pattern, message, re.IGNORECASE)
-        if match:
-            extracted['first_name'] = match.group(1)
-            extracted['last_name'] = match.group(2)
-            break
-    
-    # Email pattern
-    email_match = re.search(r'email[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', message, re.IGNORECASE)
-    if email_match:
-        extracted['email'] = email_match.group(1)
-    
-    # Phone pattern
-    phone_match = re.search(r'phone[:\s]*(\([0-9]{3}\)\s*[0-9]{3}-[0-9]{4}|\([0-9]{3}\)\s*[0-9]{3}\s*[0-9]{4}|[0-9]{3}-[0-9]{3}-[0-9]{4})', message, re.IGNORECASE)
-    if phone_match:
-        extracted['phone'] = phone_match.group(1)
-    
-    # Client type detection
-    if any(word in message.lower() for word in ['buyer', 'buying', 'purchase', 'looking to buy']):
-        extracted['client_type'] = 'buyer'
-    elif any(word in message.lower() for word in ['seller', 'selling', 'list', 'listing']):
-        extracted['client_type'] = 'seller'
-    else:
-        extracted['client_type'] = 'buyer'  # Default
-    
-    # Address pattern
-    address_match = re.search(r'address[:\s]*([^,\n]+)', message, re.IGNORECASE)
-    if address_match:
-        address_parts = address_match.group(1).strip().split(',')
-        if len(address_parts) >= 1:
-            extracted['street_address'] = address_parts[0].strip()
-        if len(address_parts) >= 2:
-            extracted['city'] = address_parts[1].strip()
-        if len(address_parts) >= 3:
-            state_zip = address_parts[2].strip().split()
-            if len(state_zip) >= 1:
-                extracted['state'] = state_zip[0]
-            if len(state_zip) >= 2:
-                extracted['zip_code'] = state_zip[1]
-    
-    # Only return if we have essential data (name and either email or phone)
-    if ('first_name' in extracted and 'last_name' in extracted and 
-        ('email' in extracted or 'phone' in extracted)):
-        return extracted
-    
-    return None
+    # Patterns are precompiled once in entity_extraction
+    return extract_client_fields(message)
 
 def build_ai_context():
     """
@@ -525,6 +503,13 @@ def create_langchain_tools():
     
     tools = []
     
+    def _client_creation_report(result):
+        report = f"Client creation result: {result['message']}"
+        if result.get('conflicts'):
+            report += '\n' + '\n'.join(f"- {conflict}" for conflict in result['conflicts'])
+            report += '\nAsk the user whether this is the same person; if not, call again with allow_duplicates=True.'
+        return report
+    
     # Create Client Tool
     def create_client_tool(first_name: str, last_name: str, email: str = None, 
                           phone: str = None, client_type: str = "buyer", 
@@ -545,7 +530,7 @@ def create_langchain_tools():
                 bedrooms=bedrooms,
                 **kwargs
             )
-            return f"Client creation result: {result['message']}"
+            return _client_creation_report(result)
         else:
             # Use local create_client function as fallback
             result = create_client(
@@ -560,7 +545,7 @@ def create_langchain_tools():
                 bedrooms=bedrooms,
                 **kwargs
             )
-            return f"Client creation result: {result['message']}"
+            return _client_creation_report(result)
     
     tools.append(Tool(
         name="create_client",
@@ -575,6 +560,7 @@ def create_langchain_tools():
         - budget_max (optional): Maximum budget as integer  
         - area_preference (optional): Preferred area/neighborhood
         - bedrooms (optional): Number of bedrooms needed
+        - allow_duplicates (optional): True to create the client anyway once the user confirms a reported possible duplicate is a different person
         Example: "add jennifer lawrence to the crm she wants to buy a house for 799999 dollars in penn valley and can be contacted at 747567574"
         """,
         func=create_client_tool
@@ -628,6 +614,8 @@ def create_langchain_tools():
         - budget_min (optional): Minimum budget as integer
         - budget_max (optional): Maximum budget as integer
         - area_preference (optional): Preferred area/neighborhood
+        - bedrooms (optional): Minimum bedrooms wanted
+        - property_type_preference (optional): e.g. Single Family, Condo, Townhouse
         Use when user wants to modify existing client information.
         """,
         func=update_client_tool
@@ -956,6 +944,15 @@ def get_gemini_response_with_function_calling(message, context="", conversation_
         if context:
             system_prompt += f"\n\n🎯 CURRENT CONTEXT: {context}"
         
+        # Resolve known clients/properties up front so the model can act on
+        # their IDs directly instead of spending a find_* round trip
+        resolved_entities = resolve_message_entities(message)
+        if resolved_entities:
+            system_prompt += (
+                "\n\n🔗 RESOLVED CRM ENTITIES (already in the database - use these IDs directly):\n"
+                f"{resolved_entities}"
+            )
+        
         # Build message history
         messages = [SystemMessage(content=system_prompt)]
         
@@ -1098,114 +1095,14 @@ def extract_entities_from_text_legacy(text):
     Returns:
         dict: Extracted entity data
     """
-    import re
-    
-    entities = {}
-    
-    # Name patterns - enhanced to catch more formats (case insensitive)
-    name_patterns = [
-        r"(?:client record for|add|create client)\s+([a-z]+\s+[a-z]+)",
-        r"Name:\s*([a-z]+\s+[a-z]+)",
-        r"([a-z]+\s+[a-z]+)(?:'s record|\s+called|\s+at the)",
-        r"^([a-z]+\s+[a-z]+),",  # "jessica martinez," at start of line
-        r"([a-z]+\s+[a-z]+)\s+called",  # "john smith called"
-        r"add\s+([a-z]+\s+[a-z]+)\s+to",  # "add jennifer lawrence to"
-    ]
-    
-    for pattern in name_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            full_name = match.group(1).strip()
-            name_parts = full_name.split()
-            if len(name_parts) >= 2:
-                entities['first_name'] = name_parts[0]
-                entities['last_name'] = ' '.join(name_parts[1:])
-            break
-    
-    # Phone patterns - enhanced to catch more formats
-    phone_patterns = [
-        r"(?:phone|cell|number)[:\s]*([\\(]?\d{3}[\\)]?[\s.-]?\d{3}[\s.-]?\d{4})",  # phone: 555-123-4567
-        r"(?:his|her|my)\s+phone\s+(?:is\s+|number\s+is\s+)?([\\(]?\d{3}[\\)]?[\s.-]?\d{3}[\s.-]?\d{4})",  # his phone is 555-123-4567
-        r"([\\(]?\d{3}[\\)]?[\s.-]?\d{3}[\s.-]?\d{4})",  # standalone phone number anywhere
-        r"(\d{10})",  # 10 digit number without separators
-    ]
-    
-    for pattern in phone_patterns:
-        phone_match = re.search(pattern, text, re.IGNORECASE)
-        if phone_match:
-            entities['phone'] = phone_match.group(1)
-            break
-    
-    # Email patterns - enhanced to catch more formats
-    email_patterns = [
-        r"(?:email|e-mail)[:\s]*([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",  # email: user@domain.com
-        r"(?:his|her|my)\s+email\s+(?:is\s+|address\s+is\s+)?([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",  # his email is user@domain.com
-        r"([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})",  # standalone email anywhere
-    ]
-    
-    for pattern in email_patterns:
-        email_match = re.search(pattern, text, re.IGNORECASE)
-        if email_match:
-            entities['email'] = email_match.group(1)
-            break
-    
-    # Budget/price patterns - enhanced to catch more formats
-    budget_patterns = [
-        r"(?:budget|under|up to)[:\s]*\$?([\d,]+)K?",  # budget: $500K
-        r"(?:with a budget of|budget is|can spend)[:\s]*\$?([\d,]+)K?",  # with a budget of $450000
-        r"(?:for)\s+\$?([\d,]{4,})(?![-.\d])",  # for $76000 (must be 4+ digits to avoid phone numbers)
-        r"\$+([\d,]{4,})(?![-.\d])",  # standalone large numbers like $450000 (with $ sign)
-    ]
-    
-    for pattern in budget_patterns:
-        budget_match = re.search(pattern, text, re.IGNORECASE)
-        if budget_match:
-            budget_str = budget_match.group(1).replace(',', '')
-            if 'K' in budget_match.group(0).upper():
-                entities['budget'] = int(budget_str) * 1000
-            else:
-                entities['budget'] = int(budget_str)
-            break
-    
-    # Area/location preferences - enhanced patterns
-    area_patterns = [
-        r"(?:in|looking in|area preference)[:\s]*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*?)(?:\s+for|\s+with|\s*$)",  # in Sacramento
-        r"(?:house|property|home)\s+in\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*?)(?:\s+for|\s+with|\s*$)",  # house in Nevada County
-        r"([A-Z][a-z]+\s+County)(?!\s+[a-z])",  # Nevada County
-        r"(?:Location|Area)[:]\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",  # Location: Sacramento
-    ]
-    
-    for pattern in area_patterns:
-        area_match = re.search(pattern, text, re.IGNORECASE)
-        if area_match:
-            entities['area_preference'] = area_match.group(1).strip()
-            break
-    
-    # Bedrooms - enhanced patterns  
-    bedroom_patterns = [
-        r"(\d+)\s*(?:bedroom|br|bed)",  # 3 bedroom
-        r"(?:bedroom|br|bed)[:\s]*(\d+)",  # bedroom: 3
-        r"(\d+)BR",  # 3BR
-    ]
-    
-    for pattern in bedroom_patterns:
-        bedroom_match = re.search(pattern, text, re.IGNORECASE)
-        if bedroom_match:
-            entities['bedrooms'] = int(bedroom_match.group(1))
-            break
-    
-    # Client type inference
-    if any(word in text.lower() for word in ['looking for', 'buyer', 'buying', 'purchase']):
-        entities['client_type'] = 'buyer'
-    elif any(word in text.lower() for word in ['selling', 'seller', 'list', 'listing']):
-        entities['client_type'] = 'seller'
-    else:
-        entities['client_type'] = 'buyer'  # Default
+    # Name, phone, email, budget, area and bedroom pattern families are
+    # precompiled once in entity_extraction and scanned in priority order
+    entities = extract_crm_entities(text)
     
     print(f"[DEBUG ENTITY EXTRACTION] Input text: {text}")
     print(f"[DEBUG ENTITY EXTRACTION] Extracted entities: {entities}")
     
-    return entities if entities else None
+    return entities
 
 def determine_operation_type(ai_response, entities):
     """
@@ -1272,12 +1169,88 @@ def init_database():
         conn.close()
         print("Database initialized successfully")
 
+from address_normalization import (
+    normalize_address_key, address_key_prefix_range, mls_number_prefix_range,
+    find_property_by_address, ensure_address_key_column, refresh_address_key, migrate_address_keys
+)
+from property_url_generator import refresh_property_urls
+
 def get_db_connection():
     """Get database connection with row factory"""
     conn = sqlite3.connect(DATABASE_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
+# ============================================================================
+# ENTITY RESOLUTION INDEX
+# ============================================================================
+
+def migrate_address_keys_on_startup():
+    """Add and backfill the indexed normalized_address_key column on property tables"""
+    try:
+        result = migrate_address_keys(DATABASE_PATH)
+        if result['success']:
+            print(f"✅ Address keys ready: {result['message']}")
+        else:
+            print(f"⚠️  Address key migration skipped: {result['message']}")
+    except Exception as e:
+        print(f"⚠️  Address key migration error: {str(e)}")
+
+def load_entity_index_on_startup():
+    """Build the in-memory client/property resolution index when Flask starts up"""
+    try:
+        from entity_resolution import load_resolution_index
+        result = load_resolution_index(DATABASE_PATH)
+        if result['success']:
+            print(f"✅ Entity index loaded: {result['message']}")
+        else:
+            print(f"⚠️  Entity index load failed: {result['message']}")
+    except Exception as e:
+        print(f"⚠️  Entity index startup error: {str(e)}")
+
+def refresh_entity_index(table, record_id):
+    """Re-index a single client or property row after it was written"""
+    try:
+        from entity_resolution import get_resolution_index
+        from client_dedupe import get_dedupe_engine
+        index = get_resolution_index()
+        conn = get_db_connection()
+        row = conn.execute(f'SELECT * FROM {table} WHERE id = ?', (record_id,)).fetchone()
+        conn.close()
+        if not row:
+            return
+        if table == 'clients':
+            index.add_client_row(dict(row))
+            get_dedupe_engine('clients', DATABASE_PATH).add_record(dict(row))
+        else:
+            index.add_property_row(dict(row))
+    except Exception as e:
+        print(f"⚠️  Entity index refresh error: {str(e)}")
+
+# Client fields that change which listings match a buyer
+MATCH_PREFERENCE_FIELDS = {'client_type', 'budget_min', 'budget_max', 'bedrooms', 'area_preference',
+                           'property_type_preference'}
+
+def refresh_client_matches(client_id):
+    """Rescore one client's MLS listing matches after their preferences were written"""
+    try:
+        from mls_integration import rescore_client_matches
+        rescore_client_matches(client_id)
+    except Exception as e:
+        print(f"⚠️  Client match refresh error: {str(e)}")
+
+def resolve_message_entities(message):
+    """Return a prompt-ready list of clients/properties mentioned in a message"""
+    try:
+        from entity_resolution import get_resolution_index, format_resolved_entities
+        return format_resolved_entities(get_resolution_index().find_mentions(message))
+    except Exception as e:
+        print(f"⚠️  Entity resolution error: {str(e)}")
+        return ''
+
+migrate_address_keys_on_startup()
+load_entity_index_on_startup()
+
 # ============================================================================
 # AI-CALLABLE DATABASE FUNCTIONS
 # ============================================================================
@@ -1292,7 +1265,8 @@ def create_client(first_name, last_name, email=None, phone=None, client_type='bu
         email (str): Email address (optional but recommended)
         phone (str): Primary phone number (optional)
         client_type (str): 'buyer', 'seller', or 'both' (default: 'buyer')
-        **kwargs: Additional client fields (address, occupation, income, etc.)
+        **kwargs: Additional client fields (address, occupation, income, etc.);
+            allow_duplicates=True skips the near-duplicate check after user confirmation
     
     Returns:
         dict: {'success': bool, 'client_id': int, 'message': str, 'conflicts': list}
@@ -1310,6 +1284,15 @@ def create_client(first_name, last_name, email=None, phone=None, client_type='bu
             if existing:
                 conflicts.append(f"Email {email} already exists for {existing['first_name']} {existing['last_name']}")
         
+        # Near-duplicates (phone-only contacts, other email formats, swapped names)
+        if not conflicts and not kwargs.get('allow_duplicates'):
+            from client_dedupe import check_client_duplicates
+            conflicts.extend(check_client_duplicates(
+                first_name, last_name, email, db_path=DATABASE_PATH,
+                home_phone=phone, business_phone=kwargs.get('business_phone'),
+                street_address=kwargs.get('street_address'), city=kwargs.get('city')
+            ))
+        
         # If conflicts exist, return them for user decision
         if conflicts:
             conn.close()
@@ -1320,14 +1303,21 @@ def create_client(first_name, last_name, email=None, phone=None, client_type='bu
                 'conflicts': conflicts
             }
         
+        # Buyer preferences go in the matching columns this database has
+        from client_matching import ensure_preference_columns, client_columns
+        ensure_preference_columns(conn)
+        preferences = {column: kwargs[field] for field, column in client_columns(conn).items()
+                       if kwargs.get(field) is not None}
+        
         # Insert new client
-        cursor = conn.execute('''
-            INSERT INTO clients (
-                first_name, last_name, email, home_phone, client_type,
-                business_phone, street_address, city, 
-                state, zip_code, employer, occupation, annual_income,
-                ssn_last_four, preferred_contact_method, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        columns = [
+            'first_name', 'last_name', 'email', 'home_phone', 'client_type',
+            'business_phone', 'street_address', 'city',
+            'state', 'zip_code', 'employer', 'occupation', 'annual_income',
+            'ssn_last_four', 'preferred_contact_method', 'notes'
+        ] + list(preferences)
+        cursor = conn.execute(f'''
+            INSERT INTO clients ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
         ''', (
             first_name, last_name, email, phone, client_type,
             kwargs.get('business_phone'), kwargs.get('street_address'), 
@@ -1335,11 +1325,14 @@ def create_client(first_name, last_name, email=None, phone=None, client_type='bu
             kwargs.get('employer'), kwargs.get('occupation'),
             kwargs.get('annual_income'), kwargs.get('ssn_last_four'),
             kwargs.get('preferred_contact_method', 'email'), kwargs.get('notes')
-        ))
+        ) + tuple(preferences.values()))
         
         client_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        refresh_entity_index('clients', client_id)
+        if preferences:
+            refresh_client_matches(client_id)
         
         return {
             'success': True,
@@ -1449,19 +1442,25 @@ def update_client(client_id, **kwargs):
                 'updated_fields': []
             }
         
+        # Databases created before client matching lack the preference columns
+        from client_matching import ensure_preference_columns, client_columns
+        ensure_preference_columns(conn)
+        preference_columns = client_columns(conn)  # e.g. bedrooms stored as bedrooms_min
+        
         # Build update query for provided fields
         valid_fields = [
             'first_name', 'last_name', 'email', 'home_phone', 
             'business_phone', 'client_type', 'street_address', 'city',
             'state', 'zip_code', 'employer', 'occupation', 'annual_income',
-            'ssn_last_four', 'preferred_contact_method', 'notes'
+            'ssn_last_four', 'preferred_contact_method', 'notes',
+            'budget_min', 'budget_max', 'bedrooms', 'area_preference', 'property_type_preference'
         ]
         
         update_fields = []
         params = []
         for field, value in kwargs.items():
             if field in valid_fields and value is not None:
-                update_fields.append(f'{field} = ?')
+                update_fields.append(f'{preference_columns.get(field, field)} = ?')
                 params.append(value)
         
         if not update_fields:
@@ -1479,6 +1478,9 @@ def update_client(client_id, **kwargs):
         conn.execute(query, params)
         conn.commit()
         conn.close()
+        refresh_entity_index('clients', client_id)
+        if MATCH_PREFERENCE_FIELDS & set(kwargs):
+            refresh_client_matches(client_id)
         
         return {
             'success': True,
@@ -1510,12 +1512,9 @@ def create_property(address_line1, city, state, zip_code, **kwargs):
     try:
         conn = get_db_connection()
         
-        # Check for existing property at same address
+        # Check for existing property at the same normalized address
         conflicts = []
-        existing = conn.execute(
-            'SELECT id FROM properties WHERE address_line1 = ? AND city = ? AND state = ?',
-            (address_line1, city, state)
-        ).fetchone()
+        existing = find_property_by_address(conn, address_line1, city, state)
         
         if existing:
             conflicts.append(f"Property already exists at {address_line1}, {city}, {state}")
@@ -1535,20 +1534,22 @@ def create_property(address_line1, city, state, zip_code, **kwargs):
                 address_line1, address_line2, city, state, zip_code, mls_number,
                 property_type, listing_type, bedrooms, bathrooms, square_feet, 
                 lot_size, year_built, listing_price, property_description,
-                public_remarks, private_remarks
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                public_remarks, private_remarks, normalized_address_key
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             address_line1, kwargs.get('address_line2'), city, state, zip_code,
             kwargs.get('mls_number'), kwargs.get('property_type', 'single_family'),
             kwargs.get('listing_type', 'sale'), kwargs.get('bedrooms'), kwargs.get('bathrooms'),
             kwargs.get('square_feet'), kwargs.get('lot_size'), kwargs.get('year_built'),
             kwargs.get('listing_price'), kwargs.get('description'), kwargs.get('public_remarks'),
-            kwargs.get('private_remarks')
+            kwargs.get('private_remarks'), normalize_address_key(address_line1, city, state)
         ))
         
         property_id = cursor.lastrowid
+        refresh_property_urls(conn, property_id)
         conn.commit()
         conn.close()
+        refresh_entity_index('properties', property_id)
         
         return {
             'success': True,
@@ -1592,7 +1593,16 @@ def find_properties(search_term=None, min_price=None, max_price=None, bedrooms=N
         '''
         params = []
         
-        if search_term:
+        address_range = address_key_prefix_range(search_term)
+        if address_range:
+            # Street-number searches use the normalized address index
+            ensure_address_key_column(conn)
+            query += ''' AND (
+                (normalized_address_key >= ? AND normalized_address_key < ?)
+                OR (mls_number >= ? AND mls_number < ?)
+            )'''
+            params.extend(address_range + mls_number_prefix_range(search_term))
+        elif search_term:
             query += ''' AND (
                 address_line1 LIKE ? OR city LIKE ? OR mls_number LIKE ?
             )'''
@@ -1715,8 +1725,13 @@ def update_property(property_id, **kwargs):
         params.append(property_id)
 
         conn.execute(query, params)
+        if {'address_line1', 'city', 'state'} & set(updated_keys):
+            refresh_address_key(conn, property_id)
+        if {'address_line1', 'city', 'state', 'zip_code', 'mls_number'} & set(updated_keys):
+            refresh_property_urls(conn, property_id)
         conn.commit()
         conn.close()
+        refresh_entity_index('properties', property_id)
 
         return {
             'success': True,
@@ -2173,7 +2188,7 @@ def new_property():
     if request.method == 'POST':
         data = request.form
         conn = get_db_connection()
-        conn.execute('''
+        cursor = conn.execute('''
             INSERT INTO properties (
                 street_address, city, state, zip_code, county,
                 assessor_parcel_number, lot_number, subdivision, lot_size_sqft, lot_size_acres,
@@ -2188,8 +2203,12 @@ def new_property():
             data.get('year_built') or None, data.get('property_type'),
             data.get('property_description'), data.get('listed_price') or None
         ))
+        property_id = cursor.lastrowid
+        refresh_address_key(conn, property_id)
+        refresh_property_urls(conn, property_id)
         conn.commit()
         conn.close()
+        refresh_entity_index('properties', property_id)
         flash('Property added successfully!')
         return redirect(url_for('properties_list'))
     
@@ -2595,13 +2614,24 @@ def process_email():
         print(f"[EMAIL PROCESSING] Received content length: {len(email_content)} characters")
         print(f"[EMAIL PROCESSING] Content preview: {email_content[:200]}...")
 
-        raw_extracted_entities = extract_entities_from_text(email_content)
+        # Strip quoted history, signatures, footers and HTML before extraction
+        preprocessed = preprocess_email(email_content)
+        preprocessing_summary = {
+            'original_chars': preprocessed['original_chars'],
+            'cleaned_chars': preprocessed['cleaned_chars'],
+            'reduction_pct': preprocessed['reduction_pct'],
+            'removed': preprocessed['removed']
+        }
+        print(f"[EMAIL PROCESSING] {preprocessed['message']}")
+
+        raw_extracted_entities = extract_entities_from_text(preprocessed['text'])
         print(f"[EMAIL PROCESSING] Raw extracted entities: {raw_extracted_entities}")
 
         if not raw_extracted_entities:
             return jsonify({
                 'message': 'Could not extract any entities from the email.',
-                'extracted_entities': None
+                'extracted_entities': None,
+                'preprocessing': preprocessing_summary
             }), 200
 
         # Focus on Client Creation
@@ -2664,7 +2694,8 @@ def process_email():
                         'data': cleaned_data,
                         'proposal_text': proposal_text
                     },
-                    'extracted_entities': raw_extracted_entities
+                    'extracted_entities': raw_extracted_entities,
+                    'preprocessing': preprocessing_summary
                 }), 200
             else:
                 # Data is NOT valid after validation
@@ -2682,7 +2713,8 @@ def process_email():
             print("[EMAIL PROCESSING] Could not extract sufficient client information.")
             return jsonify({
                 'message': 'Could not extract sufficient client information from the email to propose an action.',
-                'extracted_entities': raw_extracted_entities
+                'extracted_entities': raw_extracted_entities,
+                'preprocessing': preprocessing_summary
             }), 200
 
     except Exception as e:
@@ -2774,8 +2806,13 @@ def confirm_operation():
     {
         "operation_id": "op_...",
         "confirmed": true|false,
-        "modified_data": {...} // Optional: user modifications to the proposed data
+        "modified_data": {...}, // Optional: user modifications to the proposed data
+        "allow_duplicates": true // Optional: create a client reported as a possible duplicate anyway
     }
+    
+    A failed operation stays pending, so a client creation that came back
+    with conflicts can be confirmed again with allow_duplicates once the user
+    says it is a different person.
     """
     try:
         data = request.get_json()
@@ -2821,6 +2858,8 @@ def confirm_operation():
         
         # Use modified data if provided, otherwise use original
         execution_data = modified_data if modified_data else operation['operation_data']
+        if data.get('allow_duplicates') and operation_type in ['create_client', 'create_client_zipform']:
+            execution_data = dict(execution_data, allow_duplicates=True)
         
         # 🚨 CRITICAL DEBUG: Log data flow right before execution
         print(f"[DEBUG PRE-EXECUTION] About to execute operation")
@@ -3125,6 +3164,29 @@ def get_dashboard_stats():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@app.route('/api/market_stats', methods=['GET'])
+def api_market_stats():
+    """
+    MLS market statistics for a segment (?city=&subdivision=&property_type=&bedrooms=),
+    optionally broken down by one dimension (?by=city), from the precomputed cube
+    """
+    try:
+        from mls_integration import get_market_stats
+        args = request.args
+        result = get_market_stats(city=args.get('city'), subdivision=args.get('subdivision'),
+                                  property_type=args.get('property_type'), bedrooms=args.get('bedrooms'),
+                                  by=args.get('by'))
+        result['timestamp'] = datetime.now().isoformat()
+        return jsonify(result), 200 if result['success'] else 404
+
+    except Exception as e:
+        print(f"[MARKET STATS ERROR] {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
 # ============================================================================
 # FORM API ENDPOINTS (Integration from form_api_backend.py)
 # ============================================================================
@@ -3177,45 +3239,130 @@ def api_list_forms():
 
 @app.route('/api/forms/populate', methods=['POST'])
 def api_populate_form():
-    """Populate a form with CRM data using the real form population system"""
+    """
+    Populate a form with CRM data using the real form population system.
+
+    The form is rendered in memory. With "stream": true (or ?stream=1) the
+    PDF is the response body, written to output/ only when "persist": true;
+    otherwise it is saved and the JSON points at /download/<filename>.
+    With "async": true (or ?async=1) the render is queued instead (see
+    form_job_queue) and a 202 returns the job id to poll.
+    """
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         form_id = data.get('form_id')
         client_id = data.get('client_id') 
         property_id = data.get('property_id')
         transaction_id = data.get('transaction_id')
+        stream = bool(data.get('stream')) or request.args.get('stream') == '1'
+        persist = bool(data.get('persist', not stream))
         
         # Import the gorgeous CRPA system
         sys.path.append(os.path.dirname(os.path.dirname(__file__)))
         from crpa_crm_system import CRPACRMSystem
         
-        # Initialize CRPA system
+        # Use transaction_id if provided
+        if not transaction_id:
+            return jsonify({'success': False, 'error': 'transaction_id is required for CRPA system'}), 400
+        
+        # Render in the form job pool and answer at once
+        if bool(data.get('async')) or request.args.get('async') == '1':
+            from form_job_queue import get_form_job_queue
+            job = get_form_job_queue().submit('crpa', {'transaction_id': transaction_id, 'db_path': DATABASE_PATH})
+            if not job['success']:
+                return jsonify({'success': False, 'error': job['message']}), 500
+            job['status_url'] = f"/api/forms/jobs/{job['job_id']}"
+            return jsonify(job), 202
+        
+        # Initialize CRPA system (templates come from the process-wide registry)
         crpa_system = CRPACRMSystem()
         
-        # Use transaction_id if provided
-        if transaction_id:
-            # Create gorgeous CRPA form with real CRM data
-            output_filename = f'CRPA_Transaction_{transaction_id}.pdf'
+        # Create gorgeous CRPA form with real CRM data
+        pdf_bytes = crpa_system.render_crpa_form(transaction_id)
+        output_filename = f'CRPA_Transaction_{transaction_id}.pdf'
+        output_path = None
+        if persist:
             output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output')
             os.makedirs(output_dir, exist_ok=True)
             output_path = os.path.join(output_dir, output_filename)
-            
-            result = crpa_system.create_crpa_form(transaction_id, output_path)
-        else:
-            return jsonify({'success': False, 'error': 'transaction_id is required for CRPA system'}), 400
+            with open(output_path, 'wb') as output_file:
+                output_file.write(pdf_bytes)
         
-        if result and os.path.exists(output_path):
-            return jsonify({
-                'success': True,
-                'message': f'Gorgeous CRPA form created for transaction {transaction_id} using clean template',
-                'pdf_url': f'/download/{output_filename}',
-                'pdf_path': output_path,
-                'form_type': 'gorgeous_crpa',
-                'file_size': os.path.getsize(output_path),
-                'timestamp': datetime.now().isoformat()
-            })
-        else:
-            return jsonify({'success': False, 'error': 'Form generation failed'}), 500
+        if stream:
+            return send_file(BytesIO(pdf_bytes), mimetype='application/pdf', as_attachment=True,
+                             download_name=output_filename)
+        
+        return jsonify({
+            'success': True,
+            'message': f'Gorgeous CRPA form created for transaction {transaction_id} using clean template',
+            'pdf_url': f'/download/{output_filename}' if output_path else None,
+            'pdf_path': output_path,
+            'form_type': 'gorgeous_crpa',
+            'file_size': len(pdf_bytes),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/forms/jobs/<job_id>', methods=['GET'])
+def api_form_job(job_id):
+    """Status of a queued form job; ?wait=N holds the request up to N seconds for it to finish"""
+    try:
+        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+        from form_job_queue import get_form_job_queue
+        queue = get_form_job_queue(start=False)
+        wait = min(float(request.args.get('wait', 0)), 60.0)
+        job = queue.wait(job_id, wait) if wait > 0 else queue.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': f'Form job not found: {job_id}'}), 404
+        return jsonify({'success': True, 'job': job})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/forms/jobs/stats', methods=['GET'])
+def api_form_job_stats():
+    """Form job queue depth, latency and worker utilisation"""
+    try:
+        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+        from form_job_queue import get_form_job_queue
+        return jsonify(get_form_job_queue(start=False).stats())
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/forms/batch', methods=['POST'])
+def api_batch_forms():
+    """
+    CRPA forms for many transactions in one streamed ZIP (see form_batch).
+
+    Body: {"transaction_ids": [...]} or a filter: {"status": [...],
+    "offer_from": "YYYY-MM-DD", "offer_to": "YYYY-MM-DD"}. Forms are added
+    to the archive as they finish rendering; batch_report.json at the end
+    lists any transactions that failed.
+    """
+    try:
+        data = request.get_json() or {}
+        transaction_ids = data.get('transaction_ids')
+        status = data.get('status')
+        offer_from = data.get('offer_from')
+        offer_to = data.get('offer_to')
+        if not transaction_ids and not (status or offer_from or offer_to):
+            return jsonify({'success': False,
+                            'error': 'transaction_ids or a filter (status, offer_from, offer_to) is required'}), 400
+        
+        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+        from form_batch import render_batch, stream_batch_zip
+        
+        # Same share of the cores as the form job pool (see gunicorn.conf.py)
+        workers = int(os.environ.get('FORM_JOB_WORKERS', 0)) or None
+        items = render_batch(transaction_ids, DATABASE_PATH, status, offer_from, offer_to, workers)
+        filename = f"CRPA_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return Response(stream_with_context(stream_batch_zip(items)), mimetype='application/zip',
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -12,12 +12,28 @@ import json
 from pathlib import Path
 DATABASE_PATH = Path(__file__).parent.parent / 'real_estate_crm.db'
 
+from entity_resolution import get_resolution_index
+from client_dedupe import check_client_duplicates, record_client
+from address_normalization import find_property_by_address, refresh_address_key
+try:
+    from property_url_generator import refresh_property_urls
+except ImportError:  # repository root not on sys.path (see real_estate_crm)
+    refresh_property_urls = None
+
 def get_db_connection():
     """Get database connection with row factory"""
     conn = sqlite3.connect(DATABASE_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
+def _refresh_client_matches(client_id):
+    """Score a new buyer against the loaded MLS listings"""
+    try:
+        from mls_integration import rescore_client_matches
+        rescore_client_matches(client_id)
+    except Exception as e:
+        print(f"⚠️  Client match refresh error: {str(e)}")
+
 # ============================================================================
 # ENHANCED CLIENT MANAGEMENT FUNCTIONS
 # ============================================================================
@@ -34,10 +50,15 @@ def create_client_zipform(first_name, last_name, **kwargs):
             - street_address, city, state, zip_code, county
             - client_type, employer, occupation, annual_income, ssn_last_four
             - preferred_contact_method, notes, auto_signature_enabled
+            - budget_min, budget_max, bedrooms, area_preference, property_type_preference
+            - phone: taken as home_phone when home_phone is not given
+            - allow_duplicates: skip the near-duplicate check after user confirmation
     
     Returns:
         dict: {'success': bool, 'client_id': int, 'message': str, 'conflicts': list}
     """
+    if kwargs.get('phone') and not kwargs.get('home_phone'):
+        kwargs['home_phone'] = kwargs['phone']
     try:
         conn = get_db_connection()
         
@@ -51,6 +72,14 @@ def create_client_zipform(first_name, last_name, **kwargs):
             if existing:
                 conflicts.append(f"Email {kwargs['email']} already exists for {existing['first_name']} {existing['last_name']}")
         
+        if not conflicts and not kwargs.get('allow_duplicates'):
+            conflicts.extend(check_client_duplicates(
+                first_name, last_name, kwargs.get('email'), db_path=DATABASE_PATH,
+                home_phone=kwargs.get('home_phone'), business_phone=kwargs.get('business_phone'),
+                cellular_phone=kwargs.get('cellular_phone'), street_address=kwargs.get('street_address'),
+                city=kwargs.get('city')
+            ))
+        
         if conflicts:
             conn.close()
             return {
@@ -60,14 +89,21 @@ def create_client_zipform(first_name, last_name, **kwargs):
                 'conflicts': conflicts
             }
         
+        # Buyer preferences go in the matching columns this database has
+        from client_matching import ensure_preference_columns, client_columns
+        ensure_preference_columns(conn)
+        preferences = {column: kwargs[field] for field, column in client_columns(conn).items()
+                       if kwargs.get(field) is not None}
+        
         # Insert new client with all ZipForm fields
-        cursor = conn.execute('''
-            INSERT INTO clients (
-                first_name, last_name, middle_initial, email, home_phone, business_phone,
-                cellular_phone, fax_number, preferred_contact_method, street_address,
-                city, state, zip_code, county, client_type, employer, occupation,
-                annual_income, ssn_last_four, notes, auto_signature_enabled
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        columns = [
+            'first_name', 'last_name', 'middle_initial', 'email', 'home_phone', 'business_phone',
+            'cellular_phone', 'fax_number', 'preferred_contact_method', 'street_address',
+            'city', 'state', 'zip_code', 'county', 'client_type', 'employer', 'occupation',
+            'annual_income', 'ssn_last_four', 'notes', 'auto_signature_enabled'
+        ] + list(preferences)
+        cursor = conn.execute(f'''
+            INSERT INTO clients ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
         ''', (
             first_name, last_name, kwargs.get('middle_initial'),
             kwargs.get('email'), kwargs.get('home_phone'), kwargs.get('business_phone'),
@@ -78,12 +114,26 @@ def create_client_zipform(first_name, last_name, **kwargs):
             kwargs.get('employer'), kwargs.get('occupation'), kwargs.get('annual_income'),
             kwargs.get('ssn_last_four'), kwargs.get('notes'),
             kwargs.get('auto_signature_enabled', False)
-        ))
+        ) + tuple(preferences.values()))
         
         client_id = cursor.lastrowid
         conn.commit()
         conn.close()
         
+        get_resolution_index().add_client(
+            client_id, first_name, last_name,
+            email=kwargs.get('email'), phone=kwargs.get('home_phone'),
+            cellular_phone=kwargs.get('cellular_phone'), business_phone=kwargs.get('business_phone')
+        )
+        record_client(
+            client_id, db_path=DATABASE_PATH, first_name=first_name, last_name=last_name,
+            email=kwargs.get('email'), home_phone=kwargs.get('home_phone'),
+            cellular_phone=kwargs.get('cellular_phone'), business_phone=kwargs.get('business_phone'),
+            street_address=kwargs.get('street_address'), city=kwargs.get('city')
+        )
+        if preferences:
+            _refresh_client_matches(client_id)
+        
         return {
             'success': True,
             'client_id': client_id,
@@ -120,12 +170,9 @@ def create_property_zipform(street_address, city, state, zip_code, **kwargs):
     try:
         conn = get_db_connection()
         
-        # Check for existing property conflicts
+        # Check for existing property conflicts on the normalized address
         conflicts = []
-        existing = conn.execute(
-            'SELECT id FROM properties WHERE street_address = ? AND city = ? AND state = ?',
-            (street_address, city, state)
-        ).fetchone()
+        existing = find_property_by_address(conn, street_address, city, state)
         
         if existing:
             conflicts.append(f"Property already exists at {street_address}, {city}, {state}")
@@ -155,7 +202,7 @@ def create_property_zipform(street_address, city, state, zip_code, **kwargs):
                 deposit_amount_2nd_increase, deposit_amount_3rd_increase, offer_date,
                 expire_date, expire_time, offer_acceptance_date, total_amount_financed,
                 property_description, public_remarks, private_remarks
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             street_address, city, state, zip_code, kwargs.get('county'), kwargs.get('township'),
             kwargs.get('legal_description'), kwargs.get('tax_id'), kwargs.get('assessor_parcel_number'),
@@ -182,9 +229,17 @@ def create_property_zipform(street_address, city, state, zip_code, **kwargs):
         ))
         
         property_id = cursor.lastrowid
+        refresh_address_key(conn, property_id)
+        if refresh_property_urls:
+            refresh_property_urls(conn, property_id)
         conn.commit()
         conn.close()
         
+        get_resolution_index().add_property(
+            property_id, street_address, city=city, state=state,
+            zip_code=zip_code, mls_number=kwargs.get('mls_number')
+        )
+        
         return {
             'success': True,
             'property_id': property_id,
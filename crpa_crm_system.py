@@ -7,13 +7,62 @@ This is the final solution that creates beautiful, populated forms
 import sqlite3
 import os
 import fitz  # pymupdf
-from blue_text_remover import BlueTextRemover
+from form_template_registry import get_template_registry, CRPA_CLEAN_TEMPLATE
+
+# Position mappings for the main form fields (page 3, 0-indexed as page 2)
+CRPA_FIELD_PAGE = 2
+CRPA_FIELD_POSITIONS = {
+    # Page 3 - Main purchase agreement form
+    'form_date': (500, 142),      # Date prepared field
+    'buyer_name': (350, 170),     # Buyer name field
+    'property_address': (350, 195), # Property address
+    'city': (200, 220),           # City
+    'state': (380, 220),          # State
+    'zip': (480, 220),            # ZIP code
+    'purchase_price': (200, 280), # Purchase price (need to find exact position)
+    'earnest_money': (150, 320),  # Earnest money amount
+    'closing_date': (200, 360),   # Closing date
+}
+
+# Transaction with its buyer and property, as used on the form
+TRANSACTION_DATA_QUERY = """
+SELECT 
+    t.id as transaction_id,
+    t.offer_date as transaction_date,
+    t.purchase_price,
+    t.closing_date,
+    t.earnest_money_amount,
+    
+    -- Client (Buyer) Information
+    c.first_name || ' ' || c.last_name as buyer_name,
+    c.home_phone as buyer_phone,
+    c.email as buyer_email,
+    
+    -- Property Information
+    p.street_address,
+    p.city,
+    p.state,
+    p.zip_code,
+    
+    -- Agent Information (placeholder)
+    'Narissa Thompson' as listing_agent_name,
+    'CA-DRE-02145678' as listing_agent_license,
+    'Narissa Realty Group' as listing_brokerage
+    
+FROM transactions t
+LEFT JOIN clients c ON t.buyer_client_id = c.id
+LEFT JOIN properties p ON t.property_id = p.id
+"""
+
+# Transaction ids bound per query in get_transactions_data
+TRANSACTION_ID_CHUNK = 500
 
 class CRPACRMSystem:
-    def __init__(self, db_path="../real_estate_crm.db"):
+    def __init__(self, db_path="../real_estate_crm.db", registry=None):
         self.db_path = db_path
-        self.clean_template_path = "output/CRPA_CLEAN_TEMPLATE.pdf"
-        self.remover = BlueTextRemover()
+        # Clean template bytes are loaded once per process and shared by every instance
+        self.registry = registry or get_template_registry()
+        self.template_name = CRPA_CLEAN_TEMPLATE
         
     def get_transaction_data(self, transaction_id):
         """Get complete transaction data from CRM database"""
@@ -22,37 +71,7 @@ class CRPACRMSystem:
         cursor = conn.cursor()
         
         # Get transaction with related client and property data
-        query = """
-        SELECT 
-            t.id as transaction_id,
-            t.offer_date as transaction_date,
-            t.purchase_price,
-            t.closing_date,
-            t.earnest_money_amount,
-            
-            -- Client (Buyer) Information
-            c.first_name || ' ' || c.last_name as buyer_name,
-            c.home_phone as buyer_phone,
-            c.email as buyer_email,
-            
-            -- Property Information
-            p.street_address,
-            p.city,
-            p.state,
-            p.zip_code,
-            
-            -- Agent Information (placeholder)
-            'Narissa Thompson' as listing_agent_name,
-            'CA-DRE-02145678' as listing_agent_license,
-            'Narissa Realty Group' as listing_brokerage
-            
-        FROM transactions t
-        LEFT JOIN clients c ON t.buyer_client_id = c.id
-        LEFT JOIN properties p ON t.property_id = p.id
-        WHERE t.id = ?
-        """
-        
-        cursor.execute(query, (transaction_id,))
+        cursor.execute(TRANSACTION_DATA_QUERY + " WHERE t.id = ?", (transaction_id,))
         result = cursor.fetchone()
         conn.close()
         
@@ -60,34 +79,62 @@ class CRPACRMSystem:
             return dict(result)
         return None
     
-    def ensure_clean_template_exists(self):
-        """Ensure the clean template exists, create it if needed"""
-        if not os.path.exists(self.clean_template_path):
-            print("🧹 Creating clean template...")
-            self.remover.remove_colored_text(self.clean_template_path)
-        return os.path.exists(self.clean_template_path)
-    
-    def create_crpa_form(self, transaction_id, output_path=None):
-        """Create a populated CRPA form using CRM data"""
-        
-        # Ensure clean template exists
-        if not self.ensure_clean_template_exists():
-            raise Exception("Could not create clean template")
-        
-        # Get CRM data
-        data = self.get_transaction_data(transaction_id)
-        if not data:
-            raise ValueError(f"Transaction {transaction_id} not found")
+    def get_transactions_data(self, transaction_ids=None, status=None, offer_from=None, offer_to=None):
+        """
+        Transaction data for many transactions in a few set-based queries
         
-        # Set output path
-        if not output_path:
-            output_path = f"output/CRPA_Transaction_{transaction_id}.pdf"
+        Args:
+            transaction_ids: Transactions to fetch (all matching the other filters when None)
+            status: Transaction status or list of statuses
+            offer_from: Earliest offer date (YYYY-MM-DD)
+            offer_to: Latest offer date (YYYY-MM-DD)
         
-        # Open clean template
-        doc = fitz.open(self.clean_template_path)
+        Returns:
+            list: Transaction data dicts, as get_transaction_data, ordered by transaction id
+        """
+        conditions, params = [], []
+        if status:
+            statuses = [status] if isinstance(status, str) else list(status)
+            conditions.append(f"t.status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if offer_from:
+            conditions.append("t.offer_date >= ?")
+            params.append(offer_from)
+        if offer_to:
+            conditions.append("t.offer_date <= ?")
+            params.append(offer_to)
+        
+        # One query per chunk of ids (SQLite caps bound variables per statement)
+        id_chunks = [None]
+        if transaction_ids is not None:
+            transaction_ids = list(transaction_ids)
+            id_chunks = [transaction_ids[start:start + TRANSACTION_ID_CHUNK]
+                         for start in range(0, len(transaction_ids), TRANSACTION_ID_CHUNK)]
         
-        # Format data for display
-        formatted_data = {
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = []
+            for chunk in id_chunks:
+                chunk_conditions, chunk_params = list(conditions), list(params)
+                if chunk is not None:
+                    chunk_conditions.append(f"t.id IN ({', '.join('?' * len(chunk))})")
+                    chunk_params.extend(chunk)
+                where = f" WHERE {' AND '.join(chunk_conditions)}" if chunk_conditions else ""
+                rows.extend(dict(row) for row in conn.execute(TRANSACTION_DATA_QUERY + where, chunk_params))
+        finally:
+            conn.close()
+        
+        return sorted(rows, key=lambda row: row['transaction_id'])
+    
+    def ensure_clean_template_exists(self):
+        """Ensure the clean template is loaded, creating it if needed"""
+        return self.registry.get(self.template_name) is not None
+
+    @staticmethod
+    def format_form_data(data):
+        """Format transaction data for display on the form"""
+        return {
             'form_date': data.get('transaction_date', '2025-06-01'),
             'buyer_name': data.get('buyer_name', 'TBD'),
             'property_address': data.get('street_address', 'TBD'),
@@ -101,48 +148,53 @@ class CRPACRMSystem:
             'agent_license': data.get('listing_agent_license', 'CA-DRE-02145678'),
             'brokerage': data.get('listing_brokerage', 'Narissa Realty Group')
         }
-        
-        # Position mappings for the main form fields (page 3, 0-indexed as page 2)
-        field_positions = {
-            # Page 3 - Main purchase agreement form
-            'form_date': (500, 142),      # Date prepared field
-            'buyer_name': (350, 170),     # Buyer name field  
-            'property_address': (350, 195), # Property address
-            'city': (200, 220),           # City
-            'state': (380, 220),          # State
-            'zip': (480, 220),            # ZIP code
-            'purchase_price': (200, 280), # Purchase price (need to find exact position)
-            'earnest_money': (150, 320),  # Earnest money amount
-            'closing_date': (200, 360),   # Closing date
-        }
-        
-        # Add text to Page 3 (main form page)
-        page = doc[2]  # Page 3 is 0-indexed as page 2
-        
-        print(f"📝 Populating CRPA form for Transaction {transaction_id}:")
-        for field, value in formatted_data.items():
-            if field in field_positions and value != 'TBD':
-                x, y = field_positions[field]
-                print(f"  {field}: {value}")
-                
-                # Add blue text for new data
-                page.insert_text((x, y), str(value), fontsize=10, color=(0, 0, 0.8))
-        
+
+    def render_form_data(self, data):
+        """Populate an in-memory copy of the clean template with transaction data and return the PDF bytes"""
+        formatted_data = self.format_form_data(data)
+
+        doc = self.registry.open(self.template_name)
+        try:
+            page = doc[CRPA_FIELD_PAGE]
+            # Blue text for new data, written in one pass with the preloaded font
+            writer = fitz.TextWriter(page.rect, color=(0, 0, 0.8))
+            font = self.registry.font()
+            for field, value in formatted_data.items():
+                if field in CRPA_FIELD_POSITIONS and value != 'TBD' and value is not None:
+                    writer.append(CRPA_FIELD_POSITIONS[field], str(value), font=font, fontsize=10)
+            writer.write_text(page)
+            return doc.tobytes()
+        finally:
+            doc.close()
+
+    def render_crpa_form(self, transaction_id):
+        """Populated CRPA form for a transaction as PDF bytes"""
+        data = self.get_transaction_data(transaction_id)
+        if not data:
+            raise ValueError(f"Transaction {transaction_id} not found")
+        return self.render_form_data(data)
+
+    def create_crpa_form(self, transaction_id, output_path=None):
+        """Create a populated CRPA form using CRM data"""
+
+        # Ensure clean template exists
+        if not self.ensure_clean_template_exists():
+            raise Exception("Could not create clean template")
+
+        pdf_bytes = self.render_crpa_form(transaction_id)
+
+        # Set output path
+        if not output_path:
+            output_path = f"output/CRPA_Transaction_{transaction_id}.pdf"
+
         # Save the populated form
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        doc.save(output_path)
-        doc.close()
-        
-        if os.path.exists(output_path):
-            file_size = os.path.getsize(output_path)
-            print(f"\n✅ CRPA FORM CREATED!")
-            print(f"📁 File: {output_path}")
-            print(f"📊 Size: {file_size:,} bytes")
-            print(f"🌐 Windows path: \\\\wsl.localhost\\Ubuntu\\home\\ender\\.claude\\projects\\offer-creator\\{output_path}")
-            return output_path
-        else:
-            raise Exception("Failed to create CRPA form")
-    
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, 'wb') as handle:
+            handle.write(pdf_bytes)
+
+        print(f"✅ CRPA form created for Transaction {transaction_id}: {output_path} ({len(pdf_bytes):,} bytes)")
+        return output_path
+
     def get_available_transactions(self):
         """Get list of available transactions for form creation"""
         conn = sqlite3.connect(self.db_path)
@@ -11,6 +11,7 @@ import os
 import json
 import sqlite3
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
@@ -21,6 +22,7 @@ import logging
 from form_population_engine import FormPopulationEngine
 from validation_framework import FormValidationFramework
 from coordinate_based_form_filler import CoordinateBasedFormFiller
+from form_job_queue import get_form_job_queue
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -145,13 +147,19 @@ class FormBackendService:
         if not property_id and 'property' in self.supported_forms[form_id]['required_data']:
             raise BadRequest("property_id is required for this form")
         
+        options = options or {}
+        stream = options.get('delivery') == 'stream'
+        
         try:
-            # Use population engine to generate form
+            # Use population engine to generate form (in memory; written to output/
+            # unless streamed back without persist)
             result = self.population_engine.populate_form(
                 form_name=form_id,
                 client_id=client_id,
                 property_id=property_id,
-                transaction_id=transaction_id
+                transaction_id=transaction_id,
+                persist=bool(options.get('persist', not stream)),
+                include_pdf=stream
             )
             
             # Add backend metadata
@@ -163,7 +171,7 @@ class FormBackendService:
                     'client_id': client_id,
                     'property_id': property_id,
                     'transaction_id': transaction_id,
-                    'options': options or {}
+                    'options': options
                 }
             })
             
@@ -313,6 +321,26 @@ def populate_form():
         transaction_id = data.get('transaction_id')
         options = data.get('options', {})
         
+        # {"options": {"delivery": "stream"}} (or ?delivery=stream) returns the PDF itself
+        # instead of a JSON result pointing at a file to download in a second request;
+        # "async" queues the render and answers at once with a job id to poll
+        if request.args.get('delivery') in ('stream', 'async'):
+            options = {**options, 'delivery': request.args['delivery']}
+        
+        if options.get('delivery') == 'async':
+            if form_id not in form_service.supported_forms:
+                raise BadRequest(f"Unsupported form: {form_id}")
+            job = get_form_job_queue().submit('populate', {
+                'form_id': form_id,
+                'client_id': client_id,
+                'property_id': property_id,
+                'transaction_id': transaction_id
+            })
+            if not job['success']:
+                raise InternalServerError(job['message'])
+            job['status_url'] = f"/api/forms/jobs/{job['job_id']}"
+            return jsonify(job), 202
+        
         result = form_service.populate_form_request(
             form_id=form_id,
             client_id=client_id,
@@ -321,6 +349,16 @@ def populate_form():
             options=options
         )
         
+        if options.get('delivery') == 'stream':
+            pdf_bytes = result.pop('pdf_bytes', None)
+            if pdf_bytes is None:
+                raise InternalServerError("Form PDF could not be generated")
+            response = send_file(BytesIO(pdf_bytes), mimetype='application/pdf', as_attachment=True,
+                                 download_name=result['output_filename'])
+            response.headers['X-Form-Valid'] = 'true' if result['success'] else 'false'
+            response.headers['X-Form-Validation-Errors'] = str(len(result['validation_errors']))
+            return response
+        
         return jsonify({
             'success': True,
             'population_result': result,
@@ -335,6 +373,34 @@ def populate_form():
         logger.error(f"❌ Populate form error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@form_api.route('/jobs/<job_id>', methods=['GET'])
+def get_form_job(job_id: str):
+    """Status of a queued form job; ?wait=N holds the request up to N seconds for it to finish"""
+    try:
+        queue = get_form_job_queue(start=False)
+        wait = min(float(request.args.get('wait', 0)), 60.0)
+        job = queue.wait(job_id, wait) if wait > 0 else queue.get(job_id)
+        if job is None:
+            raise NotFound(f"Form job not found: {job_id}")
+        return jsonify({'success': True, 'job': job})
+        
+    except NotFound as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Form job status error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@form_api.route('/jobs/stats', methods=['GET'])
+def form_job_stats():
+    """Queue depth, job latency and worker utilisation"""
+    try:
+        return jsonify(get_form_job_queue(start=False).stats())
+    except Exception as e:
+        logger.error(f"❌ Form job stats error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @form_api.route('/validate', methods=['POST'])
 def validate_form():
     """Validate form field data"""
@@ -414,6 +480,8 @@ def api_status():
                 '/api/forms/populate',
                 '/api/forms/validate',
                 '/api/forms/download/<form_id>/<file_name>',
+                '/api/forms/jobs/<job_id>',
+                '/api/forms/jobs/stats',
                 '/api/forms/status',
                 '/api/forms/preview_data'
             ],
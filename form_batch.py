@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Form Batch Generation
+CRPA forms for many transactions at once: data fetched in set-based queries,
+rendered in parallel worker processes and streamed out as a ZIP archive
+"""
+
+import json
+import os
+import sqlite3
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from crpa_crm_system import CRPACRMSystem
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CRM_DB_PATH = os.path.join(ROOT_DIR, 'real_estate_crm.db')
+
+REPORT_NAME = 'batch_report.json'
+IN_FLIGHT_PER_WORKER = 2    # rendered documents waiting per worker, bounding memory
+
+# ============================================================================
+# WORKER PROCESSES
+# ============================================================================
+
+_batch_system: Optional[CRPACRMSystem] = None
+
+def _init_batch_worker(db_path: str) -> None:
+    """Pool initializer: the clean template and font loaded once per worker"""
+    global _batch_system
+    _batch_system = CRPACRMSystem(db_path)
+    _batch_system.registry.preload()
+
+def _render_item(data: Dict[str, Any]) -> bytes:
+    return _batch_system.render_form_data(data)
+
+def form_filename(transaction_id: Any) -> str:
+    return f'CRPA_Transaction_{transaction_id}.pdf'
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+def render_batch(transaction_ids: Optional[Iterable[Any]] = None, db_path: Optional[str] = None,
+                 status=None, offer_from: Optional[str] = None, offer_to: Optional[str] = None,
+                 workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Render CRPA forms for a list of transactions or for every transaction
+    matching a filter, yielding each one as soon as it is done.
+
+    All transaction data is read up front in set-based queries; only that
+    data goes to the worker processes, which keep the template in memory.
+    At most IN_FLIGHT_PER_WORKER documents per worker are rendered ahead
+    of the consumer. A transaction that is missing or fails to render is
+    yielded as a failure and the batch carries on.
+
+    Args:
+        transaction_ids: Transactions to render (all matching the filters when None)
+        db_path: CRM database
+        status, offer_from, offer_to: Filters (see CRPACRMSystem.get_transactions_data)
+        workers: Rendering processes (default: CPU count; 1 renders in this process)
+
+    Returns:
+        Iterator of dicts in completion order:
+        {'transaction_id', 'success', 'filename', 'pdf_bytes', 'error'}
+    """
+    if transaction_ids is not None:
+        transaction_ids = list(transaction_ids)
+    system = CRPACRMSystem(db_path or CRM_DB_PATH)
+    # Queried before the first item is asked for, so database errors surface here
+    rows = system.get_transactions_data(transaction_ids, status, offer_from, offer_to)
+    missing = []
+    if transaction_ids is not None:
+        found = {str(row['transaction_id']) for row in rows}
+        missing = [transaction_id for transaction_id in dict.fromkeys(transaction_ids)
+                   if str(transaction_id) not in found]
+    return _render_rows(system, rows, missing, workers)
+
+def _render_rows(system: CRPACRMSystem, rows: List[Dict[str, Any]], missing: List[Any],
+                 workers: Optional[int]) -> Iterator[Dict[str, Any]]:
+    for transaction_id in missing:
+        yield _failure(transaction_id, f'Transaction {transaction_id} not found')
+
+    workers = min(len(rows), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        for row in rows:
+            try:
+                item = _rendered(row, system.render_form_data(row))
+            except Exception as e:
+                item = _failure(row['transaction_id'], f'{type(e).__name__}: {e}')
+            yield item
+        return
+
+    from form_job_queue import _pool_context
+
+    pending = iter(rows)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                             initializer=_init_batch_worker, initargs=(system.db_path,)) as pool:
+        in_flight = {}
+        for row in pending:
+            in_flight[pool.submit(_render_item, row)] = row
+            if len(in_flight) >= workers * IN_FLIGHT_PER_WORKER:
+                break
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                row = in_flight.pop(future)
+                try:
+                    item = _rendered(row, future.result())
+                except Exception as e:
+                    item = _failure(row['transaction_id'], f'{type(e).__name__}: {e}')
+                yield item
+                next_row = next(pending, None)
+                if next_row is not None:
+                    try:
+                        in_flight[pool.submit(_render_item, next_row)] = next_row
+                    except BrokenProcessPool as e:
+                        yield _failure(next_row['transaction_id'], f'BrokenProcessPool: {e}')
+    # Left over only when a worker process died and took the pool with it
+    for row in pending:
+        yield _failure(row['transaction_id'], 'Not rendered: the worker pool stopped')
+
+def _rendered(row: Dict[str, Any], pdf_bytes: bytes) -> Dict[str, Any]:
+    return {'transaction_id': row['transaction_id'], 'success': True,
+            'filename': form_filename(row['transaction_id']), 'pdf_bytes': pdf_bytes, 'error': None}
+
+def _failure(transaction_id: Any, error: str) -> Dict[str, Any]:
+    return {'transaction_id': transaction_id, 'success': False, 'filename': None, 'pdf_bytes': None,
+            'error': error}
+
+# ============================================================================
+# STREAMED ZIP
+# ============================================================================
+
+class _ZipChunks:
+    """Write-only sink for ZipFile: collects what was written since the last take()"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_batch_zip(items: Iterable[Dict[str, Any]], summary: Optional[Dict[str, Any]] = None,
+                     progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[bytes]:
+    """
+    ZIP archive of rendered forms, yielded piece by piece as each document
+    is added; nothing but the document being written is kept in memory.
+
+    The archive ends with batch_report.json listing every transaction with
+    its file or error, since failures can no longer go in a response status
+    once streaming has begun.
+
+    Args:
+        items: Outcomes from render_batch
+        summary: Filled in with the batch totals once the archive is complete
+        progress: Called with each item's report entry
+
+    Yields:
+        bytes: Consecutive pieces of the ZIP file
+    """
+    start = time.perf_counter()
+    report = []
+    sink = _ZipChunks()
+    # PDFs are stored as is: their streams are compressed already, and deflating
+    # them again here would take longer than rendering them in the workers
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for item in items:
+            if item['success']:
+                archive.writestr(item['filename'], item['pdf_bytes'])
+            entry = {key: item[key] for key in ('transaction_id', 'success', 'filename', 'error')}
+            entry['bytes'] = len(item['pdf_bytes']) if item['success'] else 0
+            report.append(entry)
+            if progress:
+                progress(entry)
+            yield sink.take()
+
+        failures = [entry for entry in report if not entry['success']]
+        totals = {
+            'success': not failures,
+            'total': len(report),
+            'rendered': len(report) - len(failures),
+            'failed': len(failures),
+            'failures': failures,
+            'seconds': round(time.perf_counter() - start, 3),
+            'generated_at': datetime.now().isoformat()
+        }
+        totals['message'] = (f"Rendered {totals['rendered']} of {totals['total']} forms"
+                             + (f" ({totals['failed']} failed)" if failures else ''))
+        archive.writestr(REPORT_NAME, json.dumps(dict(totals, forms=report), indent=2, default=str),
+                         compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.take()
+
+    if summary is not None:
+        summary.update(totals)
+
+def write_batch_zip(output_path: str, transaction_ids: Optional[Iterable[Any]] = None,
+                    db_path: Optional[str] = None, status=None, offer_from: Optional[str] = None,
+                    offer_to: Optional[str] = None, workers: Optional[int] = None,
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Render a batch into a ZIP file.
+
+    Returns:
+        dict: {'success', 'total', 'rendered', 'failed', 'failures', 'seconds', 'output_path', 'message'}
+    """
+    summary: Dict[str, Any] = {}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        items = render_batch(transaction_ids, db_path, status, offer_from, offer_to, workers)
+        with open(output_path, 'wb') as output_file:
+            for chunk in stream_batch_zip(items, summary, progress):
+                output_file.write(chunk)
+    except (OSError, sqlite3.Error) as e:
+        return {'success': False, 'total': summary.get('total', 0), 'rendered': summary.get('rendered', 0),
+                'failed': summary.get('failed', 0), 'failures': summary.get('failures', []), 'seconds': 0,
+                'output_path': None, 'message': f'Batch failed: {e}'}
+    summary['output_path'] = output_path
+    return summary
+
+def benchmark_batch(transaction_ids: List[Any], db_path: Optional[str] = None,
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Time rendering forms one transaction at a time (a query and render per
+    form, as one API call per transaction does) against the batch path.
+
+    Returns:
+        dict: {'forms', 'one_by_one_seconds', 'batch_seconds', 'zip_bytes'}
+    """
+    system = CRPACRMSystem(db_path or CRM_DB_PATH)
+    system.render_crpa_form(transaction_ids[0])  # template and font loaded before timing
+    start = time.perf_counter()
+    for transaction_id in transaction_ids:
+        system.render_crpa_form(transaction_id)
+    one_by_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    zip_bytes = sum(len(chunk) for chunk in
+                    stream_batch_zip(render_batch(transaction_ids, system.db_path, workers=workers)))
+    batch = time.perf_counter() - start
+    return {'forms': len(transaction_ids), 'one_by_one_seconds': round(one_by_one, 3),
+            'batch_seconds': round(batch, 3), 'zip_bytes': zip_bytes}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate CRPA forms for many transactions as one ZIP')
+    parser.add_argument('ids', nargs='*', help='Transaction ids (default: every transaction matching the filters)')
+    parser.add_argument('--db-path', default=CRM_DB_PATH, help='CRM database')
+    parser.add_argument('--status', action='append', help='Transaction status (repeatable)')
+    parser.add_argument('--offer-from', help='Earliest offer date (YYYY-MM-DD)')
+    parser.add_argument('--offer-to', help='Latest offer date (YYYY-MM-DD)')
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'output', 'CRPA_batch.zip'), help='ZIP file')
+    parser.add_argument('--workers', type=int, default=None, help='Rendering processes')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare one-by-one rendering with the batch for the selected transactions')
+    args = parser.parse_args()
+
+    print("📦 CRPA Batch Generation")
+    print("=" * 50)
+    if args.benchmark:
+        ids = args.ids or [row['transaction_id'] for row in CRPACRMSystem(args.db_path).get_transactions_data(
+            status=args.status, offer_from=args.offer_from, offer_to=args.offer_to)]
+        timing = benchmark_batch(ids, args.db_path, args.workers)
+        print(f"  {timing['forms']} forms")
+        print(f"  One by one: {timing['one_by_one_seconds']}s")
+        print(f"  Batch: {timing['batch_seconds']}s ({timing['zip_bytes']:,} byte ZIP)")
+    else:
+        result = write_batch_zip(args.output, args.ids or None, args.db_path, args.status,
+                                 args.offer_from, args.offer_to, args.workers,
+                                 progress=lambda entry: print(f"  {'✅' if entry['success'] else '❌'} "
+                                                              f"{entry['filename'] or entry['transaction_id']}"
+                                                              f"{'' if entry['success'] else ': ' + entry['error']}"))
+        print(f"{'✅' if result['success'] else '⚠️ '} {result['message']}")
+        if result['output_path']:
+            print(f"  {result['output_path']} ({result['seconds']}s)")
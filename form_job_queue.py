@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Form Job Queue
+Form generation off the request path: jobs persisted in SQLite, rendered by a
+pool of warm worker processes, and polled or awaited by job id
+"""
+
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Queue database (one per deployment: every web worker submits to and claims from it)
+JOB_DB_PATH = os.environ.get('FORM_JOB_DB', os.path.join(ROOT_DIR, 'form_jobs.db'))
+OUTPUT_DIR = os.path.join(ROOT_DIR, 'output')
+MAPPING_CONFIG_PATH = os.path.join(ROOT_DIR, 'crm_field_mapping_config.json')
+
+POLL_INTERVAL = 0.5     # seconds between checks for jobs submitted by other processes
+STATS_WINDOW = 200      # finished jobs used for the latency figures
+SWEEP_INTERVAL = 30.0   # seconds between checks for jobs left running by a dead or stuck process
+JOB_TIMEOUT = float(os.environ.get('FORM_JOB_TIMEOUT', 300))  # seconds a job may stay running
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS form_jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    render_seconds REAL,
+    owner_pid INTEGER,
+    worker_pid INTEGER,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_form_jobs_status ON form_jobs(status, submitted_at);
+'''
+
+# ============================================================================
+# WORKER PROCESSES
+# ============================================================================
+
+_worker_state: Dict[str, Any] = {}
+
+def _pool_context():
+    # fork hands the workers the parent's loaded modules and preloaded
+    # templates, and does not re-run the app's module-level startup
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+
+def _init_worker():
+    """Pool initializer: templates, fonts and the population engine loaded once per worker"""
+    from form_template_registry import get_template_registry
+    from form_population_engine import FormPopulationEngine
+
+    _worker_state['preload'] = get_template_registry().preload()
+    _worker_state['engine'] = FormPopulationEngine(MAPPING_CONFIG_PATH)
+    _worker_state['crpa'] = {}
+
+def _warm() -> int:
+    return os.getpid()
+
+def _render_crpa(params: Dict[str, Any], output_dir: str) -> Dict[str, Any]:
+    from crpa_crm_system import CRPACRMSystem
+
+    db_path = params.get('db_path') or os.path.join(ROOT_DIR, 'real_estate_crm.db')
+    system = _worker_state['crpa'].get(db_path)
+    if system is None:
+        system = _worker_state['crpa'][db_path] = CRPACRMSystem(db_path)
+
+    transaction_id = params['transaction_id']
+    pdf_bytes = system.render_crpa_form(transaction_id)
+    output_filename = f'CRPA_Transaction_{transaction_id}.pdf'
+    output_path = os.path.join(output_dir, output_filename)
+    with open(output_path, 'wb') as output_file:
+        output_file.write(pdf_bytes)
+    return {
+        'message': f'CRPA form created for transaction {transaction_id}',
+        'output_path': output_path,
+        'output_filename': output_filename,
+        'pdf_url': f'/download/{output_filename}',
+        'file_size': len(pdf_bytes)
+    }
+
+def _render_populate(params: Dict[str, Any], output_dir: str) -> Dict[str, Any]:
+    result = _worker_state['engine'].populate_form(
+        form_name=params['form_id'],
+        client_id=params.get('client_id'),
+        property_id=params.get('property_id'),
+        transaction_id=params.get('transaction_id'),
+        output_dir=output_dir
+    )
+    result['pdf_url'] = f"/api/forms/download/{params['form_id']}/{result['output_filename']}"
+    return result
+
+# Job kinds: callables run in a worker process with (params, output_dir)
+RENDERERS: Dict[str, Callable[[Dict[str, Any], str], Dict[str, Any]]] = {
+    'crpa': _render_crpa,
+    'populate': _render_populate,
+}
+
+def _run_job(kind: str, params: Dict[str, Any], output_dir: str) -> Dict[str, Any]:
+    """Pool worker: render one job and report how long the render itself took"""
+    if 'engine' not in _worker_state:
+        _init_worker()
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    result = RENDERERS[kind](params, output_dir)
+    return {'result': result, 'render_seconds': time.perf_counter() - start, 'worker_pid': os.getpid()}
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# ============================================================================
+# QUEUE
+# ============================================================================
+
+class FormJobQueue:
+    """
+    Persistent form-generation queue served by a process pool.
+
+    submit() only inserts a row and returns its job id, so a web request
+    no longer waits for the render. A dispatcher thread claims queued jobs
+    (BEGIN IMMEDIATE, so each job goes to exactly one process when several
+    web workers share the database) up to the number of idle pool workers
+    and records the outcome when the worker returns. Pool workers load
+    the form templates, fonts and field mappings once at start-up.
+
+    Jobs survive restarts: anything still marked running by a process that
+    no longer exists is queued again, on start() and then every
+    sweep_interval by the dispatcher, so the jobs of a web worker that died
+    are picked up by its siblings. A job running for longer than
+    job_timeout is failed rather than left running forever.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_workers: Optional[int] = None,
+                 output_dir: Optional[str] = None, poll_interval: float = POLL_INTERVAL,
+                 sweep_interval: float = SWEEP_INTERVAL, job_timeout: float = JOB_TIMEOUT):
+        self.db_path = db_path or JOB_DB_PATH
+        self.max_workers = max_workers or int(os.environ.get('FORM_JOB_WORKERS', 0)) or \
+            max(1, (os.cpu_count() or 2) // 2)
+        self.output_dir = output_dir or OUTPUT_DIR
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self.job_timeout = job_timeout
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._changed = threading.Condition()
+        self._running: Dict[str, float] = {}
+        self._busy_seconds = 0.0
+        self._started_at: Optional[float] = None
+
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Connection committed on success and always closed"""
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @property
+    def started(self) -> bool:
+        return self._dispatcher is not None and self._dispatcher.is_alive()
+
+    def start(self) -> Dict[str, Any]:
+        """
+        Requeue orphaned jobs, start the warm worker pool and the dispatcher.
+
+        Returns:
+            dict: {'success': bool, 'workers': int, 'requeued': int, 'message': str}
+        """
+        if self.started:
+            return {'success': True, 'workers': self.max_workers, 'requeued': 0,
+                    'message': 'Form job queue already running'}
+
+        requeued = self.requeue_orphaned()
+        self._stopping.clear()
+        self._start_pool()
+        self._started_at = time.time()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='form-job-dispatcher', daemon=True)
+        self._dispatcher.start()
+        return {
+            'success': True,
+            'workers': self.max_workers,
+            'requeued': requeued,
+            'message': f'Form job queue started with {self.max_workers} workers'
+                       + (f' ({requeued} interrupted jobs requeued)' if requeued else '')
+        }
+
+    def _start_pool(self) -> None:
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_pool_context(),
+                                         initializer=_init_worker)
+        # Start the workers now so the first jobs do not pay for template loading
+        for future in [self._pool.submit(_warm) for _ in range(self.max_workers)]:
+            future.result()
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop dispatching; with wait, let running renders finish first"""
+        self._stopping.set()
+        with self._changed:
+            self._changed.notify_all()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+            self._dispatcher = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    def requeue_orphaned(self) -> int:
+        """
+        Put jobs left running by a process that is gone back in the queue,
+        along with this process's running jobs that this queue is not
+        rendering (claimed by an earlier queue here that was stopped).
+        """
+        with self._connection() as conn:
+            rows = conn.execute("SELECT id, owner_pid FROM form_jobs WHERE status = 'running'").fetchall()
+            alive = {pid: pid != os.getpid() and _pid_alive(pid) for pid in {row['owner_pid'] for row in rows}}
+            orphaned = [row['id'] for row in rows if not alive[row['owner_pid']]
+                        and not (row['owner_pid'] == os.getpid() and row['id'] in self._running)]
+            if not orphaned:
+                return 0
+            conn.executemany("UPDATE form_jobs SET status = 'queued', started_at = NULL, owner_pid = NULL "
+                             "WHERE id = ? AND status = 'running'", [(job_id,) for job_id in orphaned])
+            return len(orphaned)
+
+    def fail_timed_out(self) -> int:
+        """
+        Fail jobs running for longer than job_timeout, whichever process
+        claimed them: a render that hangs or a worker that never reports
+        back would otherwise keep them running forever.
+        """
+        now = time.time()
+        with self._connection() as conn:
+            timed_out = [row['id'] for row in conn.execute(
+                "SELECT id FROM form_jobs WHERE status = 'running' AND started_at < ?", (now - self.job_timeout,))]
+            conn.executemany("UPDATE form_jobs SET status = 'failed', finished_at = ?, error = ? "
+                             "WHERE id = ? AND status = 'running'",
+                             [(now, f'Timed out after {self.job_timeout:g}s', job_id) for job_id in timed_out])
+        for job_id in timed_out:
+            started = self._running.pop(job_id, None)  # its late result is discarded by _finish
+            if started is not None:
+                self._busy_seconds += now - started
+        return len(timed_out)
+
+    # ------------------------------------------------------------------
+    # Submitting and reading jobs
+    # ------------------------------------------------------------------
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a form for generation.
+
+        Args:
+            kind: Job kind (see RENDERERS): 'crpa' ({'transaction_id', 'db_path'}) or
+                'populate' ({'form_id', 'client_id', 'property_id', 'transaction_id'})
+            params: JSON-serializable job parameters
+
+        Returns:
+            dict: {'success': bool, 'job_id': str, 'status': str, 'queue_depth': int, 'message': str}
+        """
+        if kind not in RENDERERS:
+            return {'success': False, 'job_id': None, 'status': None, 'queue_depth': None,
+                    'message': f'Unknown form job kind: {kind}'}
+
+        job_id = uuid.uuid4().hex
+        with self._connection() as conn:
+            conn.execute('INSERT INTO form_jobs (id, kind, params, submitted_at) VALUES (?, ?, ?, ?)',
+                         (job_id, kind, json.dumps(params, default=str), time.time()))
+            depth = conn.execute("SELECT COUNT(*) FROM form_jobs WHERE status = 'queued'").fetchone()[0]
+        with self._changed:
+            self._changed.notify_all()
+        return {'success': True, 'job_id': job_id, 'status': 'queued', 'queue_depth': depth,
+                'message': f'Form job {job_id} queued ({depth} waiting)'}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status and, once finished, its result or error (None for an unknown id)"""
+        with self._connection() as conn:
+            row = conn.execute('SELECT * FROM form_jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._job_dict(row) if row else None
+
+    def wait(self, job_id: str, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        """
+        The job once it is done or failed, or as it stands after timeout.
+
+        Completions in this process wake the wait at once; jobs rendered by
+        another web worker are seen on the next poll of the database.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in ('done', 'failed') or remaining <= 0:
+                return job
+            with self._changed:
+                self._changed.wait(min(remaining, self.poll_interval))
+
+    @staticmethod
+    def _job_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'params': json.loads(row['params']),
+            'submitted_at': datetime.fromtimestamp(row['submitted_at']).isoformat(),
+            'started_at': datetime.fromtimestamp(row['started_at']).isoformat() if row['started_at'] else None,
+            'finished_at': datetime.fromtimestamp(row['finished_at']).isoformat() if row['finished_at'] else None,
+            'wait_seconds': round(row['started_at'] - row['submitted_at'], 3) if row['started_at'] else None,
+            'render_seconds': round(row['render_seconds'], 3) if row['render_seconds'] is not None else None,
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error']
+        }
+        return job
+
+    # ------------------------------------------------------------------
+    # Dispatching
+    # ------------------------------------------------------------------
+
+    def _claim(self, limit: int) -> List[sqlite3.Row]:
+        """Mark up to limit queued jobs as running in this process, oldest first"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute("SELECT id, kind, params FROM form_jobs WHERE status = 'queued' "
+                                "ORDER BY submitted_at LIMIT ?", (limit,)).fetchall()
+            if rows:
+                conn.executemany("UPDATE form_jobs SET status = 'running', started_at = ?, owner_pid = ? "
+                                 "WHERE id = ?", [(time.time(), os.getpid(), row['id']) for row in rows])
+            conn.commit()
+            return rows
+        finally:
+            conn.close()
+
+    def _sweep(self) -> None:
+        requeued, timed_out = self.requeue_orphaned(), self.fail_timed_out()
+        if requeued or timed_out:
+            print(f"🔁 Form jobs: {requeued} orphaned jobs requeued, {timed_out} timed out")
+
+    def _dispatch_loop(self) -> None:
+        next_sweep = time.monotonic() + self.sweep_interval
+        while not self._stopping.is_set():
+            if time.monotonic() >= next_sweep:
+                try:
+                    self._sweep()
+                except sqlite3.Error as e:
+                    print(f"⚠️  Form job sweep failed: {e}")
+                next_sweep = time.monotonic() + self.sweep_interval
+            idle = self.max_workers - len(self._running)
+            claimed = self._claim(idle) if idle > 0 else []
+            for row in claimed:
+                self._running[row['id']] = time.time()
+                args = (_run_job, row['kind'], json.loads(row['params']), self.output_dir)
+                try:
+                    future = self._pool.submit(*args)
+                except BrokenProcessPool:
+                    # A worker died (its jobs fail with the same error): replace the pool
+                    self._pool.shutdown(wait=False)
+                    self._start_pool()
+                    future = self._pool.submit(*args)
+                future.add_done_callback(lambda future, job_id=row['id']: self._finish(job_id, future))
+            if not claimed:
+                with self._changed:
+                    self._changed.wait(self.poll_interval)
+
+    def _finish(self, job_id: str, future) -> None:
+        started = self._running.pop(job_id, None)
+        if started is not None:
+            self._busy_seconds += time.time() - started
+        if future.cancelled():
+            return  # stopped before it ran: left running and requeued on the next start
+
+        try:
+            outcome = future.result()
+            values = ('done', outcome['render_seconds'], outcome['worker_pid'],
+                      json.dumps(outcome['result'], default=str), None)
+        except Exception as e:
+            values = ('failed', None, None, None, f'{type(e).__name__}: {e}')
+
+        # Only while still ours: a job that timed out or was requeued keeps its new state
+        with self._connection() as conn:
+            conn.execute('UPDATE form_jobs SET status = ?, finished_at = ?, render_seconds = ?, worker_pid = ?, '
+                         "result = ?, error = ? WHERE id = ? AND status = 'running' AND owner_pid = ?",
+                         (values[0], time.time()) + values[1:] + (job_id, os.getpid()))
+        with self._changed:
+            self._changed.notify_all()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queue depth, job latency and worker utilisation.
+
+        Counts and latency cover the whole queue database; utilisation is
+        this process's pool: busy workers now and the share of worker time
+        spent rendering since start().
+
+        Returns:
+            dict: {'success', 'queue_depth', 'jobs', 'latency', 'workers', 'message'}
+        """
+        with self._connection() as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM form_jobs GROUP BY status').fetchall())
+            recent = conn.execute("SELECT started_at - submitted_at, finished_at - submitted_at, render_seconds "
+                                  "FROM form_jobs WHERE status = 'done' ORDER BY finished_at DESC LIMIT ?",
+                                  (STATS_WINDOW,)).fetchall()
+
+        def summary(values):
+            values = sorted(value for value in values if value is not None)
+            if not values:
+                return {'avg': None, 'p50': None, 'p95': None}
+            return {'avg': round(sum(values) / len(values), 3),
+                    'p50': round(values[len(values) // 2], 3),
+                    'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 3)}
+
+        now = time.time()
+        busy = len(self._running)
+        busy_seconds = self._busy_seconds + sum(now - started for started in self._running.values())
+        uptime = now - self._started_at if self._started_at else 0
+        depth = counts.get('queued', 0)
+        return {
+            'success': True,
+            'queue_depth': depth,
+            'jobs': {status: counts.get(status, 0) for status in ('queued', 'running', 'done', 'failed')},
+            'latency': {
+                'sample': len(recent),
+                'wait_seconds': summary(row[0] for row in recent),
+                'total_seconds': summary(row[1] for row in recent),
+                'render_seconds': summary(row[2] for row in recent)
+            },
+            'workers': {
+                'running': self.started,
+                'size': self.max_workers,
+                'busy': busy,
+                'utilisation': round(busy_seconds / (uptime * self.max_workers), 3) if uptime else 0.0
+            },
+            'message': f'{depth} queued, {busy}/{self.max_workers} workers busy'
+        }
+
+_queue: Optional[FormJobQueue] = None
+_queue_lock = threading.Lock()
+
+def get_form_job_queue(start: bool = True) -> FormJobQueue:
+    """
+    Process-wide queue over JOB_DB_PATH.
+
+    Args:
+        start: Start the worker pool and dispatcher if they are not running
+            (reading job status and stats does not need them)
+    """
+    global _queue
+    if _queue is None or (start and not _queue.started):
+        with _queue_lock:
+            if _queue is None:
+                _queue = FormJobQueue()
+            if start and not _queue.started:
+                result = _queue.start()
+                print(f"✅ {result['message']}")
+    return _queue
+
+def benchmark_form_jobs(transaction_ids: List[Any], db_path: Optional[str] = None,
+                        workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Time rendering CRPA forms inline (one after another, as the request
+    handler did) against submitting them to the queue and waiting for all.
+
+    Returns:
+        dict: {'forms', 'workers', 'inline_seconds', 'queued_seconds', 'submit_ms', 'stats'}
+    """
+    import tempfile
+    from crpa_crm_system import CRPACRMSystem
+
+    system = CRPACRMSystem(db_path) if db_path else CRPACRMSystem()
+    system.render_crpa_form(transaction_ids[0])  # template and font loaded before timing
+    start = time.perf_counter()
+    for transaction_id in transaction_ids:
+        system.render_crpa_form(transaction_id)
+    inline = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as root:
+        queue = FormJobQueue(os.path.join(root, 'jobs.db'), workers, os.path.join(root, 'output'))
+        queue.start()
+        try:
+            start = time.perf_counter()
+            job_ids = [queue.submit('crpa', {'transaction_id': transaction_id, 'db_path': system.db_path})['job_id']
+                       for transaction_id in transaction_ids]
+            submit = time.perf_counter() - start
+            for job_id in job_ids:
+                queue.wait(job_id, timeout=300)
+            queued = time.perf_counter() - start
+            stats = queue.stats()
+        finally:
+            queue.stop()
+
+    return {
+        'forms': len(transaction_ids),
+        'workers': stats['workers']['size'],
+        'inline_seconds': round(inline, 3),
+        'queued_seconds': round(queued, 3),
+        'submit_ms': round(submit * 1000 / len(transaction_ids), 3),
+        'stats': stats
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Form generation job queue (shows its status by default)')
+    parser.add_argument('--db-path', default=JOB_DB_PATH, help='Queue database')
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help='Render N CRPA forms inline and through the queue')
+    parser.add_argument('--transaction-id', default='1', help='Transaction rendered by the benchmark')
+    parser.add_argument('--crm-db', default=os.path.join(ROOT_DIR, 'real_estate_crm.db'), help='CRM database')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes')
+    args = parser.parse_args()
+
+    print("📨 Form Job Queue")
+    print("=" * 50)
+    if args.benchmark:
+        timing = benchmark_form_jobs([args.transaction_id] * args.benchmark, args.crm_db, args.workers)
+        latency = timing['stats']['latency']
+        print(f"  {timing['forms']} forms, {timing['workers']} workers")
+        print(f"  Inline: {timing['inline_seconds']}s ({timing['forms'] / timing['inline_seconds']:.1f} forms/sec)")
+        print(f"  Queued: {timing['queued_seconds']}s ({timing['forms'] / timing['queued_seconds']:.1f} forms/sec), "
+              f"{timing['submit_ms']} ms per submit")
+        print(f"  Render p50 {latency['render_seconds']['p50']}s, wait p95 {latency['wait_seconds']['p95']}s")
+    else:
+        stats = FormJobQueue(args.db_path).stats()
+        print(f"  {stats['message']}")
+        for status, count in stats['jobs'].items():
+            print(f"  {status}: {count}")
+        total = stats['latency']['total_seconds']
+        if total['avg'] is not None:
+            print(f"  Latency over {stats['latency']['sample']} jobs: avg {total['avg']}s, p95 {total['p95']}s")
@@ -217,44 +217,17 @@ class FormPopulationEngine:
             logger.warning(f"⚠️ Validation error for rule {validation_rule}: {e}")
             return False, f"Validation error: {e}"
     
+    def render_populated_pdf(self, template_path: str, field_data: Dict[str, Any], form_name: str) -> bytes:
+        """Render a populated PDF in memory using coordinate-based filling"""
+        return self.form_filler.render_form(form_name, field_data, template_path)
+    
     def create_populated_pdf(self, template_path: str, field_data: Dict[str, Any], output_path: str, form_name: str) -> bool:
         """Create a populated PDF from template and field data using coordinate-based filling"""
         try:
-            # Use the coordinate-based form filler for professional PDF generation
-            result = self.form_filler.fill_form(
-                form_name=form_name,
-                field_data=field_data,
-                template_path=template_path,
-                output_path=output_path
-            )
-            
-            if result:
-                logger.info(f"✅ Successfully created populated PDF: {output_path}")
-                return True
-            else:
-                logger.error(f"❌ Failed to create populated PDF")
-                return False
-            width, height = letter
-            
-            # Title
-            c.setFont("Helvetica-Bold", 16)
-            c.drawString(50, height - 50, "California Residential Purchase Agreement")
-            
-            # Populate fields
-            y_position = height - 100
-            c.setFont("Helvetica", 12)
-            
-            for field_name, value in field_data.items():
-                if value and str(value).strip():
-                    c.drawString(50, y_position, f"{field_name}: {value}")
-                    y_position -= 20
-                    
-                    if y_position < 50:  # Start new page
-                        c.showPage()
-                        y_position = height - 50
-            
-            c.save()
-            logger.info(f"✅ Created populated PDF: {output_path}")
+            pdf_bytes = self.render_populated_pdf(template_path, field_data, form_name)
+            with open(output_path, 'wb') as output_file:
+                output_file.write(pdf_bytes)
+            logger.info(f"✅ Successfully created populated PDF: {output_path}")
             return True
             
         except Exception as e:
@@ -262,8 +235,15 @@ class FormPopulationEngine:
             return False
     
     def populate_form(self, form_name: str, client_id: str, property_id: str, 
-                     transaction_id: str = None, output_dir: str = 'output') -> Dict[str, Any]:
-        """Main method to populate a form with CRM data"""
+                     transaction_id: str = None, output_dir: str = 'output',
+                     persist: bool = True, include_pdf: bool = False) -> Dict[str, Any]:
+        """
+        Main method to populate a form with CRM data
+        
+        The PDF is built in memory. persist=False skips writing it to
+        output_dir; include_pdf=True returns its bytes as 'pdf_bytes' so the
+        caller can stream it straight to the client.
+        """
         
         logger.info(f"🚀 Starting form population: {form_name}")
         
@@ -302,23 +282,33 @@ class FormPopulationEngine:
             # Store the field data
             field_data[field_name] = raw_value
         
-        # Create output directory
-        Path(output_dir).mkdir(exist_ok=True)
-        
         # Generate output filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         output_filename = f"{form_name}_{client_id}_{property_id}_{timestamp}.pdf"
         output_path = Path(output_dir) / output_filename
         
-        # Create populated PDF
+        # Create populated PDF in memory
         template_path = f"documents/{form_name}_BLANK_TEMPLATE.pdf"
-        pdf_created = self.create_populated_pdf(str(template_path), field_data, str(output_path))
+        try:
+            pdf_bytes = self.render_populated_pdf(template_path, field_data, form_name)
+        except Exception as e:
+            logger.error(f"❌ Error creating PDF: {e}")
+            pdf_bytes = None
+        pdf_created = pdf_bytes is not None
+        
+        # Persist only when asked to
+        if pdf_created and persist:
+            Path(output_dir).mkdir(exist_ok=True)
+            with open(output_path, 'wb') as output_file:
+                output_file.write(pdf_bytes)
         
         # Prepare result
         result = {
             'success': pdf_created and len(validation_errors) == 0,
             'form_name': form_name,
-            'output_path': str(output_path) if pdf_created else None,
+            'output_path': str(output_path) if pdf_created and persist else None,
+            'output_filename': output_filename,
+            'file_size': len(pdf_bytes) if pdf_created else 0,
             'field_count': len(field_data),
             'populated_fields': {k: v for k, v in field_data.items() if v},
             'validation_errors': validation_errors,
@@ -327,6 +317,8 @@ class FormPopulationEngine:
             'property_id': property_id,
             'transaction_id': transaction_id
         }
+        if include_pdf:
+            result['pdf_bytes'] = pdf_bytes
         
         logger.info(f"✅ Form population completed: {result['success']}")
         logger.info(f"📊 Fields populated: {len(result['populated_fields'])}/{len(field_data)}")
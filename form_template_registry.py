@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Form Template Registry
+Clean PDF templates loaded into memory once per process, verified by content
+hash, and opened per request as in-memory copies
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import fitz  # pymupdf
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Clean California Residential Purchase Agreement (blue text removed)
+CRPA_CLEAN_TEMPLATE = 'crpa_clean'
+CRPA_CLEAN_TEMPLATE_PATH = os.path.join(ROOT_DIR, 'output', 'CRPA_CLEAN_TEMPLATE.pdf')
+CRPA_SOURCE_TEMPLATE_PATH = os.path.join(ROOT_DIR, 'documents',
+                                         'California_Residential_Purchase_Agreement_CLEAN_TEMPLATE.pdf')
+# The clean template is built per checkout and each build gets a new PDF
+# document ID, so its own bytes cannot be pinned; the agreement it is built
+# from is
+CRPA_SOURCE_SHA256 = 'cdb9856611ad343e6c31004dbd497edf7dbd16a46378814f8a63bd81859cfa91'
+
+def _build_crpa_clean_template(path: str) -> None:
+    """Create the clean CRPA template from the source agreement, refusing a changed source"""
+    from blue_text_remover import BlueTextRemover
+
+    with open(CRPA_SOURCE_TEMPLATE_PATH, 'rb') as handle:
+        digest = hashlib.sha256(handle.read()).hexdigest()
+    if digest != CRPA_SOURCE_SHA256:
+        raise ValueError(f'CRPA source agreement content hash mismatch: {digest} (expected {CRPA_SOURCE_SHA256})')
+
+    remover = BlueTextRemover()
+    remover.template_path = CRPA_SOURCE_TEMPLATE_PATH
+    remover.remove_colored_text(path)
+
+class FormTemplate:
+    """One template's PDF bytes, loaded and verified once"""
+
+    def __init__(self, name: str, path: str, data: bytes, page_count: int):
+        self.name = name
+        self.path = path
+        self.data = data
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.page_count = page_count
+        self.loaded_at = datetime.now().isoformat()
+
+    def open(self) -> fitz.Document:
+        """A new document over the in-memory bytes; changes to it never touch the template"""
+        return fitz.open(stream=self.data, filetype='pdf')
+
+    def info(self) -> Dict[str, Any]:
+        return {'name': self.name, 'path': self.path, 'bytes': len(self.data), 'sha256': self.sha256,
+                'pages': self.page_count, 'loaded_at': self.loaded_at}
+
+class TemplateRegistry:
+    """
+    Named PDF templates kept in memory for the life of the process.
+
+    A template is read from disk (built first if missing) the first time it
+    is used, parsed once to check it is a readable PDF and hashed; when an
+    expected sha256 is registered, other content is refused. After that,
+    open() costs a fitz.open over bytes already in memory: no disk access
+    and no re-validation on warm requests. reload() re-reads a template
+    that changed on disk.
+
+    Fonts for the inserted text are kept here too: a fitz.Font reused with
+    a TextWriter avoids re-loading the font on every insert_text call,
+    which costs more than the rest of a fill.
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, Dict[str, Any]] = {}
+        self._templates: Dict[str, FormTemplate] = {}
+        self._fonts: Dict[str, fitz.Font] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: str, build: Optional[Callable[[str], Any]] = None,
+                 sha256: Optional[str] = None) -> None:
+        """
+        Args:
+            name: Template name used by open()
+            path: PDF file
+            build: Called with the path to create the file when it does not exist
+            sha256: Expected content hash (any content accepted when omitted)
+        """
+        with self._lock:
+            self._specs[name] = {'path': path, 'build': build, 'sha256': sha256}
+            self._templates.pop(name, None)
+
+    def names(self):
+        return list(self._specs)
+
+    def _load(self, name: str) -> FormTemplate:
+        spec = self._specs.get(name)
+        if spec is None:
+            raise KeyError(f'Unknown form template: {name}')
+        path = spec['path']
+        if not os.path.exists(path) and spec['build']:
+            spec['build'](path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'Form template not found: {path}')
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        with fitz.open(stream=data, filetype='pdf') as doc:
+            page_count = len(doc)
+        if not page_count:
+            raise ValueError(f'Form template {name} has no pages: {path}')
+        template = FormTemplate(name, path, data, page_count)
+        if spec['sha256'] and template.sha256 != spec['sha256']:
+            raise ValueError(f'Form template {name} content hash mismatch: {template.sha256} '
+                             f'(expected {spec["sha256"]})')
+        return template
+
+    def get(self, name: str) -> FormTemplate:
+        """The loaded template, reading it on first use"""
+        template = self._templates.get(name)
+        if template is not None:
+            return template
+        with self._lock:
+            if name not in self._templates:
+                self._templates[name] = self._load(name)
+            return self._templates[name]
+
+    def open(self, name: str) -> fitz.Document:
+        """Per-request in-memory copy of a template"""
+        return self.get(name).open()
+
+    def font(self, name: str = 'helv') -> fitz.Font:
+        """Loaded font by PyMuPDF font name (helv: Helvetica, insert_text's default)"""
+        font = self._fonts.get(name)
+        if font is None:
+            font = self._fonts.setdefault(name, fitz.Font(name))
+        return font
+
+    def reload(self, name: str) -> FormTemplate:
+        """Re-read a template from disk (kept as is when its content hash is unchanged)"""
+        with self._lock:
+            template = self._load(name)
+            current = self._templates.get(name)
+            if current is None or current.sha256 != template.sha256:
+                self._templates[name] = template
+            return self._templates[name]
+
+    def preload(self) -> Dict[str, Any]:
+        """
+        Load every registered template (at worker startup).
+
+        Returns:
+            dict: {'success': bool, 'templates': dict, 'errors': dict, 'message': str}
+        """
+        loaded, errors = {}, {}
+        for name in self.names():
+            try:
+                loaded[name] = self.get(name).info()
+            except (OSError, ValueError, RuntimeError) as e:
+                errors[name] = str(e)
+        self.font()
+        return {
+            'success': not errors,
+            'templates': loaded,
+            'errors': errors,
+            'message': (f'Loaded {len(loaded)} form templates'
+                        + (f' ({len(errors)} failed: {", ".join(errors)})' if errors else ''))
+        }
+
+_registry: Optional[TemplateRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_template_registry() -> TemplateRegistry:
+    """Process-wide registry with the CRM's form templates registered"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = TemplateRegistry()
+                registry.register(CRPA_CLEAN_TEMPLATE, CRPA_CLEAN_TEMPLATE_PATH, _build_crpa_clean_template)
+                _registry = registry
+    return _registry
+
+def benchmark_template_open(name: str = CRPA_CLEAN_TEMPLATE, iterations: int = 50) -> Dict[str, Any]:
+    """
+    Time opening a template from disk (fitz.open on the path, as before)
+    against an in-memory copy from the registry.
+
+    Returns:
+        dict: {'disk_ms': float, 'memory_ms': float, 'pages': int}
+    """
+    template = get_template_registry().get(name)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        os.path.exists(template.path)
+        fitz.open(template.path).close()
+    disk = (time.perf_counter() - start) / iterations
+    start = time.perf_counter()
+    for _ in range(iterations):
+        template.open().close()
+    memory = (time.perf_counter() - start) / iterations
+    return {'disk_ms': round(disk * 1000, 3), 'memory_ms': round(memory * 1000, 3), 'pages': template.page_count}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Form templates kept in memory')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Time N template opens from disk and memory')
+    args = parser.parse_args()
+
+    print("📄 Form Template Registry")
+    print("=" * 50)
+    registry = get_template_registry()
+    result = registry.preload()
+    for info in result['templates'].values():
+        print(f"  {info['name']}: {info['pages']} pages, {info['bytes']:,} bytes, sha256 {info['sha256'][:12]}")
+    for name, error in result['errors'].items():
+        print(f"  ❌ {name}: {error}")
+    if args.benchmark and not result['errors']:
+        timing = benchmark_template_open(iterations=args.benchmark)
+        print(f"  Open from disk {timing['disk_ms']} ms, in-memory copy {timing['memory_ms']} ms")
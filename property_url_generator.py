@@ -6,74 +6,263 @@ Automatically generates real estate portal URLs from property data
 
 import re
 import sqlite3
-from urllib.parse import quote
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Portal URL columns on the properties table
+URL_COLUMNS = ('zillow_url', 'realtor_url', 'mls_portal_url')
+
+# Rowid range covered by one chunk; each chunk is its own transaction, so
+# other connections can write between chunks
+DEFAULT_CHUNK_ROWS = 5000
+
+# Resume points of interrupted update_all_property_urls runs
+CHECKPOINT_TABLE = 'property_url_checkpoints'
+
+_SPECIAL_CHARACTERS = re.compile(r'[^\w\s-]')
+_WHITESPACE = re.compile(r'\s+')
+
+# (database, table) pairs whose URL columns were checked in this process
+_url_columns_checked = set()
 
 def clean_address_for_url(address, city, state, zip_code):
     """Clean and format address for URL generation"""
     # Combine full address
-    full_address = f"{address} {city} {state} {zip_code}"
-    
+    full_address = f"{address} {city} {state} {zip_code or ''}"
+
     # Clean and format for URL
-    cleaned = re.sub(r'[^\w\s-]', '', full_address)  # Remove special chars except hyphens
-    cleaned = re.sub(r'\s+', '-', cleaned.strip())   # Replace spaces with hyphens
-    cleaned = cleaned.lower()                         # Lowercase
-    
+    cleaned = _SPECIAL_CHARACTERS.sub('', full_address)  # Remove special chars except hyphens
+    cleaned = _WHITESPACE.sub('-', cleaned.strip())      # Replace spaces with hyphens
+    cleaned = cleaned.lower()                            # Lowercase
+
     return cleaned
 
 def generate_property_urls(street_address, city, state, zip_code, mls_number=None):
     """Generate URLs for major real estate portals"""
-    
+
     # Clean address for URL
     address_slug = clean_address_for_url(street_address, city, state, zip_code)
-    
+
     # Generate URLs
     urls = {
         'zillow_url': f"https://www.zillow.com/homes/{address_slug}",
-        'realtor_url': f"https://www.realtor.com/realestateandhomes-search/{city.replace(' ', '-').lower()}-{state.lower()}-{zip_code}",
+        'realtor_url': f"https://www.realtor.com/realestateandhomes-search/{city.replace(' ', '-').lower()}-{state.lower()}-{zip_code or ''}",
         'mls_portal_url': f"https://www.mlslistings.com/property/{mls_number}" if mls_number else None
     }
-    
+
     return urls
 
-def update_all_property_urls():
-    """Update all properties in database with generated URLs"""
-    conn = sqlite3.connect('real_estate_crm.db')
-    cursor = conn.cursor()
-    
-    # Get all properties
-    cursor.execute("""
-        SELECT id, street_address, city, state, zip_code, mls_number 
-        FROM properties 
-        WHERE zillow_url IS NULL OR realtor_url IS NULL
-    """)
-    
-    properties = cursor.fetchall()
-    updated_count = 0
-    
-    for prop in properties:
-        prop_id, street_address, city, state, zip_code, mls_number = prop
-        
-        if not street_address or not city or not state:
-            continue
-            
-        # Generate URLs
-        urls = generate_property_urls(street_address, city, state, zip_code, mls_number)
-        
-        # Update database
-        cursor.execute("""
-            UPDATE properties 
-            SET zillow_url = ?, realtor_url = ?, mls_portal_url = ?
-            WHERE id = ?
-        """, (urls['zillow_url'], urls['realtor_url'], urls['mls_portal_url'], prop_id))
-        
-        updated_count += 1
-        print(f"✅ Updated URLs for: {street_address}, {city}")
-    
+def property_url_values(street_address, city, state, zip_code, mls_number=None) -> Tuple[Optional[str], ...]:
+    """URL_COLUMNS values for an INSERT or UPDATE, all None when the address is incomplete"""
+    if not street_address or not city or not state:
+        return (None, None, None)
+    urls = generate_property_urls(street_address, city, state, zip_code, mls_number)
+    return tuple(urls[column] for column in URL_COLUMNS)
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+def street_column(conn: sqlite3.Connection, table: str = 'properties') -> Optional[str]:
+    """Street address column of either properties schema"""
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()}
+    for column in ('street_address', 'address_line1'):
+        if column in columns:
+            return column
+    return None
+
+def ensure_url_columns(conn: sqlite3.Connection, table: str = 'properties') -> bool:
+    """
+    Add missing URL_COLUMNS to a properties table. Safe to call repeatedly;
+    after the first check per database and table it returns immediately.
+
+    Returns:
+        bool: False when the table does not exist
+    """
+    database = conn.execute('PRAGMA database_list').fetchone()[2]
+    if database and (database, table) in _url_columns_checked:
+        return True
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()}
+    if not columns:
+        return False
+    for column in URL_COLUMNS:
+        if column not in columns:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} TEXT')
     conn.commit()
-    conn.close()
-    
-    print(f"🎯 Updated {updated_count} properties with real estate portal URLs")
-    return updated_count
+    if database:  # in-memory databases share an empty name; never cache them
+        _url_columns_checked.add((database, table))
+    return True
+
+def refresh_property_urls(conn: sqlite3.Connection, property_id: int, table: str = 'properties') -> None:
+    """Generate one property's URLs right after it is inserted or its address changed (caller commits)"""
+    if not ensure_url_columns(conn, table):
+        return
+    address_column = street_column(conn, table)
+    row = conn.execute(
+        f'SELECT {address_column}, city, state, zip_code, mls_number FROM {table} WHERE id = ?', (property_id,)
+    ).fetchone()
+    if row:
+        conn.execute(f'UPDATE {table} SET zillow_url = ?, realtor_url = ?, mls_portal_url = ? WHERE id = ?',
+                     (*property_url_values(*row), property_id))
+
+# ============================================================================
+# BATCH UPDATE
+# ============================================================================
+
+def iter_missing_url_chunks(conn: sqlite3.Connection, table: str = 'properties',
+                            chunk_rows: int = DEFAULT_CHUNK_ROWS, after_rowid: int = 0
+                            ) -> Iterator[Tuple[int, List[tuple]]]:
+    """
+    Yield (last rowid of the range, rows) for consecutive rowid ranges of
+    chunk_rows, where rows are (rowid, street, city, state, zip, mls number)
+    of the properties in the range still missing a URL. Each range is one
+    primary key range scan; nothing outside the current chunk is held.
+    """
+    address_column = street_column(conn, table)
+    highest = conn.execute(f'SELECT MAX(rowid) FROM {table}').fetchone()[0] or 0
+    query = f'''
+        SELECT rowid, {address_column}, city, state, zip_code, mls_number
+        FROM {table}
+        WHERE rowid > ? AND rowid <= ? AND (zillow_url IS NULL OR realtor_url IS NULL)
+    '''
+    for start in range(after_rowid, highest, chunk_rows):
+        stop = min(start + chunk_rows, highest)
+        yield stop, conn.execute(query, (start, stop)).fetchall()
+
+def url_updates(rows: List[tuple]) -> Iterator[tuple]:
+    """UPDATE parameters (zillow, realtor, mls portal, rowid) for rows with a complete address"""
+    for rowid, street_address, city, state, zip_code, mls_number in rows:
+        if street_address and city and state:
+            yield (*property_url_values(street_address, city, state, zip_code, mls_number), rowid)
+
+def _checkpoint(conn: sqlite3.Connection, table: str) -> int:
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+            table_name TEXT PRIMARY KEY, last_rowid INTEGER NOT NULL, updated INTEGER NOT NULL, updated_at TEXT
+        )
+    ''')
+    row = conn.execute(f'SELECT last_rowid FROM {CHECKPOINT_TABLE} WHERE table_name = ?', (table,)).fetchone()
+    return row[0] if row else 0
+
+def print_progress(report: Dict[str, Any]) -> None:
+    """Progress callback for update_all_property_urls"""
+    print(f"  ✅ {report['updated']} URLs through rowid {report['last_rowid']} "
+          f"({report['rows_per_second']:,.0f} rows/s)")
+
+def update_all_property_urls(db_path: str = 'real_estate_crm.db', table: str = 'properties',
+                             chunk_rows: int = DEFAULT_CHUNK_ROWS, resume: bool = True,
+                             progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Update all properties in database with generated URLs.
+
+    Streams the table in rowid ranges: each chunk's URLs are computed and
+    written with one executemany in its own short transaction, together
+    with a checkpoint of the last rowid done, so the database stays
+    writable between chunks and an interrupted run picks up where it
+    stopped. The checkpoint is cleared when the run completes.
+
+    Args:
+        db_path (str): CRM database
+        table (str): Properties table
+        chunk_rows (int): Rowid range per transaction
+        resume (bool): Continue from the last checkpoint instead of the first row
+        progress (callable): Called after each chunk with {'last_rowid', 'updated', 'seconds', 'rows_per_second'}
+
+    Returns:
+        dict: {'success': bool, 'updated': int, 'skipped': int, 'chunks': int, 'seconds': float,
+               'rows_per_second': float, 'resumed_from': int, 'message': str}
+    """
+    start = time.perf_counter()
+    updated = skipped = chunks = resumed_from = 0
+    conn = sqlite3.connect(db_path)
+    try:
+        if not ensure_url_columns(conn, table):
+            return {'success': False, 'updated': 0, 'skipped': 0, 'chunks': 0, 'seconds': 0.0,
+                    'rows_per_second': 0.0, 'resumed_from': 0, 'message': f'Table {table} does not exist'}
+        with conn:
+            resumed_from = _checkpoint(conn, table) if resume else 0
+
+        for last_rowid, rows in iter_missing_url_chunks(conn, table, chunk_rows, resumed_from):
+            updates = list(url_updates(rows))
+            with conn:  # one transaction per chunk: URLs and checkpoint commit together
+                conn.executemany(
+                    f'UPDATE {table} SET zillow_url = ?, realtor_url = ?, mls_portal_url = ? WHERE rowid = ?',
+                    updates)
+                conn.execute(f'INSERT OR REPLACE INTO {CHECKPOINT_TABLE} VALUES (?, ?, ?, ?)',
+                             (table, last_rowid, updated + len(updates), datetime.now().isoformat()))
+            updated += len(updates)
+            skipped += len(rows) - len(updates)
+            chunks += 1
+            if progress:
+                seconds = time.perf_counter() - start
+                progress({'last_rowid': last_rowid, 'updated': updated, 'seconds': seconds,
+                          'rows_per_second': updated / seconds if seconds else 0.0})
+
+        with conn:
+            conn.execute(f'DELETE FROM {CHECKPOINT_TABLE} WHERE table_name = ?', (table,))
+    except sqlite3.Error as e:
+        return {'success': False, 'updated': updated, 'skipped': skipped, 'chunks': chunks,
+                'seconds': round(time.perf_counter() - start, 3), 'rows_per_second': 0.0,
+                'resumed_from': resumed_from, 'message': f'Error updating property URLs: {str(e)}'}
+    finally:
+        conn.close()
+
+    seconds = time.perf_counter() - start
+    rate = updated / seconds if seconds else 0.0
+    return {
+        'success': True,
+        'updated': updated,
+        'skipped': skipped,
+        'chunks': chunks,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rate, 1),
+        'resumed_from': resumed_from,
+        'message': (f"Updated {updated} properties with real estate portal URLs "
+                    f"({skipped} without a full address, {rate:,.0f} rows/s)")
+    }
+
+def benchmark_url_update(rows: int = 100_000, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, Any]:
+    """
+    Time update_all_property_urls over a temporary database of synthetic
+    properties, against the former one-UPDATE-per-row loop on a copy.
+
+    Returns:
+        dict: {'rows': int, 'batch_seconds': float, 'per_row_seconds': float, 'rows_per_second': float}
+    """
+    import os
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(directory, 'crm.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('''CREATE TABLE properties (id INTEGER PRIMARY KEY, street_address TEXT, city TEXT,
+                        state TEXT, zip_code TEXT, mls_number TEXT)''')
+        conn.executemany('INSERT INTO properties VALUES (?, ?, ?, ?, ?, ?)',
+                         ((n + 1, f'{n} Main St #{n % 7}', 'Grass Valley', 'CA', '95945', str(225000000 + n))
+                          for n in range(rows)))
+        ensure_url_columns(conn)
+        conn.close()
+        copy_path = os.path.join(directory, 'copy.db')
+        shutil.copy(db_path, copy_path)
+
+        conn = sqlite3.connect(copy_path)
+        start = time.perf_counter()
+        for prop_id, *fields in conn.execute('SELECT id, street_address, city, state, zip_code, mls_number '
+                                             'FROM properties').fetchall():
+            conn.execute('UPDATE properties SET zillow_url = ?, realtor_url = ?, mls_portal_url = ? WHERE id = ?',
+                         (*property_url_values(*fields), prop_id))
+        conn.commit()
+        per_row_seconds = time.perf_counter() - start
+        conn.close()
+
+        result = update_all_property_urls(db_path, chunk_rows=chunk_rows)
+        return {'rows': rows, 'batch_seconds': result['seconds'], 'per_row_seconds': round(per_row_seconds, 3),
+                'rows_per_second': result['rows_per_second']}
+    finally:
+        shutil.rmtree(directory)
 
 def test_url_generation():
     """Test URL generation with sample data"""
@@ -82,7 +271,7 @@ def test_url_generation():
         ("456 Oak Ave", "Davis", "CA", "95616", "22412695"),
         ("789 Pine Dr", "Folsom", "CA", "95630", "22425097")
     ]
-    
+
     print("🧪 Testing URL generation:")
     for address, city, state, zip_code, mls in test_data:
         urls = generate_property_urls(address, city, state, zip_code, mls)
@@ -92,13 +281,29 @@ def test_url_generation():
         print(f"   MLS: {urls['mls_portal_url']}")
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate real estate portal URLs for CRM properties')
+    parser.add_argument('--db-path', default='real_estate_crm.db')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an interrupted run')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Time the batch update over N synthetic properties')
+    args = parser.parse_args()
+
     print("🏠 Property URL Generator")
     print("=" * 50)
-    
-    # Test first
-    test_url_generation()
-    
-    print("\n" + "=" * 50)
-    
-    # Update all properties
-    update_all_property_urls()
\ No newline at end of file
+
+    if args.benchmark:
+        result = benchmark_url_update(args.benchmark, args.chunk_rows)
+        print(f"  {result['rows']} properties: batch {result['batch_seconds']}s "
+              f"({result['rows_per_second']:,.0f} rows/s), per-row loop {result['per_row_seconds']}s")
+    else:
+        # Test first
+        test_url_generation()
+
+        print("\n" + "=" * 50)
+
+        # Update all properties
+        result = update_all_property_urls(args.db_path, chunk_rows=args.chunk_rows, resume=not args.restart,
+                                          progress=print_progress)
+        print(f"{'🎯' if result['success'] else '❌'} {result['message']}")
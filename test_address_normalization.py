@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Address Normalization Tests
+Canonical street keys and the normalized_address_key migration
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from address_normalization import (
+    parse_street_address, normalize_street, normalize_address_key, address_key_prefix_range,
+    mls_number_prefix_range, ensure_address_key_column, find_property_by_address, refresh_address_key
+)
+
+class TestNormalizeStreet(unittest.TestCase):
+    """Suffix, directional, unit and punctuation folding"""
+
+    def test_suffix_variants_share_a_key(self):
+        self.assertEqual(normalize_address_key('123 Main St', 'Sacramento', 'CA'),
+                         normalize_address_key('123 MAIN STREET', ' sacramento', 'ca'))
+
+    def test_directionals_and_units(self):
+        self.assertEqual(normalize_street('456 North Oak Avenue, Apt. 4B'), '456 n oak ave #4b')
+        self.assertEqual(normalize_street('456 N. Oak Ave #4B'), '456 n oak ave #4b')
+        self.assertEqual(normalize_street('12 Main St N'), '12 main st n')
+
+    def test_directional_words_used_as_names_are_kept(self):
+        self.assertEqual(normalize_street('1 East St'), '1 east st')
+        self.assertEqual(normalize_street('12 North Ave'), '12 north ave')
+
+    def test_ordinals_and_fractions(self):
+        self.assertEqual(normalize_street('10 W 42nd Street Suite 300'), '10 w 42 st #300')
+        self.assertEqual(parse_street_address('123 1/2 Main St')['number'], '123 1/2')
+
+    def test_prefix_range_only_for_street_numbers(self):
+        self.assertEqual(address_key_prefix_range('123 main street')[0], '123 main st')
+        self.assertIsNone(address_key_prefix_range('Sacramento'))
+        self.assertEqual(mls_number_prefix_range(' 22501 '), ('22501', '22501\uffff'))
+        self.assertIsNone(mls_number_prefix_range(''))
+
+class TestAddressKeyColumn(unittest.TestCase):
+    """Migration and indexed lookups on a temporary properties table"""
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('''CREATE TABLE properties (
+            id INTEGER PRIMARY KEY, street_address TEXT, city TEXT, state TEXT, zip_code TEXT
+        )''')
+        self.conn.executemany('INSERT INTO properties (street_address, city, state) VALUES (?, ?, ?)', [
+            ('123 Main Street', 'Sacramento', 'CA'),
+            ('456 N Oak Ave', 'Davis', 'CA'),
+        ])
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        os.remove(self.db_path)
+
+    def test_migration_backfills_and_indexes(self):
+        result = ensure_address_key_column(self.conn)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['backfilled'], 2)
+
+        plan = self.conn.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM properties WHERE normalized_address_key = ?', ('x',)
+        ).fetchall()
+        self.assertIn('idx_properties_normalized_address_key', ' '.join(row[-1] for row in plan))
+
+    def test_conflict_lookup_ignores_formatting(self):
+        existing = find_property_by_address(self.conn, '123 main st.', 'SACRAMENTO', 'ca')
+        self.assertEqual(existing['id'], 1)
+        self.assertIsNone(find_property_by_address(self.conn, '125 Main St', 'Sacramento', 'CA'))
+
+    def test_refresh_after_address_change(self):
+        ensure_address_key_column(self.conn)
+        self.conn.execute("UPDATE properties SET street_address = '789 Pine Drive' WHERE id = 2")
+        refresh_address_key(self.conn, 2)
+        self.assertEqual(find_property_by_address(self.conn, '789 Pine Dr', 'Davis', 'CA')['id'], 2)
+
+class TestPropertySearch(unittest.TestCase):
+    """Street-number searches also match MLS numbers by prefix"""
+
+    def setUp(self):
+        import zipform_ai_functions
+
+        handle, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''CREATE TABLE properties (
+            id INTEGER PRIMARY KEY, mls_number TEXT UNIQUE, address_line1 TEXT, city TEXT, state TEXT,
+            zip_code TEXT, listing_price REAL, property_type TEXT, bedrooms INTEGER, bathrooms REAL,
+            square_feet INTEGER, created_at TEXT
+        )''')
+        conn.executemany('INSERT INTO properties (address_line1, city, state, zip_code, mls_number) '
+                         'VALUES (?, ?, ?, ?, ?)', [
+                             ('123 Main Street', 'Sacramento', 'CA', '95814', '225012345'),
+                             ('456 N Oak Ave', 'Davis', 'CA', '95616', '225099999'),
+                         ])
+        conn.commit()
+        conn.close()
+        self.original_path = zipform_ai_functions.DATABASE_PATH
+        zipform_ai_functions.DATABASE_PATH = self.db_path
+
+    def tearDown(self):
+        import zipform_ai_functions
+
+        zipform_ai_functions.DATABASE_PATH = self.original_path
+        os.remove(self.db_path)
+
+    def test_partial_mls_number(self):
+        from offer_creation_workflow import search_properties
+
+        self.assertEqual([p['mls_number'] for p in search_properties('2250123')], ['225012345'])
+        self.assertEqual(len(search_properties('2250')), 2)
+        self.assertEqual([p['mls_number'] for p in search_properties('123 Main St')], ['225012345'])
+
+if __name__ == "__main__":
+    unittest.main()
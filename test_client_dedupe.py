@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Client Duplicate Detection Tests
+Blocking-key dedupe engine, real-time check and batch scan
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from client_dedupe import ClientDedupeEngine, blocking_keys, find_duplicate_clients, _normalize_client
+
+class TestClientDedupe(unittest.TestCase):
+    """Dedupe engine behaviour on small hand-built client sets"""
+
+    def setUp(self):
+        self.engine = ClientDedupeEngine()
+        self.engine.add_record({'id': 1, 'first_name': 'John', 'last_name': 'Smith',
+                                'email': 'john.smith@gmail.com', 'home_phone': '(555) 123-4567'})
+        self.engine.add_record({'id': 2, 'first_name': 'Catherine', 'last_name': 'Phillips',
+                                'email': 'cphillips@example.com'})
+        self.engine.add_record({'id': 3, 'first_name': 'Robert', 'last_name': 'Williams',
+                                'email': 'rob@example.com'})
+
+    def test_phone_only_contact_matches(self):
+        matches = self.engine.find_matches({'first_name': 'J', 'last_name': 'S', 'phone': '555.123.4567'})
+        self.assertEqual(matches[0]['client_id'], 1)
+        self.assertIn('same phone', matches[0]['reasons'])
+
+    def test_swapped_name_with_other_email_domain(self):
+        matches = self.engine.find_matches({'first_name': 'Smith', 'last_name': 'John',
+                                            'email': 'johnsmith@yahoo.com'})
+        self.assertEqual([m['client_id'] for m in matches], [1])
+
+    def test_similar_sounding_name_needs_second_signal(self):
+        weak = self.engine.find_matches({'first_name': 'Katherine', 'last_name': 'Philips'})
+        self.assertEqual(weak, [])
+        strong = self.engine.find_matches({'first_name': 'Katherine', 'last_name': 'Philips',
+                                           'email': 'c.phillips@work.com'})
+        self.assertEqual([m['client_id'] for m in strong], [2])
+
+    def test_same_name_needs_a_matching_contact(self):
+        other_john = {'first_name': 'John', 'last_name': 'Smith', 'email': 'jsmith@work.com',
+                      'phone': '916-555-0000'}
+        self.assertEqual(self.engine.find_matches(other_john), [])
+
+        self.engine.add_record({'id': 4, 'first_name': 'John', 'last_name': 'Smith',
+                                'street_address': '12 Main Street', 'city': 'Nevada City'})
+        matches = self.engine.find_matches(dict(other_john, street_address='12 Main St', city='Nevada City'))
+        self.assertEqual([m['client_id'] for m in matches], [4])
+        self.assertIn('same address', matches[0]['reasons'])
+
+        # A shared address alone is a household
+        self.assertEqual(self.engine.find_matches({'first_name': 'Mary', 'last_name': 'Jones',
+                                                   'street_address': '12 Main St', 'city': 'Nevada City'}), [])
+
+    def test_distinct_client_has_no_matches(self):
+        self.assertEqual(self.engine.find_matches({'first_name': 'Mary', 'last_name': 'Johnson',
+                                                   'email': 'mary@example.com'}), [])
+
+    def test_swapped_names_share_a_block(self):
+        a = _normalize_client({'first_name': 'John', 'last_name': 'Smith'})
+        b = _normalize_client({'first_name': 'Smith', 'last_name': 'John'})
+        self.assertTrue(blocking_keys(a) & blocking_keys(b))
+
+    def test_incremental_update_replaces_old_keys(self):
+        self.engine.add_record({'id': 1, 'first_name': 'John', 'last_name': 'Smith',
+                                'email': 'john.smith@gmail.com', 'home_phone': '916-000-1111'})
+        self.assertEqual(self.engine.find_matches({'first_name': 'X', 'last_name': 'Y',
+                                                   'phone': '555-123-4567'}), [])
+
+class TestFindDuplicateClients(unittest.TestCase):
+    """Batch job over a temporary SQLite clients table"""
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''CREATE TABLE clients (
+            id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, email TEXT, home_phone TEXT
+        )''')
+        conn.executemany('INSERT INTO clients (first_name, last_name, email, home_phone) VALUES (?, ?, ?, ?)', [
+            ('John', 'Smith', 'john.smith@email.com', '555-123-4567'),
+            ('Smith', 'John', 'johnsmith@other.com', None),
+            ('Mary', 'Johnson', 'mary.johnson@email.com', '555-234-5678'),
+            ('M', 'Johnson', None, '5552345678'),
+            ('Robert', 'Williams', 'robert.williams@email.com', '555-345-6789'),
+        ])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def test_batch_scan_finds_pairs_and_clusters(self):
+        result = find_duplicate_clients(db_path=self.db_path)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['clusters'], [[1, 2], [3, 4]])
+
+class TestCreateClientChecks(unittest.TestCase):
+    """The create-client functions block likely duplicates, not namesakes"""
+
+    def setUp(self):
+        import zipform_ai_functions
+        from init_database import SQLITE_SCHEMA
+
+        handle, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(SQLITE_SCHEMA)
+        conn.close()
+        self.module = zipform_ai_functions
+        self.original = zipform_ai_functions.DATABASE_PATH
+        zipform_ai_functions.DATABASE_PATH = self.db_path
+
+    def tearDown(self):
+        self.module.DATABASE_PATH = self.original
+        os.remove(self.db_path)
+
+    def test_phone_is_checked_and_namesakes_are_created(self):
+        create = self.module.create_client_zipform
+        first = create('John', 'Smith', email='john@example.com', phone='530-555-1111')
+        self.assertTrue(first['success'], first['message'])
+
+        namesake = create('John', 'Smith', email='other.john@example.com', phone='916-555-2222')
+        self.assertTrue(namesake['success'], namesake['conflicts'])
+
+        same_phone = create('Jon', 'Smith', phone='(530) 555-1111')
+        self.assertFalse(same_phone['success'])
+        self.assertIn('same phone', same_phone['conflicts'][0])
+        self.assertTrue(create('Jon', 'Smith', phone='(530) 555-1111', allow_duplicates=True)['success'])
+
+        conn = sqlite3.connect(self.db_path)
+        phone = conn.execute('SELECT home_phone FROM clients WHERE id = ?', (first['client_id'],)).fetchone()[0]
+        conn.close()
+        self.assertEqual(phone, '530-555-1111')
+
+if __name__ == "__main__":
+    unittest.main()
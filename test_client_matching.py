@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Client to Listing Matching Tests
+Score matrix, blocked top-N ranking and incremental listing/client updates
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from client_matching import ClientMatcher, ClientPreferences, ListingFeatures, Vocabulary, score_matrix
+import client_matching
+import mls_integration
+
+FEED = pd.DataFrame({
+    'Listing Number': [101, 102, 103, 104, 105],
+    'Address - Street Complete': ['1 A St', '2 B St', '3 C St', '4 D St', '5 E St'],
+    'Address - City': ['Grass Valley', 'Grass Valley', 'Nevada City', 'Nevada City', 'Auburn'],
+    'List Price': [500000.0, 640000.0, 560000.0, 900000.0, 520000.0],
+    'Bedrooms And Possible Bedrooms': ['3', '4', '2', '4', '3'],
+    'Property Type': ['Residential', 'Residential', 'Condominium', 'Residential', 'Residential'],
+    'Status': ['Active', 'Active', 'Active', 'Active', 'Pending'],
+    'Subdivision': ['Ridge', None, None, None, None],
+})
+
+CLIENTS_SCHEMA = '''CREATE TABLE clients (
+    id INTEGER PRIMARY KEY, first_name TEXT, client_type TEXT, budget_min INTEGER, budget_max INTEGER,
+    bedrooms INTEGER, area_preference TEXT, property_type_preference TEXT
+)'''
+
+CLIENTS = [
+    (1, 'Ana', 'buyer', 450000, 600000, 3, 'Grass Valley', 'Single Family'),
+    (2, 'Ben', 'buyer', None, 600000, 2, 'Nevada City or Auburn', 'Condo'),
+    (3, 'Cy', 'seller', 400000, 900000, 3, None, None),
+    (4, 'Di', 'both', None, None, None, 'Ridge', None),
+]
+
+def listings_of(frame, vocabulary):
+    from mls_feeds import NEVADA_COUNTY_FEED
+    from mls_store import MLSStore
+    return ListingFeatures.from_store(MLSStore.from_dataframe(NEVADA_COUNTY_FEED.apply(frame)), vocabulary)
+
+def clients_of(rows, vocabulary):
+    frame = pd.DataFrame(rows, columns=['id', 'first_name', 'client_type', 'budget_min', 'budget_max', 'bedrooms',
+                                        'area_preference', 'property_type_preference'])
+    return ClientPreferences.from_frame(frame, vocabulary)
+
+class TestScoreMatrix(unittest.TestCase):
+    """Price fit, bedrooms, area and type components"""
+
+    def setUp(self):
+        self.vocabulary = Vocabulary()
+        self.listings = listings_of(FEED, self.vocabulary)
+        self.clients = clients_of(CLIENTS, self.vocabulary)
+
+    def test_components(self):
+        self.assertEqual(self.listings.keys.tolist(), ['101', '102', '103', '104'])  # 105 is pending
+        scores = score_matrix(self.clients, self.listings)
+        self.assertAlmostEqual(scores[0, 0], 1.0)  # in budget, 3 bd, Grass Valley, single family
+        # 640k is 6.7% over a 600k cap: price fit 1/3
+        self.assertAlmostEqual(scores[0, 1], 0.4 / 3 + 0.2 + 0.25 + 0.15, places=5)
+        self.assertEqual(scores[0, 3], 0)  # 50% over budget
+        self.assertAlmostEqual(scores[1, 2], 1.0)  # open budget floor, condo in Nevada City
+        self.assertAlmostEqual(scores[3, 0], 1.0)  # subdivision counts as an area
+        self.assertAlmostEqual(scores[3, 1], 0.75)
+
+    def test_blocked_ranking_matches_dense_scores(self):
+        rng = np.random.default_rng(7)
+        count = 400
+        frame = pd.DataFrame({
+            'Listing Number': np.arange(count),
+            'Address - Street Complete': [f'{i} Main St' for i in range(count)],
+            'Address - City': rng.choice(['Grass Valley', 'Nevada City', 'Auburn'], count),
+            'List Price': rng.uniform(3e5, 1.5e6, count),
+            'Bedrooms And Possible Bedrooms': rng.integers(1, 6, count).astype(str),
+            'Property Type': rng.choice(['Residential', 'Condominium'], count),
+        })
+        listings = listings_of(frame, self.vocabulary)
+        low = rng.uniform(3e5, 9e5, 60)
+        clients = clients_of([(i, 'x', 'buyer', low[i], low[i] * 1.2, int(rng.integers(1, 5)),
+                               rng.choice(['Grass Valley', 'Auburn, Nevada City', None]), None)
+                              for i in range(60)], self.vocabulary)
+        original = client_matching.BLOCK_CELLS
+        client_matching.BLOCK_CELLS = 64  # many small chunks
+        try:
+            matcher = ClientMatcher(top_n=5)
+            matcher.score_all(clients, listings)
+        finally:
+            client_matching.BLOCK_CELLS = original
+
+        dense = score_matrix(clients, listings)
+        dense[dense < client_matching.MIN_SCORE] = 0
+        for row in range(len(clients)):
+            expected = np.sort(dense[row])[::-1][:5]
+            np.testing.assert_allclose(matcher.scores[row], expected, atol=1e-6)
+            for mls_number, score in matcher.matches(row):
+                self.assertAlmostEqual(dense[row, int(mls_number)], score, places=3)
+
+class TestIncrementalMatching(unittest.TestCase):
+    """Listing deltas and client rescoring through mls_integration"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        self.db_path = os.path.join(self.root, 'crm.db')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(CLIENTS_SCHEMA)
+        conn.executemany('INSERT INTO clients VALUES (?, ?, ?, ?, ?, ?, ?, ?)', CLIENTS)
+        conn.commit()
+        conn.close()
+        mls_integration.load_mls_data(self.csv_path)
+        mls_integration.enable_client_matching(self.db_path, top_n=3)
+
+    def tearDown(self):
+        mls_integration.disable_client_matching()
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def numbers(self, client_id):
+        return [match['mls_number'] for match in mls_integration.get_client_matches(client_id)['matches']]
+
+    def test_delta_and_client_updates(self):
+        self.assertEqual(self.numbers(1), ['101', '102', '103'])  # 103 only on price: 0.5
+        self.assertFalse(mls_integration.get_client_matches(3)['success'])  # sellers are not matched
+
+        # 102 drops into budget, 101 goes pending, 106 is new
+        new_listing = pd.DataFrame([{'Listing Number': 106, 'Address - Street Complete': '6 F St',
+                                     'Address - City': 'Grass Valley', 'List Price': 575000.0,
+                                     'Bedrooms And Possible Bedrooms': '3', 'Property Type': 'Residential',
+                                     'Status': 'Active'}])
+        pd.concat([FEED.assign(**{'List Price': [500000.0, 590000.0, 560000.0, 900000.0, 520000.0],
+                                  'Status': ['Pending', 'Active', 'Active', 'Active', 'Pending']}),
+                   new_listing], ignore_index=True).to_csv(self.csv_path, index=False)
+        self.assertTrue(mls_integration.refresh_mls_data()['changed'])
+        matches = mls_integration.get_client_matches(1)['matches']
+        self.assertEqual({match['mls_number'] for match in matches[:2]}, {'102', '106'})
+        self.assertEqual([match['score'] for match in matches], [1.0, 1.0, 0.5])
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE clients SET area_preference = 'Nevada City', budget_max = 1000000, "
+                     "property_type_preference = NULL WHERE id = 1")
+        conn.commit()
+        conn.close()
+        result = mls_integration.rescore_client_matches(1)
+        self.assertEqual(result['clients'], 1)
+        self.assertEqual(self.numbers(1)[0], '104')
+        self.assertEqual(self.numbers(2)[0], '103')  # other clients untouched
+        self.assertIn('get_client_matches', mls_integration.MLS_FUNCTIONS)
+
+class TestPreferenceColumns(unittest.TestCase):
+    """Clients tables created before matching get the preference columns"""
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.db_path)
+
+    def test_missing_columns_are_added(self):
+        from client_matching import client_columns, ensure_preference_columns
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE clients (id INTEGER PRIMARY KEY, first_name TEXT, client_type TEXT, '
+                     'bedrooms_min INTEGER)')
+        conn.execute("INSERT INTO clients VALUES (1, 'Ana', 'buyer', 3)")
+        conn.commit()
+        clients = ClientPreferences.from_db(conn, Vocabulary())
+        self.assertEqual((clients.ids.tolist(), clients.bedrooms.tolist()), ([1], [3.0]))
+        self.assertEqual(client_columns(conn), {'budget_min': 'budget_min', 'budget_max': 'budget_max',
+                                                'bedrooms': 'bedrooms_min', 'area_preference': 'area_preference',
+                                                'property_type_preference': 'property_type_preference'})
+
+        conn.execute('UPDATE clients SET budget_max = 600000 WHERE id = 1')
+        self.assertTrue(ensure_preference_columns(conn))  # idempotent
+        self.assertFalse(ensure_preference_columns(conn, 'missing'))
+        conn.close()
+
+    def test_created_client_keeps_preferences(self):
+        from unittest import mock
+        from init_database import SQLITE_SCHEMA
+        import zipform_ai_functions
+
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(SQLITE_SCHEMA)
+        conn.executescript('''
+            ALTER TABLE clients DROP COLUMN budget_min;
+            ALTER TABLE clients DROP COLUMN area_preference;
+            ALTER TABLE clients RENAME COLUMN bedrooms TO bedrooms_min;
+        ''')
+        conn.close()
+
+        original = zipform_ai_functions.DATABASE_PATH
+        zipform_ai_functions.DATABASE_PATH = self.db_path
+        try:
+            with mock.patch.object(mls_integration, 'rescore_client_matches') as rescore:
+                result = zipform_ai_functions.create_client_zipform(
+                    'Ana', 'Lopez', phone='530-555-1111', budget_min=400000, budget_max=550000,
+                    bedrooms=3, area_preference='Grass Valley')
+        finally:
+            zipform_ai_functions.DATABASE_PATH = original
+        self.assertTrue(result['success'], result['message'])
+        rescore.assert_called_once_with(result['client_id'])
+
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT budget_min, budget_max, bedrooms_min, area_preference FROM clients '
+                           'WHERE id = ?', (result['client_id'],)).fetchone()
+        conn.close()
+        self.assertEqual(row, (400000, 550000, 3, 'Grass Valley'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Email Preprocessing Tests
+Quoted history, signature, footer, HTML and duplicate removal before extraction
+"""
+
+import os
+import sys
+import unittest
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from email_preprocessing import preprocess_email
+
+REPLY_THREAD = """Hi Narissa,
+
+Please add me as a buyer, budget $650K.
+
+Best regards,
+Jennifer Lawrence
+Senior Analyst | Acme Corp
+Cell: 916-555-1234
+Sent from my iPhone
+
+CONFIDENTIALITY NOTICE: This email and any attachments are for the sole use
+of the intended recipient(s).
+
+On Mon, Jun 2, 2025 at 9:14 AM Narissa <narissa@example.com> wrote:
+> Hi Jennifer, thanks for reaching out!
+"""
+
+class TestPreprocessEmail(unittest.TestCase):
+    """Each stage removes its noise and keeps what extraction needs"""
+
+    def test_reply_thread_is_reduced(self):
+        result = preprocess_email(REPLY_THREAD)
+        text = result['text']
+        self.assertIn('budget $650K', text)
+        self.assertIn('Jennifer Lawrence', text)
+        self.assertIn('916-555-1234', text)
+        for removed in ('Acme Corp', 'iPhone', 'CONFIDENTIALITY', 'wrote:', 'reaching out'):
+            self.assertNotIn(removed, text)
+        self.assertLess(result['cleaned_chars'], result['original_chars'])
+        self.assertGreater(result['removed']['quoted'], 0)
+        self.assertGreater(result['removed']['boilerplate'], 0)
+
+    def test_forwarded_message_keeps_body_and_sender(self):
+        text = preprocess_email(
+            "---------- Forwarded message ---------\nFrom: Bob Lee <bob@lee.com>\n"
+            "Date: Mon, Jun 2\nSubject: Buying\n\nI want to buy in Nevada City."
+        )['text']
+        self.assertEqual(text, 'From: Bob Lee <bob@lee.com>\nI want to buy in Nevada City.')
+
+    def test_html_is_flattened_without_losing_addresses(self):
+        text = preprocess_email(
+            '<html><style>p {color: red}</style><p>Mary Jones &lt;mj@x.com&gt;<br>phone 555-111-2222</p></html>'
+        )['text']
+        self.assertEqual(text, 'Mary Jones <mj@x.com>\nphone 555-111-2222')
+
+    def test_repeated_paragraphs_are_dropped(self):
+        result = preprocess_email('Call me at 555-111-2222.\n\nCall me at  555-111-2222.')
+        self.assertEqual(result['text'], 'Call me at 555-111-2222.')
+        self.assertGreater(result['removed']['duplicate'], 0)
+
+    def test_introduction_is_not_a_footer(self):
+        email = ("Hello,\n\nThis email is to introduce my client Jessica Martinez, who is relocating "
+                 "to Nevada City. Her number is 530-555-1111.")
+        result = preprocess_email(email)
+        self.assertEqual(result['text'], email)
+        self.assertEqual(result['removed']['boilerplate'], 0)
+
+    def test_lead_mentioning_footer_words_is_kept(self):
+        email = ("Hi Narissa,\n\nKeeping this confidential for now, but my client Jennifer Lawrence wants a "
+                 "3 bedroom in Grass Valley, phone 916-555-1234 email jen@gmail.com\n\nThanks,\nBob")
+        result = preprocess_email(email)
+        self.assertIn('916-555-1234 email jen@gmail.com', result['text'])
+        self.assertEqual(result['removed']['boilerplate'], 0)
+
+        # A footer opener with more of the message after it is not a trailing footer
+        email = ("Unsubscribe me from the newsletter, but my sister Ann Lee wants a condo.\n\n"
+                 "Confidential: she is relocating from Reno.\n\nHer cell is 775-555-0100.")
+        self.assertEqual(preprocess_email(email)['text'], email)
+
+        # ...but the same opener at the end of the message is
+        result = preprocess_email("Call me at 775-555-0100.\n\nConfidential: for the intended recipient only.\n"
+                                  "Do not forward.\n\nTo unsubscribe, reply STOP.")
+        self.assertEqual(result['text'], 'Call me at 775-555-0100.')
+
+    def test_closing_before_the_message_is_kept(self):
+        email = "Hi Narissa,\nThanks!\nI am looking in Grass Valley for a 3 bedroom home.\nMy budget is $500K"
+        self.assertEqual(preprocess_email(email)['text'], email)
+
+        # A blank line and more text after the block: the closing was part of the message
+        email = "Thanks,\nNarissa\n\nCan we see the Grass Valley house on Friday?"
+        self.assertEqual(preprocess_email(email)['text'], email)
+
+    def test_fully_quoted_email_is_kept(self):
+        self.assertEqual(preprocess_email('> only quoted text')['text'], '> only quoted text')
+
+if __name__ == "__main__":
+    unittest.main()
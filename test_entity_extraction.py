@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Entity Extraction Tests
+Precompiled pattern sets for chat messages, pasted emails and form requests
+"""
+
+import os
+import re
+import sys
+import unittest
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from entity_extraction import (
+    CompiledPatternSet, CRM_PHONE_PATTERNS, BENCHMARK_CORPUS,
+    extract_crm_entities, extract_client_fields, extract_form_request
+)
+
+class TestCompiledPatternSet(unittest.TestCase):
+    """Priority semantics match the per-pattern re.search loops"""
+
+    def test_first_prefers_pattern_order_over_position(self):
+        patterns = CompiledPatternSet([r'phone\s+(\d+)', r'(\d+)'])
+        hit = patterns.first('ref 42, phone 5551234')
+        self.assertEqual((hit.index, hit.groups), (0, ('5551234',)))
+
+    def test_first_agrees_with_sequential_search(self):
+        compiled = CompiledPatternSet(CRM_PHONE_PATTERNS, re.IGNORECASE, gate=r'\d{3}')
+        for message in BENCHMARK_CORPUS:
+            expected = None
+            for pattern in CRM_PHONE_PATTERNS:
+                expected = re.search(pattern, message, re.IGNORECASE)
+                if expected:
+                    break
+            hit = compiled.first(message)
+            self.assertEqual(hit.groups if hit else None, expected.groups() if expected else None)
+
+    def test_gate_skips_family(self):
+        patterns = CompiledPatternSet([r'(\w+@\w+\.com)'], gate='@')
+        self.assertIsNone(patterns.first('no address here'))
+        self.assertFalse(patterns.matches('no address here'))
+
+    def test_find_all_is_per_pattern(self):
+        hits = CompiledPatternSet([r'b(\d)', r'(\d)']).find_all('a1 b2')
+        self.assertEqual([(h.index, h.groups[0]) for h in hits], [(0, '2'), (1, '1'), (1, '2')])
+
+class TestExtractors(unittest.TestCase):
+    """Field extraction from representative CRM messages"""
+
+    def test_crm_entities(self):
+        entities = extract_crm_entities(BENCHMARK_CORPUS[0])
+        self.assertEqual(entities['first_name'], 'Jennifer')
+        self.assertEqual(entities['phone'], '916-555-1234')
+        self.assertEqual(entities['email'], 'jen.lawrence@gmail.com')
+        self.assertEqual(entities['budget'], 650000)
+        self.assertEqual(entities['bedrooms'], 3)
+
+    def test_client_fields_need_name_and_contact(self):
+        fields = extract_client_fields('create client: Robert Chen, email: rchen@example.com')
+        self.assertEqual((fields['first_name'], fields['last_name']), ('Robert', 'Chen'))
+        self.assertIsNone(extract_client_fields('create client: Robert Chen'))
+
+    def test_form_request(self):
+        result = extract_form_request('Generate a purchase agreement for John Smith at 456 Oak Avenue for $550,000')
+        self.assertEqual(result['intent'], 'form_generation')
+        self.assertIn('John Smith', result['entities']['client_names'])
+        self.assertEqual(result['entities']['property_addresses'], ['456 Oak Avenue'])
+        self.assertEqual(result['entities']['form_types'], ['california_purchase_agreement'])
+        self.assertIn('550000', result['entities']['amounts'])
+
+if __name__ == "__main__":
+    unittest.main()
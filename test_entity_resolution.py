@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Entity Resolution Index Tests
+Client and property lookups, phonetic matches that need confirming, and the
+hooks that keep the index current after writes
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from entity_resolution import EntityResolutionIndex, get_resolution_index, near_exact, soundex, metaphone
+
+class TestEntityResolutionIndex(unittest.TestCase):
+    """Lookups against a small hand-built index"""
+
+    def setUp(self):
+        self.index = EntityResolutionIndex()
+        self.index.add_client(1, 'Jane', 'Smith', email='jane.smith@gmail.com', phone='(530) 555-1111')
+        self.index.add_client(2, 'Catherine', 'Phillips', cellular_phone='916.555.2222')
+        self.index.add_property(10, '456 Oak Avenue', city='Davis', state='CA', zip_code='95616',
+                                mls_number='225012345')
+        self.index.add_property(11, '12 Main St', city='Nevada City', state='CA')
+
+    def test_phonetic_keys(self):
+        self.assertEqual(soundex('Smith'), soundex('Smyth'))
+        self.assertEqual(metaphone('Katherine'), metaphone('Catherine'))
+        self.assertTrue(near_exact('jon', 'john'))
+        self.assertTrue(near_exact('jhon', 'john'))
+        self.assertFalse(near_exact('jim', 'tim'))
+        self.assertFalse(near_exact('john', 'jane'))
+
+    def test_client_by_email_phone_and_name(self):
+        self.assertEqual(self.index.resolve_client('JANE.SMITH@gmail.com')[0]['match'], 'email')
+        self.assertEqual(self.index.resolve_client_id('530-555-1111'), 1)
+        self.assertEqual(self.index.resolve_client_id('+1 916 555 2222'), 2)
+        self.assertEqual(self.index.resolve_client_id('Jane Smith'), 1)
+        self.assertEqual(self.index.resolve_client_id('Jnae Smyth'), 1)  # typos, not another name
+        self.assertIsNone(self.index.resolve_client_id('Nobody Here'))
+
+    def test_sound_alike_first_name_needs_confirmation(self):
+        for query in ('John Smith', 'Jim Smith'):
+            matches = self.index.resolve_client(query)
+            self.assertEqual([(m['id'], m['match']) for m in matches], [(1, 'phonetic')])
+            self.assertGreaterEqual(matches[0]['score'], 0.6)
+            self.assertIsNone(self.index.resolve_client_id(query))
+
+        # Same-sounding spelling of the right first name is still only a candidate
+        self.assertEqual(self.index.resolve_client('Katherine Phillips')[0]['match'], 'phonetic')
+        self.assertIsNone(self.index.resolve_client_id('Katherine Phillips'))
+
+    def test_tied_clients_are_not_resolved(self):
+        self.index.add_client(3, 'Jane', 'Smith', email='other@example.com')
+        self.assertIsNone(self.index.resolve_client_id('Jane Smith'))
+        self.assertEqual(self.index.resolve_client_id('other@example.com'), 3)
+
+    def test_property_by_address_and_mls_number(self):
+        self.assertEqual(self.index.resolve_property('225012345')[0]['match'], 'mls_number')
+        self.assertEqual(self.index.resolve_property('456 Oak Ave')[0]['id'], 10)
+        self.assertEqual(self.index.resolve_property('12 Main Street, Nevada City')[0]['id'], 11)
+        self.assertEqual(self.index.resolve_property('999 Oak Ave'), [])
+
+    def test_ambiguous_address_is_not_resolved(self):
+        self.index.add_property(12, '123 Main St', city='Nevada City', state='CA')
+        self.index.add_property(13, '123 Main Ct', city='Nevada City', state='CA', mls_number='225099')
+        self.assertEqual(self.index.resolve_property_id('123 Main Street'), 12)
+        self.assertEqual(self.index.resolve_property_id('123 Main Ct, Nevada City'), 13)
+        self.assertEqual(self.index.resolve_property_id('225099'), 13)
+        for query in ('123 Main', '123 Main Nevada City', '999 Oak Ave'):
+            self.assertIsNone(self.index.resolve_property_id(query))
+
+    def test_replace_and_remove(self):
+        self.index.add_client(1, 'Jane', 'Doe', phone='530-555-9999')
+        self.assertIsNone(self.index.resolve_client_id('530-555-1111'))
+        self.assertEqual(self.index.resolve_client_id('Jane Doe'), 1)
+        self.index.remove_property(10)
+        self.assertEqual(self.index.resolve_property('225012345'), [])
+
+    def test_find_mentions(self):
+        mentions = self.index.find_mentions('Write an offer for Jane Smith on 456 Oak Ave (MLS 225012345)')
+        self.assertEqual([c['id'] for c in mentions['clients']], [1])
+        self.assertEqual([p['id'] for p in mentions['properties']], [10])
+
+class TestIndexRefreshHooks(unittest.TestCase):
+    """Writes through the CRM functions update the process-wide index"""
+
+    def setUp(self):
+        from init_database import SQLITE_SCHEMA
+
+        self.root = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.root, 'crm.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(SQLITE_SCHEMA)
+        conn.close()
+        get_resolution_index().__init__()
+
+    def tearDown(self):
+        get_resolution_index().__init__()
+        shutil.rmtree(self.root)
+
+    def test_created_client_is_indexed(self):
+        import zipform_ai_functions
+
+        original = zipform_ai_functions.DATABASE_PATH
+        zipform_ai_functions.DATABASE_PATH = self.db_path
+        try:
+            result = zipform_ai_functions.create_client_zipform('Jane', 'Smith', email='jane@example.com',
+                                                                cellular_phone='530-555-1111')
+        finally:
+            zipform_ai_functions.DATABASE_PATH = original
+        self.assertTrue(result['success'], result['message'])
+        index = get_resolution_index()
+        self.assertEqual(index.resolve_client_id('530 555 1111'), result['client_id'])
+        self.assertEqual(index.resolve_client_id('Jane Smith'), result['client_id'])
+
+    def test_imported_properties_are_indexed(self):
+        from mls_crm_sync import index_properties
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute("INSERT INTO properties (street_address, city, state, zip_code, mls_number) "
+                              "VALUES ('607 Cold Spring Ct', 'Grass Valley', 'CA', '95945', '225099')")
+        index_properties(conn, [cursor.lastrowid])
+        conn.close()
+        self.assertEqual(get_resolution_index().resolve_property('607 Cold Spring Court')[0]['id'],
+                         cursor.lastrowid)
+        self.assertEqual(get_resolution_index().resolve_property('225099')[0]['match'], 'mls_number')
+
+    def test_load_from_database(self):
+        from entity_resolution import load_resolution_index
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO clients (first_name, last_name, home_phone) VALUES ('Ada', 'Lovelace', '555-123-4567')")
+        conn.commit()
+        conn.close()
+        result = load_resolution_index(self.db_path)
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(result['clients'], 1)
+        self.assertEqual(get_resolution_index().resolve_client_id('Ada Lovelace'), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Form Batch Tests
+Set-based transaction queries, parallel rendering, per-item failures and the streamed ZIP
+"""
+
+import io
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+import zipfile
+
+import fitz  # pymupdf
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from crpa_crm_system import CRPACRMSystem
+from form_batch import render_batch, stream_batch_zip, write_batch_zip
+
+def write_crm_db(path, transactions=12):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE clients (id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, home_phone TEXT, email TEXT);
+        CREATE TABLE properties (id INTEGER PRIMARY KEY, street_address TEXT, city TEXT, state TEXT, zip_code TEXT);
+        CREATE TABLE transactions (id INTEGER PRIMARY KEY, buyer_client_id INTEGER, property_id INTEGER,
+            offer_date TEXT, purchase_price REAL, closing_date TEXT, earnest_money_amount REAL, status TEXT);
+        INSERT INTO clients VALUES (1, 'Ada', 'Lovelace', NULL, NULL);
+        INSERT INTO properties VALUES (1, '12 Main St', 'Nevada City', 'CA', '95959');
+    ''')
+    conn.executemany('INSERT INTO transactions VALUES (?, 1, 1, ?, ?, NULL, NULL, ?)',
+                     [(n, f'2025-06-{n:02d}', 600000 + n * 1000, 'pending' if n % 3 else 'closed')
+                      for n in range(1, transactions + 1)])
+    conn.commit()
+    conn.close()
+
+class TestTransactionsData(unittest.TestCase):
+    """CRPACRMSystem.get_transactions_data"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.root, 'crm.db')
+        write_crm_db(self.db_path)
+        self.system = CRPACRMSystem(self.db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_ids_and_filters(self):
+        rows = self.system.get_transactions_data(['3', 1, 99])
+        self.assertEqual([row['transaction_id'] for row in rows], [1, 3])
+        self.assertEqual(rows[0], self.system.get_transaction_data(1))
+
+        closed = self.system.get_transactions_data(status='closed')
+        self.assertEqual([row['transaction_id'] for row in closed], [3, 6, 9, 12])
+        window = self.system.get_transactions_data(status=['pending', 'closed'], offer_from='2025-06-05',
+                                                   offer_to='2025-06-07')
+        self.assertEqual([row['transaction_id'] for row in window], [5, 6, 7])
+        self.assertEqual(len(self.system.get_transactions_data()), 12)
+
+class TestBatchZip(unittest.TestCase):
+    """Rendering a batch into a streamed ZIP"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.root, 'crm.db')
+        write_crm_db(self.db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def read_zip(self, chunks):
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        return archive, json.loads(archive.read('batch_report.json'))
+
+    def test_parallel_batch_with_failures(self):
+        summary = {}
+        chunks = list(stream_batch_zip(render_batch([2, 5, 404, 8], self.db_path, workers=2), summary))
+        self.assertGreater(len(chunks), 4)  # a piece per document, then the report and directory
+
+        archive, report = self.read_zip(chunks)
+        self.assertEqual(sorted(archive.namelist()), ['CRPA_Transaction_2.pdf', 'CRPA_Transaction_5.pdf',
+                                                      'CRPA_Transaction_8.pdf', 'batch_report.json'])
+        with fitz.open(stream=archive.read('CRPA_Transaction_5.pdf'), filetype='pdf') as doc:
+            self.assertIn('$605,000.00', doc[2].get_text())
+        self.assertEqual((summary['total'], summary['rendered'], summary['failed']), (4, 3, 1))
+        self.assertFalse(summary['success'])
+        self.assertEqual(report['failures'][0]['transaction_id'], 404)
+        self.assertIn('not found', report['failures'][0]['error'])
+
+    def test_filter_in_process(self):
+        items = list(render_batch(db_path=self.db_path, status='closed', workers=1))
+        self.assertEqual([item['transaction_id'] for item in items], [3, 6, 9, 12])
+        self.assertTrue(all(item['pdf_bytes'][:5] == b'%PDF-' for item in items))
+
+    def test_write_batch_zip(self):
+        output_path = os.path.join(self.root, 'out', 'batch.zip')
+        seen = []
+        result = write_batch_zip(output_path, db_path=self.db_path, offer_to='2025-06-03', workers=1,
+                                 progress=seen.append)
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual((result['rendered'], len(seen)), (3, 3))
+        with zipfile.ZipFile(output_path) as archive:
+            self.assertEqual(len(archive.namelist()), 4)
+
+if __name__ == "__main__":
+    unittest.main()
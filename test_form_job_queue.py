@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Form Job Queue Tests
+Submitting, rendering in warm worker processes, requeueing interrupted jobs and metrics
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import fitz  # pymupdf
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import form_job_queue
+from form_job_queue import FormJobQueue
+
+def write_crm_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE clients (id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, home_phone TEXT, email TEXT);
+        CREATE TABLE properties (id INTEGER PRIMARY KEY, street_address TEXT, city TEXT, state TEXT, zip_code TEXT);
+        CREATE TABLE transactions (id INTEGER PRIMARY KEY, buyer_client_id INTEGER, property_id INTEGER,
+            offer_date TEXT, purchase_price REAL, closing_date TEXT, earnest_money_amount REAL);
+        INSERT INTO clients VALUES (1, 'Ada', 'Lovelace', NULL, NULL);
+        INSERT INTO properties VALUES (1, '12 Main St', 'Nevada City', 'CA', '95959');
+        INSERT INTO transactions VALUES (7, 1, 1, '2025-06-01', 650000, '2025-07-15', NULL);
+        INSERT INTO transactions VALUES (8, 1, 1, '2025-06-02', 655000, '2025-07-20', NULL);
+    ''')
+    conn.commit()
+    conn.close()
+
+class TestFormJobQueue(unittest.TestCase):
+    """CRPA jobs against a temporary CRM database and queue"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.crm_db = os.path.join(self.root, 'crm.db')
+        write_crm_db(self.crm_db)
+        self.jobs_db = os.path.join(self.root, 'jobs.db')
+        self.output_dir = os.path.join(self.root, 'output')
+        self.queue = FormJobQueue(self.jobs_db, max_workers=2, output_dir=self.output_dir, poll_interval=0.05)
+
+    def tearDown(self):
+        self.queue.stop()
+        shutil.rmtree(self.root)
+
+    def test_submit_and_wait(self):
+        self.queue.start()
+        submitted = self.queue.submit('crpa', {'transaction_id': 7, 'db_path': self.crm_db})
+        self.assertTrue(submitted['success'], submitted['message'])
+        missing = self.queue.submit('crpa', {'transaction_id': 99, 'db_path': self.crm_db})
+
+        job = self.queue.wait(submitted['job_id'], timeout=60)
+        self.assertEqual(job['status'], 'done', job['error'])
+        self.assertIsNotNone(job['render_seconds'])
+        with fitz.open(job['result']['output_path']) as doc:
+            self.assertIn('Ada Lovelace', doc[2].get_text())
+        self.assertEqual(job['result']['pdf_url'], '/download/CRPA_Transaction_7.pdf')
+
+        failed = self.queue.wait(missing['job_id'], timeout=60)
+        self.assertEqual(failed['status'], 'failed')
+        self.assertIn('99', failed['error'])
+
+        stats = self.queue.stats()
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertEqual(stats['jobs'], {'queued': 0, 'running': 0, 'done': 1, 'failed': 1})
+        self.assertEqual(stats['latency']['sample'], 1)
+        self.assertEqual((stats['workers']['size'], stats['workers']['busy']), (2, 0))
+        self.assertGreater(stats['workers']['utilisation'], 0)
+
+        self.assertIsNone(self.queue.get('unknown'))
+        self.assertFalse(self.queue.submit('fax', {})['success'])
+
+    def test_jobs_survive_restart(self):
+        # Queued while no dispatcher runs, plus one left running by a process that exited
+        queued = self.queue.submit('crpa', {'transaction_id': 7, 'db_path': self.crm_db})['job_id']
+        interrupted = self.queue.submit('crpa', {'transaction_id': 8, 'db_path': self.crm_db})['job_id']
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        conn = sqlite3.connect(self.jobs_db)
+        conn.execute("UPDATE form_jobs SET status = 'running', owner_pid = ? WHERE id = ?", (exited.pid, interrupted))
+        conn.commit()
+        conn.close()
+        self.assertEqual(self.queue.get(queued)['status'], 'queued')
+        self.assertEqual(self.queue.stats()['queue_depth'], 1)
+
+        restarted = FormJobQueue(self.jobs_db, max_workers=1, output_dir=self.output_dir, poll_interval=0.05)
+        try:
+            self.assertEqual(restarted.start()['requeued'], 1)
+            for job_id in (queued, interrupted):
+                self.assertEqual(restarted.wait(job_id, timeout=60)['status'], 'done')
+        finally:
+            restarted.stop()
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                         ['CRPA_Transaction_7.pdf', 'CRPA_Transaction_8.pdf'])
+
+    def test_running_dispatcher_sweeps_orphaned_and_stale_jobs(self):
+        queue = FormJobQueue(self.jobs_db, max_workers=1, output_dir=self.output_dir, poll_interval=0.05,
+                             sweep_interval=0.1, job_timeout=60)
+        try:
+            queue.start()
+            # Claimed after start by a sibling that has since died, and by a live one that is stuck
+            exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+            exited.wait()
+            conn = sqlite3.connect(self.jobs_db)
+            conn.executemany("INSERT INTO form_jobs (id, kind, params, status, submitted_at, started_at, owner_pid) "
+                             "VALUES (?, 'crpa', ?, 'running', ?, ?, ?)",
+                             [('orphaned', json.dumps({'transaction_id': 7, 'db_path': self.crm_db}),
+                               time.time(), time.time(), exited.pid),
+                              ('stuck', json.dumps({'transaction_id': 8, 'db_path': self.crm_db}),
+                               time.time() - 120, time.time() - 90, os.getppid())])
+            conn.commit()
+            conn.close()
+
+            self.assertEqual(queue.wait('orphaned', timeout=60)['status'], 'done')
+            stuck = queue.wait('stuck', timeout=60)
+            self.assertEqual(stuck['status'], 'failed')
+            self.assertIn('Timed out', stuck['error'])
+        finally:
+            queue.stop()
+        self.assertEqual(os.listdir(self.output_dir), ['CRPA_Transaction_7.pdf'])
+
+class TestFormJobEndpoints(unittest.TestCase):
+    """form_api_backend queues populate requests and reports on them"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.queue = FormJobQueue(os.path.join(self.root, 'jobs.db'), max_workers=1,
+                                  output_dir=os.path.join(self.root, 'output'), poll_interval=0.05)
+        form_job_queue._queue = self.queue
+
+    def tearDown(self):
+        form_job_queue._queue = None
+        self.queue.stop()
+        shutil.rmtree(self.root)
+
+    def test_async_populate(self):
+        from flask import Flask
+        import form_api_backend
+
+        app = Flask(__name__)
+        app.register_blueprint(form_api_backend.form_api)
+        client = app.test_client()
+        response = client.post('/api/forms/populate?delivery=async', json={
+            'form_id': 'california_purchase_agreement', 'client_id': '1', 'property_id': '1'})
+        self.assertEqual(response.status_code, 202)
+        submitted = response.get_json()
+        self.assertEqual(submitted['status'], 'queued')
+
+        job = client.get(f"{submitted['status_url']}?wait=60").get_json()['job']
+        self.assertEqual(job['status'], 'done', job['error'])
+        self.assertTrue(os.path.exists(job['result']['output_path']))
+        self.assertTrue(job['result']['pdf_url'].startswith('/api/forms/download/california_purchase_agreement/'))
+
+        self.assertEqual(client.get('/api/forms/jobs/stats').get_json()['jobs']['done'], 1)
+        self.assertEqual(client.get('/api/forms/jobs/unknown').status_code, 404)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Form Template Registry Tests
+Load-once templates, content hash checks, per-request copies and CRPA rendering
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import fitz  # pymupdf
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from form_template_registry import TemplateRegistry
+from crpa_crm_system import CRPACRMSystem
+
+def write_pdf(path, pages=3):
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_text((72, 72), f'Page {number + 1}')
+    doc.save(path)
+    doc.close()
+
+class TestTemplateRegistry(unittest.TestCase):
+    """Templates are read once and opened as independent in-memory copies"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'template.pdf')
+        write_pdf(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_loaded_once(self):
+        registry = TemplateRegistry()
+        registry.register('form', self.path)
+        template = registry.get('form')
+        self.assertEqual(template.page_count, 3)
+        os.remove(self.path)  # warm opens never touch the disk
+        self.assertIs(registry.get('form'), template)
+
+        first, second = registry.open('form'), registry.open('form')
+        first[0].insert_text((72, 200), 'Only in the first copy')
+        first.delete_page(2)
+        self.assertEqual((len(first), len(second)), (2, 3))
+        self.assertNotIn('Only in the first copy', second[0].get_text())
+        self.assertEqual(len(registry.open('form')), 3)
+        with self.assertRaises(KeyError):
+            registry.open('missing')
+
+    def test_content_hash_and_build(self):
+        with open(self.path, 'rb') as handle:
+            digest = hashlib.sha256(handle.read()).hexdigest()
+        registry = TemplateRegistry()
+        registry.register('form', self.path, sha256=digest)
+        self.assertEqual(registry.get('form').sha256, digest)
+        registry.register('wrong', self.path, sha256='0' * 64)
+        with self.assertRaises(ValueError):
+            registry.get('wrong')
+
+        built = []
+        missing = os.path.join(self.root, 'built.pdf')
+        registry.register('built', missing, build=lambda path: built.append(write_pdf(path, 2)))
+        result = registry.preload()
+        self.assertFalse(result['success'])
+        self.assertEqual(set(result['templates']), {'form', 'built'})
+        self.assertIn('wrong', result['errors'])
+        self.assertEqual(len(built), 1)
+        registry.get('built')
+        self.assertEqual(len(built), 1)
+
+    def test_crpa_source_is_pinned(self):
+        import form_template_registry
+
+        with open(form_template_registry.CRPA_SOURCE_TEMPLATE_PATH, 'rb') as handle:
+            self.assertEqual(hashlib.sha256(handle.read()).hexdigest(), form_template_registry.CRPA_SOURCE_SHA256)
+
+        original = form_template_registry.CRPA_SOURCE_TEMPLATE_PATH
+        form_template_registry.CRPA_SOURCE_TEMPLATE_PATH = self.path  # some other PDF
+        try:
+            built = os.path.join(self.root, 'clean.pdf')
+            with self.assertRaises(ValueError):
+                form_template_registry._build_crpa_clean_template(built)
+            self.assertFalse(os.path.exists(built))
+        finally:
+            form_template_registry.CRPA_SOURCE_TEMPLATE_PATH = original
+
+    def test_reload_keeps_unchanged_content(self):
+        registry = TemplateRegistry()
+        registry.register('form', self.path)
+        template = registry.get('form')
+        os.utime(self.path)
+        self.assertIs(registry.reload('form'), template)
+        write_pdf(self.path, 4)
+        self.assertEqual(registry.reload('form').page_count, 4)
+
+class TestCRPARendering(unittest.TestCase):
+    """CRPACRMSystem fills an in-memory copy of the registered template"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        template_path = os.path.join(self.root, 'template.pdf')
+        write_pdf(template_path)
+        self.registry = TemplateRegistry()
+        self.registry.register('crpa_clean', template_path)
+
+        self.db_path = os.path.join(self.root, 'crm.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript('''
+            CREATE TABLE clients (id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT, home_phone TEXT, email TEXT);
+            CREATE TABLE properties (id INTEGER PRIMARY KEY, street_address TEXT, city TEXT, state TEXT, zip_code TEXT);
+            CREATE TABLE transactions (id INTEGER PRIMARY KEY, buyer_client_id INTEGER, property_id INTEGER,
+                offer_date TEXT, purchase_price REAL, closing_date TEXT, earnest_money_amount REAL);
+            INSERT INTO clients VALUES (1, 'Ada', 'Lovelace', NULL, NULL);
+            INSERT INTO properties VALUES (1, '12 Main St', 'Nevada City', 'CA', '95959');
+            INSERT INTO transactions VALUES (7, 1, 1, '2025-06-01', 650000, '2025-07-15', NULL);
+        ''')
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_render_and_create(self):
+        system = CRPACRMSystem(self.db_path, registry=self.registry)
+        pdf = system.render_crpa_form(7)
+        with fitz.open(stream=pdf, filetype='pdf') as doc:
+            text = doc[2].get_text()
+        for value in ('Ada Lovelace', '12 Main St', '$650,000.00', '2025-07-15'):
+            self.assertIn(value, text)
+        self.assertNotIn('Ada Lovelace', self.registry.open('crpa_clean')[2].get_text())
+
+        output_path = system.create_crpa_form(7, os.path.join(self.root, 'out', 'form.pdf'))
+        with open(output_path, 'rb') as handle:
+            self.assertEqual(handle.read()[:5], b'%PDF-')
+        with self.assertRaises(ValueError):
+            system.render_crpa_form(99)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+MLS to CRM Sync Tests
+Bulk property import and price/status reconciliation against temporary
+properties tables in both schemas
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from mls_feeds import NEVADA_COUNTY_FEED
+from mls_store import MLSStore
+from mls_crm_sync import import_listings, private_remarks, reconcile_listings
+import mls_integration
+
+FEED = pd.DataFrame({
+    'Listing Number': [101, 102, 103, 104],
+    'Address - Street Complete': ['607 Cold Spring Ct', '12 Main St', '9 Pine Dr', '607 Cold Spring Court'],
+    'Address - City': ['Grass Valley', 'Nevada City', 'Penn Valley', 'Grass Valley'],
+    'Address - Zip Code': [95945, 95959, 95946, 95945],
+    'List Price': [649000.0, 525000.0, 410000.0, 655000.0],
+    'Bedrooms And Possible Bedrooms': ['3', '4 (5)', '2', '3'],
+    'Full Bathrooms': [2, 2, 1, 2],
+    'Partial Bathrooms': [0, 1, 0, 0],
+    'Subdivision': ['Ridge', 'Ridge', None, 'Ridge'],
+    'DOM': [10, 45, 3, 1],
+})
+
+APP_SCHEMA = '''CREATE TABLE properties (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, mls_number TEXT UNIQUE, address_line1 TEXT NOT NULL,
+    address_line2 TEXT, city TEXT NOT NULL, state TEXT NOT NULL, zip_code TEXT NOT NULL,
+    property_type TEXT, listing_type TEXT, bedrooms REAL, bathrooms REAL, square_feet INTEGER,
+    lot_size REAL, year_built INTEGER, listing_price REAL, property_description TEXT,
+    public_remarks TEXT, private_remarks TEXT, status TEXT DEFAULT 'active'
+)'''
+
+LEGACY_SCHEMA = '''CREATE TABLE properties (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, mls_number TEXT UNIQUE, street_address TEXT NOT NULL,
+    city TEXT NOT NULL, state TEXT NOT NULL, zip_code TEXT NOT NULL, listed_price REAL,
+    bedrooms INTEGER, bathrooms REAL, lot_size_acres REAL, private_remarks TEXT
+)'''
+
+class TestImportListings(unittest.TestCase):
+    """One-transaction import with set-based duplicate resolution"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.root, 'crm.db')
+        self.store = MLSStore.from_dataframe(NEVADA_COUNTY_FEED.apply(FEED))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def connect(self, schema):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(schema)
+        return conn
+
+    def test_outcomes_per_listing(self):
+        conn = self.connect(APP_SCHEMA)
+        conn.execute("INSERT INTO properties (mls_number, address_line1, city, state, zip_code) "
+                     "VALUES ('102', '12 Main Street', 'Nevada City', 'CA', '95959')")
+        conn.commit()
+
+        result = import_listings(conn, self.store, ['101', '102', '103', '104', '999', '101'])
+        statuses = {outcome['mls_number']: outcome['status'] for outcome in result['results']}
+        self.assertEqual(statuses, {'101': 'created', '102': 'exists', '103': 'created',
+                                    '104': 'exists', '999': 'not_found'})
+        self.assertEqual((result['created'], result['existing'], result['not_found']), (2, 2, 1))
+
+        row = conn.execute("SELECT * FROM properties WHERE mls_number = '101'").fetchone()
+        names = [description[0] for description in conn.execute('SELECT * FROM properties').description]
+        row = dict(zip(names, row))
+        self.assertEqual((row['listing_price'], row['bedrooms'], row['bathrooms']), (649000.0, 3, 2.0))
+        self.assertEqual((row['state'], row['zip_code']), ('CA', '95945'))
+        self.assertIn('- Subdivision: Ridge', row['private_remarks'])
+        created_104 = [outcome for outcome in result['results'] if outcome['mls_number'] == '104'][0]
+        self.assertEqual(created_104['property_id'], row['id'])  # same address as 101 in this batch
+
+        again = import_listings(conn, self.store, ['101', '103'])
+        self.assertEqual(again['created'], 0)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM properties').fetchone()[0], 3)
+        conn.close()
+
+    def test_legacy_schema_columns(self):
+        conn = self.connect(LEGACY_SCHEMA)
+        result = import_listings(conn, self.store, ['102'])
+        self.assertEqual(result['created'], 1)
+        row = conn.execute('SELECT street_address, listed_price, bathrooms, normalized_address_key '
+                           'FROM properties').fetchone()
+        self.assertEqual(row[:3], ('12 Main St', 525000.0, 2.5))
+        self.assertTrue(row[3].startswith('12 main st|nevada city'))
+        conn.close()
+
+    def test_private_remarks_template(self):
+        remarks = private_remarks(FEED.head(1), ['101'], imported_on='2024-01-02')[0]
+        self.assertTrue(remarks.startswith('Auto-imported from Nevada County MLS #101 on 2024-01-02'))
+        self.assertIn('- DOM (Days on Market): 10', remarks)
+        self.assertIn('- Heating: N/A', remarks)
+
+class TestImportMLSProperties(unittest.TestCase):
+    """import_mls_properties over the loaded feed, by numbers or search filters"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        self.db_path = os.path.join(self.root, 'crm.db')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+        mls_integration.load_mls_data(self.csv_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(APP_SCHEMA)
+        conn.close()
+
+    def tearDown(self):
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_import_by_filters(self):
+        result = mls_integration.import_mls_properties(filters={'city': 'Grass Valley', 'limit': 1},
+                                                       db_path=self.db_path)
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual([outcome['status'] for outcome in result['results']], ['created', 'exists'])
+
+        result = mls_integration.import_mls_properties('102, 103', db_path=self.db_path)
+        self.assertEqual(result['created'], 2)
+        self.assertIn('import_mls_properties', mls_integration.MLS_FUNCTIONS)
+
+    def test_nothing_to_import(self):
+        self.assertFalse(mls_integration.import_mls_properties(db_path=self.db_path)['success'])
+        result = mls_integration.import_mls_properties(filters={'colour': 'blue'}, db_path=self.db_path)
+        self.assertIn('Unknown MLS search filter', result['message'])
+
+class TestReconcileListings(unittest.TestCase):
+    """Feed price and status changes flow into imported properties with an audit trail"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        self.db_path = os.path.join(self.root, 'crm.db')
+        self.feed = FEED.assign(Status=['Active', 'Active', 'Active', 'Active'])
+        self.feed.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(APP_SCHEMA)
+        conn.close()
+        mls_integration.load_mls_data(self.csv_path)
+        mls_integration.import_mls_properties(['101', '102', '103'], db_path=self.db_path)
+
+    def tearDown(self):
+        mls_integration.disable_mls_reconciliation()
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def query(self, sql):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def test_refresh_delta_updates_changed_listings(self):
+        self.assertEqual(mls_integration.reconcile_mls_properties(db_path=self.db_path)['updated'], 0)
+        mls_integration.enable_mls_reconciliation(self.db_path)
+
+        self.feed.assign(**{'List Price': [629000.0, 525000.0, 410000.0, 655000.0],
+                            'Status': ['Active', 'Pending', 'Active', 'Sold']}).to_csv(self.csv_path, index=False)
+        self.assertTrue(mls_integration.refresh_mls_data()['changed'])
+
+        result = mls_integration.get_mls_status()['last_reconciliation']
+        self.assertEqual(result['updated'], 2)
+        self.assertEqual(self.query('SELECT mls_number, listing_price, status FROM properties ORDER BY mls_number'),
+                         [('101', 629000.0, 'active'), ('102', 525000.0, 'pending'), ('103', 410000.0, 'active')])
+        audit = self.query('SELECT record_id, old_values, new_values, user_agent FROM audit_log ORDER BY record_id')
+        self.assertEqual([row[1:] for row in audit], [
+            ('{"listing_price": 649000.0}', '{"listing_price": 629000.0}', 'mls_reconciliation'),
+            ('{"status": "active"}', '{"status": "pending"}', 'mls_reconciliation'),
+        ])
+
+    def test_full_reconcile_counts(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE properties SET listing_price = 1, status = 'withdrawn' WHERE mls_number = '103'")
+        conn.execute("INSERT INTO properties (mls_number, address_line1, city, state, zip_code) "
+                     "VALUES ('555', '1 Gone Rd', 'Truckee', 'CA', '96161')")
+        conn.commit()
+        store = mls_integration._mls_store
+        result = reconcile_listings(conn, store)
+        self.assertEqual((result['checked'], result['updated'], result['not_in_feed']), (3, 1, 1))
+        self.assertEqual((result['price_changes'], result['status_changes']), (1, 1))
+        self.assertEqual(reconcile_listings(conn, store, ['103'])['updated'], 0)
+        conn.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+MLS Feed Registry Tests
+Column mappings, converters, merged multi-feed stores and load_mls_feeds
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from mls_store import MLSStore
+from mls_feeds import (NEVADA_COUNTY_FEED, SIMPLE_LISTING_FEED, detect_feed, get_feed, listing_properties,
+                       merge_stores)
+import mls_integration
+
+CANONICAL = pd.DataFrame({
+    'Listing Number': [101, 102, 103],
+    'Address - Street Complete': ['607 Cold Spring Ct', '12 Main St', '9 Pine Dr'],
+    'Address - City': ['Grass Valley', 'Nevada City', 'Penn Valley'],
+    'Address - Zip Code': [95945, 95959, 95946],
+    'List Price': [649000.0, 525000.0, 410000.0],
+    'Bedrooms And Possible Bedrooms': ['3', '4 (5)', '2'],
+    'Full Bathrooms': [2, 2, 1],
+    'Partial Bathrooms': [0, 1, 0],
+    'Year Built Details': ['New', '1978', '2001'],
+    'Property Type': ['Residential', 'Residential', 'Condo'],
+})
+
+SIMPLE = pd.DataFrame({
+    'Listing Number': [1, 102, 3],
+    'Property_Address': ['123 Main St', '1 Other Rd', '607 Cold Spring Court'],
+    'City': ['Sacramento', 'Davis', 'Grass Valley'],
+    'State': ['CA', 'CA', 'CA'],
+    'Zip': [95814, 95616, 95945],
+    'Price': ['$450,000', '$675,000', '$1'],
+    'Bedrooms': [3, 4, 3],
+    'Bathrooms': [2.5, 3.0, 2.0],
+    'Square_Feet': [1200, 1800, 1500],
+    'Property_Type': ['Townhouse', 'Single Family', 'Single Family'],
+    'Status': ['Active', 'Active', 'Pending'],
+})
+
+class TestFeedSpecs(unittest.TestCase):
+    """Declarative mappings onto the canonical columns"""
+
+    def test_simple_layout_is_mapped_and_converted(self):
+        mapped = SIMPLE_LISTING_FEED.apply(SIMPLE)
+        self.assertEqual(mapped['List Price'].tolist(), [450000, 675000, 1])
+        self.assertEqual(mapped['Full Bathrooms'].tolist(), [2.0, 3.0, 2.0])
+        self.assertEqual(mapped['Partial Bathrooms'].tolist(), [1.0, 0.0, 0.0])
+        self.assertEqual(mapped['Address - Street Complete'][0], '123 Main St')
+        self.assertNotIn('Property_Address', mapped.columns)
+
+    def test_canonical_layout_passes_through_in_file_order(self):
+        mapped = NEVADA_COUNTY_FEED.apply(CANONICAL.assign(**{'List Price': ['$649,000', '525000', '']}))
+        self.assertEqual(list(mapped.columns), list(CANONICAL.columns))
+        self.assertEqual(mapped['List Price'].tolist()[:2], [649000.0, 525000.0])
+        self.assertTrue(np.isnan(mapped['List Price'][2]))
+
+    def test_layout_detected_from_header(self):
+        root = tempfile.mkdtemp()
+        try:
+            for name, frame, expected in (('a.csv', CANONICAL, 'nevada_county'), ('b.csv', SIMPLE, 'simple_listing'),
+                                          ('c.csv', CANONICAL[['Listing Number']], 'nevada_county')):
+                frame.to_csv(os.path.join(root, name), index=False)
+                self.assertEqual(detect_feed(os.path.join(root, name)).name, expected)
+        finally:
+            shutil.rmtree(root)
+        with self.assertRaises(ValueError):
+            get_feed('no_such_feed')
+
+    def test_listing_properties(self):
+        fields = listing_properties(CANONICAL).to_dict('records')
+        self.assertEqual(fields[1]['listing_price'], 525000.0)
+        self.assertEqual(fields[1]['bedrooms'], 4)
+        self.assertEqual(fields[1]['bathrooms'], 2.5)
+        self.assertEqual((fields[1]['zip_code'], fields[1]['state']), ('95959', 'CA'))
+        self.assertIsNone(fields[0]['year_built'])
+        self.assertEqual([field['property_type'] for field in fields], ['single_family', 'single_family', 'condo'])
+
+class TestMergeStores(unittest.TestCase):
+    """Listing number and normalized address deduplicate across feeds"""
+
+    def test_first_feed_wins_duplicates(self):
+        canonical = MLSStore.from_dataframe(NEVADA_COUNTY_FEED.apply(CANONICAL))
+        simple = MLSStore.from_dataframe(SIMPLE_LISTING_FEED.apply(SIMPLE))
+        merged = merge_stores([canonical, simple])
+
+        # 102 repeats a listing number, 3 the address of 101
+        self.assertEqual(merged.keys(), ['101', '102', '103', '1'])
+        self.assertEqual(merged.get('102')['Address - City'], 'Nevada City')
+        self.assertEqual(merged.get('1')['State'], 'CA')
+        self.assertIsNone(merged.get('101')['State'])
+        self.assertEqual(merged.get('1')['Bedrooms And Possible Bedrooms'], '3')  # numeric joins text column
+        self.assertEqual(merged.find_by_address('123 Main Street', 'Sacramento'), '1')
+
+class TestLoadMLSFeeds(unittest.TestCase):
+    """load_mls_feeds parses feeds in parallel and refreshes the merged store"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.paths = [os.path.join(self.root, 'canonical.csv'), os.path.join(self.root, 'simple.csv')]
+        CANONICAL.to_csv(self.paths[0], index=False)
+        SIMPLE.to_csv(self.paths[1], index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+        self.events = []
+        mls_integration.subscribe_mls_changes(self.events.append)
+
+    def tearDown(self):
+        mls_integration.unsubscribe_mls_changes(self.events.append)
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_load_search_and_refresh(self):
+        result = mls_integration.load_mls_feeds(self.paths, max_workers=2)
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual((result['count'], result['duplicates']), (4, 2))
+        self.assertEqual([feed['feed'] for feed in result['feeds']], ['nevada_county', 'simple_listing'])
+        found = mls_integration.find_mls_properties(city='Sacramento', min_bathrooms=2.5)
+        self.assertEqual([listing['mls_number'] for listing in found['properties']], ['1'])
+
+        again = mls_integration.load_mls_feeds(self.paths)
+        self.assertTrue(all(feed['from_snapshot'] for feed in again['feeds']))
+        self.assertFalse(mls_integration.refresh_mls_data()['changed'])
+
+        SIMPLE.assign(Price=['$455,000', '$675,000', '$1']).to_csv(self.paths[1], index=False)
+        refreshed = mls_integration.refresh_mls_data()
+        self.assertTrue(refreshed['changed'], refreshed['message'])
+        self.assertEqual(self.events[-1]['changed'], ['1'])
+        self.assertEqual(mls_integration.find_mls_property('1')['property']['List Price'], 455000)
+
+    def test_load_mls_data_maps_detected_layout(self):
+        result = mls_integration.load_mls_data(self.paths[1])
+        self.assertEqual(result['feed'], 'simple_listing')
+        listing = mls_integration.find_mls_property('3')['property']
+        self.assertEqual(listing['Address - Street Complete'], '607 Cold Spring Court')
+        self.assertEqual(listing['List Price'], 1)
+
+if __name__ == "__main__":
+    unittest.main()
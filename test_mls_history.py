@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+MLS Listing History Tests
+Change-only appends, month partitions, price drops and DOM analytics
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from mls_feeds import NEVADA_COUNTY_FEED
+from mls_store import MLSStore
+from mls_history import ListingHistory
+import mls_integration
+
+FEED = pd.DataFrame({
+    'Listing Number': [101, 102, 103],
+    'Address - Street Complete': ['607 Cold Spring Ct', '12 Main St', '9 Pine Dr'],
+    'Address - City': ['Grass Valley', 'Nevada City', 'Penn Valley'],
+    'List Price': [649000.0, 525000.0, 410000.0],
+    'Original Price': [649000.0, 540000.0, 410000.0],
+    'Status': ['Active', 'Active', 'Active'],
+    'Pending Date': [None, None, None],
+    'DOM': [10, 45, 3],
+    'Subdivision': ['Ridge', 'Ridge', 'Lake Wildwood'],
+})
+
+def store_of(frame):
+    return MLSStore.from_dataframe(NEVADA_COUNTY_FEED.apply(frame))
+
+class TestListingHistory(unittest.TestCase):
+    """Observations are appended only when tracked values change"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_change_only_appends_across_months(self):
+        history = ListingHistory(self.root)
+        self.assertEqual(history.append(store_of(FEED), '2024-05-30')['appended'], 3)
+        unchanged = FEED.assign(DOM=[12, 47, 5])  # DOM alone is not a change
+        self.assertEqual(history.append(store_of(unchanged), '2024-06-01')['appended'], 0)
+
+        changed = FEED.assign(**{'List Price': [629000.0, 525000.0, 410000.0],
+                                 'Status': ['Active', 'Pending', 'Active'],
+                                 'Pending Date': [None, '06/03/24', None]})
+        result = ListingHistory(self.root).append(store_of(changed), '2024-06-03')
+        self.assertEqual((result['appended'], result['unchanged']), (2, 1))
+        self.assertTrue(result['partition'].startswith('2024-06/part-000001-'))
+
+        history = ListingHistory(self.root)
+        self.assertEqual(history.summary()['partitions'], ['2024-05', '2024-06'])
+        self.assertEqual(len(history.observations(since='2024-06-01')), 2)
+        records = history.listing_history('102')
+        self.assertEqual([(record['observed'], record['status']) for record in records],
+                         [('2024-05-30', 'active'), ('2024-06-03', 'pending')])
+        self.assertEqual(records[1]['pending_date'], '2024-06-03')
+
+        drops = history.price_changes(7, as_of='2024-06-05')
+        self.assertEqual(drops[['mls_number', 'previous_price', 'price']].values.tolist(),
+                         [['101', 649000.0, 629000.0]])
+        self.assertEqual(drops['change_percent'][0], -3.08)
+        self.assertTrue(history.price_changes(1, as_of='2024-06-05').empty)
+
+    def test_median_dom_advances_active_listings(self):
+        history = ListingHistory(self.root)
+        history.append(store_of(FEED.assign(Status=['Active', 'Sold', 'Active'])), '2024-06-01')
+        dom = history.median_dom('subdivision', as_of='2024-06-11')
+        self.assertEqual(dom.values.tolist(), [['Lake Wildwood', 13.0, 1], ['Ridge', 32.5, 2]])
+        sold = history.median_dom('subdivision', status='sold', as_of='2024-06-11')
+        self.assertEqual(sold.values.tolist(), [['Ridge', 45.0, 1]])
+
+def append_prices(root, start, count):
+    """Append `count` daily price cuts of listing 101 from a separate process"""
+    history = ListingHistory(root)
+    for day in range(count):
+        price = 600000.0 - 1000 * (start + day)
+        history.append(store_of(FEED.assign(**{'List Price': [price, 525000.0, 410000.0]})),
+                       f'2024-06-{start + day + 1:02d}')
+
+class TestConcurrentAppends(unittest.TestCase):
+    """Appenders sharing a root (one per gunicorn worker) never lose each other's parts"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_two_instances_interleaved(self):
+        first, second = ListingHistory(self.root), ListingHistory(self.root)
+        first.append(store_of(FEED), '2024-06-01')
+        cut = FEED.assign(**{'List Price': [629000.0, 525000.0, 410000.0]})
+        self.assertEqual(second.append(store_of(cut), '2024-06-02')['appended'], 1)  # sees first's state
+        first.append(store_of(cut.assign(Status=['Active', 'Pending', 'Active'])), '2024-06-03')
+
+        for history in (first, second, ListingHistory(self.root)):
+            summary = history.summary()
+            self.assertEqual((summary['observations'], summary['parts']), (5, 3))
+            drops = history.price_changes(7, as_of='2024-06-05')
+            self.assertEqual(drops[['mls_number', 'previous_price', 'price']].values.tolist(),
+                             [['101', 649000.0, 629000.0]])
+
+    def test_processes_appending_at_once(self):
+        import multiprocessing
+
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=append_prices, args=(self.root, start, 5)) for start in (0, 10)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+
+        history = ListingHistory(self.root)
+        self.assertEqual(history.summary()['parts'], 10)
+        self.assertEqual(len(history.listing_history('101')), 10)
+
+class TestMLSHistoryIntegration(unittest.TestCase):
+    """Loads and refresh deltas are recorded through the change listener"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+        mls_integration.enable_mls_history(os.path.join(self.root, 'history'))
+
+    def tearDown(self):
+        mls_integration.disable_mls_history()
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_refresh_records_price_drop(self):
+        mls_integration.load_mls_data(self.csv_path)
+        FEED.assign(**{'List Price': [649000.0, 499000.0, 410000.0]}).to_csv(self.csv_path, index=False)
+        self.assertTrue(mls_integration.refresh_mls_data()['changed'])
+
+        drops = mls_integration.find_mls_price_drops(days=7)
+        self.assertEqual([drop['mls_number'] for drop in drops['drops']], ['102'])
+        self.assertEqual(len(mls_integration.get_mls_listing_history('102')['history']), 2)
+        groups = mls_integration.get_mls_days_on_market()['groups']
+        self.assertEqual([group['subdivision'] for group in groups], ['Lake Wildwood', 'Ridge'])
+        self.assertFalse(mls_integration.get_mls_days_on_market(by='price')['success'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+MLS Keyword Search Tests
+Stemming, boolean and phrase queries, field scopes and incremental extension
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from mls_store import MLSStore
+from mls_search import MLSSearchIndex
+from mls_keywords import KeywordIndex, parse_query, stem
+import mls_keywords
+import mls_integration
+
+FEED = pd.DataFrame({
+    'Listing Number': [1, 2, 3, 4, 5],
+    'Address - Street Complete': ['1 Oak Ave', '2 Pine Dr', '3 Main St', '4 Ridge Rd', '5 Elm St'],
+    'Address - City': ['Grass Valley', 'Grass Valley', 'Nevada City', 'Grass Valley', 'Auburn'],
+    'List Price': [599000.0, 649000.0, 525000.0, 700000.0, 480000.0],
+    'Public Remarks': ['Single story home with owned solar and a sparkling pool.',
+                       'Two story craftsman. Solar panels are leased, not owned.',
+                       'Charming single-story cottage on a quiet street.',
+                       "Owner's pride: RV parking, shop and fenced pastures.",
+                       None],
+    'Parking Features': ['Attached,Garage Door Opener', 'Detached,RV Access', None,
+                         'RV Possible,Workshop in Garage', 'Garage Facing Side,RV Access'],
+    'Pool Features': ['Built-In,Solar Heat', None, None, None, None],
+    'Status': ['Active', 'Active', 'Active', 'Pending', 'Active'],
+})
+
+def numbers(result):
+    return sorted(listing['mls_number'] for listing in result['properties'])
+
+class TestKeywordIndex(unittest.TestCase):
+    """Queries against one store version"""
+
+    def setUp(self):
+        self.store = MLSStore.from_dataframe(FEED)
+        self.index = KeywordIndex.build(self.store)
+        self.search_index = MLSSearchIndex(self.store)
+
+    def keys(self, query):
+        return [self.store.key_at(position) for position in self.index.match(query).nonzero()[0]]
+
+    def test_stemming_and_stop_words(self):
+        self.assertEqual(stem('stories'), stem('story'))
+        self.assertEqual(stem('pools'), stem('pool'))
+        self.assertEqual(stem('fenced'), stem('fence'))
+        self.assertEqual(self.keys('pools'), ['1'])
+        self.assertEqual(self.keys('fence'), ['4'])
+        with self.assertRaises(ValueError):
+            self.index.match('the and of')
+
+    def test_boolean_and_phrase_queries(self):
+        self.assertEqual(self.keys('owned solar'), ['1', '2'])  # words anywhere
+        self.assertEqual(self.keys('"owned solar"'), ['1'])  # as a phrase
+        self.assertEqual(self.keys('"single story"'), ['1', '3'])  # hyphenated too
+        self.assertEqual(self.keys('"single story" AND pool'), ['1'])
+        self.assertEqual(self.keys('solar -leased'), ['1'])
+        self.assertEqual(self.keys('cottage OR (craftsman NOT owned)'), ['3'])
+        self.assertEqual(self.keys('"story with owned"'), [])  # stop words keep their position
+        self.assertEqual(self.keys('"story home with owned solar"'), ['1'])
+        self.assertEqual(self.keys('helipad'), [])
+
+    def test_field_scopes(self):
+        self.assertEqual(self.keys('rv'), ['2', '4', '5'])
+        self.assertEqual(self.keys('remarks:rv'), ['4'])
+        self.assertEqual(self.keys('parking:"rv access"'), ['2', '5'])
+        self.assertEqual(self.keys('parking:"side rv"'), [])  # never across feature list items
+        self.assertEqual(self.keys('pool:solar'), ['1'])
+        with self.assertRaises(ValueError):
+            self.index.match('exterior:deck')  # no such column in this feed
+        with self.assertRaises(ValueError):
+            parse_query('solar)')
+
+    def test_structured_filters(self):
+        result = self.index.search('rv', self.search_index, {'city': 'Grass Valley', 'status': 'Active'})
+        self.assertEqual(numbers(result), ['2'])
+        result = self.index.search('rv', self.search_index, {'max_price': 650000, 'sort_by': 'price_desc'})
+        self.assertEqual([listing['mls_number'] for listing in result['properties']], ['2', '5'])
+
+    def test_extend_tokenizes_only_new_text(self):
+        rows = self.store.frame(np.array([self.store.positions.get('3')]))
+        rows['Public Remarks'] = 'Single story cottage, now with owned solar!'
+        added = FEED.iloc[[0]].assign(**{'Listing Number': [6], 'Public Remarks': ['Gated RV parking.']})
+        newer = self.store.apply_delta(pd.concat([rows, added]), ['2'])
+
+        extended = self.index.extend(newer)
+        remarks = extended.fields['remarks']
+        self.assertEqual(len(remarks.segments), 2)
+        self.assertIs(remarks.segments[0], self.index.fields['remarks'].segments[0])
+        self.assertEqual(len(extended.fields['parking'].segments), 1)  # no new feature lists
+
+        rebuilt = KeywordIndex.build(newer)
+        for query in ('"owned solar"', 'rv parking', 'craftsman', 'parking:rv OR cottage'):
+            self.assertEqual(extended.match(query).tolist(), rebuilt.match(query).tolist(), query)
+        matched = extended.match('"owned solar"').nonzero()[0]
+        self.assertEqual(sorted(newer.key_at(position) for position in matched), ['1', '3'])
+
+        original = mls_keywords.MAX_SEGMENTS
+        mls_keywords.MAX_SEGMENTS = 1
+        try:
+            merged = self.index.extend(newer)
+        finally:
+            mls_keywords.MAX_SEGMENTS = original
+        self.assertEqual(len(merged.fields['remarks'].segments), 1)
+        self.assertEqual(merged.match('rv parking').tolist(), rebuilt.match('rv parking').tolist())
+
+class TestSearchMLSKeywords(unittest.TestCase):
+    """search_mls_keywords follows loads and refreshes"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+
+    def tearDown(self):
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_search_after_refresh(self):
+        mls_integration.load_mls_data(self.csv_path)
+        result = mls_integration.search_mls_keywords('"owned solar"')
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(numbers(result), ['1'])
+
+        FEED.assign(**{'Public Remarks': FEED['Public Remarks'].where(FEED['Listing Number'] != 3,
+                                                                      'Cottage with owned solar.')}
+                    ).to_csv(self.csv_path, index=False)
+        mls_integration.refresh_mls_data()
+        self.assertEqual(numbers(mls_integration.search_mls_keywords('"owned solar"')), ['1', '3'])
+        self.assertEqual(numbers(mls_integration.search_mls_keywords('rv', city='Grass Valley')), ['2', '4'])
+        self.assertFalse(mls_integration.search_mls_keywords('(')['success'])
+        self.assertIn('search_mls_keywords', mls_integration.MLS_FUNCTIONS)
+
+if __name__ == "__main__":
+    unittest.main()
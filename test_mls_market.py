@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+MLS Market Statistics Tests
+Cube cells and roll-ups, breakdowns and get_market_stats after a load
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from mls_feeds import NEVADA_COUNTY_FEED
+from mls_store import MLSStore
+from mls_market import MarketStatsCube
+import mls_integration
+
+FEED = pd.DataFrame({
+    'Listing Number': [101, 102, 103, 104, 105],
+    'Address - Street Complete': ['1 A St', '2 B St', '3 C St', '4 D St', '5 E St'],
+    'Address - City': ['Grass Valley', 'Grass Valley', 'Grass Valley', 'Nevada City', 'Nevada City'],
+    'List Price': [500000.0, 600000.0, 700000.0, 800000.0, 450000.0],
+    'Close Price': [0.0, 0.0, 690000.0, 0.0, 0.0],
+    'Square Footage': [2000, 2000, 2000, 1600, None],
+    'Bedrooms And Possible Bedrooms': ['3', '3', '4', '3', '6 (7)'],
+    'Property Type': ['Residential', 'Residential', 'Residential', 'Condominium', 'Residential'],
+    'Status': ['Active', 'Pending', 'Sold', 'Active', 'Active'],
+    'Subdivision': ['Ridge', 'Ridge', None, None, 'Lake Wildwood'],
+    'DOM': [10, 20, 30, 40, 50],
+})
+
+class TestMarketStatsCube(unittest.TestCase):
+    """Every combination of dimensions and its roll-ups"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cube = MarketStatsCube.build(MLSStore.from_dataframe(NEVADA_COUNTY_FEED.apply(FEED)))
+
+    def test_rollup_and_cells(self):
+        everything = self.cube.get()
+        self.assertEqual(everything['listings'], 5)
+        self.assertEqual(everything['status_counts'], {'active': 3, 'pending': 1, 'sold': 1})
+        self.assertEqual(everything['list_price']['median'], 600000.0)
+        self.assertEqual(everything['price_per_sqft']['count'], 4)  # 105 has no square footage
+        self.assertEqual(everything['close_price'], {'count': 1, 'p25': 690000.0, 'median': 690000.0,
+                                                     'p75': 690000.0, 'p90': 690000.0, 'mean': 690000.0})
+
+        grass_valley_3 = self.cube.get(city='GRASS VALLEY ', bedrooms=3)
+        self.assertEqual(grass_valley_3['listings'], 2)
+        self.assertEqual(grass_valley_3['price_per_sqft']['median'], 275.0)
+        self.assertEqual(grass_valley_3['dom']['median'], 15.0)
+        self.assertEqual(self.cube.get(property_type='Condo', city='Nevada City')['listings'], 1)
+        self.assertEqual(self.cube.get(bedrooms='6')['listings'], 1)  # 5+ bucket
+        self.assertEqual(self.cube.get(subdivision='ridge', property_type='single family')['listings'], 2)
+        self.assertIsNone(self.cube.get(city='Truckee'))
+
+    def test_breakdown(self):
+        rows = self.cube.breakdown('bedrooms', city='Grass Valley')
+        self.assertEqual([(row['bedrooms'], row['listings']) for row in rows], [('3', 2), ('4', 1)])
+        self.assertEqual([row['subdivision'] for row in self.cube.breakdown('subdivision')],
+                         ['lake wildwood', 'ridge'])
+        with self.assertRaises(ValueError):
+            self.cube.breakdown('zip_code')
+
+class TestGetMarketStats(unittest.TestCase):
+    """get_market_stats answers from the cube rebuilt on every load"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+
+    def tearDown(self):
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_stats_follow_refresh(self):
+        mls_integration.load_mls_data(self.csv_path)
+        result = mls_integration.get_market_stats(city='Nevada City')
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(result['stats']['list_price']['median'], 625000.0)
+
+        FEED.assign(**{'List Price': [500000.0, 600000.0, 700000.0, 900000.0, 450000.0]}).to_csv(
+            self.csv_path, index=False)
+        mls_integration.refresh_mls_data()
+        result = mls_integration.get_market_stats(city='Nevada City')
+        self.assertEqual(result['stats']['list_price']['median'], 675000.0)
+        self.assertEqual(result['version'], mls_integration.get_mls_status()['version'])
+
+        by_city = mls_integration.get_market_stats(by='city')
+        self.assertEqual([row['city'] for row in by_city['breakdown']], ['grass valley', 'nevada city'])
+        self.assertFalse(mls_integration.get_market_stats(by='zip_code')['success'])
+        self.assertFalse(mls_integration.get_market_stats(bedrooms='many')['success'])
+        self.assertFalse(mls_integration.get_market_stats(city='Truckee')['success'])
+
+if __name__ == "__main__":
+    unittest.main()
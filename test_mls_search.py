@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+MLS Search Tests
+Range and category filters, selectivity-ordered intersection and top-k sorting
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from mls_store import MLSStore
+from mls_search import MLSSearchIndex, RangeIndex
+import mls_integration
+
+FEED = pd.DataFrame({
+    'Listing Number': [1, 2, 3, 4, 5, 6],
+    'Address - Street Complete': ['1 Oak Ave', '2 Pine Dr', '3 Main St', '4 Ridge Rd', '5 Elm St', '6 Lake Dr'],
+    'Address - City': ['Grass Valley', 'grass valley', 'Nevada City', 'Grass Valley', 'Truckee', 'Grass Valley'],
+    'Address - Zip Code': [95945, 95945, 95959, 95949, 96161, 95945],
+    'List Price': [599000.0, 649000.0, 525000.0, 700000.0, None, 450000.0],
+    'Bedrooms And Possible Bedrooms': ['3', '4 (5)', '3', '3', '2', '2'],
+    'Full Bathrooms': [2, 2, 1, 3, 1, 1],
+    'Partial Bathrooms': [1, 0, 0, 0, 0, 1],
+    'Square Footage': [1800, 2200, 1500, 2600, 900, 1200],
+    'Lot Size - Acres': [0.5, 1.2, 0.2, 5.0, 0.1, 0.3],
+    'DOM': [10, 45, 3, 90, 12, 30],
+    'Year Built Details': ['1998', 'New', '1955', '2005', 'Unknown', '1978'],
+    'Pool': ['Yes', 'No', 'Yes', 'Yes', 'No', None],
+    'Pool Features': [None, None, None, None, None, 'In Ground'],
+    'Property Type': ['Residential', 'Residential', 'Residential', 'Residential', 'Condo', 'Residential'],
+    'Status': ['Active', 'Active', 'Active', 'Active', 'Active', 'Pending'],
+})
+
+def numbers(result):
+    return [listing['mls_number'] for listing in result['properties']]
+
+class TestRangeIndex(unittest.TestCase):
+    """Binary-searched bounds over sorted values"""
+
+    def test_inclusive_bounds_skip_missing(self):
+        index = RangeIndex(np.array([5.0, np.nan, 1.0, 3.0, 3.0]))
+        self.assertEqual(sorted(index.positions(3, 5).tolist()), [0, 3, 4])
+        self.assertEqual(index.count(None, 2), 1)
+        self.assertEqual(index.count(6, None), 0)
+        self.assertEqual(index.count(None, None), 4)
+
+class TestMLSSearchIndex(unittest.TestCase):
+    """Multi-criteria search over a store"""
+
+    def setUp(self):
+        self.index = MLSSearchIndex(MLSStore.from_dataframe(FEED))
+
+    def test_combined_filters(self):
+        result = self.index.search({'min_bedrooms': 3, 'max_price': '650k', 'city': 'Grass Valley', 'pool': True})
+        self.assertEqual(numbers(result), ['1'])
+        self.assertEqual(result['properties'][0]['bathrooms'], 2.5)
+
+    def test_category_values_are_case_insensitive_and_accept_lists(self):
+        result = self.index.search({'city': ['grass valley', 'Truckee']})
+        self.assertEqual(numbers(result), ['6', '1', '2', '4', '5'])  # by price, unknown price last
+
+    def test_numeric_zip_and_derived_fields(self):
+        self.assertEqual(numbers(self.index.search({'zip_code': '95945', 'min_year_built': 2000})), ['2'])
+        self.assertEqual(numbers(self.index.search({'pool': True, 'max_lot_acres': 0.4})), ['6', '3'])
+        self.assertEqual(numbers(self.index.search({'min_bathrooms': 2.5})), ['1', '4'])
+
+    def test_top_k_sorting(self):
+        result = self.index.search({'status': 'Active', 'sort_by': 'newest_listing', 'limit': 2})
+        self.assertEqual(numbers(result), ['3', '1'])
+        self.assertEqual(result['total'], 5)
+        self.assertEqual(numbers(self.index.search({'sort_by': 'price_desc', 'limit': 1})), ['4'])
+
+    def test_no_match_and_invalid_filters(self):
+        self.assertEqual(self.index.search({'city': 'Sacramento', 'max_price': 900000})['total'], 0)
+        with self.assertRaises(ValueError):
+            self.index.search({'bedroom_count': 3})
+        with self.assertRaises(ValueError):
+            self.index.search({'max_price': 'cheap'})
+
+class TestFindMLSProperties(unittest.TestCase):
+    """find_mls_properties over the loaded feed"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+        mls_integration.load_mls_data(self.csv_path)
+
+    def tearDown(self):
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_search_follows_refresh(self):
+        result = mls_integration.find_mls_properties({'city': 'Grass Valley'}, max_price=600000)
+        self.assertTrue(result['success'])
+        self.assertEqual(numbers(result), ['6', '1'])
+
+        FEED.assign(**{'List Price': 1.0}).to_csv(self.csv_path, index=False)
+        mls_integration.refresh_mls_data()
+        self.assertEqual(mls_integration.find_mls_properties(city='Grass Valley', max_price=600000)['total'], 4)
+
+    def test_registered_and_reports_bad_filters(self):
+        self.assertIn('find_mls_properties', mls_integration.MLS_FUNCTIONS)
+        result = mls_integration.find_mls_properties(colour='blue')
+        self.assertFalse(result['success'])
+        self.assertIn('Unknown MLS search filter', result['message'])
+
+if __name__ == "__main__":
+    unittest.main()
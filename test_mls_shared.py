@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Shared MLS Store Tests
+Versioned publishing, pointer checks and workers adopting each other's loads and refreshes
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from mls_store import MLSStore
+from mls_shared import SharedMLSStore
+import mls_shared
+import mls_integration
+
+FEED = pd.DataFrame({
+    'Listing Number': [1, 2, 3],
+    'Address - Street Complete': ['1 Oak Ave', '2 Pine Dr', '3 Main St'],
+    'Address - City': ['Grass Valley', 'Grass Valley', 'Nevada City'],
+    'List Price': [599000.0, 649000.0, 525000.0],
+    'Public Remarks': ['Owned solar and a pool.', 'Craftsman near downtown.', 'Cottage on a quiet street.'],
+    'Status': ['Active', 'Active', 'Pending'],
+})
+
+class TestSharedMLSStore(unittest.TestCase):
+    """Publishing and mapping versions"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_publish_and_open(self):
+        writer, reader = SharedMLSStore(self.root), SharedMLSStore(self.root)
+        self.assertIsNone(reader.pointer())
+        self.assertEqual(reader.version(), 0)
+
+        store = MLSStore.from_dataframe(FEED)
+        pointer = writer.publish(store, {'size': 1}, [('feed.csv', 'nevada_county')])
+        self.assertEqual((pointer['version'], reader.version()), (1, 1))
+        mapped = reader.open()
+        self.assertIsInstance(mapped.hashes, np.memmap)
+        self.assertEqual(mapped.get('2'), store.get('2'))
+
+        newer = store.apply_delta(FEED.iloc[[0]].assign(**{'List Price': [579000.0]}), ['3'])
+        writer.publish(newer, event={'type': 'delta', 'changed': ['1'], 'removed': ['3']})
+        self.assertEqual(reader.version(), 2)
+        self.assertEqual(reader.pointer()['event']['changed'], ['1'])
+        self.assertNotIn('3', reader.open())
+
+        for _ in range(3):
+            writer.publish(newer)
+        versions = sorted(path.name for path in reader.root.glob('v*'))
+        self.assertEqual(versions, ['v000004', 'v000005'])  # older versions removed
+        self.assertEqual(len(reader.open()), 2)
+
+class TestSharedWorkers(unittest.TestCase):
+    """mls_integration as one worker, SharedMLSStore as another process publishing"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+
+    def tearDown(self):
+        mls_integration.disable_shared_mls()
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_worker_adopts_published_versions(self):
+        result = mls_shared.build_shared_store([self.csv_path], sync_crm=False)
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(result['shared_version'], 1)
+
+        # A fresh worker maps the published store instead of loading the feed
+        mls_integration.enable_shared_mls()
+        attached = mls_integration.attach_shared_mls()
+        self.assertTrue(attached['success'], attached['message'])
+        self.assertEqual((attached['count'], attached['version']), (3, 1))
+        events = mls_integration.get_mls_changes()
+        self.assertEqual((events[-1]['type'], events[-1]['origin']), ('load', 'shared'))
+        self.assertEqual(mls_integration.search_mls_keywords('solar')['total'], 1)
+
+        # Another process refreshes: this worker picks it up as a delta on its next access
+        other = SharedMLSStore()
+        store = other.open()
+        newer = store.apply_delta(FEED.iloc[[1]].assign(**{'Public Remarks': ['Craftsman with owned solar.']}),
+                                  [], store.source)
+        other.publish(newer, other.pointer()['fingerprint'], other.pointer()['feeds'],
+                      {'type': 'delta', 'changed': ['2'], 'base': 1})
+        self.assertEqual(mls_integration.search_mls_keywords('solar')['total'], 2)
+        event = mls_integration.get_mls_changes()[-1]
+        self.assertEqual((event['type'], event['changed'], event['origin']), ('delta', ['2'], 'shared'))
+        self.assertEqual(mls_integration.get_mls_status()['shared_version'], 2)
+
+        # A refresh here is published for the others and served from the mapped copy
+        FEED.assign(**{'Status': ['Active', 'Sold', 'Pending']}).to_csv(self.csv_path, index=False)
+        refreshed = mls_integration.refresh_mls_data()
+        self.assertTrue(refreshed['changed'], refreshed['message'])
+        self.assertEqual(other.version(), 3)
+        self.assertEqual(other.open().get('2')['Status'], 'Sold')
+        self.assertEqual(mls_integration.find_mls_property('2')['property']['Status'], 'Sold')
+        self.assertEqual(mls_integration.get_mls_status()['shared_version'], 3)
+
+    def test_listener_does_not_deadlock_on_newer_version(self):
+        import threading
+
+        mls_integration.enable_shared_mls()
+        self.assertTrue(mls_integration.load_mls_data(self.csv_path)['success'])
+
+        def publish_elsewhere(event):
+            # Another worker publishes while this one is still announcing its refresh
+            if event['origin'] == 'local' and event['type'] == 'delta':
+                other = SharedMLSStore()
+                other.publish(other.open(), other.pointer()['fingerprint'], other.pointer()['feeds'])
+
+        mls_integration.subscribe_mls_changes(publish_elsewhere)
+        mls_integration.enable_mls_reconciliation(os.path.join(self.root, 'crm.db'))
+        try:
+            FEED.assign(**{'List Price': [579000.0, 649000.0, 525000.0]}).to_csv(self.csv_path, index=False)
+            refresh = threading.Thread(target=mls_integration.refresh_mls_data, daemon=True)
+            refresh.start()
+            refresh.join(30)
+            self.assertFalse(refresh.is_alive(), 'refresh deadlocked in a change listener')
+        finally:
+            mls_integration.disable_mls_reconciliation()
+            mls_integration.unsubscribe_mls_changes(publish_elsewhere)
+
+        # The newer version is adopted on the next access instead
+        self.assertEqual(mls_integration.find_mls_property('1')['property']['List Price'], 579000.0)
+        self.assertEqual(mls_integration.get_mls_status()['shared_version'], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+MLS Similar Listings Tests
+TF-IDF remarks cosine, numeric closeness, filters and refresh deltas
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from mls_store import MLSStore
+from mls_search import MLSSearchIndex
+from mls_keywords import KeywordIndex
+from mls_similarity import SimilarityIndex
+import mls_integration
+
+FEED = pd.DataFrame({
+    'Listing Number': [1, 2, 3, 4, 5, 6],
+    'Address - Street Complete': ['1 Oak Ave', '2 Pine Dr', '3 Main St', '4 Ridge Rd', '5 Elm St', '6 Lake Dr'],
+    'Address - City': ['Grass Valley', 'Grass Valley', 'Nevada City', 'Grass Valley', 'Auburn', 'Auburn'],
+    'List Price': [600000.0, 620000.0, 610000.0, 2500000.0, 300000.0, 590000.0],
+    'Square Footage': [1800, 1850, 1800, 5200, 900, 1750],
+    'Bedrooms And Possible Bedrooms': ['3', '3', '3', '6', '1', '3'],
+    'Full Bathrooms': [2, 2, 2, 5, 1, 2],
+    'Lot Size - Acres': [0.5, 0.6, 0.5, 40.0, 0.1, 0.4],
+    'Year Built Details': ['1998', '2001', '1995', '2015', '1960', '1999'],
+    'Public Remarks': ['Craftsman with owned solar, vineyard views and a wraparound porch.',
+                       'Craftsman with owned solar and a wraparound porch near downtown.',
+                       'Ranch home on a cul-de-sac with a big garage.',
+                       'Gated estate with vineyard views, pool and guest house.',
+                       'Tiny cabin in the pines, needs work.',
+                       None],
+    'Status': ['Active', 'Active', 'Active', 'Active', 'Active', 'Pending'],
+})
+
+def build(store):
+    return SimilarityIndex(store, KeywordIndex.build(store), MLSSearchIndex(store))
+
+def numbers(result):
+    return [listing['mls_number'] for listing in result['properties']]
+
+class TestSimilarityIndex(unittest.TestCase):
+    """Scores and top-k for one store version"""
+
+    def setUp(self):
+        self.store = MLSStore.from_dataframe(FEED)
+        self.index = build(self.store)
+
+    def test_text_and_numeric_scores(self):
+        text = self.index.text_scores(0)
+        self.assertAlmostEqual(float(text[0]), 1.0, places=5)  # cosine with itself
+        self.assertGreater(text[1], text[3])  # shares more distinctive words
+        self.assertEqual(text[5], 0)  # no remarks
+        numeric = self.index.numeric_scores(0)
+        self.assertAlmostEqual(float(numeric[0]), 1.0, places=5)
+        self.assertGreater(numeric[2], numeric[4])
+        self.assertLess(numeric[3], 0.2)  # an estate four times the size
+        self.assertIsNone(self.index.text_scores(5))
+
+    def test_similar_listings(self):
+        result = self.index.similar('1', limit=3)
+        self.assertEqual(numbers(result), ['2', '6', '3'])  # 3 and 6 share no remark words: closest numbers first
+        self.assertEqual(result['total'], 5)  # everything but the listing itself
+        self.assertTrue(all(a >= b for a, b in zip(result['scores'], result['scores'][1:])))
+        self.assertEqual(numbers(self.index.similar('1', filters={'city': 'Auburn'})), ['6', '5'])
+        self.assertEqual(numbers(self.index.similar('6', limit=1)), ['1'])  # numeric features only
+        with self.assertRaises(KeyError):
+            self.index.similar('999')
+
+    def test_delta_matches_rebuild(self):
+        rows = FEED[FEED['Listing Number'].isin([3])].assign(
+            **{'Public Remarks': ['Craftsman ranch with owned solar on a cul-de-sac.']})
+        added = FEED.iloc[[0]].assign(**{'Listing Number': [7], 'List Price': [605000.0]})
+        newer = self.store.apply_delta(pd.concat([rows, added]), ['5'])
+        keywords = KeywordIndex.build(self.store)
+        extended = SimilarityIndex(newer, keywords.extend(newer), MLSSearchIndex(newer))
+        self.assertEqual(len(extended.segments), 2)
+        rebuilt = build(newer)
+        for position in range(len(newer)):
+            np.testing.assert_allclose(extended.scores(position), rebuilt.scores(position), atol=1e-5)
+        self.assertEqual(numbers(extended.similar('1', limit=1)), ['7'])
+
+class TestFindSimilarListings(unittest.TestCase):
+    """find_similar_listings follows loads and refreshes"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+
+    def tearDown(self):
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_similar_after_refresh(self):
+        mls_integration.load_mls_data(self.csv_path)
+        result = mls_integration.find_similar_listings('1', limit=2, status='Active')
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(numbers(result), ['2', '3'])
+
+        FEED.assign(**{'Status': ['Active', 'Sold', 'Active', 'Active', 'Active', 'Pending']}).to_csv(
+            self.csv_path, index=False)
+        mls_integration.refresh_mls_data()
+        self.assertEqual(numbers(mls_integration.find_similar_listings('1', limit=2, status='Active')), ['3', '4'])
+        self.assertFalse(mls_integration.find_similar_listings('999')['success'])
+        self.assertIn('find_similar_listings', mls_integration.MLS_FUNCTIONS)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+MLS Listing Store Tests
+Columnar store construction, lookups and the load_mls_data integration
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+
+from mls_store import MLSStore, StringArray, SortedKeyIndex, read_feed
+from mls_snapshot import load_store_cached
+from mls_ingest import ingest_csv
+import mls_integration
+
+FEED = pd.DataFrame({
+    'Listing Number': [101, 102, None, 101],
+    'Address - Street Complete': ['607 Cold Spring Ct', '12 Main St', '1 Nowhere Rd', '607 Cold Spring Court'],
+    'Address - City': ['Grass Valley', 'Nevada City', 'Truckee', 'Grass Valley'],
+    'List Price': [649000.0, 525000.0, 1.0, 659000.0],
+    'Pool Features': ['In Ground', None, None, None],
+})
+
+class TestMLSStore(unittest.TestCase):
+    """Typed columns and on-demand listing dicts"""
+
+    def setUp(self):
+        self.store = MLSStore.from_dataframe(FEED)
+
+    def test_keys_drop_blanks_and_keep_last_duplicate(self):
+        self.assertEqual(self.store.keys(), ['102', '101'])
+        self.assertEqual(self.store.get('101')['List Price'], 659000.0)
+        self.assertNotIn('nan', self.store)
+
+    def test_listing_dict_matches_feed_columns(self):
+        listing = self.store.get('102')
+        self.assertEqual(list(listing), list(FEED.columns))
+        self.assertEqual(listing['Address - City'], 'Nevada City')
+        self.assertIsNone(listing['Pool Features'])
+        self.assertIsNone(self.store.get('999'))
+
+    def test_columns_are_typed(self):
+        self.assertEqual(self.store.columns['List Price'].values.dtype, np.float64)
+        city = self.store.columns['Address - City']
+        self.assertEqual(city.codes.dtype, np.int32)
+        self.assertEqual(len(city.categories), 2)
+
+    def test_sorted_key_index_last_row_wins(self):
+        index = SortedKeyIndex.build(['b', None, 'a', 'b'])
+        self.assertEqual((index.get('a'), index.get('b'), index.get('c')), (2, 3, None))
+        self.assertIsNone(index.get('a-much-longer-key-than-any-indexed'))
+
+    def test_string_array_round_trip(self):
+        strings = ['', 'Grass Valley', 'café ☕']
+        array = StringArray.from_strings(strings)
+        self.assertEqual(array.to_list(), strings)
+        self.assertEqual(array[2], 'café ☕')
+
+class TestMLSSnapshot(unittest.TestCase):
+    """Snapshots are reused while the CSV is unchanged and rebuilt when it changes"""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.csv_path = str(self.root / 'feed.csv')
+        FEED.to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_second_load_maps_snapshot(self):
+        first = load_store_cached(self.csv_path, root=self.root / 'cache')
+        second = load_store_cached(self.csv_path, root=self.root / 'cache')
+        self.assertFalse(first['from_snapshot'])
+        self.assertTrue(second['from_snapshot'])
+        self.assertIsInstance(second['store'].columns['List Price'].values, np.memmap)
+        self.assertEqual(second['store'].get('101'), first['store'].get('101'))
+        self.assertEqual(second['store'].find_by_address('607 Cold Spring Court', 'Grass Valley'), '101')
+
+    def test_touched_file_with_same_content_reuses_snapshot(self):
+        load_store_cached(self.csv_path, root=self.root / 'cache')
+        os.utime(self.csv_path, ns=(0, 0))
+        self.assertTrue(load_store_cached(self.csv_path, root=self.root / 'cache')['from_snapshot'])
+
+    def test_changed_file_is_reparsed(self):
+        load_store_cached(self.csv_path, root=self.root / 'cache')
+        FEED.assign(**{'List Price': 1.0}).to_csv(self.csv_path, index=False)
+        result = load_store_cached(self.csv_path, root=self.root / 'cache')
+        self.assertFalse(result['from_snapshot'])
+        self.assertEqual(result['store'].get('102')['List Price'], 1.0)
+
+MIXED_FEED = '''Listing Number,Public Remarks,Bedrooms And Possible Bedrooms,Square Footage,Pool Features
+1,"Great home",3,1500,
+2,"Cozy cabin",4,900,
+3,"Nice "AS IS" lot, needs some work on the roof, sold as is with no warranty",2,1200,
+4,"Views","4 (5)",2000,In Ground
+5,"Updated",2,,
+1,"Great home, new roof",3,1550,
+'''
+
+class TestChunkedIngest(unittest.TestCase):
+    """Streaming a feed in chunks builds the same store as a whole-file parse"""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.csv_path = str(self.root / 'feed.csv')
+        with open(self.csv_path, 'w') as handle:
+            handle.write(MIXED_FEED)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def assert_same_store(self, store, expected):
+        self.assertEqual(store.keys(), expected.keys())
+        self.assertEqual(store.kinds, expected.kinds)
+        np.testing.assert_array_equal(store.hashes, expected.hashes)
+        for key in expected.keys():
+            self.assertEqual(store.get(key), expected.get(key))
+
+    def test_chunks_match_whole_file_parse(self):
+        # Chunks of 2 rows: a column numeric in one chunk and text in the next,
+        # an all-missing chunk, a listing repeated across chunks, and an
+        # over-long line starting a chunk
+        expected = MLSStore.from_dataframe(read_feed(self.csv_path))
+        self.assertEqual(expected.keys(), ['2', '4', '5', '1'])
+        for directory in (None, self.root / 'columns'):
+            if directory:
+                directory.mkdir()
+            store = ingest_csv(self.csv_path, directory=directory, rows_per_chunk=2)
+            self.assert_same_store(store, expected)
+        self.assertIsInstance(store.columns['Square Footage'].values, np.memmap)
+
+    def test_progress_is_reported(self):
+        updates = []
+        ingest_csv(self.csv_path, rows_per_chunk=2, progress=updates.append)
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(updates[-1]['percent'], 100.0)
+
+    def test_snapshot_is_streamed_in_place(self):
+        result = load_store_cached(self.csv_path, root=self.root / 'cache')
+        self.assertIsInstance(result['store'].columns['Public Remarks'].codes, np.memmap)
+        self.assertEqual(result['store'].get('1')['Public Remarks'], 'Great home, new roof')
+        self.assertTrue(load_store_cached(self.csv_path, root=self.root / 'cache')['from_snapshot'])
+
+class TestIncrementalRefresh(unittest.TestCase):
+    """Row-hash deltas rebuild the same store a full parse would"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+        mls_integration.load_mls_data(self.csv_path)
+        self.events = []
+        mls_integration.subscribe_mls_changes(self.events.append)
+
+    def tearDown(self):
+        mls_integration.unsubscribe_mls_changes(self.events.append)
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_unchanged_feed_is_a_no_op(self):
+        result = mls_integration.refresh_mls_data()
+        self.assertFalse(result['changed'])
+        self.assertEqual(self.events, [])
+
+    def test_delta_matches_full_rebuild(self):
+        updated = pd.DataFrame({
+            'Listing Number': [101, 103],
+            'Address - Street Complete': ['607 Cold Spring Ct', '9 Pine Dr'],
+            'Address - City': ['Grass Valley', 'Penn Valley'],
+            'List Price': [639000.0, 410000.0],
+            'Pool Features': [None, 'Above Ground'],
+        })
+        updated.to_csv(self.csv_path, index=False)
+
+        before = mls_integration._mls_store
+        result = mls_integration.refresh_mls_data()
+        self.assertEqual((result['added'], result['updated'], result['removed']), (1, 1, 1))
+        self.assertEqual(before.get('102')['Address - Street Complete'], '12 Main St')
+
+        store = mls_integration._mls_store
+        full = MLSStore.from_dataframe(updated)
+        self.assertEqual(sorted(store.keys()), sorted(full.keys()))
+        for key in full.keys():
+            self.assertEqual(store.get(key), full.get(key))
+        self.assertEqual(store.find_by_address('9 Pine Drive', 'Penn Valley'), '103')
+        self.assertIsNone(store.find_by_address('12 Main St', 'Nevada City'))
+
+        event = self.events[-1]
+        self.assertEqual((event['added'], event['changed'], event['removed']), (['103'], ['101'], ['102']))
+        self.assertEqual(mls_integration.get_mls_changes(event['version'] - 1), [event])
+
+class TestLoadMLSData(unittest.TestCase):
+    """load_mls_data builds the store and address index from a CSV"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, 'feed.csv')
+        FEED.to_csv(self.csv_path, index=False)
+        os.environ['MLS_SNAPSHOT_DIR'] = os.path.join(self.root, 'cache')
+
+    def tearDown(self):
+        del os.environ['MLS_SNAPSHOT_DIR']
+        shutil.rmtree(self.root)
+
+    def test_load_and_lookup(self):
+        result = mls_integration.load_mls_data(self.csv_path)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['count'], 2)
+        self.assertEqual(mls_integration.find_mls_property('102')['property']['Address - Street Complete'],
+                         '12 Main St')
+        by_address = mls_integration.find_mls_property_by_address('607 Cold Spring Ct', 'Grass Valley')
+        self.assertEqual(by_address['mls_number'], '101')
+        self.assertTrue(mls_integration.load_mls_data(self.csv_path)['from_snapshot'])
+
+    def test_missing_key_column(self):
+        FEED.drop(columns=['Listing Number']).to_csv(self.csv_path, index=False)
+        result = mls_integration.load_mls_data(self.csv_path)
+        self.assertFalse(result['success'])
+        self.assertIn('Could not find "Listing Number" column', result['message'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+In-Memory PDF Pipeline Tests
+Overlay and merge without temporary files, page-selective stamping, optional
+persistence and streamed responses
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import fitz  # pymupdf
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from coordinate_based_form_filler import CoordinateBasedFormFiller
+from form_population_engine import FormPopulationEngine
+
+FIELDS = {'buyer_name': 'Ada Lovelace', 'purchase_price': '$650,000', 'loan_amount': '$520,000'}
+
+def write_pdf(path, pages=3):
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_text((72, 72), f'Page {number + 1}')
+    doc.save(path)
+    doc.close()
+
+class TestCoordinateFillerInMemory(unittest.TestCase):
+    """Overlay, merge and serialize in memory"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.template_path = os.path.join(self.root, 'template.pdf')
+        write_pdf(self.template_path)
+        self.filler = CoordinateBasedFormFiller()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_render_form(self):
+        with open(self.template_path, 'rb') as handle:
+            template_bytes = handle.read()
+        for template in (template_bytes, self.template_path):
+            pdf = self.filler.render_form('california_purchase_agreement', FIELDS, template)
+            with fitz.open(stream=pdf, filetype='pdf') as doc:
+                self.assertEqual(len(doc), 3)
+                self.assertIn('Page 1', doc[0].get_text())
+                self.assertIn('Ada Lovelace', doc[0].get_text())
+                self.assertIn('$520,000', doc[1].get_text())
+
+        # Without a template the overlay itself is the form
+        overlay = self.filler.render_form('California_Residential_Purchase_Agreement', FIELDS,
+                                          os.path.join(self.root, 'missing.pdf'))
+        with fitz.open(stream=overlay, filetype='pdf') as doc:
+            self.assertEqual(len(doc), 2)
+        with self.assertRaises(ValueError):
+            self.filler.render_form('unknown_form', FIELDS)
+
+    def test_fill_form_writes_only_the_result(self):
+        output_path = os.path.join(self.root, 'filled.pdf')
+        self.assertEqual(self.filler.fill_form('california_purchase_agreement', FIELDS,
+                                               self.template_path, output_path), output_path)
+        self.assertEqual(sorted(os.listdir(self.root)), ['filled.pdf', 'template.pdf'])
+        with fitz.open(output_path) as doc:
+            self.assertIn('Ada Lovelace', doc[0].get_text())
+
+class TestPageSelectiveStamping(unittest.TestCase):
+    """Only pages with fields get an overlay; the parsed template is reused"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.template_path = os.path.join(self.root, 'template.pdf')
+        write_pdf(self.template_path, 27)
+        self.filler = CoordinateBasedFormFiller()
+        self.fields = dict(FIELDS, buyer_date='March 1, 2025')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_overlay_pages(self):
+        page_numbers, overlay = self.filler.create_overlay_pages('california_purchase_agreement', self.fields)
+        self.assertEqual(page_numbers, [1, 2, 27])
+        with fitz.open(stream=overlay, filetype='pdf') as doc:
+            self.assertEqual(len(doc), 3)
+        with fitz.open(stream=self.filler.create_overlay_bytes('california_purchase_agreement', self.fields),
+                       filetype='pdf') as doc:
+            self.assertEqual(len(doc), 27)
+
+    def test_stamps_only_pages_with_fields(self):
+        pdf = self.filler.render_form('california_purchase_agreement', self.fields, self.template_path)
+        with fitz.open(stream=pdf, filetype='pdf') as doc:
+            self.assertEqual(len(doc), 27)
+            stamped = [page.number + 1 for page in doc if page.get_xobjects()]
+            self.assertEqual(stamped, [1, 2, 27])
+            self.assertEqual([doc[n].get_text().strip() for n in (4, 25)], ['Page 5', 'Page 26'])
+            self.assertIn('March 1, 2025', doc[26].get_text())
+            self.assertIn('Page 27', doc[26].get_text())
+
+        # The cached template pages are not changed by stamping
+        again = self.filler.render_form('california_purchase_agreement', {'buyer_name': 'Grace Hopper'},
+                                        self.template_path)
+        with fitz.open(stream=again, filetype='pdf') as doc:
+            self.assertIn('Grace Hopper', doc[0].get_text())
+            self.assertNotIn('Ada Lovelace', doc[0].get_text())
+            self.assertEqual(len(doc[0].get_xobjects()), 1)
+
+    def test_template_reader_cached(self):
+        reader = self.filler.template_reader(self.template_path)
+        self.assertIs(self.filler.template_reader(self.template_path), reader)
+        with open(self.template_path, 'rb') as handle:
+            data = handle.read()
+        self.assertIs(self.filler.template_reader(data), self.filler.template_reader(data))
+        write_pdf(self.template_path, 2)  # changed on disk: parsed again
+        self.assertEqual(len(self.filler.template_reader(self.template_path).pages), 2)
+
+class TestPopulateWithoutPersisting(unittest.TestCase):
+    """FormPopulationEngine and the form API return the PDF instead of a file path"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.root, 'output')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_populate_form_in_memory(self):
+        engine = FormPopulationEngine()
+        engine.db_path = os.path.join(self.root, 'missing.db')  # falls back to the mock CRM data
+        result = engine.populate_form('california_purchase_agreement', '1', '1', output_dir=self.output_dir,
+                                      persist=False, include_pdf=True)
+        self.assertFalse(os.path.exists(self.output_dir))
+        self.assertIsNone(result['output_path'])
+        self.assertEqual(result['pdf_bytes'][:5], b'%PDF-')
+        self.assertEqual(result['file_size'], len(result['pdf_bytes']))
+
+        saved = engine.populate_form('california_purchase_agreement', '1', '1', output_dir=self.output_dir)
+        self.assertNotIn('pdf_bytes', saved)
+        self.assertEqual(os.listdir(self.output_dir), [saved['output_filename']])
+
+    def test_streamed_response(self):
+        import form_api_backend
+
+        app = Flask(__name__)
+        app.register_blueprint(form_api_backend.form_api)
+        engine = form_api_backend.form_service.population_engine
+        engine.db_path = os.path.join(self.root, 'missing.db')
+        response = app.test_client().post('/api/forms/populate?delivery=stream', json={
+            'form_id': 'california_purchase_agreement', 'client_id': '1', 'property_id': '1',
+            'transaction_id': '1', 'options': {'persist': False}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        self.assertEqual(response.data[:5], b'%PDF-')
+        self.assertIn('X-Form-Valid', response.headers)
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+
+if __name__ == "__main__":
+    unittest.main()
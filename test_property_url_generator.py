@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Property URL Generator Tests
+Chunked batch updates, checkpoints and URLs written on insert
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Add core_app to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core_app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import property_url_generator
+from property_url_generator import (generate_property_urls, iter_missing_url_chunks, refresh_property_urls,
+                                    update_all_property_urls)
+from mls_feeds import NEVADA_COUNTY_FEED
+from mls_store import MLSStore
+from mls_crm_sync import import_listings
+
+SCHEMA = '''CREATE TABLE properties (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, mls_number TEXT, street_address TEXT,
+    city TEXT, state TEXT, zip_code TEXT
+)'''
+
+class TestUpdateAllPropertyUrls(unittest.TestCase):
+    """Batch job over a temporary legacy-schema properties table"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.root, 'crm.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(SCHEMA)
+        conn.executemany('INSERT INTO properties (mls_number, street_address, city, state, zip_code) '
+                         'VALUES (?, ?, ?, ?, ?)',
+                         [(str(n), f'{n} Main St.', 'Grass Valley', 'CA', '95945') for n in range(1, 24)]
+                         + [(None, None, 'Nowhere', 'CA', None)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def urls(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('SELECT id, zillow_url, realtor_url, mls_portal_url FROM properties').fetchall()
+        conn.close()
+        return {row[0]: row[1:] for row in rows}
+
+    def test_chunked_update(self):
+        reports = []
+        result = update_all_property_urls(self.db_path, chunk_rows=5, progress=reports.append)
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual((result['updated'], result['skipped'], result['chunks']), (23, 1, 5))
+        self.assertEqual([report['last_rowid'] for report in reports], [5, 10, 15, 20, 24])
+
+        urls = self.urls()
+        self.assertEqual(urls[3], (
+            'https://www.zillow.com/homes/3-main-st-grass-valley-ca-95945',
+            'https://www.realtor.com/realestateandhomes-search/grass-valley-ca-95945',
+            'https://www.mlslistings.com/property/3'))
+        self.assertEqual(urls[24], (None, None, None))  # no street address
+
+        # Nothing left to do; the finished run left no checkpoint
+        again = update_all_property_urls(self.db_path, chunk_rows=5)
+        self.assertEqual((again['updated'], again['resumed_from']), (0, 0))
+
+    def test_resume_from_checkpoint(self):
+        original = property_url_generator.url_updates
+        calls = []
+
+        def failing(rows):
+            calls.append(len(rows))
+            if len(calls) == 3:
+                raise sqlite3.OperationalError('database is locked')
+            return original(rows)
+
+        property_url_generator.url_updates = failing
+        try:
+            interrupted = update_all_property_urls(self.db_path, chunk_rows=5)
+        finally:
+            property_url_generator.url_updates = original
+        self.assertFalse(interrupted['success'])
+        self.assertEqual(interrupted['updated'], 10)  # the first two chunks were committed
+        self.assertEqual(sum(1 for urls in self.urls().values() if urls[0]), 10)
+
+        resumed = update_all_property_urls(self.db_path, chunk_rows=5)
+        self.assertEqual((resumed['resumed_from'], resumed['updated'], resumed['chunks']), (10, 13, 3))
+        self.assertEqual(sum(1 for urls in self.urls().values() if urls[0]), 23)
+
+    def test_chunks_are_rowid_ranges(self):
+        conn = sqlite3.connect(self.db_path)
+        property_url_generator.ensure_url_columns(conn)
+        chunks = list(iter_missing_url_chunks(conn, chunk_rows=10, after_rowid=10))
+        conn.close()
+        self.assertEqual([(stop, [row[0] for row in rows]) for stop, rows in chunks],
+                         [(20, list(range(11, 21))), (24, [21, 22, 23, 24])])
+
+class TestUrlsOnInsert(unittest.TestCase):
+    """New properties get their URLs when they are written"""
+
+    def test_refresh_property_urls(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute(SCHEMA)
+        cursor = conn.execute("INSERT INTO properties (mls_number, street_address, city, state, zip_code) "
+                              "VALUES ('42', '1 Oak Ave', 'Nevada City', 'CA', '95959')")
+        refresh_property_urls(conn, cursor.lastrowid)
+        row = conn.execute('SELECT zillow_url, realtor_url, mls_portal_url FROM properties').fetchone()
+        expected = generate_property_urls('1 Oak Ave', 'Nevada City', 'CA', '95959', '42')
+        self.assertEqual(row, (expected['zillow_url'], expected['realtor_url'], expected['mls_portal_url']))
+
+    def test_zipform_create_writes_urls(self):
+        from init_database import SQLITE_SCHEMA
+        import zipform_ai_functions
+
+        root = tempfile.mkdtemp()
+        db_path = os.path.join(root, 'crm.db')
+        conn = sqlite3.connect(db_path)
+        conn.executescript(SQLITE_SCHEMA)
+        conn.close()
+        original = zipform_ai_functions.DATABASE_PATH
+        zipform_ai_functions.DATABASE_PATH = db_path
+        try:
+            result = zipform_ai_functions.create_property_zipform('1 Oak Ave', 'Nevada City', 'CA', '95959',
+                                                                  mls_number='42')
+            self.assertTrue(result['success'], result['message'])
+            conn = sqlite3.connect(db_path)
+            row = conn.execute('SELECT zillow_url, realtor_url, mls_portal_url FROM properties WHERE id = ?',
+                               (result['property_id'],)).fetchone()
+            conn.close()
+        finally:
+            zipform_ai_functions.DATABASE_PATH = original
+            shutil.rmtree(root)
+        expected = generate_property_urls('1 Oak Ave', 'Nevada City', 'CA', '95959', '42')
+        self.assertEqual(row, (expected['zillow_url'], expected['realtor_url'], expected['mls_portal_url']))
+
+    def test_mls_import_writes_urls(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute(SCHEMA)
+        property_url_generator.ensure_url_columns(conn)
+        store = MLSStore.from_dataframe(NEVADA_COUNTY_FEED.apply(pd.DataFrame({
+            'Listing Number': [101], 'Address - Street Complete': ['607 Cold Spring Ct'],
+            'Address - City': ['Grass Valley'], 'Address - Zip Code': [95945]})))
+        self.assertEqual(import_listings(conn, store, ['101'])['created'], 1)
+        row = conn.execute('SELECT zillow_url, mls_portal_url FROM properties').fetchone()
+        self.assertEqual(row, ('https://www.zillow.com/homes/607-cold-spring-ct-grass-valley-ca-95945',
+                               'https://www.mlslistings.com/property/101'))
+
+if __name__ == "__main__":
+    unittest.main()